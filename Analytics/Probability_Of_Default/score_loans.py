@@ -0,0 +1,41 @@
+import sys
+import argparse
+from pathlib import Path
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from finpipe.credit import PDModel, score_file, default_model_path
+
+# === USAGE ===
+# Fit once (writes ~/.finpipe/models/pd_model.joblib + .json manifest):
+#     python score_loans.py fit
+# Score any LoanDataRiskAnalysis.csv-shaped file, CSV or Parquet in and out, streamed in chunks:
+#     python score_loans.py score LoanDataRiskAnalysis.csv scores.parquet --keep ApplicationDate
+
+# Importing this file runs nothing.
+def main(argv=None):
+    here = Path(__file__).resolve().parent
+
+    parser = argparse.ArgumentParser(description="Probability-of-Default model: fit once, then score loan files")
+    parser.add_argument('--model', default=str(default_model_path()), help="fitted model path")
+    commands = parser.add_subparsers(dest='command', required=True)
+    fit = commands.add_parser('fit', help="fit the PD and risk-score models and save them")
+    fit.add_argument('data', nargs='?', default=str(here / 'model_data.csv'))
+    fit.add_argument('--threshold', type=float, default=50, help="RiskScore above which a loan counts as a default")
+    score = commands.add_parser('score', help="score a CSV / Parquet file of loans")
+    score.add_argument('src')
+    score.add_argument('dst')
+    score.add_argument('--chunksize', type=int, default=200_000)
+    score.add_argument('--keep', nargs='*', default=[], help="input columns copied next to the scores")
+    args = parser.parse_args(argv)
+
+    if args.command == 'fit':
+        model = PDModel.fit(pd.read_csv(args.data), threshold=args.threshold)
+        print(f"✅ Model saved to {model.save(args.model)} ({model.info['rows']} rows, "
+              f"default rate {model.info['default_rate']:.1%})")
+    else:
+        score_file(PDModel.load(args.model), args.src, args.dst, chunksize=args.chunksize, keep=args.keep)
+
+
+if __name__ == '__main__':
+    main()
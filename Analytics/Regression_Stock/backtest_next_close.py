@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# === CONFIGURATION ===
+db_user = '----'
+db_pass = '---'
+db_host = '---'
+db_port = '---'
+db_name = '---'
+table_name = 'sp500_ohlcv'
+min_train_days = 504        # two years of bars before the first prediction
+refit_every_days = 21       # retrain monthly
+rolling_window = None       # None = expanding window; an int keeps only the last N bars per refit
+n_jobs = None               # worker processes (default: all cores)
+metrics_path = 'backtest_metrics.csv'
+
+
+# Importing this file runs nothing: the backtest's worker processes import it again on platforms that spawn them.
+def main():
+    from sqlalchemy import create_engine
+    from finpipe.storage import ParquetCache
+    from finpipe.features import compute_features
+    from finpipe.modeling import WalkForwardBacktest
+
+    # === Load Prices (local Parquet cache, refreshed from the database; split- and dividend-adjusted) ===
+    engine = create_engine(f'postgresql://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}')
+    prices = ParquetCache(engine).load(table_name, adjusted=True)  # the table itself holds traded prices
+
+    # === Features, computed once for the whole panel ===
+    features = compute_features(prices)
+
+    # === Walk-Forward Backtest ===
+    # Every ticker is replayed in date order: the model only ever sees bars before the month it predicts.
+    # Finished tickers are checkpointed under ~/.finpipe/backtests/, so rerunning after a crash resumes.
+    backtest = WalkForwardBacktest(min_train=min_train_days, step=refit_every_days, window=rolling_window,
+                                   n_jobs=n_jobs)
+    result = backtest.run(features)
+
+    result.metrics.to_csv(metrics_path)
+    print(f"✅ Per-ticker metrics written to '{metrics_path}'")
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,8 @@
-import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta
-from sqlalchemy import create_engine, text
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from finpipe.jobs import JobContext, get_job
 
 # === CONFIGURATION ===
 db_user = '--'
@@ -10,85 +11,19 @@ db_host = '--'
 db_port = '--'
 db_name = '--'
 table_name = '--'
-
-# === TICKERS ===
-tickers = [
-    'AAPL', 'MSFT', 'NVDA', 'AMD', 'TSLA', 'META', 'AMZN', 'GOOG', 'AVGO', 'CRM',
-    'JPM', 'BAC', 'GS', 'MS', 'V', 'MA', 'PYPL', 'SQ', 'COIN', 'SCHW',
-    'XOM', 'CVX', 'SLB', 'HAL', 'BA', 'GE', 'NOC', 'LMT', 'CAT', 'DE',
-    'UNH', 'JNJ', 'LLY', 'PFE', 'MRK', 'AMGN', 'REGN', 'BMY', 'CVS', 'ABBV',
-    'WMT', 'COST', 'TGT', 'MCD', 'HD', 'DIS', 'SBUX', 'NKE', 'BKNG', 'ROKU'
-]
-
-# === DATE RANGE ===
-today = datetime.today().date()
-future = today + timedelta(days=30)
-
-# === Connect to PostgreSQL ===
-engine = create_engine(f'postgresql://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}')
-
-# === Ensure Table Exists ===
-with engine.connect() as conn:
-    conn.execute(text(f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            underlying TEXT,
-            expiration DATE,
-            contractSymbol TEXT,
-            strike DOUBLE PRECISION,
-            lastPrice DOUBLE PRECISION,
-            bid DOUBLE PRECISION,
-            ask DOUBLE PRECISION,
-            change DOUBLE PRECISION,
-            percentChange DOUBLE PRECISION,
-            volume BIGINT,
-            openInterest BIGINT,
-            impliedVolatility DOUBLE PRECISION,
-            inTheMoney BOOLEAN,
-            type TEXT
-        );
-    """))
-
-# === Download Options Data ===
-all_data = []
-failed = []
-
-for ticker in tickers:
-    try:
-        print(f"📥 Fetching options for {ticker}")
-        tk = yf.Ticker(ticker)
-        for exp in tk.options:
-            exp_date = datetime.strptime(exp, "%Y-%m-%d").date()
-            if today < exp_date <= future:
-                calls = tk.option_chain(exp).calls
-                puts = tk.option_chain(exp).puts
-
-                calls["type"] = "call"
-                puts["type"] = "put"
-
-                options_df = pd.concat([calls, puts], ignore_index=True)
-                options_df["underlying"] = ticker
-                options_df["expiration"] = exp_date
-                all_data.append(options_df)
-    except Exception as e:
-        print(f"❌ Failed for {ticker}: {e}")
-        failed.append(ticker)
-
-# === Save to Database ===
-if all_data:
-    df = pd.concat(all_data, ignore_index=True)
-    df = df[['underlying', 'expiration', 'contractSymbol', 'strike', 'lastPrice', 'bid',
-             'ask', 'change', 'percentChange', 'volume', 'openInterest', 'impliedVolatility',
-             'inTheMoney', 'type']]
-    
-    print(f"📤 Inserting {len(df)} options records...")
-    df.to_sql(table_name, engine, if_exists='append', index=False)
-    print("✅ Insert complete.")
-else:
-    print("⚠️ No options data collected.")
-
-# === Log Failures ===
-if failed:
-    with open("failed_options.log", "w") as f:
-        for item in failed:
-            f.write(item + "\n")
-    print("⚠️ Failed tickers logged.")
+snapshot_freq = '15min'  # runs inside the same bucket share one snapshot_ts, so reruns add nothing
+horizon_days = 30        # expiries up to this many days ahead
+
+# === RUN ===
+# Underlyings (finpipe.jobs.OPTION_UNDERLYINGS), the table DDL, the chain fan-out over underlyings and
+# expiries and the snapshot insert live in finpipe.jobs. Underlyings are inserted ten at a time and
+# checkpointed in the task queue (`python -m finpipe queue options --show`).
+# Importing this file runs nothing; `python -m finpipe run options` runs the same job.
+def main():
+    job = get_job('options').with_options(table=table_name, snapshot_freq=snapshot_freq, horizon_days=horizon_days)
+    with JobContext(dsn=f'postgresql://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}') as ctx:
+        return job.run(ctx)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Nightly feature refresh: one new bar per ticker appended vs a full recompute.
+
+    python benchmarks/bench_feature_store.py
+    python benchmarks/bench_feature_store.py --tickers 100 --days 500
+
+The store is built on all but the last day of the synthetic panel, then the last
+day is appended; the appended rows are compared bit for bit with a full recompute.
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from finpipe.features import FeatureSpec, FeatureStore, compute_features
+from finpipe.synthetic import synthetic_ohlcv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--days', type=int, default=2000)
+    parser.add_argument('--windows', type=int, nargs='+', default=[5, 20])
+    args = parser.parse_args()
+
+    spec = FeatureSpec(windows=tuple(args.windows))
+    df = synthetic_ohlcv(args.tickers, args.days)
+    last_day = df['date'].max()
+
+    started = time.perf_counter()
+    full = compute_features(df, spec)
+    full_s = time.perf_counter() - started
+    print(f"full recompute : {len(df):,} rows in {full_s:.2f}s")
+
+    with tempfile.TemporaryDirectory() as path:
+        store = FeatureStore(path, spec)
+        store.build(df[df['date'] < last_day])
+        started = time.perf_counter()
+        appended = FeatureStore(path).append(df[df['date'] == last_day])
+        append_s = time.perf_counter() - started
+        print(f"daily append   : {len(appended):,} rows in {append_s:.3f}s  -> {full_s / append_s:.0f}x faster")
+
+    expected = full[full['date'] == last_day].reset_index(drop=True)
+    a = appended[spec.columns()].to_numpy(dtype=float)
+    b = expected[spec.columns()].to_numpy(dtype=float)
+    print(f"bit-identical to full recompute: {bool(((a == b) | (np.isnan(a) & np.isnan(b))).all())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Funding-risk cubes and statistics wall time: notebook-style in-memory code vs one streamed scan.
+
+    python benchmarks/bench_funding.py
+    python benchmarks/bench_funding.py --deals 10000000 --chunksize 1000000
+
+Data: ``synthetic_funding`` - deals with the columns of
+``Analytics/Funds_Analysis`` ``Feature_Engineered_Funding_Data.csv``, written to a
+temporary CSV. The notebook cubes are timed on ``--loop`` deals and extrapolated;
+the notebook statistics (IQR, z-scores, chi-squared) run on the whole frame.
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from finpipe.funding import funding_cubes, aggregate_frames, stream_stats
+from finpipe.synthetic import synthetic_funding
+
+
+def notebook_cubes(df):
+    """The notebooks' row-wise classes and separate groupbys (a representative subset)."""
+    df = df.copy()
+    df['refinancing_needed'] = df['refinancing_needed'].astype(int)
+    df['funding_size_class'] = df['funding_amount'].apply(
+        lambda x: 'small' if x < 250_000_000 else 'medium' if x < 750_000_000 else 'large')
+    df['maturity_bucket'] = df['days_to_maturity'].apply(
+        lambda x: 'short_term' if x <= 180 else 'medium_term' if x <= 365 else 'long_term')
+    df['spread_level'] = df['interest_spread'].apply(lambda x: 'low' if x < 40 else 'medium' if x < 70 else 'high')
+    df['rating_score'] = df['credit_rating'].map({'AAA': 1, 'AA': 2, 'A': 3, 'BBB': 4, 'BB': 5, 'B': 6, 'CCC': 7,
+                                                  'D': 8})
+    df['risk_bucket'] = df.apply(
+        lambda row: 'very_high_risk' if row['spread_level'] == 'high' and row['rating_score'] >= 6
+        else 'moderate_risk' if row['spread_level'] == 'medium' and row['rating_score'] >= 4
+        else 'low_risk', axis=1)
+    df['maturity_date'] = df['maturity_date'].astype('datetime64[ns]')
+    for keys in ('funding_source', 'institution_id', 'funding_currency', 'maturity_date',
+                 ['risk_bucket', 'credit_rating', 'rating_score']):
+        df.groupby(keys)[['funding_amount', 'interest_spread', 'refinancing_needed']].agg(['count', 'sum', 'mean'])
+    df.groupby('risk_bucket')['interest_spread'].agg(['mean', 'median', 'std', 'min', 'max'])
+
+
+def notebook_stats(df):
+    """IQR bounds, z-scores and chi-squared tests as ``EDA_Funding_Risks.ipynb`` computes them."""
+    from scipy.stats import chi2_contingency, zscore
+    out = {}
+    for column in ('interest_spread', 'funding_amount'):
+        q1, q3 = df[column].quantile(0.25), df[column].quantile(0.75)
+        iqr = q3 - q1
+        out[column] = {'q1': q1, 'q3': q3,
+                       'iqr_outliers': ((df[column] < q1 - 1.5 * iqr) | (df[column] > q3 + 1.5 * iqr)).sum(),
+                       'z_outliers': (abs(zscore(df[column])) > 3).sum()}
+    for column in ('funding_source', 'funding_currency', 'credit_rating'):
+        chi2_contingency(pd.crosstab(df[column], df['refinancing_needed']))
+    return out
+
+
+def same(a, b):
+    try:
+        (pd.testing.assert_series_equal if isinstance(a, pd.Series) else pd.testing.assert_frame_equal)(
+            a, b, check_dtype=False, rtol=1e-9)
+    except AssertionError:
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deals', type=int, default=2_000_000)
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--loop', type=int, default=100_000, help="deals timed with the notebook-style path")
+    args = parser.parse_args()
+
+    deals = synthetic_funding(args.deals)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'Feature_Engineered_Funding_Data.csv'
+        deals.to_csv(path, index=False)
+        print(f"{len(deals):,} deals, {path.stat().st_size / 1e6:,.0f} MB of CSV")
+
+        started = time.perf_counter()
+        notebook_cubes(deals.head(args.loop))
+        per_deal = (time.perf_counter() - started) / args.loop
+        print(f"notebook apply + groupbys : {per_deal * 1e6:.1f} us/deal -> ~{per_deal * len(deals):.1f}s in memory")
+
+        started = time.perf_counter()
+        cubes = funding_cubes(path, chunksize=args.chunksize, root=tmp, log=None)
+        seconds = time.perf_counter() - started
+        print(f"funding_cubes, cold       : {seconds:.2f}s including the CSV read "
+              f"({len(deals) / seconds:,.0f} deals/sec, {per_deal * len(deals) / seconds:.1f}x)")
+
+        started = time.perf_counter()
+        funding_cubes(path, chunksize=args.chunksize, root=tmp, log=None)
+        print(f"funding_cubes, cached     : {time.perf_counter() - started:.3f}s")
+
+        sample = deals.head(args.loop)
+        whole, chunked = aggregate_frames(sample), aggregate_frames(sample.iloc[i:i + 7_919]
+                                                                    for i in range(0, len(sample), 7_919))
+        print(f"chunked == one frame      : {all(same(whole[name], chunked[name]) for name in whole)}")
+        print(f"{len(cubes)} cubes: {', '.join(cubes)}")
+
+        started = time.perf_counter()
+        exact = notebook_stats(pd.read_csv(path))
+        print(f"notebook statistics       : {time.perf_counter() - started:.2f}s including pd.read_csv")
+        started = time.perf_counter()
+        stats = stream_stats(path, chunksize=args.chunksize, log=None)
+        print(f"stream_stats              : {time.perf_counter() - started:.2f}s, "
+              f"{sum(len(v) for v in stats.sketches['interest_spread'].levels)} values kept per sketch")
+        iqr = stats.iqr_bounds()
+        for column, row in exact.items():
+            error = max(abs((deals[column] <= iqr.at[column, q]).mean() - p) for q, p in (('q1', 0.25), ('q3', 0.75)))
+            print(f"  {column:<16}: quartile rank error {error:.3%}, IQR outliers {row['iqr_outliers']:,} exact / "
+                  f"{iqr.at[column, 'outliers']:,.0f} sketch")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Peak RSS of the 500-ticker OHLCV load: concatenated float64 frame vs compact streamed frames.
+
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --tickers 100 --days 500
+
+Each mode runs in a fresh subprocess (peak RSS only ever grows) against
+``finpipe.synthetic.SyntheticProvider``, which generates ``yf.Ticker.history``-shaped
+frames (tz-aware index, float64 prices, Dividends / Stock Splits columns). The rows are encoded for COPY into a
+``NullSink``, so the figures are the client-side cost of the load only.
+
+* ``concat``: the original shape - object tickers, float64, tz-aware dates, one ``final_df``
+* ``stream``: ``stream_history`` - compact per-ticker frames handed straight to the sink
+* ``wide``: the original S&P 500 loader - one ``yf.download`` of every ticker, then ``stack``
+* ``batched``: ``download_batches`` - ``--batch-size`` tickers per download, written batch by batch
+"""
+import sys
+import time
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from finpipe.ingestion import (OHLCV_COLUMNS, DownloadScheduler, fetch_history, stream_history,
+                               download_batches, wide_to_long)
+from finpipe.storage import NullSink, stream_copy
+from finpipe.synthetic import SyntheticProvider
+
+TYPES = {'date': 'date', 'volume': 'bigint'}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3  # bytes on macOS, KiB on Linux
+
+
+def run(mode, tickers, days, batch_size):
+    names = [f'T{i:03d}' for i in range(tickers)]
+    scheduler = DownloadScheduler(SyntheticProvider(days=days), max_workers=8, rate_per_host=None, log=lambda m: None)
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == 'concat':
+        final_df, _ = fetch_history(names, '2017-01-01', '2030-01-01', scheduler=scheduler, compact=False)
+        frame_mb = final_df.memory_usage(deep=True).sum() / 1e6
+        stats = stream_copy(NullSink(), final_df, OHLCV_COLUMNS, TYPES, log=None)
+    elif mode == 'stream':
+        stream = stream_history(names, '2017-01-01', '2030-01-01', scheduler=scheduler)
+        stats = stream_copy(NullSink(), stream, OHLCV_COLUMNS, TYPES, log=None)
+        frame_mb = float('nan')
+    elif mode == 'wide':
+        raw = scheduler.provider.download(names, '2017-01-01', '2030-01-01')
+        final_df = wide_to_long(raw)
+        frame_mb = final_df.memory_usage(deep=True).sum() / 1e6
+        stats = stream_copy(NullSink(), final_df, OHLCV_COLUMNS, TYPES, log=None)
+    else:
+        batches = download_batches(names, '2017-01-01', '2030-01-01', batch_size=batch_size, scheduler=scheduler)
+        stats = stream_copy(NullSink(), batches, OHLCV_COLUMNS, TYPES, log=None)
+        frame_mb = float('nan')
+    seconds = time.perf_counter() - started
+    print(f"RESULT {mode} rows={stats.rows} peak={peak_rss_mb():.1f} baseline={baseline:.1f} "
+          f"frame={frame_mb:.1f} seconds={seconds:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--days', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--mode', choices=['concat', 'stream', 'wide', 'batched'])
+    args = parser.parse_args()
+    if args.mode:
+        return run(args.mode, args.tickers, args.days, args.batch_size)
+
+    results = {}
+    for mode in ('concat', 'stream', 'wide', 'batched'):
+        out = subprocess.run([sys.executable, __file__, '--mode', mode, '--tickers', str(args.tickers),
+                              '--days', str(args.days), '--batch-size', str(args.batch_size)],
+                             capture_output=True, text=True, check=True).stdout
+        line = next(l for l in out.splitlines() if l.startswith('RESULT'))
+        results[mode] = dict(kv.split('=') for kv in line.split()[2:])
+    for mode, r in results.items():
+        extra = float(r['peak']) - float(r['baseline'])
+        frame = f", final_df {float(r['frame']):.0f} MB" if r['frame'] != 'nan' else ''
+        print(f"{mode:<7}: {int(r['rows']):,} rows, peak RSS {float(r['peak']):.0f} MB "
+              f"(+{extra:.0f} MB over imports{frame}) in {float(r['seconds']):.1f}s")
+    for before, after in (('concat', 'stream'), ('wide', 'batched')):
+        old = float(results[before]['peak']) - float(results[before]['baseline'])
+        new = float(results[after]['peak']) - float(results[after]['baseline'])
+        print(f"{before} -> {after}: {old:.0f} MB -> {new:.0f} MB ({old / max(new, 1):.1f}x less)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Model-selection wall time: per-model ``GridSearchCV`` vs ``ModelSearch`` (cached folds, pool, halving).
+
+    python benchmarks/bench_model_search.py
+    python benchmarks/bench_model_search.py --rows 50000 --jobs 1 2 4 8
+
+Data: synthetic loan applications with a RiskScore that is linear in the features
+plus noise; candidates are the PD notebook's linear / Ridge / Lasso grids with
+10-fold CV. ``--jobs`` lists the pool sizes to time (scaling with cores).
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from finpipe.credit import RISK_FEATURES
+from finpipe.modeling import ModelSearch, risk_candidates, risk_preprocess
+from finpipe.synthetic import synthetic_loans
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    out = fn()
+    seconds = time.perf_counter() - started
+    print(f"{label:<38}: {seconds:7.2f}s")
+    return out, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--cv', type=int, default=10)
+    parser.add_argument('--jobs', type=int, nargs='+', default=sorted({1, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    loans = synthetic_loans(args.rows)
+    rng = np.random.default_rng(1)
+    X = loans[RISK_FEATURES]
+    y = (60 - 0.05 * (loans['CreditScore'] - 570) + 40 * loans['DebtToIncomeRatio']
+         + 5 * (loans['EmploymentStatus'] == 'Unemployed') + rng.normal(0, 5, len(loans))).to_numpy()
+
+    from sklearn.pipeline import Pipeline
+    from sklearn.model_selection import GridSearchCV, KFold
+    folds = KFold(args.cv, shuffle=True, random_state=0)
+
+    def grid_search_cv():
+        for candidate in risk_candidates():
+            pipeline = Pipeline([('preprocess', risk_preprocess()), ('model', candidate.estimator)])
+            grid = {f'model__{k}': v for k, v in candidate.grid.items()}
+            GridSearchCV(pipeline, grid, cv=folds, scoring='neg_mean_squared_error').fit(X, y)
+
+    _, baseline = timed(f"GridSearchCV per model, cv={args.cv}", grid_search_cv)
+    with tempfile.TemporaryDirectory() as cache:
+        def search(n_jobs, halving=False):
+            return ModelSearch(risk_candidates(), risk_preprocess(), cv=args.cv, n_jobs=n_jobs, halving=halving,
+                               cache_dir=cache, refit=False, log=None).fit(X, y)
+
+        timed("ModelSearch, 1 worker, cold cache", lambda: search(1))
+        single = None
+        for n_jobs in args.jobs:
+            _, seconds = timed(f"ModelSearch, {n_jobs} worker(s), warm cache", lambda: search(n_jobs))
+            single = single or seconds
+            print(f"{'':<38}  speed-up vs 1 worker {single / seconds:.1f}x, vs GridSearchCV {baseline / seconds:.1f}x")
+        result, _ = timed(f"+ successive halving, {args.jobs[-1]} worker(s)", lambda: search(args.jobs[-1], True))
+        print(f"{'':<38}  best {result.best_['name']} {result.best_['params']}")
+
+
+if __name__ == '__main__':
+    main()
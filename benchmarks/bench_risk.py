@@ -0,0 +1,80 @@
+"""Portfolio risk wall time: per-portfolio pandas loop vs ``portfolio_risk`` (matrix form, chunked).
+
+    python benchmarks/bench_risk.py
+    python benchmarks/bench_risk.py --portfolios 10000 --instruments 100 --years 8
+
+Data: synthetic closes for ``--instruments`` instruments split over a USD table, a
+EUR (``.DE``) table and a GBP (``.L``) table with its own holidays, converted to USD
+with synthetic ``EURUSD=X`` / ``GBPUSD=X`` rates; random long-only weights.
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from finpipe.risk import price_matrix, simple_returns, portfolio_risk, correlation_matrix
+from finpipe.synthetic import synthetic_ohlcv
+
+
+def loop_risk(returns, weights, level=0.99, window=21):
+    """What a notebook would do: one pandas Series per portfolio."""
+    rows = []
+    for _, w in weights.iterrows():
+        p = (returns * w).sum(axis=1)
+        var = -p.quantile(1 - level)
+        wealth = (1 + p).cumprod()
+        rows.append({'volatility': p.std() * np.sqrt(252), 'hist_var': var, 'hist_cvar': -p[p <= -var].mean(),
+                     'rolling_vol': p.rolling(window).std().iloc[-1] * np.sqrt(252),
+                     'max_drawdown': -(wealth / wealth.cummax() - 1).min()})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--portfolios', type=int, default=10_000)
+    parser.add_argument('--instruments', type=int, default=100)
+    parser.add_argument('--years', type=int, default=8)
+    parser.add_argument('--loop', type=int, default=200, help="portfolios timed with the pandas loop")
+    args = parser.parse_args()
+
+    days, third = 252 * args.years, args.instruments // 3
+    names = ([f'US{i:03d}' for i in range(args.instruments - 2 * third)] + [f'EU{i:03d}.DE' for i in range(third)]
+             + [f'UK{i:03d}.L' for i in range(third)])
+    tables = {'usd': synthetic_ohlcv(names[:-2 * third], days, seed=1),
+              'eur': synthetic_ohlcv(names[-2 * third:-third], days, seed=2),
+              'gbp': synthetic_ohlcv(names[-third:], days, seed=3)}
+    tables['gbp'] = tables['gbp'][pd.to_datetime(tables['gbp']['date']).dt.dayofyear % 50 != 0]  # UK holidays
+    fx = synthetic_ohlcv(['EURUSD=X', 'GBPUSD=X'], days, seed=4)
+    fx['close'] = (np.where(fx['ticker'] == 'EURUSD=X', 1.1, 1.3) * fx['close']
+                   / fx.groupby('ticker')['close'].transform('first'))
+
+    started = time.perf_counter()
+    returns = simple_returns(price_matrix(tables, fx=fx))
+    print(f"aligned + FX-converted returns {returns.shape[0]:,} days x {returns.shape[1]} instruments "
+          f"in {time.perf_counter() - started:.2f}s")
+    weights = pd.DataFrame(np.random.default_rng(0).dirichlet(np.ones(returns.shape[1]), args.portfolios),
+                           columns=returns.columns)
+
+    started = time.perf_counter()
+    loop_risk(returns, weights.iloc[:args.loop])
+    per_portfolio = (time.perf_counter() - started) / args.loop
+    print(f"pandas loop            : {per_portfolio * 1000:.1f} ms/portfolio -> "
+          f"~{per_portfolio * args.portfolios:.0f}s for {args.portfolios:,}")
+
+    started = time.perf_counter()
+    risk = portfolio_risk(returns, weights, log=None)
+    seconds = time.perf_counter() - started
+    print(f"portfolio_risk         : {seconds:.2f}s for {args.portfolios:,} portfolios "
+          f"({len(risk.columns)} figures each, {per_portfolio * args.portfolios / seconds:.0f}x)")
+    started = time.perf_counter()
+    correlation_matrix(returns)
+    print(f"correlation matrix     : {time.perf_counter() - started:.3f}s")
+    print(risk.describe().loc[['mean', 'min', 'max']].round(4).to_string())
+
+
+if __name__ == '__main__':
+    main()
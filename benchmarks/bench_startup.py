@@ -0,0 +1,67 @@
+"""CLI startup time: ``python -m finpipe --help`` and ``run ... --dry-run`` against the heavy imports they avoid.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 20 --budget 0.5
+
+Every command runs in a fresh interpreter and the median wall time of ``--repeat``
+runs is reported next to a bare ``python -c pass``. A second check lists which of
+pandas / numpy / SQLAlchemy / yfinance a dry run of every job has imported (it
+should be none). Exits with status 1 when a CLI command takes longer than ``--budget``
+seconds or imports a heavy module.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ('pandas', 'numpy', 'sqlalchemy', 'yfinance', 'scipy', 'pyarrow')
+COMMANDS = {
+    'python -c pass': ['-c', 'pass'],
+    'finpipe --help': ['-m', 'finpipe', '--help'],
+    'finpipe run --help': ['-m', 'finpipe', 'run', '--help'],
+    'finpipe list': ['-m', 'finpipe', 'list'],
+    'finpipe run all --dry-run': ['-m', 'finpipe', 'run', 'all', '--dry-run'],
+    'import finpipe.ingestion': ['-c', 'import finpipe.ingestion'],
+}
+CLI = [name for name in COMMANDS if name.startswith('finpipe')]
+LOADED = ("import sys, contextlib, io\n"
+          "from finpipe.cli import main\n"
+          "with contextlib.redirect_stdout(io.StringIO()):\n"
+          "    main(['run', 'all', '--dry-run'])\n"
+          f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+
+
+def timed(args, env):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=0.5, help="seconds allowed per CLI command")
+    args = parser.parse_args()
+
+    env = {**os.environ, 'PYTHONPATH': str(ROOT)}
+    medians = {}
+    for name, command in COMMANDS.items():
+        timed(command, env)  # warm the bytecode and OS file caches
+        medians[name] = statistics.median(timed(command, env) for _ in range(args.repeat))
+        print(f"{name:<28}: {medians[name] * 1000:7.1f} ms")
+
+    loaded = subprocess.run([sys.executable, '-c', LOADED], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    print(f"heavy modules after a dry run of every job: {loaded or 'none'}")
+    over = [name for name in CLI if medians[name] > args.budget]
+    for name in over:
+        print(f"  {name} is over the {args.budget:.2f}s budget")
+    sys.exit(1 if over or loaded else 0)
+
+
+if __name__ == '__main__':
+    main()
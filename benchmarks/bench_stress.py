@@ -0,0 +1,61 @@
+"""Monte Carlo stress throughput (paths/sec), worker scaling and early stop.
+
+    python benchmarks/bench_stress.py
+    python benchmarks/bench_stress.py --paths 1000000 --jobs 1 4 8
+
+Data: synthetic histories for the commodity futures and bond ETFs the ETL scripts
+load, a mixed holdings book with a -20% gold / -10% long-bond shock, and 20k
+synthetic funding deals (``funding_amount``, ``interest_spread``, ``days_to_maturity``,
+``refinancing_needed``) for the refinancing-cost model.
+"""
+import os
+import sys
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from finpipe.risk import (price_matrix, simple_returns, CorrelatedGBM, Bootstrap, PortfolioStress, FundingStress,
+                          MonteCarlo)
+from finpipe.synthetic import synthetic_ohlcv
+
+INSTRUMENTS = ['BZ=F', 'NG=F', 'HO=F', 'GC=F', 'SI=F', 'HG=F', 'ZW=F', 'ZC=F', 'BND', 'AGG', 'TLT', 'LQD', 'IEF']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paths', type=int, default=1_000_000)
+    parser.add_argument('--chunk', type=int, default=50_000)
+    parser.add_argument('--jobs', type=int, nargs='+', default=sorted({1, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    returns = simple_returns(price_matrix(synthetic_ohlcv(INSTRUMENTS, 2000)))
+    holdings = dict.fromkeys(INSTRUMENTS, 1e6)
+    shocks = {'GC=F': -0.2, 'TLT': -0.1}
+    rng = np.random.default_rng(0)
+    deals = pd.DataFrame({'funding_amount': rng.uniform(1e8, 1e9, 20_000),
+                          'interest_spread': rng.uniform(0.5, 4, 20_000),
+                          'days_to_maturity': rng.integers(0, 1500, 20_000),
+                          'refinancing_needed': rng.random(20_000) < 0.4})
+    models = {
+        'GBM, 10-day holdings loss': PortfolioStress(CorrelatedGBM.from_returns(returns, 10), holdings, shocks),
+        'bootstrap, 10-day holdings loss': PortfolioStress(Bootstrap(returns, 10, 5), holdings, shocks),
+        'funding, 1-year refinancing cost': FundingStress.from_frame(deals, shock=0.5),
+    }
+    for label, model in models.items():
+        print(f"== {label}")
+        first = None
+        for n_jobs in args.jobs:
+            result = MonteCarlo(model, n_paths=args.paths, chunk=args.chunk, n_jobs=n_jobs, log=None).run()
+            first = first if first is not None else result.losses
+            print(f"  {n_jobs} worker(s): {result.paths_per_second:12,.0f} paths/sec  "
+                  f"(same losses as 1 worker: {np.array_equal(first, result.losses)})")
+        stopped = MonteCarlo(model, n_paths=args.paths, chunk=args.chunk, n_jobs=args.jobs[-1], tol=0.02,
+                             log=None).run()
+        print(f"  early stop at 2% VaR interval: {stopped.summary()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""Benchmark suite: every pipeline and analytics path on synthetic data, at several scales, saved as JSON.
+
+    python benchmarks/suite.py                                   # scales 10 100 1000, every case
+    python benchmarks/suite.py --scales 10 100 --cases download upsert features
+    python benchmarks/suite.py --compare benchmarks/results/<earlier run>.json
+
+Nothing touches the network or a database server. Downloads go to
+``finpipe.synthetic.SyntheticProvider`` (``--latency`` seconds per call, like a round
+trip to Yahoo), and loads / upserts go to a scratch SQLite file through the same
+``upsert_frame`` the ETL scripts use. A scale is a ticker count: ``scale`` tickers x
+``--days`` bars, ``scale`` option underlyings, ``scale x 1000`` loans and funding deals.
+
+Each case is timed ``--repeat`` times and the fastest run is kept. A run is written to
+``benchmarks/results/<UTC time>-<commit>.json`` (git-ignored) with the finpipe version,
+commit and machine. ``--compare`` prints the ratio to an earlier file and exits with status 1
+when a case is more than ``--threshold`` slower.
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from pathlib import Path
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import finpipe
+from finpipe.ingestion import (OHLCV_COLUMNS, DownloadScheduler, CachedProvider, stream_history, download_batches,
+                               compact_ohlcv)
+from finpipe.storage import NullSink, stream_copy, upsert_frame
+from finpipe.synthetic import (SyntheticProvider, synthetic_ohlcv, synthetic_loans, synthetic_funding,
+                               synthetic_option_chains)
+
+RESULTS = ROOT / 'benchmarks' / 'results'
+START, END = '2017-01-01', '2030-01-01'
+TYPES = {'date': 'date', 'volume': 'bigint'}
+PRICE_TABLE = ("CREATE TABLE {table} (date DATE, ticker TEXT, open DOUBLE PRECISION, high DOUBLE PRECISION, "
+               "low DOUBLE PRECISION, close DOUBLE PRECISION, volume BIGINT, PRIMARY KEY (date, ticker))")
+
+
+def names(scale):
+    return [f'T{i:04d}' for i in range(scale)]
+
+
+# --- cases: case(scale, args, scratch) -> (unit, run); run() returns the items processed -------
+
+def case_download(scale, args, scratch):
+    """Per-ticker ``history`` calls on the scheduler, streamed to a null sink."""
+    scheduler = DownloadScheduler(SyntheticProvider(days=args.days, latency=args.latency), max_workers=8,
+                                  rate_per_host=None, log=None)
+    return 'rows', lambda: stream_copy(NullSink(), stream_history(names(scale), START, END, scheduler=scheduler),
+                                       OHLCV_COLUMNS, TYPES, log=None).rows
+
+
+def case_download_batches(scale, args, scratch):
+    """``yf.download``-style batches of 50 tickers, reshaped and streamed to a null sink."""
+    provider = SyntheticProvider(days=args.days, latency=args.latency)
+    return 'rows', lambda: stream_copy(NullSink(), download_batches(names(scale), START, END, provider=provider),
+                                       OHLCV_COLUMNS, TYPES, log=None).rows
+
+
+def case_download_cached(scale, args, scratch):
+    """``download`` replayed offline from the response cache (recorded once before timing)."""
+    root = Path(scratch) / f'responses_{scale}'
+    recorder = CachedProvider(SyntheticProvider(days=args.days, latency=args.latency), root=root)
+    stream_copy(NullSink(), stream_history(names(scale), START, END, scheduler=DownloadScheduler(
+        recorder, max_workers=8, rate_per_host=None, log=None)), OHLCV_COLUMNS, TYPES, log=None)
+    scheduler = DownloadScheduler(CachedProvider(SyntheticProvider(days=args.days), root=root, mode='offline'),
+                                  max_workers=8, rate_per_host=None, log=None)
+    return 'rows', lambda: stream_copy(NullSink(), stream_history(names(scale), START, END, scheduler=scheduler),
+                                       OHLCV_COLUMNS, TYPES, log=None).rows
+
+
+def case_option_snapshot(scale, args, scratch):
+    """Expiries then chains of ``scale`` underlyings (6 expiries x 41 strikes)."""
+    from finpipe.options.snapshot import fetch_option_snapshot
+    provider = SyntheticProvider(latency=args.latency)
+    for name in names(scale):
+        provider._chains(name)  # generate the chains outside the timing
+    scheduler = DownloadScheduler(provider, max_workers=8, rate_per_host=None, log=None)
+    return 'contracts', lambda: len(fetch_option_snapshot(names(scale), date(2024, 6, 1), date(2024, 8, 1),
+                                                          scheduler=scheduler)[0])
+
+
+def _price_table(scale, args, scratch):
+    from sqlalchemy import create_engine, text
+    engine = create_engine(f"sqlite:///{scratch}/suite_{scale}.sqlite")
+    table = 'bench_prices'
+    df = compact_ohlcv(synthetic_ohlcv(names(scale), args.days))
+    last = df['date'].max()
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(PRICE_TABLE.format(table=table)))
+    upsert_frame(engine, df[df['date'] < last], table)
+    # a daily run: the last 5 stored bars come back again (overlap), plus one new day
+    return engine, table, df[df['date'] >= sorted(df['date'].unique())[-6]]
+
+
+def case_upsert(scale, args, scratch):
+    """Daily batch (5 overlap days + 1 new) through the staged ``INSERT ... ON CONFLICT DO NOTHING``."""
+    engine, table, batch = _price_table(scale, args, scratch)
+
+    def run():
+        upsert_frame(engine, batch, table)
+        return len(batch)
+    return 'rows', run
+
+
+def case_dedup_antijoin(scale, args, scratch):
+    """The same batch through the old client-side dedup: read every key, anti-join, append."""
+    engine, table, batch = _price_table(scale, args, scratch)
+
+    def run():
+        keys = pd.read_sql(f"SELECT date, ticker FROM {table}", engine)
+        new = batch.assign(date=batch['date'].astype(str), ticker=batch['ticker'].astype(str))
+        new = new.merge(keys, on=['date', 'ticker'], how='left', indicator=True)
+        new[new['_merge'] == 'left_only'].drop(columns='_merge').to_sql(table, engine, if_exists='append',
+                                                                       index=False)
+        return len(batch)
+    return 'rows', run
+
+
+def case_validate(scale, args, scratch):
+    """Data-quality rules on the compact panel (every row passes, so the full clean frame is rebuilt)."""
+    from finpipe.quality import validate_ohlcv
+    df = compact_ohlcv(synthetic_ohlcv(names(scale), args.days))
+    return 'rows', lambda: len(validate_ohlcv(df).clean)
+
+
+def case_features(scale, args, scratch):
+    from finpipe.features import compute_features
+    df = synthetic_ohlcv(names(scale), args.days)
+    return 'rows', lambda: len(compute_features(df))
+
+
+def case_pd_scoring(scale, args, scratch):
+    from finpipe.credit import PDModel
+    if 'pd_model' not in args.shared:
+        args.shared['pd_model'] = PDModel.fit(pd.read_csv(ROOT / 'Analytics/Probability_Of_Default/model_data.csv'))
+    loans = synthetic_loans(scale * 1000)
+    return 'loans', lambda: len(args.shared['pd_model'].score(loans))
+
+
+def case_funding_cubes(scale, args, scratch):
+    from finpipe.funding import aggregate_frames
+    deals = synthetic_funding(scale * 1000)
+
+    def run():
+        aggregate_frames(deals)
+        return len(deals)
+    return 'deals', run
+
+
+def case_funding_stats(scale, args, scratch):
+    from finpipe.funding import FundingStats
+    deals = synthetic_funding(scale * 1000)
+    return 'deals', lambda: FundingStats().update(deals).rows
+
+
+def case_portfolio_risk(scale, args, scratch):
+    """1000 random long-only portfolios over the ``scale`` instruments."""
+    from finpipe.risk import wide_closes, simple_returns, portfolio_risk
+    returns = simple_returns(wide_closes(synthetic_ohlcv(names(scale), args.days)))
+    weights = pd.DataFrame(np.random.default_rng(0).dirichlet(np.ones(scale), 1000), columns=returns.columns)
+    return 'portfolios', lambda: len(portfolio_risk(returns, weights, log=None))
+
+
+def case_options_analytics(scale, args, scratch):
+    from finpipe.options import analyse_chain
+    chains, spots = synthetic_option_chains(scale)
+    return 'contracts', lambda: len(analyse_chain(chains, spots=spots))
+
+
+CASES = {name[len('case_'):]: fn for name, fn in globals().items() if name.startswith('case_')}
+
+
+# --- running, saving, comparing ------------------------------------------------------
+
+def run_case(name, scale, args, scratch):
+    with contextlib.redirect_stdout(io.StringIO()):  # the library's progress messages
+        unit, run = CASES[name](scale, args, scratch)
+        best, items = float('inf'), 0
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            items = run()
+            best = min(best, time.perf_counter() - started)
+    return {'case': name, 'scale': scale, 'seconds': round(best, 6), 'items': int(items), 'unit': unit,
+            'per_second': round(items / best, 1) if best > 0 else None}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'finpipe': finpipe.__version__, 'commit': commit, 'python': platform.python_version(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'machine': platform.platform(),
+            'cpus': os.cpu_count()}
+
+
+def compare(results, baseline, threshold):
+    """Print new / old seconds per case and return the cases slower than ``1 + threshold``."""
+    old = {(r['case'], r['scale']): r for r in baseline['results']}
+    print(f"\nvs {baseline['created']} (commit {baseline['environment'].get('commit')}):")
+    slower = []
+    for r in results:
+        before = old.get((r['case'], r['scale']))
+        if before is None:
+            continue
+        ratio = r['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        flag = '  <-- slower' if ratio > 1 + threshold else ''
+        print(f"  {r['case']:<18} {r['scale']:>6}: {before['seconds']:8.3f}s -> {r['seconds']:8.3f}s "
+              f"({ratio:5.2f}x){flag}")
+        if flag:
+            slower.append(r)
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--days', type=int, default=500, help="bars per ticker")
+    parser.add_argument('--latency', type=float, default=0.02, help="simulated seconds per provider call")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', type=Path, help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument('--compare', type=Path, help="earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="relative slow-down reported as a regression")
+    args = parser.parse_args()
+    args.shared = {}
+
+    env = environment()
+    created = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        for scale in args.scales:
+            for name in args.cases:
+                result = run_case(name, scale, args, scratch)
+                results.append(result)
+                print(f"{name:<18} {scale:>6}: {result['seconds']:8.3f}s  "
+                      f"{result['per_second'] or 0:>14,.0f} {result['unit']}/sec")
+
+    out = args.out or RESULTS / f"{created.replace(':', '')}-{env['commit'] or 'nogit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({'created': created, 'environment': env,
+                               'settings': {'days': args.days, 'latency': args.latency, 'repeat': args.repeat},
+                               'results': results}, indent=1))
+    print(f"Results written to {out}")
+    if args.compare:
+        slower = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        sys.exit(1 if slower else 0)
+
+
+if __name__ == '__main__':
+    main()
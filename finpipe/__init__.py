@@ -0,0 +1,7 @@
+"""finpipe - shared engine behind the ETL pipelines and analytics in this repository.
+
+The ``*_to_database.py`` scripts under ``ETL_Pipelines/`` and ``Analytics/`` import
+from here instead of each carrying their own download/load loop.
+"""
+
+__version__ = "0.1.0"
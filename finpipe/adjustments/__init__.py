@@ -0,0 +1,14 @@
+"""Raw prices plus corporate-action factors, adjusted at read time."""
+from .store import (ACTIONS_TABLE, FACTORS_TABLE, FACTOR_COLUMNS, FIRST_DATE, ensure_adjustment_tables,
+                    load_actions, changed_actions, record_actions, factor_intervals, refresh_factors,
+                    update_adjustments)
+from .read import (adjusted_sql, has_factors, price_source, create_adjusted_view, load_adjusted, load_factors,
+                   factor_versions, adjust_frame)
+
+__all__ = [
+    'ACTIONS_TABLE', 'FACTORS_TABLE', 'FACTOR_COLUMNS', 'FIRST_DATE', 'ensure_adjustment_tables',
+    'load_actions', 'changed_actions', 'record_actions', 'factor_intervals', 'refresh_factors',
+    'update_adjustments',
+    'adjusted_sql', 'has_factors', 'price_source', 'create_adjusted_view', 'load_adjusted', 'load_factors',
+    'factor_versions', 'adjust_frame',
+]
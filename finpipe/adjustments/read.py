@@ -0,0 +1,150 @@
+"""Adjusted prices at read time.
+
+The adjusted series is the raw table joined to its factor intervals: one range
+join per bar, with ``COALESCE(..., 1)`` for the bars after a ticker's last action.
+``create_adjusted_view`` puts the join behind a ``<table>_adjusted`` view, so SQL
+readers and ``pd.read_sql`` keep selecting ``date, ticker, open, ... volume``.
+``adjust_frame`` does the same join in pandas for frames that are already local
+(e.g. read from ``ParquetCache``), with ``merge_asof`` on the interval start.
+
+Readers that keep derived history (``FeatureStore``) compare ``factor_versions``
+between runs: a new split rewrites the factors of old bars without adding a bar,
+so a changed version is the only sign that the ticker has to be recomputed.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from ..ingestion.frames import OHLCV_COLUMNS, PRICE_COLUMNS
+from .store import FACTORS_TABLE, FACTOR_COLUMNS, _in_tickers
+
+
+def adjusted_sql(table, factors_table=FACTORS_TABLE):
+    """``SELECT`` of ``table`` with split- and dividend-adjusted prices and split-adjusted volume."""
+    prices = ',\n           '.join(f"p.{c} * COALESCE(f.price_factor, 1.0) AS {c}" for c in PRICE_COLUMNS)
+    return f"""
+        SELECT p.date, p.ticker,
+           {prices},
+           CAST(ROUND(p.volume * COALESCE(f.volume_factor, 1.0)) AS BIGINT) AS volume
+        FROM {table} p
+        LEFT JOIN {factors_table} f
+          ON f.source_table = '{table}' AND f.ticker = p.ticker
+         AND p.date >= f.valid_from AND p.date < f.valid_to
+    """
+
+
+def has_factors(engine, factors_table=FACTORS_TABLE):
+    """True when ``factors_table`` exists; readers of a database no job has written to skip the join."""
+    from sqlalchemy import inspect
+    return inspect(engine).has_table(factors_table)
+
+
+def price_source(engine, table, adjusted=True, factors_table=FACTORS_TABLE):
+    """``FROM`` clause for reading ``table``: the adjusted subquery, or the table itself when not ``adjusted``."""
+    if adjusted and has_factors(engine, factors_table):
+        return f"({adjusted_sql(table, factors_table)}) adjusted"
+    return table
+
+
+def create_adjusted_view(engine, table, view=None, factors_table=FACTORS_TABLE):
+    """(Re)create the view ``view`` (default ``<table>_adjusted``) over ``adjusted_sql``; returns its name."""
+    from sqlalchemy import text
+    from .store import ensure_adjustment_tables
+    view = view or f"{table}_adjusted"
+    ensure_adjustment_tables(engine, factors_table=factors_table)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP VIEW IF EXISTS {view}"))
+        conn.execute(text(f"CREATE VIEW {view} AS {adjusted_sql(table, factors_table)}"))
+    return view
+
+
+def load_adjusted(engine, table, tickers=None, start=None, end=None, factors_table=FACTORS_TABLE):
+    """Adjusted ``OHLCV_COLUMNS`` rows of ``table``, optionally for ``tickers`` and ``start <= date < end``."""
+    from sqlalchemy import text
+    sql = f"SELECT * FROM {price_source(engine, table, factors_table=factors_table)} WHERE 1 = 1"
+    params = {}
+    if tickers is not None:
+        clause, params = _in_tickers(list(tickers))
+        sql += f" AND ticker IN {clause}" if params else " AND 1 = 0"
+    if start is not None:
+        sql += " AND date >= :start"
+        params['start'] = pd.Timestamp(start).date()
+    if end is not None:
+        sql += " AND date < :end"
+        params['end'] = pd.Timestamp(end).date()
+    with engine.connect() as conn:
+        df = pd.read_sql(text(sql + " ORDER BY ticker, date"), conn, params=params)
+    df['date'] = pd.to_datetime(df['date'])
+    return df[OHLCV_COLUMNS]
+
+
+def _no_factors():
+    return pd.DataFrame({'ticker': pd.Series(dtype=str), 'valid_from': pd.Series(dtype='datetime64[ns]'),
+                         'valid_to': pd.Series(dtype='datetime64[ns]'), 'price_factor': pd.Series(dtype=float),
+                         'volume_factor': pd.Series(dtype=float)})
+
+
+def load_factors(engine, table, tickers=None, factors_table=FACTORS_TABLE):
+    """Factor intervals of ``table`` (``FACTOR_COLUMNS`` without ``source_table``); empty without a factors table."""
+    from sqlalchemy import text
+    if not has_factors(engine, factors_table):
+        return _no_factors()
+    sql = f"SELECT {', '.join(FACTOR_COLUMNS[1:])} FROM {factors_table} WHERE source_table = :source"
+    params = {'source': table}
+    if tickers is not None:
+        clause, names = _in_tickers(list(tickers))
+        if not names:
+            return _no_factors()
+        sql += f" AND ticker IN {clause}"
+        params.update(names)
+    with engine.connect() as conn:
+        df = pd.read_sql(text(sql + " ORDER BY ticker, valid_from"), conn, params=params)
+    for col in ('valid_from', 'valid_to'):
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def factor_versions(factors):
+    """``{ticker: digest}`` of ``load_factors`` intervals; a ticker without factors has none."""
+    versions = {}
+    for ticker, rows in factors.groupby(factors['ticker'].astype(str), sort=True):
+        rows = rows.sort_values('valid_from')
+        key = '|'.join(f"{a:%Y-%m-%d}:{b:%Y-%m-%d}:{p!r}:{v!r}" for a, b, p, v in zip(
+            rows['valid_from'], rows['valid_to'], rows['price_factor'].astype(float),
+            rows['volume_factor'].astype(float)))
+        versions[ticker] = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return versions
+
+
+def adjust_frame(df, factors):
+    """Adjusted copy of a raw OHLCV frame, given ``load_factors`` intervals; row order is kept.
+
+    Only the price and volume columns present in ``df`` are adjusted (``date`` and
+    ``ticker`` are required).
+    """
+    if df.empty or factors.empty:
+        return df.copy()
+    dates = pd.to_datetime(df['date'])
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    left = pd.DataFrame({'date': dates.astype('datetime64[ns]').to_numpy(),
+                         'ticker': df['ticker'].astype(str).to_numpy(),
+                         'row': np.arange(len(df))}).sort_values('date', kind='stable')
+    right = factors.assign(valid_from=factors['valid_from'].astype('datetime64[ns]'),
+                           valid_to=factors['valid_to'].astype('datetime64[ns]'),
+                           ticker=factors['ticker'].astype(str)).sort_values('valid_from')
+    hit = pd.merge_asof(left, right, left_on='date', right_on='valid_from', by='ticker')
+    inside = (hit['date'] < hit['valid_to']).to_numpy()
+    price = np.ones(len(df))
+    volume = np.ones(len(df))
+    rows = hit['row'].to_numpy()
+    price[rows] = np.where(inside, hit['price_factor'].to_numpy(dtype=float, na_value=1.0), 1.0)
+    volume[rows] = np.where(inside, hit['volume_factor'].to_numpy(dtype=float, na_value=1.0), 1.0)
+    out = df.copy()
+    for col in PRICE_COLUMNS:
+        if col in out.columns:
+            out[col] = out[col].to_numpy(dtype=float) * price
+    if 'volume' in out.columns:
+        out['volume'] = (pd.to_numeric(out['volume']) * volume).round()
+    return out
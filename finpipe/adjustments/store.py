@@ -0,0 +1,185 @@
+"""Corporate-action and adjustment-factor tables.
+
+The price tables store the prices that traded (``PriceJob(raw=True)``), so a split
+leaves every stored bar unchanged. Splits and dividends go into ``corporate_actions``,
+one row per ``(source_table, ticker, date)``. A change there rebuilds that ticker's
+rows in ``adjustment_factors``: piecewise-constant cumulative factors, one row per
+interval between two actions::
+
+    [valid_from, valid_to)   price_factor = product over the later actions of
+                             (1 / split) * (1 - dividend / previous raw close)
+                             volume_factor = product of the later split ratios
+
+The first interval starts at ``FIRST_DATE``; bars on or after a ticker's last action
+have no row and a factor of 1. A new split therefore rewrites a handful of factor
+rows instead of eight years of prices, and the adjusted series is computed when it
+is read (``finpipe.adjustments.read``).
+
+The dividend factor is Yahoo's ``Adj Close`` convention. It divides by the raw close
+of the bar before the ex-date, which is read from the price table itself, so the
+prices have to be loaded before ``refresh_factors`` runs.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from ..ingestion.actions import ACTION_COLUMNS, empty_actions
+
+ACTIONS_TABLE = 'corporate_actions'
+FACTORS_TABLE = 'adjustment_factors'
+FACTOR_COLUMNS = ['source_table', 'ticker', 'valid_from', 'valid_to', 'price_factor', 'volume_factor']
+FIRST_DATE = date(1900, 1, 1)
+
+
+def ensure_adjustment_tables(engine, actions_table=ACTIONS_TABLE, factors_table=FACTORS_TABLE):
+    from sqlalchemy import text
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {actions_table} (
+                source_table TEXT,
+                ticker TEXT,
+                date DATE,
+                dividend DOUBLE PRECISION,
+                split DOUBLE PRECISION,
+                PRIMARY KEY (source_table, ticker, date)
+            );
+        """))
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {factors_table} (
+                source_table TEXT,
+                ticker TEXT,
+                valid_from DATE,
+                valid_to DATE,
+                price_factor DOUBLE PRECISION,
+                volume_factor DOUBLE PRECISION,
+                PRIMARY KEY (source_table, ticker, valid_from)
+            );
+        """))
+
+
+def _in_tickers(tickers):
+    """``IN`` clause and parameters for a ticker list (plain placeholders work on every driver)."""
+    names = [f't{i}' for i in range(len(tickers))]
+    return f"({', '.join(':' + n for n in names)})", dict(zip(names, tickers))
+
+
+def load_actions(conn, source_table, tickers=None, actions_table=ACTIONS_TABLE):
+    """Stored actions of ``source_table`` (optionally only ``tickers``) as an ``ACTION_COLUMNS`` frame."""
+    from sqlalchemy import text
+    sql = f"SELECT ticker, date, dividend, split FROM {actions_table} WHERE source_table = :source"
+    params = {'source': source_table}
+    if tickers is not None:
+        if not len(tickers):
+            return empty_actions()
+        clause, names = _in_tickers(list(tickers))
+        sql += f" AND ticker IN {clause}"
+        params.update(names)
+    rows = conn.execute(text(sql + " ORDER BY ticker, date"), params).fetchall()
+    if not rows:
+        return empty_actions()
+    df = pd.DataFrame(rows, columns=ACTION_COLUMNS)
+    df['date'] = pd.to_datetime(df['date']).astype('datetime64[s]')
+    return df
+
+
+def changed_actions(new, stored):
+    """Rows of ``new`` that are missing from ``stored`` or differ from it."""
+    if new.empty:
+        return new
+    new = new.drop_duplicates(['ticker', 'date'], keep='last')
+    merged = new.merge(stored, on=['ticker', 'date'], how='left', suffixes=('', '_stored'))
+    same = (np.isclose(merged['dividend'], merged['dividend_stored'], rtol=1e-9, atol=1e-12)
+            & np.isclose(merged['split'], merged['split_stored'], rtol=1e-9))
+    return new[~same]
+
+
+def record_actions(engine, actions, source_table, actions_table=ACTIONS_TABLE, factors_table=FACTORS_TABLE):
+    """Upsert the new or changed rows of ``actions`` for ``source_table``; returns the tickers they touch.
+
+    Re-downloaded actions that are already stored cost one indexed read and no write,
+    so every run can hand in everything it saw.
+    """
+    if actions is None or actions.empty:
+        return []
+    from ..storage import upsert_frame
+    ensure_adjustment_tables(engine, actions_table, factors_table)
+    actions = actions.assign(ticker=actions['ticker'].astype(str))
+    with engine.connect() as conn:
+        stored = load_actions(conn, source_table, actions['ticker'].unique(), actions_table)
+    changed = changed_actions(actions, stored)
+    if changed.empty:
+        return []
+    upsert_frame(engine, changed.assign(source_table=source_table), actions_table,
+                 key=('source_table', 'ticker', 'date'), on_conflict='update',
+                 columns=['source_table', *ACTION_COLUMNS])
+    return list(dict.fromkeys(changed['ticker']))
+
+
+def factor_intervals(actions):
+    """``adjustment_factors`` rows (without ``source_table``) from actions with a ``prev_close`` column.
+
+    A dividend whose previous close is unknown (the first stored bar) only
+    contributes its split.
+    """
+    if actions.empty:
+        return pd.DataFrame(columns=FACTOR_COLUMNS[1:])
+    df = actions.sort_values(['ticker', 'date'], kind='stable').reset_index(drop=True)
+    split = df['split'].to_numpy(dtype=float)
+    split = np.where(split > 0, split, 1.0)
+    dividend = df['dividend'].to_numpy(dtype=float)
+    prev_close = pd.to_numeric(df['prev_close']).to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cash = np.where((dividend > 0) & (prev_close > 0), 1 - dividend / prev_close, 1.0)
+    own = cash / split
+    tickers = df['ticker'].to_numpy()
+    # cumulative from each action to the ticker's last one: it applies to the bars before that action
+    price = pd.Series(own[::-1]).groupby(tickers[::-1], sort=False).cumprod().to_numpy()[::-1]
+    volume = pd.Series(split[::-1]).groupby(tickers[::-1], sort=False).cumprod().to_numpy()[::-1]
+    days = pd.to_datetime(df['date']).dt.date
+    return pd.DataFrame({'ticker': tickers,
+                         'valid_from': days.groupby(df['ticker'], sort=False).shift(1).fillna(FIRST_DATE),
+                         'valid_to': days, 'price_factor': price, 'volume_factor': volume})
+
+
+def refresh_factors(engine, price_table, tickers, actions_table=ACTIONS_TABLE, factors_table=FACTORS_TABLE):
+    """Rebuild the ``adjustment_factors`` rows of ``tickers`` in ``price_table``; returns rows written.
+
+    Delete and insert happen in one transaction, so readers never see a ticker
+    without its factors. Only the given tickers are touched.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return 0
+    from sqlalchemy import text
+    ensure_adjustment_tables(engine, actions_table, factors_table)
+    clause, names = _in_tickers(tickers)
+    with engine.begin() as conn:
+        rows = conn.execute(text(f"""
+            SELECT a.ticker, a.date, a.dividend, a.split,
+                   (SELECT p.close FROM {price_table} p
+                    WHERE p.ticker = a.ticker AND p.date < a.date
+                    ORDER BY p.date DESC LIMIT 1) AS prev_close
+            FROM {actions_table} a
+            WHERE a.source_table = :source AND a.ticker IN {clause}
+        """), {'source': price_table, **names}).fetchall()
+        actions = pd.DataFrame(rows, columns=[*ACTION_COLUMNS, 'prev_close'])
+        factors = factor_intervals(actions)
+        conn.execute(text(f"DELETE FROM {factors_table} WHERE source_table = :source AND ticker IN {clause}"),
+                     {'source': price_table, **names})
+        if not factors.empty:
+            conn.execute(text(f"INSERT INTO {factors_table} ({', '.join(FACTOR_COLUMNS)}) "
+                              f"VALUES ({', '.join(':' + c for c in FACTOR_COLUMNS)})"),
+                         factors.assign(source_table=price_table).to_dict('records'))
+    return len(factors)
+
+
+def update_adjustments(engine, actions, price_table, log=print):
+    """``record_actions`` then ``refresh_factors`` for the tickers whose actions changed; returns those tickers."""
+    changed = record_actions(engine, actions, price_table)
+    if changed:
+        written = refresh_factors(engine, price_table, changed)
+        if log:
+            log(f"🧮 Corporate actions changed for {len(changed)} tickers in '{price_table}'; "
+                f"{written} factor rows rebuilt")
+    return changed
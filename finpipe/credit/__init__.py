@@ -0,0 +1,8 @@
+"""Credit-risk models: persisted Probability-of-Default scoring."""
+from .pd_model import (PD_FEATURES, RISK_FEATURES, DEFAULT_THRESHOLD, SCORE_COLUMNS, PDModel,
+                       default_model_path, iter_loan_chunks, score_file)
+
+__all__ = [
+    'PD_FEATURES', 'RISK_FEATURES', 'DEFAULT_THRESHOLD', 'SCORE_COLUMNS', 'PDModel',
+    'default_model_path', 'iter_loan_chunks', 'score_file',
+]
@@ -0,0 +1,194 @@
+"""Probability-of-Default scoring with a persisted, fitted model.
+
+``ProbabilityOfDefault.ipynb`` refits everything in every session. ``PDModel.fit``
+trains the notebook's two models once:
+
+* PD: ``StandardScaler`` + ``LogisticRegression`` on ``PD_FEATURES``, target
+  ``RiskScore > threshold`` (the notebook's ``Default`` column)
+* risk score: ``OneHotEncoder`` on ``EmploymentStatus`` (the notebook's column 9)
+  + ``LinearRegression`` on ``RISK_FEATURES``
+
+and ``save`` writes them with joblib next to a small JSON manifest. Both models are
+linear, so scoring folds the scaler and the one-hot encoding into one weight vector
+per model: a chunk is scored with one matrix-vector product and a category lookup,
+with results equal to the sklearn pipelines' (``score(..., exact=True)`` runs those).
+
+``score_file`` streams CSV or Parquet input in ``chunksize`` rows and appends the
+scores to a CSV or Parquet output, so files much larger than memory can be scored.
+"""
+import json
+import time
+from pathlib import Path
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from ..paths import state_dir
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+
+PD_FEATURES = ['DebtToIncomeRatio', 'CreditScore', 'MonthlyDebtPayments', 'NetWorth', 'SavingsAccountBalance',
+               'PaymentHistory', 'BankruptcyHistory', 'LoanAmount', 'CreditCardUtilizationRate']
+RISK_FEATURES = ['DebtToIncomeRatio', 'CreditScore', 'MonthlyDebtPayments', 'PaymentHistory', 'NetWorth',
+                 'SavingsAccountBalance', 'BankruptcyHistory', 'CreditCardUtilizationRate', 'LoanAmount',
+                 'EmploymentStatus']
+CATEGORICAL = 'EmploymentStatus'
+DEFAULT_THRESHOLD = 50  # RiskScore above this counts as a default, as in the notebook
+SCORE_COLUMNS = ['ProbabilityOfDefault', 'PredictedRiskScore']
+
+
+def default_model_path():
+    return state_dir() / 'models' / 'pd_model.joblib'
+
+
+class PDModel:
+    """Fitted PD classifier and risk-score regressor, plus their folded linear scorers."""
+
+    def __init__(self, classifier, regressor, threshold=DEFAULT_THRESHOLD, info=None):
+        self.classifier = classifier
+        self.regressor = regressor
+        self.threshold = threshold
+        self.info = info or {}
+        self._fold()
+
+    @classmethod
+    def fit(cls, data, threshold=DEFAULT_THRESHOLD, random_state=42):
+        """Fit both models on a ``model_data.csv``-shaped frame (features + ``RiskScore``)."""
+        from sklearn.pipeline import Pipeline
+        from sklearn.compose import ColumnTransformer
+        from sklearn.preprocessing import StandardScaler, OneHotEncoder
+        from sklearn.linear_model import LogisticRegression, LinearRegression
+
+        default = (data['RiskScore'] > threshold).astype(int)
+        classifier = Pipeline([
+            ('scaler', StandardScaler()),
+            ('logistic', LogisticRegression(random_state=random_state)),
+        ]).fit(data[PD_FEATURES], default)
+        regressor = Pipeline([
+            ('encoder', ColumnTransformer([('encoder', OneHotEncoder(handle_unknown='ignore'), [CATEGORICAL])],
+                                          remainder='passthrough')),
+            ('linear', LinearRegression()),
+        ]).fit(data[RISK_FEATURES], data['RiskScore'])
+        info = {'trained_at': datetime.now(timezone.utc).isoformat(), 'rows': len(data),
+                'default_rate': float(default.mean())}
+        return cls(classifier, regressor, threshold, info)
+
+    def _fold(self):
+        """Collapse scaler + logistic and one-hot + linear into plain weight vectors."""
+        scaler = self.classifier.named_steps['scaler']
+        logistic = self.classifier.named_steps['logistic']
+        w = logistic.coef_[0] / scaler.scale_
+        self._pd_weights = w
+        self._pd_bias = float(logistic.intercept_[0] - w @ scaler.mean_)
+
+        transformer = self.regressor.named_steps['encoder']
+        linear = self.regressor.named_steps['linear']
+        categories = transformer.named_transformers_['encoder'].categories_[0]
+        coef = linear.coef_
+        self._category_weights = dict(zip(categories, coef[:len(categories)]))
+        self._risk_columns = [c for c in RISK_FEATURES if c != CATEGORICAL]  # passthrough order
+        self._risk_weights = coef[len(categories):]
+        self._risk_bias = float(linear.intercept_)
+
+    def score(self, df, exact=False):
+        """``SCORE_COLUMNS`` for every row of ``df`` (needs ``PD_FEATURES`` and ``RISK_FEATURES``)."""
+        if exact:
+            return pd.DataFrame({
+                'ProbabilityOfDefault': self.classifier.predict_proba(df[PD_FEATURES])[:, 1],
+                'PredictedRiskScore': self.regressor.predict(df[RISK_FEATURES]),
+            }, index=df.index)
+        x = df[PD_FEATURES].to_numpy(dtype=np.float64)
+        z = x @ self._pd_weights + self._pd_bias
+        pd_score = 1.0 / (1.0 + np.exp(-z))
+        category = df[CATEGORICAL].map(self._category_weights).fillna(0.0).to_numpy(dtype=np.float64)
+        risk = df[self._risk_columns].to_numpy(dtype=np.float64) @ self._risk_weights + self._risk_bias + category
+        return pd.DataFrame({'ProbabilityOfDefault': pd_score, 'PredictedRiskScore': risk}, index=df.index)
+
+    # --- persistence -------------------------------------------------------------------
+
+    def save(self, path=None):
+        import joblib
+        import sklearn
+        path = Path(path or default_model_path())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({'classifier': self.classifier, 'regressor': self.regressor, 'threshold': self.threshold,
+                     'info': self.info}, path)
+        manifest = {**self.info, 'threshold': self.threshold, 'sklearn': sklearn.__version__,
+                    'pd_features': PD_FEATURES, 'risk_features': RISK_FEATURES}
+        path.with_suffix('.json').write_text(json.dumps(manifest, indent=1))
+        return path
+
+    @classmethod
+    def load(cls, path=None):
+        import joblib
+        saved = joblib.load(Path(path or default_model_path()))
+        return cls(saved['classifier'], saved['regressor'], saved['threshold'], saved['info'])
+
+
+# --- chunked file scoring ------------------------------------------------------------------
+
+def _is_parquet(path):
+    return Path(path).suffix.lower() in ('.parquet', '.pq')
+
+
+def iter_loan_chunks(path, chunksize=200_000, columns=None):
+    """Frames of about ``chunksize`` rows from a CSV or Parquet file, reading only ``columns``.
+
+    With pyarrow, CSV is parsed by its multi-threaded streaming reader and the chunks
+    are sized by bytes (~``chunksize`` rows of a typical loan record).
+    """
+    if _is_parquet(path):
+        if pa is None:
+            raise ImportError("reading Parquet needs pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif pa is not None:
+        # types are inferred from the first block only; pin the features so a later block can't disagree
+        types = {c: pa.float64() for c in PD_FEATURES}
+        types[CATEGORICAL] = pa.string()
+        convert = pa_csv.ConvertOptions(include_columns=columns, column_types=types)
+        reader = pa_csv.open_csv(path, read_options=pa_csv.ReadOptions(block_size=chunksize * 128),
+                                 convert_options=convert)
+        for batch in reader:
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def score_file(model, src, dst, chunksize=200_000, keep=(), log=print):
+    """Score every loan in ``src`` into ``dst`` (CSV or Parquet by extension) chunk by chunk.
+
+    ``keep`` names input columns copied to the output next to the scores (e.g. an id).
+    Returns ``(rows, seconds)``.
+    """
+    columns = list(dict.fromkeys(list(keep) + PD_FEATURES + RISK_FEATURES))
+    started = time.perf_counter()
+    rows, writer = 0, None
+    Path(dst).unlink(missing_ok=True)
+    try:
+        for chunk in iter_loan_chunks(src, chunksize, columns):
+            out = pd.concat([chunk[list(keep)].reset_index(drop=True),
+                             model.score(chunk).reset_index(drop=True)], axis=1)
+            if pa is not None:
+                table = pa.Table.from_pandas(out, preserve_index=False)
+                if writer is None:
+                    writer = (pq.ParquetWriter if _is_parquet(dst) else pa_csv.CSVWriter)(dst, table.schema)
+                writer.write_table(table)
+            elif _is_parquet(dst):
+                raise ImportError("writing Parquet needs pyarrow: pip install pyarrow")
+            else:
+                out.to_csv(dst, mode='a', header=rows == 0, index=False)
+            rows += len(out)
+    finally:
+        if writer is not None:
+            writer.close()
+    seconds = time.perf_counter() - started
+    if log:
+        log(f"Scored {rows:,} loans into {dst} in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} loans/sec)")
+    return rows, seconds
@@ -0,0 +1,10 @@
+"""Per-ticker feature engineering for the OHLCV panel."""
+from .spec import FeatureSpec
+from .engine import (segment_positions, shift, rolling, sort_panel, fix_low_prices,
+                     compute_features)
+from .store import FeatureStore
+
+__all__ = [
+    'FeatureSpec', 'segment_positions', 'shift', 'rolling', 'sort_panel', 'fix_low_prices',
+    'compute_features', 'FeatureStore',
+]
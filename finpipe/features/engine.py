@@ -0,0 +1,173 @@
+"""Vectorised per-ticker feature engineering over a long ``(date, ticker)`` OHLCV panel.
+
+The notebooks ran ``df['close'].rolling(N)`` on the whole multi-ticker frame, so
+windows bled from one ticker into the next. Here the panel is sorted once by
+``(ticker, date)`` into contiguous arrays and every kernel is a NumPy operation on
+the full array, masked by the bar's position inside its ticker segment:
+
+* lags / momentum / returns: one shifted copy, NaN where ``pos < k``
+* rolling stats: ``sliding_window_view`` reductions, NaN where ``pos < N - 1``
+
+Each output value depends only on the ``N`` bars of its own window, which is what
+lets ``features.store`` extend features for new bars and get identical numbers.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .spec import FeatureSpec
+
+BLOCK = 1 << 16  # rows per block for window reductions; caps the (rows, N) temporaries
+
+
+def segment_positions(tickers):
+    """Position of each row inside its run of equal tickers (input must be grouped)."""
+    values = np.asarray(tickers)
+    n = len(values)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = values[1:] != values[:-1]
+    start_index = np.flatnonzero(starts)
+    segment = np.cumsum(starts) - 1
+    return np.arange(n) - start_index[segment]
+
+
+def shift(x, k, pos):
+    """``x`` shifted down by ``k`` rows inside each segment (NaN for the first ``k`` bars)."""
+    out = np.full(len(x), np.nan)
+    if 0 < k < len(x):
+        out[k:] = x[:-k]
+    out[pos < k] = np.nan
+    return out
+
+
+def rolling(x, window, pos, reducer):
+    """Trailing ``window``-bar reduction inside each segment, NaN until the window is full.
+
+    ``reducer(block)`` receives a ``(rows, window)`` view and reduces over ``axis=1``.
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+    windows = sliding_window_view(x, window)  # row i is x[i : i + window], ends at bar i + window - 1
+    for start in range(0, len(windows), BLOCK):
+        block = windows[start:start + BLOCK]
+        out[start + window - 1:start + window - 1 + len(block)] = reducer(block)
+    out[pos < window - 1] = np.nan
+    return out
+
+
+# The reducers accumulate column by column in a fixed order, so a window's result depends
+# only on its own values - never on block boundaries or SIMD paths - and incremental
+# recomputation reproduces a full recompute bit for bit.
+
+def _sum(block):
+    total = block[:, 0].copy()
+    for j in range(1, block.shape[1]):
+        total += block[:, j]
+    return total
+
+
+def _mean(block):
+    return _sum(block) / block.shape[1]
+
+
+def _std(block):
+    mean = _mean(block)
+    sq = (block[:, 0] - mean) ** 2
+    for j in range(1, block.shape[1]):
+        sq += (block[:, j] - mean) ** 2
+    return np.sqrt(sq / (block.shape[1] - 1))  # sample std, like pandas .rolling().std()
+
+
+def _max(block):
+    return block.max(axis=1)
+
+
+def _min(block):
+    return block.min(axis=1)
+
+
+def sort_panel(df):
+    """Panel sorted by ``(ticker, date)`` with a fresh RangeIndex - the layout the kernels expect."""
+    return df.sort_values(['ticker', 'date'], kind='stable').reset_index(drop=True)
+
+
+def fix_low_prices(df, threshold=5000.0):
+    """Vectorised replacement for the notebook's row-wise ``df.apply`` fix of bad ``low`` prints."""
+    low = df['low'].to_numpy(dtype=float)
+    mid = (df['open'].to_numpy(dtype=float) + df['close'].to_numpy(dtype=float)) / 2
+    return np.where(low > threshold, mid, low)
+
+
+def compute_features(df, spec=None, presorted=False, first_close=None):
+    """Return ``df`` sorted by ``(ticker, date)`` with every feature in ``spec`` appended.
+
+    ``df`` needs ``date, ticker, open, high, low, close, volume``. Pass ``presorted=True``
+    when it is already grouped by ticker in date order. ``first_close`` optionally maps
+    ticker -> the close the ``cumulative_return`` is measured from (the incremental store
+    passes each ticker's very first stored close; by default the first bar in ``df``).
+    """
+    spec = spec or FeatureSpec()
+    if not presorted:
+        df = sort_panel(df)
+    out = {}
+    pos = segment_positions(df['ticker'].to_numpy())
+    opn = df['open'].to_numpy(dtype=float)
+    high = df['high'].to_numpy(dtype=float)
+    low = fix_low_prices(df, spec.low_fix_threshold)
+    close = df['close'].to_numpy(dtype=float)
+    volume = df['volume'].to_numpy(dtype=float)
+
+    if spec.calendar:
+        dates = pd.DatetimeIndex(pd.to_datetime(df['date']))
+        out['day_of_week'] = dates.dayofweek.to_numpy()
+        out['month'] = dates.month.to_numpy()
+        out['is_month_end'] = dates.is_month_end.astype(np.int8)
+
+    prev_close = shift(close, 1, pos)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['daily_return'] = close / prev_close - 1
+        out['log_return'] = np.log(close / prev_close)
+        out['open_close_spread'] = opn - close
+        out['high_low_spread'] = high - low
+        if first_close is None:
+            base = close[(np.arange(len(close)) - pos)] if len(close) else close
+        else:
+            base = df['ticker'].map(first_close).to_numpy(dtype=float)
+        out['cumulative_return'] = close / base - 1
+
+        for n in spec.windows:
+            mean = rolling(close, n, pos, _mean)
+            std = rolling(close, n, pos, _std)
+            out[f'rolling_mean_{n}'] = mean
+            out[f'rolling_std_{n}'] = std
+            out[f'rolling_max_{n}'] = rolling(close, n, pos, _max)
+            out[f'rolling_min_{n}'] = rolling(close, n, pos, _min)
+            out[f'momentum_{n}'] = close - shift(close, n, pos)
+            out[f'z_score_{n}'] = (close - mean) / std
+            upper = mean + spec.bollinger_k * std
+            lower = mean - spec.bollinger_k * std
+            out[f'bollinger_upper_{n}'] = upper
+            out[f'bollinger_lower_{n}'] = lower
+            out[f'bollinger_width_{n}'] = (upper - lower) / mean
+
+        for k in spec.lags:
+            out[f'close_lag_{k}'] = shift(close, k, pos)
+
+        out['volume_change'] = volume / shift(volume, 1, pos) - 1
+        spike = volume / rolling(volume, spec.volume_window, pos, _mean)
+        out['volume_spike'] = spike
+        out['volume_spike_alert'] = spike > spec.volume_spike_threshold
+
+        delta = close - prev_close
+        gain = rolling(np.where(delta > 0, delta, 0.0), spec.rsi_period, pos - 1, _mean)
+        loss = rolling(np.where(delta < 0, -delta, 0.0), spec.rsi_period, pos - 1, _mean)
+        out[f'rsi_{spec.rsi_period}'] = 100 - 100 / (1 + gain / loss)
+
+    result = df.copy()
+    result['low'] = low
+    features = pd.DataFrame(out, index=result.index)
+    return pd.concat([result, features], axis=1)
@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    """Declarative description of the feature set built from ``sp500_ohlcv``.
+
+    Window features (rolling mean/std/max/min, momentum, z-score, Bollinger bands)
+    are produced once per entry of ``windows`` with an ``_N`` suffix, lags once per
+    entry of ``lags``. Defaults reproduce the Regression_Stock notebooks (N = 5, lags 1..5).
+    """
+
+    windows: tuple = (5,)
+    lags: tuple = (1, 2, 3, 4, 5)
+    bollinger_k: float = 2.0
+    volume_window: int = 5            # volume_spike = volume / rolling mean of this many bars
+    volume_spike_threshold: float = 2.0
+    rsi_period: int = 14
+    low_fix_threshold: float = 5000.0  # bad 'low' prints above this are replaced by (open + close) / 2
+    calendar: bool = True
+
+    @property
+    def lookback(self):
+        """Bars of history a new bar needs to get every feature (longest window/lag + 1 for returns)."""
+        return max(max(self.windows, default=1), max(self.lags, default=0) + 1,
+                   self.volume_window + 1, self.rsi_period + 1)
+
+    def columns(self):
+        """Names of the generated feature columns, in output order."""
+        cols = []
+        if self.calendar:
+            cols += ['day_of_week', 'month', 'is_month_end']
+        cols += ['daily_return', 'log_return', 'open_close_spread', 'high_low_spread', 'cumulative_return']
+        for n in self.windows:
+            cols += [f'rolling_mean_{n}', f'rolling_std_{n}', f'rolling_max_{n}', f'rolling_min_{n}',
+                     f'momentum_{n}', f'z_score_{n}',
+                     f'bollinger_upper_{n}', f'bollinger_lower_{n}', f'bollinger_width_{n}']
+        cols += [f'close_lag_{k}' for k in self.lags]
+        cols += ['volume_change', 'volume_spike', 'volume_spike_alert', f'rsi_{self.rsi_period}']
+        return cols
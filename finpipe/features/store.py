@@ -0,0 +1,208 @@
+"""Incremental, append-only feature store (Parquet dataset keyed by ``(date, ticker)``).
+
+Layout under ``path``::
+
+    features/part-000000.parquet ...   feature rows, one file per build/append batch
+    state.parquet                      last ``spec.lookback`` raw bars per ticker
+    meta.json                          spec, first close, last date and factor version per ticker
+
+A nightly refresh only computes the new bars: the stored trailing bars are glued in
+front of the new ones, ``compute_features`` runs on that short frame, and only rows
+newer than each ticker's last stored date are appended. Every feature depends only
+on the bars of its own window (see ``engine``), so the appended values equal a full
+recompute bit for bit. Bars dated on or before the last stored date are ignored;
+call ``build`` to recompute after history is corrected.
+
+``refresh_from_db`` reads the split- and dividend-adjusted series
+(``finpipe.adjustments``). A split rescales every earlier adjusted bar without
+adding one, so it also keeps each ticker's ``factor_versions`` digest: a ticker
+whose factors changed is dropped (``forget``) and recomputed from its full history.
+"""
+import json
+import time
+import dataclasses
+from pathlib import Path
+
+import pandas as pd
+
+from .spec import FeatureSpec
+from .engine import compute_features, sort_panel
+
+RAW_COLUMNS = ['date', 'ticker', 'open', 'high', 'low', 'close', 'volume']
+
+
+class FeatureStore:
+    """Persisted per-ticker features that are extended for new bars only."""
+
+    def __init__(self, path, spec=None):
+        self.path = Path(path)
+        self.parts = self.path / 'features'
+        meta = self._load_meta()
+        stored_spec = FeatureSpec(**meta['spec']) if meta else None
+        if spec is not None and stored_spec is not None and spec != stored_spec:
+            raise ValueError(f"store at {self.path} was built with {stored_spec}; "
+                             f"call build() to recompute with {spec}")
+        self.spec = spec or stored_spec or FeatureSpec()
+        self.first_close = meta.get('first_close', {}) if meta else {}
+        self.last_date = {t: pd.Timestamp(d) for t, d in meta.get('last_date', {}).items()} if meta else {}
+        self.factors = meta.get('factors', {}) if meta else {}
+
+    # --- persistence -------------------------------------------------------------------
+
+    def _load_meta(self):
+        try:
+            with open(self.path / 'meta.json') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _save_meta(self):
+        meta = {
+            'spec': dataclasses.asdict(self.spec),
+            'first_close': self.first_close,
+            'last_date': {t: d.isoformat() for t, d in self.last_date.items()},
+            'factors': self.factors,
+        }
+        tmp = self.path / 'meta.json.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(meta, f, indent=1, sort_keys=True)
+        tmp.replace(self.path / 'meta.json')
+
+    def _state(self):
+        try:
+            return pd.read_parquet(self.path / 'state.parquet')
+        except FileNotFoundError:
+            return pd.DataFrame(columns=RAW_COLUMNS)
+
+    def _write_part(self, features):
+        self.parts.mkdir(parents=True, exist_ok=True)
+        number = len(list(self.parts.glob('part-*.parquet')))
+        features.to_parquet(self.parts / f'part-{number:06d}.parquet', index=False)
+
+    def _remember(self, bars):
+        """Update trailing state, first closes and last dates from raw ``bars`` (sorted)."""
+        state = sort_panel(pd.concat([self._state(), bars[RAW_COLUMNS]], ignore_index=True))
+        state = state.groupby('ticker', sort=False).tail(self.spec.lookback)
+        state.to_parquet(self.path / 'state.parquet', index=False)
+        for ticker, close in bars.groupby('ticker', sort=False)['close'].first().items():
+            self.first_close.setdefault(ticker, float(close))
+        for ticker, day in bars.groupby('ticker', sort=False)['date'].max().items():
+            self.last_date[ticker] = pd.Timestamp(day)
+        self._save_meta()
+
+    # --- public API --------------------------------------------------------------------
+
+    def build(self, bars):
+        """Full recompute from raw ``bars``; replaces whatever the store held."""
+        started = time.perf_counter()
+        self.path.mkdir(parents=True, exist_ok=True)
+        for part in self.parts.glob('part-*.parquet'):
+            part.unlink()
+        (self.path / 'state.parquet').unlink(missing_ok=True)
+        self.first_close, self.last_date, self.factors = {}, {}, {}
+        bars = sort_panel(_normalise(bars))
+        features = compute_features(bars, self.spec, presorted=True)
+        self._write_part(features)
+        self._remember(bars)
+        print(f"Feature store built: {len(features):,} rows in {time.perf_counter() - started:.2f}s")
+        return features
+
+    def append(self, bars):
+        """Compute and persist features for bars newer than each ticker's last stored date.
+
+        Returns the appended feature rows.
+        """
+        started = time.perf_counter()
+        bars = _normalise(bars)
+        last = bars['ticker'].map(self.last_date)
+        new = sort_panel(bars[last.isna() | (bars['date'] > last)])
+        if new.empty:
+            print("Feature store up to date.")
+            return new
+        state = self._state()
+        state = state[state['ticker'].isin(new['ticker'].unique())]
+        window = sort_panel(pd.concat([state, new[RAW_COLUMNS]], ignore_index=True).assign(
+            _new=lambda d: [False] * len(state) + [True] * len(new)))
+        first_close = dict(self.first_close)
+        for ticker, close in new.groupby('ticker', sort=False)['close'].first().items():
+            first_close.setdefault(ticker, float(close))
+        features = compute_features(window, self.spec, presorted=True, first_close=first_close)
+        features = features[features.pop('_new')].reset_index(drop=True)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._write_part(features)
+        self._remember(new)
+        print(f"Feature store appended {len(features):,} rows in {time.perf_counter() - started:.3f}s")
+        return features
+
+    def forget(self, tickers):
+        """Drop the features, trailing bars and meta of ``tickers`` so the next append recomputes them."""
+        tickers = {str(t) for t in tickers}
+        for part in sorted(self.parts.glob('part-*.parquet')):
+            df = pd.read_parquet(part)
+            keep = ~df['ticker'].astype(str).isin(tickers)
+            if not keep.all():
+                df[keep].to_parquet(part, index=False)
+        state = self._state()
+        state[~state['ticker'].astype(str).isin(tickers)].to_parquet(self.path / 'state.parquet', index=False)
+        for meta in (self.first_close, self.last_date, self.factors):
+            for ticker in tickers:
+                meta.pop(ticker, None)
+        self._save_meta()
+
+    def refresh_from_db(self, engine, table='sp500_ohlcv', adjusted=True):
+        """Append the bars of ``table`` after the oldest per-ticker last date.
+
+        With ``adjusted`` (default) the adjusted series is read, and tickers whose
+        adjustment factors changed since the last refresh are recomputed in full.
+        """
+        from sqlalchemy import text
+        from ..adjustments import price_source, load_factors, factor_versions
+        source = price_source(engine, table, adjusted)
+        versions = factor_versions(load_factors(engine, table)) if adjusted else {}
+        select = f"SELECT date, ticker, open, high, low, close, volume FROM {source}"
+        if not self.last_date:
+            features = self.build(pd.read_sql(text(select), engine))
+        else:
+            changed = sorted(t for t in self.last_date if versions.get(t) != self.factors.get(t))
+            if changed:
+                print(f"Adjustment factors changed for {len(changed)} tickers; recomputing them")
+                self.forget(changed)
+            since = min(self.last_date.values(), default=pd.Timestamp.min).date()
+            params = {'since': since, **{f't{i}': t for i, t in enumerate(changed)}}
+            where = "date > :since" + (f" OR ticker IN ({', '.join(f':t{i}' for i in range(len(changed)))})"
+                                       if changed else "")
+            features = self.append(pd.read_sql(text(f"{select} WHERE {where}"), engine, params=params))
+        self.factors = {t: versions[t] for t in self.last_date if t in versions}
+        self._save_meta()
+        return features
+
+    def read(self, tickers=None, start=None, end=None, columns=None):
+        """Stored features, optionally filtered (filters are pushed down to the Parquet scan)."""
+        filters = []
+        if tickers is not None:
+            filters.append(('ticker', 'in', list(tickers)))
+        if start is not None:
+            filters.append(('date', '>=', pd.Timestamp(start)))
+        if end is not None:
+            filters.append(('date', '<=', pd.Timestamp(end)))
+        df = pd.read_parquet(self.parts, columns=columns, filters=filters or None)
+        return sort_panel(df) if {'ticker', 'date'} <= set(df.columns) else df
+
+    def compact(self):
+        """Rewrite all parts as a single sorted file (run occasionally; appends add one file each)."""
+        df = self.read()
+        for part in self.parts.glob('part-*.parquet'):
+            part.unlink()
+        self._write_part(df)
+        return len(df)
+
+
+def _normalise(bars):
+    """Raw bars with naive ``datetime64`` dates (DB ``DATE`` values arrive as objects)."""
+    bars = bars[RAW_COLUMNS].copy()
+    dates = pd.to_datetime(bars['date'])
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    bars['date'] = dates.astype('datetime64[ns]')
+    bars['ticker'] = bars['ticker'].astype(str)
+    return bars
@@ -0,0 +1,12 @@
+"""Funding-risk analytics: the Funds_Analysis notebooks' aggregations and tests in one streamed scan."""
+from .cubes import (CUBES_VERSION, RATING_SCORES, BUCKETS, CROSSTABS, bucket, engineer, iter_deal_chunks,
+                    file_digest, aggregate_frames, funding_cubes)
+from .streaming import (STAT_COLUMNS, TEST_COLUMNS, CHI2_COLUMNS, RunningMoments, QuantileSketch, ContingencyTable,
+                        welch_test, FundingStats, stream_stats)
+
+__all__ = [
+    'CUBES_VERSION', 'RATING_SCORES', 'BUCKETS', 'CROSSTABS', 'bucket', 'engineer', 'iter_deal_chunks',
+    'file_digest', 'aggregate_frames', 'funding_cubes',
+    'STAT_COLUMNS', 'TEST_COLUMNS', 'CHI2_COLUMNS', 'RunningMoments', 'QuantileSketch', 'ContingencyTable',
+    'welch_test', 'FundingStats', 'stream_stats',
+]
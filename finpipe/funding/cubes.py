@@ -0,0 +1,318 @@
+"""Funding-risk aggregations of the ``Analytics/Funds_Analysis`` notebooks, in one streamed scan.
+
+``EDA_Funding_Risks.ipynb``, ``Funding_Profile_Analysis.ipynb`` and
+``fund_risk_analytics.ipynb`` each reload the deal file and run overlapping
+``groupby`` calls, with the size / maturity / spread classes built row by row with
+``.apply``. ``funding_cubes(path)`` produces all of those tables from one pass:
+
+* the file is read in ``chunksize`` rows (pyarrow's streaming CSV / Parquet reader);
+* ``engineer`` adds any missing derived column with ``np.digitize`` / ``np.select``
+  on whole columns, using the notebooks' thresholds and labels;
+* each chunk is reduced to partial aggregates per cube (count, mean, M2, min, max,
+  unique institution pairs, contingency counts), and partials are merged exactly at
+  the end - so memory follows the chunk size and the group counts, not the file.
+  The one exception is the median of ``adjusted_spread`` by risk bucket, which keeps
+  that column (8 bytes per deal);
+* the result is pickled under ``state_dir()/funding_cubes`` keyed by a digest of
+  the file's bytes. The digest itself is memoised on (path, size, mtime), so an
+  unchanged file is answered from the cache without being read at all.
+
+Column names, values and row order match the notebooks, which stay the regression
+baseline. Their ``by_source`` and ``by_institution`` tables aggregate
+``total_funding_amount`` with ``'mean'``; that column is kept as is, and the sum
+the name suggests is added as ``sum_funding_amount``.
+"""
+import json
+import time
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..paths import state_dir
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+
+CUBES_VERSION = 2  # bump when an aggregation changes, so cached results are recomputed
+
+RATING_SCORES = {'AAA': 1, 'AA': 2, 'A': 3, 'BBB': 4, 'BB': 5, 'B': 6, 'CCC': 7, 'D': 8}
+# (column, bins, labels, right): np.digitize(column, bins, right) indexes labels
+BUCKETS = {
+    'funding_class': ('funding_amount', [252_287_500, 500_813_200, 750_850_100],
+                      ['Small', 'Medium', 'Upper-Medium', 'Large'], False),
+    'funding_size_class': ('funding_amount', [250_000_000, 750_000_000], ['small', 'medium', 'large'], False),
+    'maturity_bucket': ('days_to_maturity', [180, 365], ['short_term', 'medium_term', 'long_term'], True),
+    'spread_level': ('interest_spread', [40, 70], ['low', 'medium', 'high'], False),
+}
+CROSSTABS = ['risk_bucket', 'funding_source', 'funding_currency', 'credit_rating']
+
+
+def bucket(values, bins, labels, right=False):
+    """Vectorised ``if x < b0: l0 elif x < b1: l1 ... else: ln`` (``<=`` with ``right=True``)."""
+    return np.asarray(labels, dtype=object)[np.digitize(np.asarray(values, dtype=np.float64), bins, right=right)]
+
+
+def engineer(df):
+    """The EDA notebook's derived columns, added where missing, without a per-row ``apply``."""
+    df = df.copy()
+    if df['refinancing_needed'].dtype != np.int64:
+        df['refinancing_needed'] = df['refinancing_needed'].astype(bool).astype(np.int64)
+    for name, (column, bins, labels, right) in BUCKETS.items():
+        if name not in df:
+            df[name] = bucket(df[column], bins, labels, right)
+    if 'rating_score' not in df:
+        df['rating_score'] = df['credit_rating'].map(RATING_SCORES)
+    if 'is_foreign_currency' not in df:
+        df['is_foreign_currency'] = (df['funding_currency'] != 'USD').astype(int)
+    if 'adjusted_spread' not in df:
+        df['adjusted_spread'] = df['interest_spread'] / df['days_to_maturity']
+    if 'risk_bucket' not in df:
+        score = df['rating_score'].to_numpy(dtype=np.float64)
+        level = df['spread_level'].to_numpy()
+        df['risk_bucket'] = np.select([(level == 'high') & (score >= 6), (level == 'medium') & (score >= 4)],
+                                      ['very_high_risk', 'moderate_risk'], 'low_risk')
+    return df
+
+
+# --- mergeable partial aggregates ----------------------------------------------------
+
+def _moments(df, keys, columns):
+    """Per-group ``count / mean / m2 / min / max`` of ``columns`` - mergeable across chunks."""
+    g = df.groupby(keys, sort=False)[columns]
+    parts = {'count': g.count(), 'mean': g.mean(), 'var': g.var(ddof=0), 'min': g.min(), 'max': g.max()}
+    parts['m2'] = parts.pop('var') * parts['count']
+    return pd.concat(parts, axis=1)
+
+
+def _merge_moments(partials, keys):
+    """Combine chunk partials: exact count, mean, M2 (pairwise-update form), min and max per group."""
+    df = pd.concat(partials)
+    levels = list(range(len(keys)))
+
+    def by_group(frame, how):
+        return getattr(frame.groupby(level=levels, sort=True), how)()
+
+    count = by_group(df['count'], 'sum')
+    mean = by_group(df['mean'] * df['count'], 'sum') / count
+    m2 = by_group(df['m2'] + (df['mean'] - mean.reindex(df.index).to_numpy()) ** 2 * df['count'], 'sum')
+    out = pd.concat({'count': count, 'mean': mean, 'm2': m2, 'min': by_group(df['min'], 'min'),
+                     'max': by_group(df['max'], 'max')}, axis=1)
+    out.index.names = keys
+    return out
+
+
+class _Accumulator:
+    """Partial aggregates of every cube, fed one chunk at a time."""
+
+    MOMENTS = {
+        'funding_source': (['funding_source'], ['funding_amount']),
+        'institution_id': (['institution_id'], ['funding_amount']),
+        'funding_currency': (['funding_currency'], ['funding_amount']),
+        'funding_class': (['funding_class'], ['funding_amount']),
+        'maturity_date': (['maturity_date'], ['funding_amount', 'interest_spread', 'refinancing_needed']),
+        'risk_segment': (['risk_bucket', 'credit_rating', 'rating_score'],
+                         ['funding_amount', 'interest_spread', 'refinancing_needed']),
+        'risk_adjusted_spread': (['risk_bucket'], ['adjusted_spread']),
+        'all': (['_all'], ['funding_amount']),
+    }
+
+    def __init__(self):
+        self.moments = {name: [] for name in self.MOMENTS}
+        self.numeric = None
+        self.by_refinancing = []
+        self.pairs = []
+        self.counts = {column: [] for column in CROSSTABS}
+        self.median_values = []
+        self.rows = 0
+
+    def add(self, chunk):
+        df = engineer(chunk).assign(_all='all')
+        df['maturity_date'] = pd.to_datetime(df['maturity_date'])
+        self.rows += len(df)
+        for name, (keys, columns) in self.MOMENTS.items():
+            self.moments[name].append(_moments(df, keys, columns))
+        if self.numeric is None:
+            self.numeric = [c for c in df.select_dtypes(include=[np.number, bool]).columns if c != 'refinancing_needed']
+        self.by_refinancing.append(_moments(df, ['refinancing_needed'], self.numeric))
+        keys = ['risk_bucket', 'credit_rating', 'rating_score', 'institution_id']
+        self.pairs.append(df[keys].drop_duplicates())
+        for column in CROSSTABS:
+            self.counts[column].append(df.groupby([column, 'refinancing_needed']).size())
+        self.median_values.append(df[['risk_bucket', 'adjusted_spread']])
+
+    def result(self):
+        merged = {name: _merge_moments(self.moments[name], keys) for name, (keys, _) in self.MOMENTS.items()}
+
+        def amount_table(name, total):
+            m = merged[name]
+            mean, count = m[('mean', 'funding_amount')], m[('count', 'funding_amount')]
+            table = pd.DataFrame({'average_funding_amount': mean,
+                                  'total_funding_amount': mean * count if total == 'sum' else mean,
+                                  'deal_count': count})
+            if total != 'sum':
+                table['sum_funding_amount'] = mean * count
+            return table.reset_index()
+
+        cubes = {'by_source': amount_table('funding_source', 'mean'),  # the notebook's "total" is a mean
+                 'by_institution': amount_table('institution_id', 'mean'),
+                 'by_currency': amount_table('funding_currency', 'sum')}
+
+        m = merged['funding_class']
+        classes = pd.DataFrame({'number_of_deals': m[('count', 'funding_amount')],
+                                'total_amount': m[('mean', 'funding_amount')] * m[('count', 'funding_amount')],
+                                'average_deal_size': m[('mean', 'funding_amount')]}).reset_index()
+        classes['percent_of_total_funding'] = (classes['total_amount'] / classes['total_amount'].sum() * 100).round(2)
+        cubes['by_funding_class'] = classes.sort_values(by='total_amount', ascending=False)
+
+        m = merged['maturity_date']
+        cubes['maturity_trend'] = pd.DataFrame({
+            'average_funding_amount': m[('mean', 'funding_amount')],
+            'average_interest_spread': m[('mean', 'interest_spread')],
+            'refinancing_probability': m[('mean', 'refinancing_needed')]}).reset_index()
+
+        m = merged['risk_segment']
+        pairs = pd.concat(self.pairs).drop_duplicates()
+        unique = pairs.groupby(['risk_bucket', 'credit_rating', 'rating_score'])['institution_id'].nunique()
+        cubes['risk_segmentation'] = pd.DataFrame({
+            ('institution_id', 'nunique'): unique,
+            ('funding_amount', 'count'): m[('count', 'funding_amount')],
+            ('funding_amount', 'sum'): m[('mean', 'funding_amount')] * m[('count', 'funding_amount')],
+            ('funding_amount', 'mean'): m[('mean', 'funding_amount')],
+            ('interest_spread', 'mean'): m[('mean', 'interest_spread')],
+            ('refinancing_needed', 'mean'): m[('mean', 'refinancing_needed')]})
+
+        m = merged['risk_adjusted_spread']
+        values = pd.concat(self.median_values)
+        count = m[('count', 'adjusted_spread')]
+        cubes['adjusted_spread_by_risk'] = pd.DataFrame({
+            'avg_adjusted_spread': m[('mean', 'adjusted_spread')],
+            'median_adjusted_spread': values.groupby('risk_bucket')['adjusted_spread'].median(),
+            'std_adjusted_spread': np.sqrt(m[('m2', 'adjusted_spread')] / (count - 1)),
+            'min_adjusted_spread': m[('min', 'adjusted_spread')],
+            'max_adjusted_spread': m[('max', 'adjusted_spread')],
+            'count': count}).reset_index()
+
+        for column in CROSSTABS:
+            table = pd.concat(self.counts[column]).groupby(level=[0, 1]).sum().unstack(fill_value=0)
+            table.columns.name = 'refinancing_needed'
+            cubes[f'refinancing_by_{column}'] = table
+        refinancing = cubes['refinancing_by_risk_bucket'].copy()
+        refinancing['Total'] = refinancing.sum(axis=1)
+        refinancing['Refinancing_Rate (%)'] = ((refinancing[1] / refinancing['Total'] * 100).round(2)
+                                               if 1 in refinancing.columns else 0.0)
+        cubes['refinancing_counts'] = refinancing
+        cubes['chi2_tests'] = _chi2_tests({c: cubes[f'refinancing_by_{c}'] for c in CROSSTABS[1:]})
+
+        m = _merge_moments(self.by_refinancing, ['refinancing_needed'])
+        cubes['by_refinancing'] = m['mean'][self.numeric]
+
+        m = merged['all']
+        n = m[('count', 'funding_amount')].iloc[0]
+        cubes['funding_amount_summary'] = pd.Series({
+            'count': n, 'mean': m[('mean', 'funding_amount')].iloc[0],
+            'std': np.sqrt(m[('m2', 'funding_amount')].iloc[0] / (n - 1)),
+            'min': m[('min', 'funding_amount')].iloc[0], 'max': m[('max', 'funding_amount')].iloc[0]})
+        return cubes
+
+
+def _chi2_tests(tables):
+    """``chi2_contingency`` of each ``X x refinancing_needed`` table, as in the EDA notebook (needs scipy)."""
+    try:
+        from scipy.stats import chi2_contingency
+    except ImportError:  # optional dependency
+        return pd.DataFrame(columns=['chi2', 'p_value', 'dof'])
+    rows = {}
+    for column, table in tables.items():
+        chi2, p, dof, _ = chi2_contingency(table)
+        rows[column] = {'chi2': chi2, 'p_value': p, 'dof': dof}
+    return pd.DataFrame(rows).T
+
+
+# --- files, fingerprints and the cache -----------------------------------------------
+
+def iter_deal_chunks(path, chunksize=1_000_000):
+    """Frames of about ``chunksize`` deals from a CSV or Parquet file."""
+    path = Path(path)
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        if pa is None:
+            raise ImportError("reading Parquet needs pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif pa is not None:
+        # types are inferred from the first block only; pin the ones a later block could contradict
+        types = {'funding_amount': pa.float64(), 'interest_spread': pa.float64(), 'maturity_date': pa.string(),
+                 'institution_id': pa.string()}
+        reader = pa_csv.open_csv(path, read_options=pa_csv.ReadOptions(block_size=chunksize * 96),
+                                 convert_options=pa_csv.ConvertOptions(column_types=types))
+        for batch in reader:
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def file_digest(path, root=None):
+    """BLAKE2 digest of the file's bytes, memoised on (path, size, mtime) in ``root/digests.json``."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    memo_path = Path(root or state_dir() / 'funding_cubes') / 'digests.json'
+    try:
+        memo = json.loads(memo_path.read_text())
+    except FileNotFoundError:
+        memo = {}
+    key = f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+    if key not in memo:
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        memo = {k: v for k, v in memo.items() if not k.startswith(f"{path}|")}
+        memo[key] = h.hexdigest()
+        memo_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = memo_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(memo, indent=1))
+        tmp.replace(memo_path)
+    return memo[key]
+
+
+def aggregate_frames(frames):
+    """All cubes from an iterable of deal frames (or one frame)."""
+    acc = _Accumulator()
+    for chunk in [frames] if isinstance(frames, pd.DataFrame) else frames:
+        acc.add(chunk)
+    return acc.result()
+
+
+def funding_cubes(path, chunksize=1_000_000, cache=True, root=None, log=print):
+    """``{name: DataFrame}`` of every funding-risk cube for the deal file at ``path``.
+
+    Cubes: ``by_source``, ``by_institution``, ``by_currency``, ``by_funding_class``,
+    ``maturity_trend``, ``risk_segmentation``, ``adjusted_spread_by_risk``,
+    ``refinancing_counts``, ``refinancing_by_<column>``, ``chi2_tests``,
+    ``by_refinancing`` and ``funding_amount_summary``.
+    """
+    started = time.perf_counter()
+    root = Path(root or state_dir() / 'funding_cubes')
+    target = root / f"{file_digest(path, root)}-v{CUBES_VERSION}.pkl" if cache else None
+    if target is not None and target.exists():
+        cubes = pd.read_pickle(target)
+        if log:
+            log(f"Funding cubes for {path} from cache in {time.perf_counter() - started:.2f}s")
+        return cubes
+    acc = _Accumulator()
+    for chunk in iter_deal_chunks(path, chunksize):
+        acc.add(chunk)
+    cubes = acc.result()
+    if target is not None:
+        root.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix('.tmp')
+        pd.to_pickle(cubes, tmp)
+        tmp.replace(target)
+    if log:
+        log(f"Funding cubes for {acc.rows:,} deals in {time.perf_counter() - started:.2f}s")
+    return cubes
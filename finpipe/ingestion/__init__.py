@@ -0,0 +1,27 @@
+"""Shared ingestion engine: pluggable providers plus a concurrent download scheduler."""
+from .frames import (OHLCV_COLUMNS, PRICE_COLUMNS, DATE_DTYPE, empty_ohlcv, to_ohlcv,
+                     compact_ohlcv, concat_ohlcv)
+from .providers import OptionChain, YahooProvider, FakeProvider
+from .scheduler import (RateLimiter, RetryPolicy, TaskTimeout, ScheduleResult,
+                        DownloadScheduler, call_with_timeout)
+from .actions import ACTION_COLUMNS, empty_actions, unadjust_splits, history_actions_long
+from .cache import ASSET_TTLS, CacheMiss, asset_class, request_key, CachedProvider
+from .fetch import fetch_history, OhlcvStream, stream_history
+from .batches import wide_to_long, BatchedDownload, download_batches
+from .universe import cached_universe, scrape_sp500, sp500_symbols
+from .state import (HighWaterMarkStore, IncrementalStarts, read_db_high_water_marks,
+                    plan_starts, incremental_starts)
+
+__all__ = [
+    'OHLCV_COLUMNS', 'PRICE_COLUMNS', 'DATE_DTYPE', 'empty_ohlcv', 'to_ohlcv',
+    'compact_ohlcv', 'concat_ohlcv',
+    'OptionChain', 'YahooProvider', 'FakeProvider',
+    'RateLimiter', 'RetryPolicy', 'TaskTimeout', 'ScheduleResult',
+    'DownloadScheduler', 'call_with_timeout',
+    'ACTION_COLUMNS', 'empty_actions', 'unadjust_splits', 'history_actions_long',
+    'ASSET_TTLS', 'CacheMiss', 'asset_class', 'request_key', 'CachedProvider',
+    'fetch_history', 'OhlcvStream', 'stream_history',
+    'wide_to_long', 'BatchedDownload', 'download_batches',
+    'cached_universe', 'scrape_sp500', 'sp500_symbols',
+    'HighWaterMarkStore', 'IncrementalStarts', 'read_db_high_water_marks', 'plan_starts', 'incremental_starts',
+]
@@ -0,0 +1,97 @@
+"""Raw (unadjusted) prices and corporate actions from Yahoo answers.
+
+Yahoo adjusts for splits even with ``auto_adjust=False``. Its Open / High / Low /
+Close, Volume and Dividends are restated in today's share count, and only
+``Adj Close`` adds the dividend adjustment. ``history()`` defaults to
+``auto_adjust=True``, so the tables used to mix split-adjusted,
+dividend-adjusted and partly adjusted closes, and every new split changed history.
+
+A download with ``raw=True`` asks for ``auto_adjust=False, actions=True`` and
+undoes the split adjustment. Every bar is multiplied by the product of the
+split ratios after it (volume and dividends are divided by it). Yahoo restates
+the bars of every split up to the moment of the request, not just those up to
+the requested ``end``, so the request runs ``through`` today and the bars past
+``end`` are dropped only after the ratios are applied (``trim_bars``); their
+actions are kept. A split in the ``lag_days`` gap is then undone like any other.
+What gets stored is the price that traded that day, and it never changes.
+The non-zero ``Dividends`` / ``Stock Splits`` rows come back as a separate actions
+frame for ``finpipe.adjustments``, which serves the adjusted series at read time.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from .frames import OHLCV_COLUMNS, PRICE_COLUMNS
+
+ACTION_COLUMNS = ['ticker', 'date', 'dividend', 'split']
+ACTION_FIELDS = {'Dividends': 'dividends', 'Stock Splits': 'stock splits'}
+
+
+def empty_actions():
+    return pd.DataFrame({'ticker': pd.Series(dtype='str'), 'date': pd.Series(dtype='datetime64[s]'),
+                         'dividend': pd.Series(dtype=float), 'split': pd.Series(dtype=float)})
+
+
+def unadjust_splits(df):
+    """``(ohlcv, actions)`` from a long frame with Yahoo's ``dividends`` / ``stock splits`` columns.
+
+    ``df`` holds any number of tickers (``date, ticker, open, high, low, close, volume``
+    plus the two action columns, 0 meaning none). Prices are multiplied and volume
+    divided by the product of each ticker's later split ratios, so ``df`` must reach
+    the time of the request (see the module docstring). ``actions`` lists the
+    non-zero rows with the dividend restated the same way, and ``split`` is the ratio,
+    e.g. 4.0 for a 4-for-1 split or 1.0 when there was none.
+    """
+    if 'stock splits' not in df.columns:
+        df = df.assign(**{'stock splits': 0.0})
+    if 'dividends' not in df.columns:
+        df = df.assign(dividends=0.0)
+    df = df.sort_values(['ticker', 'date'], kind='stable')
+    ratio = pd.to_numeric(df['stock splits']).fillna(0.0).to_numpy(dtype=float)
+    ratio = np.where(ratio > 0, ratio, 1.0)
+    tickers = df['ticker'].astype(str).to_numpy()
+    # product of the ratios from each bar to the end of its ticker, then without the bar's own split
+    inclusive = pd.Series(ratio[::-1]).groupby(tickers[::-1], sort=False).cumprod().to_numpy()[::-1]
+    later = inclusive / ratio
+
+    out = df[OHLCV_COLUMNS].copy()
+    if (later != 1.0).any():
+        for col in PRICE_COLUMNS:
+            out[col] = out[col].to_numpy(dtype=float) * later
+        out['volume'] = (pd.to_numeric(out['volume']) / later).round()
+
+    dividend = pd.to_numeric(df['dividends']).fillna(0.0).to_numpy(dtype=float) * later
+    has_action = (dividend != 0) | (ratio != 1.0)
+    if not has_action.any():
+        return out, empty_actions()
+    dates = pd.to_datetime(df['date'].to_numpy()[has_action])
+    if getattr(dates, 'tz', None) is not None:
+        dates = dates.tz_localize(None)
+    actions = pd.DataFrame({'ticker': tickers[has_action], 'date': dates.normalize().astype('datetime64[s]'),
+                            'dividend': dividend[has_action], 'split': ratio[has_action]})
+    return out, actions.reset_index(drop=True)
+
+
+def through_today(end, through=None):
+    """Exclusive end date of a raw request for bars before ``end``: ``through`` or tomorrow, never before ``end``."""
+    through = pd.Timestamp(through if through is not None else date.today() + timedelta(days=1))
+    return max(through, pd.Timestamp(end)).date()
+
+
+def trim_bars(df, end):
+    """The rows of ``df`` dated before ``end`` (exclusive, like a Yahoo request)."""
+    dates = pd.to_datetime(df['date'])
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    keep = (dates < pd.Timestamp(end)).to_numpy()
+    return df if keep.all() else df[keep]
+
+
+def history_actions_long(raw, ticker):
+    """A ``yf.Ticker(t).history(actions=True)`` frame as long rows with the action columns kept."""
+    df = raw.reset_index()
+    df['ticker'] = ticker
+    df = df.rename(columns={'Date': 'date', 'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close',
+                            'Volume': 'volume', **ACTION_FIELDS})
+    return df[[c for c in [*OHLCV_COLUMNS, *ACTION_FIELDS.values()] if c in df.columns]]
@@ -0,0 +1,127 @@
+"""Batched ``yf.download`` for large universes (the S&P 500 loader).
+
+One ``yf.download`` of ~500 symbols returns a very wide ``(ticker, field)`` frame,
+and ``stack`` then builds the long copy next to it. Here the universe is split
+into ``batch_size`` tickers; each batch is downloaded, reshaped to long OHLCV,
+compacted and handed to the caller before the next batch is requested, so peak
+memory is bounded by one batch. A batch that fails after retries only marks its
+own tickers as failed.
+"""
+import time
+
+import pandas as pd
+
+from .frames import OHLCV_COLUMNS, empty_ohlcv, compact_ohlcv
+from .actions import ACTION_FIELDS, empty_actions, unadjust_splits, through_today, trim_bars
+from .providers import YahooProvider
+from .scheduler import DownloadScheduler
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def wide_to_long(raw, actions=False):
+    """Long OHLCV rows from a wide ``yf.download`` frame (``(ticker, field)`` or ``(field, ticker)`` columns).
+
+    All-NaN columns (delisted symbols) and dates on which a ticker has no prices are dropped.
+    ``actions=True`` keeps the ``dividends`` / ``stock splits`` columns of an ``actions=True`` download.
+    """
+    if raw is None or raw.empty:
+        return empty_ohlcv()
+    raw = raw.dropna(how='all', axis=1)
+    # group_by='ticker' puts the ticker on level 0; the default layout has it on level 1
+    ticker_level = 0 if set(FIELDS) & set(raw.columns.get_level_values(1)) else 1
+    df = raw.stack(level=ticker_level, future_stack=True)
+    df.index.names = ['date', 'ticker']
+    df.columns = df.columns.str.lower()
+    for col in OHLCV_COLUMNS[2:]:
+        if col not in df.columns:
+            df[col] = pd.NA  # e.g. a batch where Yahoo sent no Volume
+    df = df.dropna(how='all', subset=['open', 'high', 'low', 'close'])
+    extra = [c for c in ACTION_FIELDS.values() if c in df.columns] if actions else []
+    return df[OHLCV_COLUMNS[2:] + extra].reset_index()
+
+
+class BatchedDownload:
+    """Iterable of long OHLCV frames, one per ticker batch, downloaded as it is consumed.
+
+    Single use. Once exhausted, ``failed`` lists the tickers of failed batches plus
+    tickers Yahoo returned nothing for (``errors`` gives the reason), and ``rows`` the number of rows yielded.
+    With ``raw=True`` the prices are not split-adjusted and ``actions`` holds the
+    splits and dividends of the downloaded tickers (see ``finpipe.ingestion.actions``);
+    the request then runs ``through`` today and the bars from ``end`` on are dropped.
+    """
+
+    def __init__(self, tickers, start, end, batch_size=50, provider=None, scheduler=None, compact=True,
+                 raw=False, through=None, **download_kwargs):
+        self.tickers = list(dict.fromkeys(tickers))
+        self.start, self.end = start, end
+        self.batch_size = batch_size
+        self.scheduler = scheduler or DownloadScheduler(provider or YahooProvider(), max_workers=1)
+        self.compact = compact
+        self.raw = raw
+        self.request_end = through_today(end, through) if raw else end
+        self.download_kwargs = {'group_by': 'ticker', 'threads': True, 'progress': False,
+                                'auto_adjust': False, **({'actions': True} if raw else {}), **download_kwargs}
+        self._failed = {}  # ticker -> reason
+        self._actions = []
+        self.rows = 0
+
+    def batches(self):
+        return [self.tickers[i:i + self.batch_size] for i in range(0, len(self.tickers), self.batch_size)]
+
+    def _download(self, batch):
+        kwargs = {'timeout': self.scheduler.timeout, **self.download_kwargs} if self.scheduler.timeout else \
+            self.download_kwargs
+        raw = self.scheduler.provider.download(batch, self.start, self.request_end, **kwargs)
+        if raw is None or raw.empty:
+            raise ValueError("No data returned")
+        return raw
+
+    def __iter__(self):
+        batches = self.batches()
+        started = time.perf_counter()
+        for number, batch in enumerate(batches, 1):
+            try:
+                raw = self.scheduler.call(self._download, batch)
+            except Exception as e:
+                print(f"❌ Batch {number}/{len(batches)} failed ({e}); {len(batch)} tickers skipped")
+                self._failed.update(dict.fromkeys(batch, str(e) or type(e).__name__))
+                continue
+            df = wide_to_long(raw, actions=self.raw)
+            del raw  # the wide frame is gone before the caller writes the long one
+            if self.raw:
+                df, found = unadjust_splits(df)
+                if not found.empty:
+                    self._actions.append(found)
+                df = trim_bars(df, self.end)
+            self._failed.update(dict.fromkeys(set(batch) - set(df['ticker'].unique()), "No data returned"))
+            if self.compact:
+                df = compact_ohlcv(df, self.tickers)
+            self.rows += len(df)
+            print(f"---- Batch {number}/{len(batches)}: {df['ticker'].nunique()}/{len(batch)} tickers, "
+                  f"{len(df):,} rows")
+            yield df
+        print(f"Downloaded {len(self.tickers) - len(self._failed)}/{len(self.tickers)} tickers "
+              f"({self.rows:,} rows) in {time.perf_counter() - started:.1f}s")
+
+    @property
+    def failed(self):
+        return [t for t in self.tickers if t in self._failed]
+
+    @property
+    def errors(self):
+        """``{ticker: reason}`` of the failed tickers."""
+        return {t: self._failed[t] for t in self.failed}
+
+    @property
+    def actions(self):
+        return pd.concat(self._actions, ignore_index=True) if self._actions else empty_actions()
+
+    def fail(self, tickers, reason="Could not be written"):
+        """Mark ``tickers`` as failed from the consumer side (e.g. their batch could not be written)."""
+        self._failed.update(dict.fromkeys(tickers, reason))
+
+
+def download_batches(tickers, start, end, batch_size=50, provider=None, scheduler=None, **kwargs):
+    """``BatchedDownload`` over ``tickers``; extra keyword arguments go to ``provider.download``."""
+    return BatchedDownload(tickers, start, end, batch_size, provider, scheduler, **kwargs)
@@ -0,0 +1,209 @@
+"""On-disk cache of provider answers, with per-asset TTLs, LRU eviction and offline replay.
+
+``CachedProvider`` wraps any provider and keeps the interface, so the scheduler,
+the jobs and the scripts do not change. Each ``history`` / ``download`` /
+``option_expiries`` / ``option_chain`` answer is stored under the SHA-256 of its
+request (method, tickers, date range, interval and the other yfinance arguments)::
+
+    <root>/<method>/<first two hex digits>/<sha256>.pkl
+
+A resumed run after a crash, a retry of failed tickers or a development run then
+reads the answer from disk instead of asking Yahoo again.
+
+* Freshness: an answer is served while it is younger than the TTL of its asset
+  class (``ASSET_TTLS``: daily bars for hours, option chains for minutes).
+* Size: the least recently used answers are deleted once the cache grows past
+  ``max_bytes``. Recency is tracked in memory and files are touched on every hit,
+  so the next process starts from the same order (file modification times).
+* Modes: ``'readwrite'`` (default); ``'refresh'`` always fetches and rewrites;
+  ``'offline'`` never touches the network, serves whatever is stored whatever its
+  age and raises ``CacheMiss`` for anything else. A run recorded once can then be
+  replayed byte for byte, e.g. for benchmarks.
+
+Hits skip the rate limiter: the scheduler hands its ``RateLimiter`` to the cache,
+which takes a token only before a real request.
+"""
+import os
+import json
+import time
+import pickle
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+import pandas as pd
+
+from ..paths import state_dir
+
+HOUR = 3600.0
+ASSET_TTLS = {
+    'equity': 12 * HOUR,
+    'forex': 12 * HOUR,
+    'futures': 12 * HOUR,
+    'expiries': 6 * HOUR,
+    'options': 0.25 * HOUR,  # one snapshot bucket
+}
+MODES = ('readwrite', 'refresh', 'offline')
+UNKEYED = frozenset({'timeout', 'session', 'progress', 'threads'})  # do not change the answer
+
+
+class CacheMiss(LookupError):
+    """An offline cache has no answer for the request. Not retried by the scheduler."""
+
+    retryable = False
+
+
+def asset_class(ticker):
+    """``'forex'`` for ``EURUSD=X``, ``'futures'`` for ``GC=F``, ``'equity'`` otherwise."""
+    ticker = str(ticker)
+    if ticker.endswith('=X'):
+        return 'forex'
+    if ticker.endswith('=F'):
+        return 'futures'
+    return 'equity'
+
+
+def _text(value):
+    if isinstance(value, (list, tuple)):
+        return [_text(v) for v in value]
+    if hasattr(value, 'isoformat'):
+        return pd.Timestamp(value).isoformat()
+    return value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+
+def request_key(method, args, kwargs):
+    """SHA-256 of the canonical JSON of a provider call (arguments that do not change the answer dropped)."""
+    request = {'method': method, 'args': _text(list(args)),
+               'kwargs': {k: _text(v) for k, v in sorted(kwargs.items()) if k not in UNKEYED}}
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+class CachedProvider:
+    """Provider wrapper answering repeated calls from an on-disk cache.
+
+    ``ttls`` overrides entries of ``ASSET_TTLS`` (seconds; ``None`` never expires).
+    ``stats`` counts hits, misses, writes and evictions.
+    """
+
+    limits_own_rate = True  # DownloadScheduler leaves the rate limiting of misses to us
+
+    def __init__(self, provider, root=None, mode='readwrite', ttls=None, max_bytes=2 * 1024 ** 3,
+                 rate_limiter=None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.provider = provider
+        self.root = Path(root) if root else state_dir() / 'responses'
+        self.mode = mode
+        self.ttls = {**ASSET_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.rate_limiter = rate_limiter
+        self.stats = dict.fromkeys(['hits', 'misses', 'writes', 'evictions'], 0)
+        self._lock = threading.Lock()
+        self._sizes = None  # path -> bytes, least recently used first; scanned on first use
+
+    @property
+    def host(self):
+        return getattr(self.provider, 'host', 'default')
+
+    def __repr__(self):
+        return f"CachedProvider({self.provider!r}, root='{self.root}', mode={self.mode!r}, stats={self.stats})"
+
+    # --- storage -----------------------------------------------------------------------
+
+    def path(self, method, key):
+        return self.root / method / key[:2] / f'{key}.pkl'
+
+    def _load(self, path, ttl):
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)  # most recently used
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None  # missing, evicted meanwhile or truncated: fetch again
+        if self.mode != 'offline' and ttl is not None and time.time() - entry['fetched_at'] > ttl:
+            return None
+        return entry
+
+    def _store(self, path, method, key, value):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump({'method': method, 'fetched_at': time.time(), 'value': value}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)  # readers see the old answer or the new one, never half a file
+        with self._lock:
+            sizes = self._scan()
+            sizes[path] = path.stat().st_size
+            sizes.move_to_end(path)
+            self.stats['writes'] += 1
+            self._evict(sizes)
+
+    def _scan(self):
+        if self._sizes is None:
+            found = [(p.stat(), p) for p in self.root.glob('*/*/*.pkl')]
+            found.sort(key=lambda item: item[0].st_mtime_ns)
+            self._sizes = OrderedDict((p, stat.st_size) for stat, p in found)
+        return self._sizes
+
+    def _evict(self, sizes):
+        """Delete least recently used answers until ``max_bytes`` holds (the newest one always stays)."""
+        if self.max_bytes is None:
+            return
+        total = sum(sizes.values())
+        while total > self.max_bytes and len(sizes) > 1:
+            path, size = sizes.popitem(last=False)
+            total -= size
+            path.unlink(missing_ok=True)
+            self.stats['evictions'] += 1
+
+    def size(self):
+        """Bytes currently stored."""
+        with self._lock:
+            return sum(self._scan().values())
+
+    def clear(self):
+        """Delete every stored answer."""
+        with self._lock:
+            for path in self._scan():
+                path.unlink(missing_ok=True)
+            self._sizes = OrderedDict()
+
+    # --- the provider interface ----------------------------------------------------------
+
+    def _call(self, method, asset, *args, **kwargs):
+        key = request_key(method, args, kwargs)
+        path = self.path(method, key)
+        if self.mode != 'refresh':
+            entry = self._load(path, self.ttls.get(asset))
+            if entry is not None:
+                with self._lock:
+                    self.stats['hits'] += 1
+                    sizes = self._scan()
+                    if path in sizes:
+                        sizes.move_to_end(path)
+                return entry['value']
+        with self._lock:
+            self.stats['misses'] += 1
+        if self.mode == 'offline':
+            raise CacheMiss(f"offline cache has no {method}{args} in '{self.root}'")
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(self.host)
+        value = getattr(self.provider, method)(*args, **kwargs)
+        self._store(path, method, key, value)
+        return value
+
+    def history(self, ticker, start, end, timeout=None, **kwargs):
+        return self._call('history', asset_class(ticker), ticker, start, end, timeout=timeout, **kwargs)
+
+    def download(self, tickers, start, end, **kwargs):
+        classes = {asset_class(t) for t in tickers}
+        # the shortest TTL of the batch
+        asset = min(classes, key=lambda c: self.ttls.get(c) or float('inf')) if classes else 'equity'
+        return self._call('download', asset, list(tickers), start, end, **kwargs)
+
+    def option_expiries(self, ticker):
+        return self._call('option_expiries', 'expiries', ticker)
+
+    def option_chain(self, ticker, expiry):
+        return self._call('option_chain', 'options', ticker, expiry)
@@ -0,0 +1,134 @@
+import time
+from collections.abc import Mapping
+
+import pandas as pd
+
+from .frames import to_ohlcv, compact_ohlcv, concat_ohlcv
+from .actions import empty_actions, unadjust_splits, history_actions_long, through_today, trim_bars
+from .providers import YahooProvider
+from .scheduler import DownloadScheduler
+
+
+def _plan(tickers, start, end, provider, scheduler, scheduler_kwargs, compact, raw=False, through=None):
+    """Scheduler, requested tickers, the per-ticker fetch function shared by both entry points
+    and the ``{ticker: actions}`` dict it fills when ``raw``.
+
+    A raw request runs through ``through`` (default: today) so that every split Yahoo
+    has already applied is in the answer; bars from ``end`` on are dropped afterwards.
+    """
+    if scheduler is None:
+        scheduler = DownloadScheduler(provider or YahooProvider(), **scheduler_kwargs)
+    starts = start if isinstance(start, Mapping) else dict.fromkeys(tickers, start)
+    tickers = [t for t in tickers if t in starts]
+    empty_ok = getattr(start, 'known', frozenset())
+    history_kwargs = {'auto_adjust': False, 'actions': True} if raw else {}
+    request_end = through_today(end, through) if raw else end
+    actions = {}
+
+    def fetch(ticker):
+        answer = scheduler.provider.history(ticker, starts[ticker], request_end, timeout=scheduler.timeout,
+                                            **history_kwargs)
+        if ticker in empty_ok and (answer is None or answer.empty):
+            return None  # nothing new since the last run
+        df = to_ohlcv(answer, ticker)  # raises on an empty frame, so it is retried / logged
+        if raw:
+            df, found = unadjust_splits(history_actions_long(answer, ticker))
+            if not found.empty:
+                actions[ticker] = found
+            df = trim_bars(df, end)
+            if df.empty:
+                if ticker in empty_ok:
+                    return None
+                raise ValueError(f"No data before {end}")
+        return compact_ohlcv(df, tickers) if compact else df
+
+    return scheduler, tickers, fetch, actions
+
+
+def fetch_history(tickers, start, end, provider=None, scheduler=None, compact=True, raw=False, through=None,
+                  **scheduler_kwargs):
+    """Download daily OHLCV for ``tickers`` concurrently and return ``(final_df, failed)``.
+
+    ``final_df`` is the concatenated standard OHLCV frame (see ``frames.OHLCV_COLUMNS``),
+    in the compact schema unless ``compact=False``, and ``failed`` the list of tickers
+    that still failed after retries, in input order. Extra keyword arguments go to
+    ``DownloadScheduler`` (``max_workers``, ``rate_per_host``, ``timeout``, ...).
+
+    ``start`` may also be a ``{ticker: start}`` mapping (see ``state.incremental_starts``);
+    tickers missing from it are treated as up to date and not requested, and an empty
+    answer for a ticker in ``start.known`` is not a failure.
+
+    ``raw=True`` returns the prices that traded, not split-adjusted (see ``actions``);
+    Yahoo is then asked for bars ``through`` today (exclusive, default tomorrow) and
+    those from ``end`` on are dropped once the splits are undone.
+
+    Prefer ``stream_history`` when the frames only go to a sink: it never holds them all.
+    """
+    scheduler, tickers, fetch, _ = _plan(tickers, start, end, provider, scheduler, scheduler_kwargs, compact, raw,
+                                         through)
+    print(f"📥 Downloading {len(tickers)} tickers with {scheduler.max_workers} workers ...")
+    result = scheduler.map(fetch, tickers)
+    print(f"Downloaded {len(result.results)}/{len(result.results) + len(result.failed)} "
+          f"tickers in {result.elapsed:.1f}s")
+    failed = [t for t in dict.fromkeys(tickers) if t in result.failed]
+    return concat_ohlcv(result.results.values()), failed
+
+
+class OhlcvStream:
+    """Iterable of per-ticker OHLCV frames, downloaded while it is consumed.
+
+    Hand it straight to a sink (``upsert_frame(engine, stream, table, columns=OHLCV_COLUMNS)``)
+    so at most a few tickers are in memory instead of the concatenated ``final_df``.
+    Single use. Once exhausted, ``failed`` lists the failed tickers in input order
+    (``errors`` maps them to their last error), ``rows`` the number of rows yielded,
+    ``latest`` a small ``date, ticker`` frame of the newest bar per ticker (for
+    ``HighWaterMarkStore.record``) and, for a raw stream, ``actions`` the splits and
+    dividends seen.
+    """
+
+    def __init__(self, scheduler, tickers, fetch, actions=None):
+        self.scheduler = scheduler
+        self.tickers = tickers
+        self._fetch = fetch
+        self._actions = actions if actions is not None else {}
+        self._failed = {}
+        self._latest = {}
+        self.rows = 0
+        self.elapsed = 0.0
+
+    def __iter__(self):
+        print(f"📥 Streaming {len(self.tickers)} tickers with {self.scheduler.max_workers} workers ...")
+        started = time.perf_counter()
+        for ticker, df in self.scheduler.imap(self._fetch, self.tickers, failed=self._failed):
+            if df is None or df.empty:
+                continue
+            self.rows += len(df)
+            self._latest[ticker] = df['date'].max()
+            yield df
+        self.elapsed = time.perf_counter() - started
+        print(f"Downloaded {len(self.tickers) - len(self._failed)}/{len(self.tickers)} "
+              f"tickers ({self.rows:,} rows) in {self.elapsed:.1f}s")
+
+    @property
+    def failed(self):
+        return [t for t in self.tickers if t in self._failed]
+
+    @property
+    def errors(self):
+        """``{ticker: last error}`` of the failed tickers."""
+        return {t: self._failed[t] for t in self.failed}
+
+    @property
+    def latest(self):
+        return pd.DataFrame({'date': list(self._latest.values()), 'ticker': list(self._latest)})
+
+    @property
+    def actions(self):
+        found = [self._actions[t] for t in self.tickers if t in self._actions]
+        return pd.concat(found, ignore_index=True) if found else empty_actions()
+
+
+def stream_history(tickers, start, end, provider=None, scheduler=None, compact=True, raw=False, through=None,
+                   **scheduler_kwargs):
+    """Like ``fetch_history`` but returns an ``OhlcvStream`` of per-ticker frames instead of one frame."""
+    return OhlcvStream(*_plan(tickers, start, end, provider, scheduler, scheduler_kwargs, compact, raw, through))
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional dependency
+    pa = None
+
+# Standard column layout shared by every OHLCV table (bonds, commodities, etf, forex, fund, stocks)
+OHLCV_COLUMNS = ['date', 'ticker', 'open', 'high', 'low', 'close', 'volume']
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# Compact in-memory schema: 4-byte dates (Arrow date32, or datetime64[s] without pyarrow),
+# int-coded tickers, float32 prices where they round-trip bit for bit, int64 volume.
+DATE_DTYPE = pd.ArrowDtype(pa.date32()) if pa is not None else 'datetime64[s]'
+
+
+def empty_ohlcv():
+    """Return an empty DataFrame with the standard OHLCV columns."""
+    return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+
+def to_ohlcv(df, ticker):
+    """Flatten a ``yf.Ticker(...).history`` frame into the standard long OHLCV layout.
+
+    Raises ``ValueError`` when the provider returned no rows, the same way the
+    original per-script loops did, so the ticker ends up in the failed list.
+    """
+    if df is None or df.empty:
+        raise ValueError("No data returned")
+    df = df.reset_index()                # the Date index becomes a regular column
+    df['ticker'] = ticker                # tag every row with its ticker
+    df = df[['Date', 'ticker', 'Open', 'High', 'Low', 'Close', 'Volume']]
+    df.columns = OHLCV_COLUMNS           # lower case, standardised names
+    return df
+
+
+def compact_ohlcv(df, tickers=None):
+    """``df`` in the compact OHLCV schema (roughly 2.5x smaller than object/float64/tz-aware).
+
+    * ``date``: the local calendar date (tz dropped, like the DB ``DATE``) as ``DATE_DTYPE``
+    * ``ticker``: categorical; pass the full ``tickers`` universe so per-ticker frames share
+      one category set and concatenate without falling back to ``object``
+    * prices: float32 when every value converts back to exactly the same float64, else
+      float64. Yahoo serves float32 quotes widened to float64, which fit; FX at 5
+      decimals stored as doubles, adjusted prices or BRK-A at 700,000 keep float64.
+      No precision is lost (the COPY encoder widens float32 back before writing)
+    * ``volume``: int64 (nullable ``Int64`` when a bar has no volume)
+    """
+    out = {}
+    dates = df['date']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)  # skipped when already datetime: it would scan for its cache
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    out['date'] = dates.dt.normalize().astype('datetime64[s]').astype(DATE_DTYPE)
+    categories = sorted(set(tickers)) if tickers is not None else sorted(df['ticker'].astype(str).unique())
+    out['ticker'] = pd.Categorical(df['ticker'].astype(str), categories=categories)
+    for col in PRICE_COLUMNS:
+        values = df[col].to_numpy(dtype=np.float64)
+        narrow = values.astype(np.float32)
+        with np.errstate(over='ignore', invalid='ignore'):
+            fits = np.array_equal(narrow.astype(np.float64), values, equal_nan=True)
+        out[col] = narrow if fits else values
+    volume = pd.to_numeric(df['volume'])
+    out['volume'] = volume.round().astype('Int64' if volume.isna().any() else np.int64)
+    return pd.DataFrame(out, index=df.index)[OHLCV_COLUMNS]
+
+
+def concat_ohlcv(frames):
+    """Combine per-ticker frames into one; empty input gives an empty OHLCV frame."""
+    frames = [f for f in frames if f is not None and not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else empty_ohlcv()
@@ -0,0 +1,118 @@
+"""Market-data providers.
+
+A provider is any object exposing the handful of calls the pipelines make against
+Yahoo Finance. The scheduler only talks to this interface, so a run can be pointed
+at ``FakeProvider`` (canned DataFrames, no network) instead of ``YahooProvider``.
+
+Interface::
+
+    host                                   -> str, used as the rate-limit key
+    history(ticker, start, end, timeout)   -> DataFrame like yf.Ticker(t).history(...)
+    option_expiries(ticker)                -> list of 'YYYY-MM-DD' strings
+    option_chain(ticker, expiry)           -> object with .calls / .puts DataFrames
+    download(tickers, start, end, **kw)    -> wide DataFrame like yf.download(...); kw may carry timeout
+"""
+import time
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+# Same shape as the object returned by yf.Ticker(t).option_chain(exp)
+OptionChain = namedtuple('OptionChain', ['calls', 'puts'])
+
+
+class YahooProvider:
+    """Thin wrapper around ``yfinance``; yfinance is imported on first use only."""
+
+    host = 'query1.finance.yahoo.com'
+
+    def __init__(self, session=None):
+        self.session = session  # optional shared HTTP session handed to yf.Ticker
+        self._yf = None
+
+    @property
+    def yf(self):
+        if self._yf is None:
+            import yfinance
+            self._yf = yfinance
+        return self._yf
+
+    def _ticker(self, ticker):
+        if self.session is not None:
+            return self.yf.Ticker(ticker, session=self.session)
+        return self.yf.Ticker(ticker)
+
+    def history(self, ticker, start, end, timeout=None, **kwargs):
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        return self._ticker(ticker).history(start=start, end=end, **kwargs)
+
+    def option_expiries(self, ticker):
+        return list(self._ticker(ticker).options)
+
+    def option_chain(self, ticker, expiry):
+        chain = self._ticker(ticker).option_chain(expiry)
+        return OptionChain(chain.calls, chain.puts)
+
+    def download(self, tickers, start, end, **kwargs):
+        if self.session is not None:
+            kwargs.setdefault('session', self.session)
+        return self.yf.download(tickers=tickers, start=start, end=end, **kwargs)
+
+
+class FakeProvider:
+    """Local provider serving canned DataFrames, for exercising the scheduler offline.
+
+    ``histories`` maps ticker -> DataFrame in ``history()`` shape (DatetimeIndex named
+    'Date', columns Open/High/Low/Close/Volume). The returned frame is cut to
+    [start, end) like Yahoo does. ``latency`` simulates the round-trip per call and
+    ``failures`` maps ticker -> number of calls that should raise before succeeding
+    (use a large number for a permanently broken ticker).
+    """
+
+    host = 'fake.local'
+
+    def __init__(self, histories=None, chains=None, latency=0.0, failures=None):
+        self.histories = dict(histories or {})
+        self.chains = dict(chains or {})  # ticker -> {expiry: OptionChain}
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.calls = []  # (method, ticker) log, handy for asserting call counts
+        self._lock = threading.Lock()
+
+    def _hit(self, method, ticker):
+        with self._lock:
+            self.calls.append((method, ticker))
+            remaining = self.failures.get(ticker, 0)
+            if remaining:
+                self.failures[ticker] = remaining - 1
+        if self.latency:
+            time.sleep(self.latency)
+        if remaining:
+            raise ConnectionError(f"simulated failure for {ticker}")
+
+    def history(self, ticker, start, end, timeout=None, **kwargs):
+        self._hit('history', ticker)
+        df = self.histories.get(ticker)
+        if df is None:
+            return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+        index = df.index.tz_localize(None) if getattr(df.index, 'tz', None) is not None else df.index
+        mask = (index >= pd.Timestamp(start)) & (index < pd.Timestamp(end))
+        return df.loc[mask].copy()
+
+    def option_expiries(self, ticker):
+        self._hit('option_expiries', ticker)
+        return sorted(self.chains.get(ticker, {}))
+
+    def option_chain(self, ticker, expiry):
+        self._hit('option_chain', ticker)
+        chain = self.chains[ticker][expiry]
+        return OptionChain(chain.calls.copy(), chain.puts.copy())
+
+    def download(self, tickers, start, end, **kwargs):
+        frames = {t: self.history(t, start, end) for t in tickers}
+        frames = {t: f for t, f in frames.items() if not f.empty}
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)  # (ticker, field) columns, like group_by='ticker'
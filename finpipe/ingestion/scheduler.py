@@ -0,0 +1,238 @@
+"""Bounded-concurrency download scheduler.
+
+Replaces the serial ``for ticker in ...: yf.Ticker(ticker).history(...)`` loops.
+Every task runs on a fixed-size thread pool and each attempt:
+
+1. takes a token from the per-host rate limiter,
+2. runs under a per-task timeout,
+3. on failure sleeps a jittered exponential backoff and tries again.
+
+Wall-clock time is therefore roughly ``ceil(n / max_workers)`` round-trips
+(bounded below by the host rate limit) instead of ``n`` round-trips.
+"""
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+
+class RateLimiter:
+    """Thread-safe token bucket, one bucket per host.
+
+    ``rate`` is the sustained requests/second allowed per host and ``burst`` the
+    bucket size (how many requests may go out back-to-back after an idle period).
+    A ``rate`` of ``None`` or ``0`` disables limiting.
+    """
+
+    def __init__(self, rate=4.0, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 1.0)
+        self._buckets = {}  # host -> [tokens, last_refill]
+        self._lock = threading.Lock()
+
+    def acquire(self, host):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1.0:
+                    self._buckets[host] = (tokens - 1.0, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1.0 - tokens) / self.rate
+            time.sleep(wait)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: ``uniform(0, min(max_delay, base * 2**n))``."""
+
+    def __init__(self, attempts=3, base_delay=0.5, max_delay=10.0, seed=None):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, attempt):
+        cap = min(self.max_delay, self.base_delay * (2 ** attempt))
+        with self._lock:
+            return self._rng.uniform(0, cap)
+
+
+class TaskTimeout(TimeoutError):
+    """Raised when a single task attempt runs longer than the scheduler timeout."""
+
+
+MAX_ABANDONED = 16  # hung calls left running before call_with_timeout refuses to start more
+_abandoned = set()
+_abandoned_lock = threading.Lock()
+
+
+def abandoned_calls():
+    """Number of timed-out calls whose threads are still running (each may hold a socket)."""
+    with _abandoned_lock:
+        _abandoned.difference_update([t for t in _abandoned if not t.is_alive()])
+        return len(_abandoned)
+
+
+def call_with_timeout(fn, timeout, *args, max_abandoned=MAX_ABANDONED, **kwargs):
+    """Run ``fn`` in a daemon thread and give up after ``timeout`` seconds.
+
+    Python cannot kill a thread, so a hung call is abandoned rather than
+    cancelled; it no longer holds a pool slot, which is what matters here. This
+    is a fallback: providers get the timeout themselves (``history(timeout=)``,
+    ``yf.download(timeout=)``) and normally give up first. At most
+    ``max_abandoned`` abandoned threads may still be running; beyond that new
+    calls fail with ``TaskTimeout`` at once instead of piling up more threads.
+    """
+    if not timeout:
+        return fn(*args, **kwargs)
+    if abandoned_calls() >= max_abandoned:
+        raise TaskTimeout(f"{max_abandoned} timed-out calls are still running; not starting another")
+    box = {}
+
+    def target():
+        try:
+            box['value'] = fn(*args, **kwargs)
+        except BaseException as e:  # handed back to the caller below
+            box['error'] = e
+
+    worker = threading.Thread(target=target, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        with _abandoned_lock:
+            _abandoned.add(worker)
+        raise TaskTimeout(f"timed out after {timeout}s")
+    if 'error' in box:
+        raise box['error']
+    return box.get('value')
+
+
+class ScheduleResult:
+    """Outcome of a scheduler run: ``results`` (key -> value) and ``failed`` (key -> error text)."""
+
+    def __init__(self, results, failed, elapsed):
+        self.results = results
+        self.failed = failed
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (f"ScheduleResult(ok={len(self.results)}, failed={len(self.failed)}, "
+                f"elapsed={self.elapsed:.2f}s)")
+
+
+class DownloadScheduler:
+    """Run provider calls for many keys with bounded concurrency, rate limiting, retries and timeouts.
+
+    Parameters
+    ----------
+    provider : provider object (see ``finpipe.ingestion.providers``); its ``host``
+        attribute is the rate-limit key.
+    max_workers : size of the thread pool, i.e. max requests in flight.
+    rate_per_host : sustained requests/second per host (``None`` to disable).
+    retry : ``RetryPolicy``; defaults to 3 attempts.
+    timeout : seconds allowed per attempt (``None`` to disable), handed to the provider
+        call; the watchdog thread abandons a call only ``watchdog_grace`` seconds later.
+    log : callable used for progress messages (``print`` by default).
+
+    A provider with ``limits_own_rate`` (``CachedProvider``) gets the rate limiter
+    instead and only spends a token on a real request. An error with
+    ``retryable = False`` (``CacheMiss``) fails the key without further attempts.
+    """
+
+    def __init__(self, provider, max_workers=8, rate_per_host=4.0, retry=None,
+                 timeout=60.0, rate_limiter=None, log=print, watchdog_grace=5.0):
+        self.provider = provider
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or RateLimiter(rate_per_host)
+        self.retry = retry or RetryPolicy()
+        self.timeout = timeout
+        self.watchdog_grace = watchdog_grace
+        self.log = log or (lambda *a, **k: None)
+        self._limits_own_rate = getattr(provider, 'limits_own_rate', False)
+        if self._limits_own_rate and getattr(provider, 'rate_limiter', None) is None:
+            provider.rate_limiter = self.rate_limiter
+
+    @property
+    def host(self):
+        return getattr(self.provider, 'host', 'default')
+
+    def call(self, fn, *args, **kwargs):
+        """One rate-limited, time-boxed call with retries (no thread pool)."""
+        last_error = None
+        for attempt in range(self.retry.attempts):
+            if attempt:
+                time.sleep(self.retry.delay(attempt - 1))
+            if not self._limits_own_rate:
+                self.rate_limiter.acquire(self.host)
+            try:
+                return call_with_timeout(fn, self.timeout and self.timeout + self.watchdog_grace, *args, **kwargs)
+            except TaskTimeout as e:
+                last_error = e
+                self.log(f"⏱️ {e}; {abandoned_calls()} timed-out calls still running")
+            except Exception as e:
+                last_error = e
+                if not getattr(e, 'retryable', True):
+                    break
+        raise last_error
+
+    def map(self, fn, keys):
+        """Run ``fn(key)`` for every key on the pool and collect a ``ScheduleResult``.
+
+        ``fn`` failing on its last attempt marks only that key as failed; the rest
+        of the batch carries on.
+        """
+        keys = list(dict.fromkeys(keys))  # de-duplicate, keep order
+        results, failed = {}, {}
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.call, fn, key): key for key in keys}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    self.log(f"❌ Failed {key}: {e}")
+                    failed[key] = str(e) or type(e).__name__
+        ordered = {k: results[k] for k in keys if k in results}  # deterministic order for concat
+        return ScheduleResult(ordered, failed, time.perf_counter() - started)
+
+    def imap(self, fn, keys, failed=None, in_flight=None):
+        """Like ``map`` but yields ``(key, result)`` as tasks finish, in completion order.
+
+        At most ``in_flight`` (default ``2 * max_workers``) results are pending at once, so
+        a slow consumer (e.g. a COPY stream) holds the producers back instead of letting
+        finished frames pile up. Failed keys go into the ``failed`` dict when given.
+        """
+        keys = iter(dict.fromkeys(keys))
+        in_flight = in_flight or 2 * self.max_workers
+        failed = {} if failed is None else failed
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {}
+            while True:
+                for key in keys:
+                    pending[pool.submit(self.call, fn, key)] = key
+                    if len(pending) >= in_flight:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self.log(f"❌ Failed {key}: {e}")
+                        failed[key] = str(e) or type(e).__name__
+                        continue
+                    yield key, result
+
+    def history(self, tickers, start, end, **kwargs):
+        """``provider.history`` for every ticker; results are the raw provider frames."""
+        def fetch(ticker):
+            return self.provider.history(ticker, start, end, timeout=self.timeout, **kwargs)
+        return self.map(fetch, tickers)
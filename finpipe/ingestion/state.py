@@ -0,0 +1,125 @@
+"""High-water-mark state for incremental downloads.
+
+Instead of re-downloading the full 8-year window on every run, each pipeline asks
+for ``[last stored date + 1 day - overlap, end)`` per ticker. The last stored date
+comes from ``SELECT ticker, MAX(date) ... GROUP BY ticker`` the first time and is
+then kept in a small JSON file, so normal runs do not touch the table at all.
+
+Tickers without a mark (new to the universe) fall back to the full backfill start.
+"""
+import os
+import json
+import threading
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from ..paths import state_dir
+
+
+class HighWaterMarkStore:
+    """JSON-backed ``{table: {ticker: 'YYYY-MM-DD'}}`` map of the last stored date per ticker."""
+
+    def __init__(self, path=None):
+        self.path = path or (state_dir() / 'high_water_marks.json')
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self._marks = json.load(f)
+        except FileNotFoundError:
+            self._marks = {}
+
+    def has(self, table):
+        return table in self._marks
+
+    def get(self, table):
+        """Marks for ``table`` as ``{ticker: Timestamp}``."""
+        return {t: pd.Timestamp(d) for t, d in self._marks.get(table, {}).items()}
+
+    def set(self, table, marks):
+        """Replace the marks of ``table`` (e.g. after re-reading them from the database)."""
+        with self._lock:
+            self._marks[table] = {t: pd.Timestamp(d).date().isoformat() for t, d in marks.items()}
+            self._save()
+
+    def record(self, table, df):
+        """Advance marks from a frame that has just been written (``date``/``ticker`` columns).
+
+        Marks only ever move forward; call this after the insert has committed.
+        """
+        if df is None or df.empty:
+            return
+        dates = pd.to_datetime(df['date'])
+        if getattr(dates.dt, 'tz', None) is not None:
+            dates = dates.dt.tz_localize(None)
+        latest = dates.groupby(df['ticker'].astype(str)).max()
+        with self._lock:
+            marks = self._marks.setdefault(table, {})
+            for ticker, day in latest.items():
+                day = day.date().isoformat()
+                if marks.get(ticker, '') < day:
+                    marks[ticker] = day
+            self._save()
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self._marks, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)  # atomic, a crash never leaves a half-written file
+
+
+def read_db_high_water_marks(conn, table):
+    """``{ticker: Timestamp}`` of ``MAX(date)`` per ticker in ``table`` (empty if the table is missing)."""
+    try:
+        rows = conn.execute(text(f"SELECT ticker, MAX(date) FROM {table} GROUP BY ticker")).fetchall()
+    except (ProgrammingError, OperationalError):  # no such table (PostgreSQL, SQLite)
+        return {}
+    return {ticker: pd.Timestamp(day) for ticker, day in rows if day is not None}
+
+
+class IncrementalStarts(dict):
+    """``{ticker: start}`` plus ``known``, the tickers that already have a stored mark.
+
+    A short incremental window can legitimately come back empty (holidays, weekends),
+    so ``fetch_history`` does not count an empty answer for a known ticker as a failure.
+    """
+
+    def __init__(self, starts, known):
+        super().__init__(starts)
+        self.known = frozenset(known)
+
+
+def plan_starts(tickers, marks, backfill_start, end, overlap_days=5):
+    """Per-ticker download start for an incremental run.
+
+    Known tickers restart at ``mark + 1 day - overlap_days`` so late corrections to the
+    last few bars are picked up again; brand-new tickers get ``backfill_start``.
+    Tickers that are already up to date (start >= end) are left out.
+    """
+    backfill_start, end = pd.Timestamp(backfill_start), pd.Timestamp(end)
+    starts = {}
+    for ticker in tickers:
+        mark = marks.get(ticker)
+        if mark is None:
+            start = backfill_start
+        else:
+            start = max(pd.Timestamp(mark) + pd.Timedelta(days=1 - overlap_days), backfill_start)
+        if start < end:
+            starts[ticker] = start
+    return IncrementalStarts(starts, known=[t for t in tickers if t in marks])
+
+
+def incremental_starts(tickers, table, conn, backfill_start, end, store=None, overlap_days=5, refresh=False):
+    """Resolve per-ticker starts, reading ``MAX(date)`` from the table only when the local store has no marks.
+
+    Pass ``refresh=True`` to re-sync the store from the table (e.g. after manual edits).
+    """
+    store = store or HighWaterMarkStore()
+    if refresh or not store.has(table):
+        store.set(table, read_db_high_water_marks(conn, table))
+    starts = plan_starts(tickers, store.get(table), backfill_start, end, overlap_days)
+    backfills = sum(1 for t in starts if t not in starts.known)
+    print(f"Incremental plan for '{table}': {len(starts)} tickers to fetch "
+          f"({backfills} backfills), {len(set(tickers)) - len(starts)} up to date")
+    return starts
@@ -0,0 +1,51 @@
+"""Locally cached ticker universes.
+
+The S&P 500 loader used to scrape Wikipedia on every run. The list changes a few
+times a quarter, so it is cached in ``state_dir()`` and re-scraped only when older
+than ``max_age_days``; when the scrape fails a stale cache is used instead.
+"""
+import os
+import json
+from datetime import datetime, timedelta, timezone
+
+from ..paths import state_dir
+
+SP500_URL = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
+
+
+def cached_universe(name, loader, max_age_days=7, refresh=False, path=None):
+    """``loader()`` (a list of symbols), cached as ``<state_dir>/universe_<name>.json``."""
+    path = path or (state_dir() / f'universe_{name}.json')
+    cached = None
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except FileNotFoundError:
+        pass
+    now = datetime.now(timezone.utc)
+    if cached and not refresh and now - datetime.fromisoformat(cached['fetched']) < timedelta(days=max_age_days):
+        return cached['symbols']
+    try:
+        symbols = list(loader())
+    except Exception as e:
+        if not cached:
+            raise
+        print(f"⚠️ Could not refresh the {name} universe ({e}); using the list cached {cached['fetched']}")
+        return cached['symbols']
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'fetched': now.isoformat(), 'symbols': symbols}, f, indent=1)
+    os.replace(tmp, path)
+    return symbols
+
+
+def scrape_sp500():
+    """S&P 500 symbols from Wikipedia, with ``.`` replaced by ``-`` as Yahoo expects (BRK.B -> BRK-B)."""
+    import pandas as pd
+    sp500 = pd.read_html(SP500_URL)[0]
+    return sp500['Symbol'].str.replace('.', '-', regex=False).unique().tolist()
+
+
+def sp500_symbols(max_age_days=7, refresh=False):
+    """Cached S&P 500 constituents (see ``cached_universe``)."""
+    return cached_universe('sp500', scrape_sp500, max_age_days, refresh)
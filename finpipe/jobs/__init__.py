@@ -0,0 +1,12 @@
+"""Importable pipeline jobs (one per asset class), the context they share in one process and their task queue."""
+from .base import years_before, chunked, csv_symbols, JobContext, JobResult, Job, PriceJob, OptionsJob
+from .queue import STATES, OPEN_STATES, Task, JobQueue
+from .catalog import (BOND_TICKERS, COMMODITY_TICKERS, FOREX_PAIRS, FUND_TICKERS, OPTION_UNDERLYINGS,
+                      etf_symbols, sp500_universe, JOBS, get_job)
+
+__all__ = [
+    'years_before', 'chunked', 'csv_symbols', 'JobContext', 'JobResult', 'Job', 'PriceJob', 'OptionsJob',
+    'STATES', 'OPEN_STATES', 'Task', 'JobQueue',
+    'BOND_TICKERS', 'COMMODITY_TICKERS', 'FOREX_PAIRS', 'FUND_TICKERS', 'OPTION_UNDERLYINGS',
+    'etf_symbols', 'sp500_universe', 'JOBS', 'get_job',
+]
@@ -0,0 +1,110 @@
+"""The pipeline jobs, one per asset class, with the ticker universes of the ETL scripts.
+
+Table names are the defaults; ``finpipe run --table forex=fx_prices`` or
+``job.table = ...`` points a job elsewhere.
+"""
+import os
+
+from .base import PriceJob, OptionsJob, csv_symbols
+
+BOND_TICKERS = [
+    # European Sovereign & Corporate Bond ETFs
+    'IEGA.L',  # iShares Core Euro Corporate Bond UCITS
+    'IGLT.L',  # iShares Core UK Gilts UCITS
+    'EMIM.L',  # iShares Core Global Aggregate Bond UCITS
+    'EUNA.L',  # iShares EUR Corporate Bond UCITS
+    'IBGL.L',  # iShares € Govt Bond 15-30yr UCITS
+    'IHRD.L',  # iShares $ Corp Bond UCITS
+    'IBTM.L',  # iShares $ Treasuries 7-10yr UCITS
+    'LUAG.DE',  # Xtrackers II EUR Corporate Bond UCITS
+    # Global Bond ETFs
+    'BND',     # Vanguard Total Bond Market ETF
+    'AGG',     # iShares Core US Aggregate Bond
+    'TLT',     # iShares 20+ Year Treasury Bond
+    'LQD',     # iShares iBoxx $ Investment Grade Corp
+    'IEF',     # iShares 7-10 Year Treasury Bond
+    # Eurozone Bond Futures
+    'EUX1.DE',  # Euro Bund Futures proxy (Xetra)
+    'EUX2.DE',  # Euro Buxl (Long) Futures proxy
+]
+
+COMMODITY_TICKERS = [
+    "BZ=F",  # Brent Crude Oil
+    "NG=F",  # Natural Gas
+    "HO=F",  # Heating Oil
+    "GC=F",  # Gold
+    "SI=F",  # Silver
+    "HG=F",  # Copper
+    "PL=F",  # Platinum
+    "PA=F",  # Palladium
+    "ZW=F",  # Wheat
+    "ZC=F",  # Corn
+    "ZS=F",  # Soybeans
+    "KC=F",  # Coffee
+    "CC=F",  # Cocoa
+]
+
+FOREX_PAIRS = [
+    "EURUSD=X", "GBPUSD=X", "USDCHF=X", "USDJPY=X",
+    "EURGBP=X", "EURCHF=X", "EURJPY=X",
+    "GBPEUR=X", "GBPCHF=X", "GBPJPY=X",
+    "AUDUSD=X", "NZDUSD=X", "USDCAD=X", "USDNOK=X", "USDSEK=X"
+]
+
+# Top 100 Funds in Europe by Ticker
+FUND_TICKERS = [
+    'IMEU.DE', 'SWDA.L', 'VUSA.L', 'VWRL.AS', 'IWDA.AS', 'ISF.L', 'EQQQ.DE', 'EXXT.DE', 'SXR8.DE', 'XDWD.DE',
+    'VWRL.L', 'CSNDX.SW', 'CSPX.L', 'IUSA.L', 'IEMG', 'IWRD.L', 'IWVL.AS', 'SUAS.AS', 'XESC.DE', 'ISAC.AS',
+    'VEVE.L', 'SXRW.DE', 'SMT.L', 'VERX.DE', 'XDUK.DE', 'CSBGC.SW', 'LU0635178014', 'ISJP.L', 'EMIM.L', 'IEEM.L',
+    'XD9U.DE', 'EXX7.DE', 'IEUX.L', 'VEUR.L', 'SPYW.DE', 'SXR1.DE', 'EIMI.L', 'CSP1.L', 'IQQQ.DE', 'XMME.DE',
+    'ESGE.AS', '2B76.DE', 'IITU.L', 'XDUK.L', 'SSEW.L', 'IAGG', 'XUKE.L', 'IE00B3XXRP09', 'XDJP.DE', 'IWFM.L',
+    'SUSW.L', 'VETY.L', 'SGWD.L', 'XDWT.DE', 'IE00B42NKQ00', 'VHVG.DE', 'XBAE.DE', 'SDJH.DE', 'IE00B1XNHC34',
+    'V3AA.DE', 'XD9E.DE', 'IUSQ.DE', 'XD7T.DE', 'XMMT.DE', 'SWRA.L', 'EMIM.DE', 'V3AE.DE', 'XDW0.DE', 'VDWR.DE',
+    'ESPO.L', 'XDWT.L', 'VHYG.DE', 'IWVL.L', 'ISPY.L', 'IUIT.L', 'EUNA.L', 'XDWT.AS', 'XDWQ.DE', 'CSNDX.L',
+    'EXXY.DE', 'EUFN', 'SXR7.DE', 'VWCE.DE', 'CSP1.AS', 'ISPA.DE', 'EXXT.L', 'XEMD.DE', 'IMEU.L', 'XD9U.L',
+    'XDWD.L', 'SPYG.L', 'IWRD.AS', 'XDW0.AS', 'IUSQ.L', 'VEUR.DE', 'VEVE.DE', 'ISF.DE', 'VHVG.L'
+]
+
+OPTION_UNDERLYINGS = [
+    'AAPL', 'MSFT', 'NVDA', 'AMD', 'TSLA', 'META', 'AMZN', 'GOOG', 'AVGO', 'CRM',
+    'JPM', 'BAC', 'GS', 'MS', 'V', 'MA', 'PYPL', 'SQ', 'COIN', 'SCHW',
+    'XOM', 'CVX', 'SLB', 'HAL', 'BA', 'GE', 'NOC', 'LMT', 'CAT', 'DE',
+    'UNH', 'JNJ', 'LLY', 'PFE', 'MRK', 'AMGN', 'REGN', 'BMY', 'CVS', 'ABBV',
+    'WMT', 'COST', 'TGT', 'MCD', 'HD', 'DIS', 'SBUX', 'NKE', 'BKNG', 'ROKU'
+]
+
+
+def etf_symbols():
+    """'Symbol' column of the CSV named by FINPIPE_ETF_CSV"""
+    path = os.environ.get('FINPIPE_ETF_CSV')
+    if not path:
+        raise ValueError("The etf job reads its tickers from a CSV with a 'Symbol' column: set FINPIPE_ETF_CSV")
+    return csv_symbols(path)
+
+
+def sp500_universe():
+    """S&P 500 constituents, cached locally and re-scraped weekly"""
+    from ..ingestion import sp500_symbols
+    return sp500_symbols(max_age_days=7)
+
+
+JOBS = {job.name: job for job in [
+    PriceJob('bonds', 'bond_data', BOND_TICKERS, "European and global bond ETFs, bond futures proxies",
+             quality='bonds'),
+    PriceJob('commodities', 'commodity_data', COMMODITY_TICKERS, "EU-relevant commodity futures",
+             quality='commodities'),
+    PriceJob('etf', 'etf_data', etf_symbols, "ETFs listed in FINPIPE_ETF_CSV"),
+    PriceJob('forex', 'forex_data', FOREX_PAIRS, "Major and EUR/GBP FX pairs", quality='forex'),
+    PriceJob('fund', 'fund_data', FUND_TICKERS, "Top 100 European funds", quality='fund'),
+    PriceJob('stocks', 'sp500_ohlcv', sp500_universe, "S&P 500 stocks in yf.download batches",
+             incremental=False, on_conflict='nothing', batch_size=50),
+    OptionsJob('options', 'options_data', OPTION_UNDERLYINGS, "Option chains expiring within 30 days"),
+]}
+
+
+def get_job(name):
+    """The job called ``name``; raises ``KeyError`` listing the known jobs."""
+    try:
+        return JOBS[name]
+    except KeyError:
+        raise KeyError(f"Unknown job {name!r}; choose from {', '.join(JOBS)}") from None
@@ -0,0 +1,231 @@
+"""Persistent work queue of per-ticker download tasks, so runs resume where they stopped.
+
+Every job run turns its universe into ``(pipeline, ticker, start, end)`` tasks in a
+small SQLite file (``~/.finpipe/queue.sqlite``) and moves each task through::
+
+    pending -> running -> done
+                       -> failed  (retried once its backoff has passed)
+                       -> dead    (max_attempts reached; ``finpipe queue retry``)
+
+Jobs mark tasks ``done`` after every committed write (a checkpoint), not at the
+end. A run that crashes or is killed leaves its unwritten tasks ``pending`` /
+``running``, and the next run of that pipeline claims exactly those, with their
+stored date ranges, instead of planning the whole universe again. A failed
+ticker waits ``base_delay * 2 ** (attempts - 1)`` seconds (capped at ``max_delay``)
+before a run claims it again; after ``max_attempts`` failures it is parked as
+``dead`` with its last error. This replaces the ``failed_<job>.log`` files the
+scripts used to overwrite at the end of each run.
+
+Only the standard library is used, so ``finpipe queue`` starts as fast as ``list``.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from ..paths import state_dir
+
+HOUR = 3600.0
+STATES = ('pending', 'running', 'done', 'failed', 'dead')
+OPEN_STATES = ('pending', 'running')  # left behind by an interrupted run
+TASK_COLUMNS = 'pipeline, ticker, start_date, end_date, state, attempts, not_before, last_error, updated_at'
+
+
+def _day(value):
+    if isinstance(value, datetime):  # also pd.Timestamp
+        value = value.date()
+    return value.isoformat() if isinstance(value, date) else str(value)[:10]
+
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+
+class Task:
+    """One ``(pipeline, ticker)`` download of ``start`` -> ``end`` and its queue state."""
+
+    def __init__(self, pipeline, ticker, start, end, state='pending', attempts=0, not_before=0.0,
+                 last_error=None, updated_at=None):
+        self.pipeline = pipeline
+        self.ticker = ticker
+        self.start = date.fromisoformat(start) if isinstance(start, str) else start
+        self.end = date.fromisoformat(end) if isinstance(end, str) else end
+        self.state = state
+        self.attempts = attempts
+        self.not_before = not_before
+        self.last_error = last_error
+        self.updated_at = updated_at
+
+    def __repr__(self):
+        return (f"Task({self.pipeline!r}, {self.ticker!r}, {self.start} -> {self.end}, {self.state}, "
+                f"attempts={self.attempts})")
+
+
+class JobQueue:
+    """SQLite-backed task queue shared by the jobs of one state directory.
+
+    ``enqueue`` starts a new run of a pipeline, ``claim`` hands the due tasks to the
+    run, ``complete`` / ``fail`` record the outcome. Safe to share between the
+    threads of one process; separate processes serialize on the file lock.
+    """
+
+    def __init__(self, path=None, max_attempts=5, base_delay=60.0, max_delay=6 * HOUR):
+        self.path = path or (state_dir() / 'queue.sqlite')
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        import sqlite3  # not at module level: finpipe.jobs is imported by every CLI command
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                pipeline TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                not_before REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL,
+                PRIMARY KEY (pipeline, ticker)
+            )
+        """)
+
+    def __repr__(self):
+        return f"JobQueue('{self.path}', max_attempts={self.max_attempts})"
+
+    @contextmanager
+    def _transaction(self):
+        """The connection inside an immediate (write-locking) transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _write(self, sql, params=(), many=False):
+        """One statement (or ``executemany``) in its own transaction; returns the rows changed."""
+        with self._transaction() as conn:
+            return (conn.executemany(sql, params) if many else conn.execute(sql, params)).rowcount
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def backoff(self, attempts):
+        """Seconds a task waits after its ``attempts``-th failure."""
+        return min(self.max_delay, self.base_delay * 2 ** max(attempts - 1, 0))
+
+    # --- a run ---------------------------------------------------------------------------
+
+    def interrupted(self, pipeline):
+        """True when an earlier run of ``pipeline`` left tasks ``pending`` or ``running``."""
+        return bool(self._read(f"SELECT 1 FROM tasks WHERE pipeline = ? "
+                               f"AND state IN ({_placeholders(OPEN_STATES)}) LIMIT 1", (pipeline, *OPEN_STATES)))
+
+    def enqueue(self, pipeline, ranges):
+        """Start a run of ``pipeline`` over ``{ticker: (start, end)}``.
+
+        Finished tasks of the previous run are replaced. ``failed`` and ``dead`` tickers
+        keep their state and attempt count (with the new range), so their backoff
+        carries over from run to run.
+        """
+        now = time.time()
+        rows = [(pipeline, str(ticker), _day(start), _day(end), now) for ticker, (start, end) in ranges.items()]
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM tasks WHERE pipeline = ? AND state = 'done'", (pipeline,))
+            conn.executemany("""
+                INSERT INTO tasks (pipeline, ticker, start_date, end_date, state, updated_at)
+                VALUES (?, ?, ?, ?, 'pending', ?)
+                ON CONFLICT (pipeline, ticker) DO UPDATE SET
+                    start_date = excluded.start_date, end_date = excluded.end_date,
+                    updated_at = excluded.updated_at,
+                    state = CASE WHEN state IN ('failed', 'dead') THEN state ELSE 'pending' END
+            """, rows)
+
+    def claim(self, pipeline, now=None):
+        """Mark the due tasks of ``pipeline`` ``running`` and return them.
+
+        Due means ``pending``, ``running`` (a crashed run's) or ``failed`` with its
+        backoff elapsed. Tasks still backing off and ``dead`` ones are left alone.
+        """
+        now = time.time() if now is None else now
+        due = "pipeline = ? AND (state IN ('pending', 'running') OR (state = 'failed' AND not_before <= ?))"
+        with self._transaction() as conn:
+            rows = conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE {due} ORDER BY ticker",
+                                (pipeline, now)).fetchall()
+            conn.execute(f"UPDATE tasks SET state = 'running', updated_at = ? WHERE {due}", (now, pipeline, now))
+        return [Task(*row[:4], 'running', *row[5:]) for row in rows]
+
+    def complete(self, pipeline, tickers):
+        """Checkpoint: mark ``tickers`` done (call after their rows have committed)."""
+        tickers = [str(t) for t in dict.fromkeys(tickers)]
+        if not tickers:
+            return 0
+        now = time.time()
+        return self._write("UPDATE tasks SET state = 'done', last_error = NULL, updated_at = ? "
+                           "WHERE pipeline = ? AND ticker = ?", [(now, pipeline, t) for t in tickers], many=True)
+
+    def fail(self, pipeline, errors):
+        """Record one failed attempt per ticker of ``{ticker: error}``; returns ``{ticker: state}``.
+
+        The task becomes ``failed`` with its next attempt after ``backoff``, or ``dead``
+        once it has failed ``max_attempts`` times.
+        """
+        if not errors:
+            return {}
+        now = time.time()
+        attempts = dict(self._read(f"SELECT ticker, attempts FROM tasks WHERE pipeline = ? AND ticker IN "
+                                   f"({_placeholders(errors)})", (pipeline, *map(str, errors))))
+        states, rows = {}, []
+        for ticker, error in errors.items():
+            ticker = str(ticker)
+            count = attempts.get(ticker, 0) + 1
+            states[ticker] = 'dead' if count >= self.max_attempts else 'failed'
+            rows.append((states[ticker], count, now + self.backoff(count), str(error)[:500], now, pipeline, ticker))
+        self._write("UPDATE tasks SET state = ?, attempts = ?, not_before = ?, last_error = ?, updated_at = ? "
+                    "WHERE pipeline = ? AND ticker = ?", rows, many=True)
+        return states
+
+    # --- inspection and maintenance (finpipe queue) ------------------------------------------
+
+    def counts(self, pipeline=None):
+        """``{pipeline: {state: tasks}}``, optionally for one pipeline."""
+        sql, params = "SELECT pipeline, state, COUNT(*) FROM tasks", ()
+        if pipeline is not None:
+            sql, params = sql + " WHERE pipeline = ?", (pipeline,)
+        counts = {}
+        for name, state, n in self._read(sql + " GROUP BY pipeline, state ORDER BY pipeline", params):
+            counts.setdefault(name, dict.fromkeys(STATES, 0))[state] = n
+        return counts
+
+    def tasks(self, pipeline, states=None):
+        """Tasks of ``pipeline`` (only those in ``states`` when given), by ticker."""
+        sql = f"SELECT {TASK_COLUMNS} FROM tasks WHERE pipeline = ?"
+        params = (pipeline,)
+        if states:
+            sql += f" AND state IN ({_placeholders(states)})"
+            params += tuple(states)
+        return [Task(*row) for row in self._read(sql + " ORDER BY ticker", params)]
+
+    def retry(self, pipeline, states=('failed', 'dead')):
+        """Make the ``states`` tasks of ``pipeline`` due again with a fresh attempt count; returns how many."""
+        return self._write(f"UPDATE tasks SET state = 'pending', attempts = 0, not_before = 0, updated_at = ? "
+                           f"WHERE pipeline = ? AND state IN ({_placeholders(states)})",
+                           (time.time(), pipeline, *states))
+
+    def clear(self, pipeline, states=None):
+        """Delete the tasks of ``pipeline`` (only those in ``states`` when given); returns how many."""
+        if states:
+            return self._write(f"DELETE FROM tasks WHERE pipeline = ? AND state IN ({_placeholders(states)})",
+                               (pipeline, *states))
+        return self._write("DELETE FROM tasks WHERE pipeline = ?", (pipeline,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
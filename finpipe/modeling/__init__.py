@@ -0,0 +1,14 @@
+"""Model selection and evaluation: fold-cached grid search, candidate sets, walk-forward backtests."""
+from .search import Candidate, FoldCache, ModelSearch
+from .candidates import (ALPHAS, risk_preprocess, risk_candidates, next_close_preprocess,
+                         next_close_candidates, next_close_dataset)
+from .backtest import (IncrementalRidge, default_model, walk_forward_folds, prepare_panel, backtest_ticker,
+                       error_metrics, BacktestResult, WalkForwardBacktest)
+
+__all__ = [
+    'Candidate', 'FoldCache', 'ModelSearch',
+    'ALPHAS', 'risk_preprocess', 'risk_candidates', 'next_close_preprocess', 'next_close_candidates',
+    'next_close_dataset',
+    'IncrementalRidge', 'default_model', 'walk_forward_folds', 'prepare_panel', 'backtest_ticker', 'error_metrics',
+    'BacktestResult', 'WalkForwardBacktest',
+]
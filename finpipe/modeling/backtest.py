@@ -0,0 +1,271 @@
+"""Walk-forward (expanding or rolling window) backtest of the next-day close predictor.
+
+The notebook scores a random ``train_test_split`` of a time series, which lets the
+model train on the future. Here every ticker is replayed in calendar order:
+
+* the trading calendar is cut into folds of ``step`` days after ``min_train`` days
+  of history (``walk_forward_folds``);
+* before each fold the model is refitted on the ticker's rows dated before the fold
+  (all of them, or the last ``window``) and predicts the fold. On an expanding
+  window, estimators with ``partial_fit`` - including the default ``IncrementalRidge``
+  - are only updated with the rows added since the previous fold;
+* features come from one ``compute_features`` pass over the whole panel; each task
+  only slices its ticker's rows.
+
+Tickers are independent tasks on a process pool; the folds of one ticker run in
+order inside its task (the incremental refit of a fold builds on the previous one),
+so a run uses at most one worker per ticker. Each finished ticker's predictions
+are written to ``checkpoint_dir`` straight away, so an interrupted run picks up
+where it stopped; the run directory is keyed by the model, columns and schedule.
+"""
+import os
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from ..paths import state_dir
+
+KEY_COLUMNS = ['date', 'ticker']
+TARGET = 'next_day_close'
+
+
+class IncrementalRidge:
+    """``StandardScaler`` + ``Ridge(alpha)`` that can be updated with new rows (``partial_fit``).
+
+    Keeps the row count, column means and centred cross-product matrix of ``[X, y]``
+    and merges each new batch into them (Chan et al.'s pairwise update), so a refit
+    after a fold costs the new rows plus one small ``solve`` instead of a pass over
+    the whole history. The coefficients equal the sklearn pipeline's on the same rows.
+    """
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+
+    def get_params(self, deep=True):
+        return {'alpha': self.alpha}
+
+    def set_params(self, **params):
+        for name, value in params.items():
+            setattr(self, name, value)
+        return self
+
+    def __repr__(self):
+        return f"IncrementalRidge(alpha={self.alpha})"
+
+    def fit(self, X, y):
+        for name in ('n_', 'mean_', 'comoment_'):
+            self.__dict__.pop(name, None)
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        Z = np.column_stack([np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)])
+        n, mean = len(Z), Z.mean(axis=0)
+        centred = Z - mean
+        comoment = centred.T @ centred
+        if getattr(self, 'n_', 0):
+            delta = mean - self.mean_
+            total = self.n_ + n
+            comoment += self.comoment_ + np.outer(delta, delta) * (self.n_ * n / total)
+            mean = self.mean_ + delta * (n / total)
+            n = total
+        self.n_, self.mean_, self.comoment_ = n, mean, comoment
+        self._solve()
+        return self
+
+    def _solve(self):
+        xx, xy = self.comoment_[:-1, :-1], self.comoment_[:-1, -1]
+        scale = np.sqrt(np.diag(xx) / self.n_)
+        scale[scale == 0] = 1.0  # constant columns, as StandardScaler leaves them
+        standard = np.linalg.solve(xx / np.outer(scale, scale) + self.alpha * np.eye(len(scale)), xy / scale)
+        self.coef_ = standard / scale
+        self.intercept_ = self.mean_[-1] - self.mean_[:-1] @ self.coef_
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+
+def default_model():
+    return IncrementalRidge(alpha=1.0)
+
+
+def walk_forward_folds(dates, min_train=504, step=21):
+    """``[(test_start, test_end), ...]`` over the sorted unique ``dates``; ``test_end`` is exclusive.
+
+    The first fold starts after ``min_train`` trading days; the last one ends after the last date.
+    """
+    calendar = np.sort(pd.unique(np.asarray(dates)))
+    starts = calendar[min_train::step]
+    ends = list(starts[1:]) + [calendar[-1] + np.timedelta64(1, 'D')]
+    return list(zip(starts, ends))
+
+
+def prepare_panel(features, columns=None):
+    """Sorted panel with the ``next_day_close`` target; rows missing a feature or the target are dropped."""
+    df = features.sort_values(KEY_COLUMNS[::-1], kind='stable')
+    df = df.assign(**{TARGET: df.groupby('ticker', sort=False, observed=True)['close'].shift(-1)})
+    if columns is None:
+        columns = [c for c in df.select_dtypes(include=[np.number, bool]).columns if c != TARGET]
+    df = df.dropna(subset=list(columns) + [TARGET])
+    dates = pd.to_datetime(df['date'])
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    df = df.assign(date=dates.astype('datetime64[ns]'), ticker=df['ticker'].astype(str))
+    return df[KEY_COLUMNS + list(columns) + [TARGET]].reset_index(drop=True), list(columns)
+
+
+def backtest_ticker(ticker, rows, columns, folds, model, window=None):
+    """Walk ``folds`` over one ticker's ``rows``; returns its out-of-sample predictions."""
+    from sklearn.base import clone
+    dates = rows['date'].to_numpy()
+    X = rows[columns].to_numpy(dtype=np.float64)
+    y = rows[TARGET].to_numpy(dtype=np.float64)
+    incremental = hasattr(model, 'partial_fit') and not window  # a rolling window has to forget rows
+    fitted, seen = None, 0
+    out = []
+    for number, (start, end) in enumerate(folds):
+        train_end = np.searchsorted(dates, start)
+        test_end = np.searchsorted(dates, end)
+        if train_end == test_end or train_end < 2:
+            continue  # no bars to predict in this fold, or nothing to learn from yet
+        if incremental:
+            if fitted is None:
+                fitted = clone(model)
+            fitted.partial_fit(X[seen:train_end], y[seen:train_end])
+            seen = train_end
+        else:
+            train_start = max(0, train_end - window) if window else 0
+            fitted = clone(model).fit(X[train_start:train_end], y[train_start:train_end])
+        out.append(pd.DataFrame({
+            'date': dates[train_end:test_end], 'ticker': ticker, 'fold': number,
+            'close': rows['close'].to_numpy()[train_end:test_end],
+            'y_true': y[train_end:test_end], 'y_pred': fitted.predict(X[train_end:test_end]),
+        }))
+    return pd.concat(out, ignore_index=True) if out else None
+
+
+def error_metrics(predictions):
+    """Per-ticker out-of-sample errors, next to the naive "tomorrow = today" forecast.
+
+    ``mae`` / ``rmse`` / ``mape`` of the predicted close, ``direction_hit`` (share of days
+    where the predicted move has the sign of the actual move) and ``mae_vs_naive`` (< 1 beats it).
+    """
+    p = predictions
+    error = p['y_pred'] - p['y_true']
+    frame = pd.DataFrame({
+        'ticker': p['ticker'],
+        'abs_error': error.abs(),
+        'sq_error': error ** 2,
+        'pct_error': (error / p['y_true']).abs(),
+        'hit': np.sign(p['y_pred'] - p['close']) == np.sign(p['y_true'] - p['close']),
+        'naive_abs_error': (p['close'] - p['y_true']).abs(),
+    })
+    g = frame.groupby('ticker', sort=True)
+    metrics = pd.DataFrame({
+        'n': g.size(),
+        'mae': g['abs_error'].mean(),
+        'rmse': np.sqrt(g['sq_error'].mean()),
+        'mape': g['pct_error'].mean(),
+        'direction_hit': g['hit'].mean(),
+    })
+    metrics['mae_vs_naive'] = metrics['mae'] / g['naive_abs_error'].mean()
+    return metrics
+
+
+class BacktestResult:
+    def __init__(self, predictions, metrics, seconds):
+        self.predictions = predictions
+        self.metrics = metrics
+        self.seconds = seconds
+
+    def summary(self):
+        m = self.metrics
+        return (f"{len(m)} tickers, {int(m['n'].sum()):,} predictions: median MAE {m['mae'].median():.4f}, "
+                f"median MAPE {m['mape'].median():.2%}, direction hit {m['direction_hit'].median():.1%}, "
+                f"beats naive on {(m['mae_vs_naive'] < 1).mean():.0%} of tickers ({self.seconds:.1f}s)")
+
+
+def _task(ticker, rows, columns, folds, model, window, path):
+    predictions = backtest_ticker(ticker, rows, columns, folds, model, window)
+    if predictions is not None and path is not None:
+        tmp = path.with_suffix('.tmp')
+        predictions.to_parquet(tmp, index=False)
+        os.replace(tmp, path)  # a half-written checkpoint never looks complete
+    return ticker, predictions
+
+
+class WalkForwardBacktest:
+    """Resumable walk-forward backtest over a feature panel (``compute_features`` output), parallel across tickers.
+
+    ``model`` is any sklearn regressor (default: ``IncrementalRidge``); ``columns`` the feature
+    columns (default: every numeric column). ``window=None`` is an expanding window;
+    an int keeps the last ``window`` rows per refit.
+    """
+
+    def __init__(self, model=None, columns=None, min_train=504, step=21, window=None, n_jobs=None,
+                 checkpoint_dir=None, run_id=None, log=print):
+        self.model = model if model is not None else default_model()
+        self.columns = columns
+        self.min_train = min_train
+        self.step = step
+        self.window = window
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.checkpoint_dir = checkpoint_dir
+        self.run_id = run_id
+        self.log = log or (lambda message: None)
+
+    def run_path(self, columns, folds):
+        from joblib import hash as joblib_hash
+        run_id = self.run_id or joblib_hash((repr(self.model), columns, [tuple(map(str, f)) for f in folds],
+                                             self.window))
+        return Path(self.checkpoint_dir or state_dir() / 'backtests') / run_id
+
+    def run(self, features, tickers=None):
+        started = time.perf_counter()
+        panel, columns = prepare_panel(features, self.columns)
+        folds = walk_forward_folds(panel['date'], self.min_train, self.step)
+        path = self.run_path(columns, folds)
+        path.mkdir(parents=True, exist_ok=True)
+
+        # the panel is sorted by ticker, so each ticker is one contiguous slice
+        bounds = panel.groupby('ticker', sort=False).indices
+        names = [t for t in bounds if tickers is None or t in set(tickers)]
+        done = {p.stem for p in path.glob('*.parquet')}
+        todo = [t for t in names if _safe(t) not in done]
+        self.log(f"Backtest: {len(names)} tickers x {len(folds)} folds, {len(names) - len(todo)} already done "
+                 f"(checkpoints in {path})")
+
+        def rows(ticker):
+            index = bounds[ticker]
+            return panel.iloc[index[0]:index[-1] + 1]
+
+        finished = 0
+        if self.n_jobs == 1:
+            for ticker in todo:
+                _task(ticker, rows(ticker), columns, folds, self.model, self.window, path / f'{_safe(ticker)}.parquet')
+                finished += 1
+        else:
+            with ProcessPoolExecutor(self.n_jobs) as pool:
+                futures = [pool.submit(_task, t, rows(t), columns, folds, self.model, self.window,
+                                       path / f'{_safe(t)}.parquet') for t in todo]
+                for future in as_completed(futures):
+                    future.result()
+                    finished += 1
+                    if finished % 50 == 0:
+                        self.log(f"  {finished}/{len(todo)} tickers ({time.perf_counter() - started:.0f}s)")
+
+        wanted = {_safe(t) for t in names}
+        parts = [pd.read_parquet(p) for p in sorted(path.glob('*.parquet')) if p.stem in wanted]
+        predictions = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        result = BacktestResult(predictions, error_metrics(predictions) if parts else pd.DataFrame(),
+                                time.perf_counter() - started)
+        self.log(result.summary() if parts else "Backtest produced no predictions")
+        return result
+
+
+def _safe(ticker):
+    """File-name-safe ticker (``BRK/B`` -> ``BRK%2FB``), reversible like the Parquet cache's partitions."""
+    from urllib.parse import quote
+    return quote(str(ticker), safe='')
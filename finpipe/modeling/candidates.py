@@ -0,0 +1,79 @@
+"""Candidate sets and preprocessing for the repo's two modelling problems.
+
+* RiskScore / PD (``ProbabilityOfDefault.ipynb``): linear models on the loan features,
+  one-hot ``EmploymentStatus`` + ``StandardScaler`` in front.
+* next-day close (``predict_next_day_closing_price.ipynb``): the notebook's model zoo
+  on the ``finpipe.features`` columns; XGBoost / LightGBM join when installed.
+"""
+import numpy as np
+
+from .search import Candidate
+
+ALPHAS = [0.001, 0.01, 0.1, 1, 10, 100]  # the notebook's Ridge / Lasso grid
+
+
+def risk_preprocess():
+    from sklearn.pipeline import Pipeline
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    return Pipeline([
+        ('encoder', ColumnTransformer([('encoder', OneHotEncoder(handle_unknown='ignore'), ['EmploymentStatus'])],
+                                      remainder='passthrough')),
+        ('scaler', StandardScaler()),
+    ])
+
+
+def risk_candidates():
+    from sklearn.linear_model import LinearRegression, Ridge, Lasso
+    return [
+        Candidate('linear', LinearRegression()),
+        Candidate('ridge', Ridge(), {'alpha': ALPHAS, 'fit_intercept': [True, False]}),
+        Candidate('lasso', Lasso(max_iter=5000), {'alpha': ALPHAS, 'fit_intercept': [True, False]}),
+    ]
+
+
+def next_close_preprocess():
+    from sklearn.preprocessing import StandardScaler
+    return StandardScaler()
+
+
+def next_close_candidates(random_state=42):
+    from sklearn.linear_model import LinearRegression, Ridge
+    from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+    from sklearn.svm import SVR
+    candidates = [
+        Candidate('linear', LinearRegression()),
+        Candidate('ridge', Ridge(), {'alpha': ALPHAS}),
+        Candidate('random_forest', RandomForestRegressor(random_state=random_state),
+                  {'n_estimators': [100, 300], 'max_depth': [None, 10]}),
+        Candidate('gradient_boosting', GradientBoostingRegressor(random_state=random_state),
+                  {'n_estimators': [100, 300], 'learning_rate': [0.05, 0.1]}),
+        Candidate('svr', SVR(), {'C': [1, 10, 100]}),
+    ]
+    try:
+        from xgboost import XGBRegressor
+        candidates.append(Candidate('xgboost', XGBRegressor(random_state=random_state),
+                                    {'n_estimators': [100, 300], 'learning_rate': [0.05, 0.1]}))
+    except ImportError:
+        pass
+    try:
+        from lightgbm import LGBMRegressor
+        candidates.append(Candidate('lightgbm', LGBMRegressor(random_state=random_state, verbose=-1),
+                                    {'n_estimators': [100, 300], 'learning_rate': [0.05, 0.1]}))
+    except ImportError:
+        pass
+    return candidates
+
+
+def next_close_dataset(features, columns=None):
+    """``(X, y)`` from ``compute_features`` output: target is each ticker's next close.
+
+    ``columns`` defaults to every numeric column except the target; rows with a NaN
+    (window warm-up, last bar per ticker) are dropped.
+    """
+    df = features.copy()
+    df['next_day_close'] = df.groupby('ticker', sort=False, observed=True)['close'].shift(-1)
+    if columns is None:
+        columns = [c for c in df.select_dtypes(include=[np.number, bool]).columns if c != 'next_day_close']
+    df = df.dropna(subset=list(columns) + ['next_day_close'])
+    return df[columns].astype(float), df['next_day_close'].to_numpy()
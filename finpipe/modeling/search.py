@@ -0,0 +1,218 @@
+"""Parallel, cached model selection (grid search + K-fold CV, optional successive halving).
+
+The notebooks run ``GridSearchCV`` per model and then each model's CV one after
+another, and every grid point refits the scaler / one-hot encoder on every fold.
+``ModelSearch`` instead:
+
+1. fits the preprocessing once per fold and stores the transformed train / test
+   arrays as ``.npy`` files (``FoldCache``), keyed by a hash of the data, the
+   preprocessing and the splitter - a rerun on unchanged data reuses them;
+2. runs every (candidate, grid point, fold) fit as one task on a process pool;
+   workers memory-map the fold arrays instead of receiving copies;
+3. with ``halving=True`` scores all grid points on a small random subsample of
+   each training fold, keeps the best ``1 / factor`` and grows the subsample by
+   ``factor`` until the survivors are scored on the full folds.
+
+Tasks are independent, so wall time scales with the number of worker processes
+until there are fewer tasks in a round than workers.
+"""
+import os
+import math
+import time
+from pathlib import Path
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ..paths import state_dir
+
+
+@dataclass
+class Candidate:
+    """A named estimator and its parameter grid (``dict`` or list of dicts, as in ``GridSearchCV``)."""
+
+    name: str
+    estimator: object
+    grid: object = field(default_factory=dict)
+
+    def configs(self):
+        from sklearn.model_selection import ParameterGrid
+        return list(ParameterGrid(self.grid or {}))
+
+
+class FoldCache:
+    """Preprocessed ``(X_train, y_train, X_test, y_test)`` per fold as memory-mappable ``.npy`` files.
+
+    Training rows are stored in a seeded random order, so a prefix of ``n`` rows is
+    a random subsample - that is what the halving rounds train on.
+    """
+
+    def __init__(self, X, y, preprocess=None, cv=10, root=None, random_state=0):
+        from joblib import hash as joblib_hash
+        from sklearn.model_selection import KFold
+        self.X, self.y = X, np.asarray(y)
+        self.preprocess = preprocess
+        self.cv = KFold(cv, shuffle=True, random_state=random_state) if isinstance(cv, int) else cv
+        self.random_state = random_state
+        key = joblib_hash((X, self.y, repr(preprocess), repr(self.cv), random_state))
+        self.path = Path(root or state_dir() / 'model_search') / key
+        self.splits = list(self.cv.split(X, self.y))
+
+    def files(self, fold):
+        return {part: self.path / f'fold{fold:02d}_{part}.npy' for part in ('X_train', 'y_train', 'X_test', 'y_test')}
+
+    def ready(self, fold):
+        return all(p.exists() for p in self.files(fold).values())
+
+    def build(self, fold):
+        """Fit the preprocessing on the training part of ``fold`` and write the four arrays."""
+        from sklearn.base import clone
+        train, test = self.splits[fold]
+        train = np.random.default_rng(self.random_state + fold).permutation(train)
+        X_train, X_test = _rows(self.X, train), _rows(self.X, test)
+        if self.preprocess is not None:
+            step = clone(self.preprocess)
+            X_train, X_test = step.fit_transform(X_train), step.transform(X_test)
+        self.path.mkdir(parents=True, exist_ok=True)
+        arrays = {'X_train': _dense(X_train), 'y_train': self.y[train],
+                  'X_test': _dense(X_test), 'y_test': self.y[test]}
+        for part, path in self.files(fold).items():
+            tmp = path.with_suffix('.tmp.npy')
+            np.save(tmp, arrays[part])
+            os.replace(tmp, path)
+
+    def __len__(self):
+        return len(self.splits)
+
+
+def _rows(X, index):
+    return X.iloc[index] if hasattr(X, 'iloc') else X[index]
+
+
+def _dense(X):
+    X = X.toarray() if hasattr(X, 'toarray') else np.asarray(X)
+    return np.ascontiguousarray(X, dtype=np.float64)
+
+
+def _fit_score(files, estimator, params, n_samples, scoring):
+    """One task: fit ``estimator`` with ``params`` on the first ``n_samples`` cached training rows."""
+    from sklearn.base import clone
+    from sklearn.metrics import get_scorer
+    X_train = np.load(files['X_train'], mmap_mode='r')[:n_samples]
+    y_train = np.load(files['y_train'], mmap_mode='r')[:n_samples]
+    X_test = np.load(files['X_test'], mmap_mode='r')
+    y_test = np.load(files['y_test'], mmap_mode='r')
+    model = clone(estimator).set_params(**params)
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)  # parallelism comes from the pool; don't oversubscribe the cores
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+    return get_scorer(scoring)(model, X_test, y_test), fit_seconds
+
+
+def _build_fold(cache, fold):
+    cache.build(fold)
+    return fold
+
+
+class ModelSearch:
+    """Grid search over several ``Candidate`` models with K-fold CV on a process pool.
+
+    ``preprocess`` is an unfitted transformer (e.g. one-hot + scaler) applied before
+    every candidate and fitted once per fold. ``scoring`` is an sklearn scorer name
+    (higher is better). After ``fit``: ``results_`` (one row per config and round),
+    ``best_`` (``{'name', 'params', 'score'}``) and, with ``refit=True``,
+    ``best_estimator_`` - a preprocessing + model ``Pipeline`` fitted on all rows.
+    """
+
+    def __init__(self, candidates, preprocess=None, cv=10, scoring='neg_mean_squared_error', n_jobs=None,
+                 halving=False, factor=3, min_samples=500, cache_dir=None, refit=True, random_state=0,
+                 log=print):
+        self.candidates = list(candidates)
+        self.preprocess = preprocess
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.halving = halving
+        self.factor = factor
+        self.min_samples = min_samples
+        self.cache_dir = cache_dir
+        self.refit = refit
+        self.random_state = random_state
+        self.log = log or (lambda message: None)
+
+    def _schedule(self, n_configs, n_train):
+        """Training-set size per round: grows by ``factor`` and ends at the full fold."""
+        if not self.halving or n_configs <= 1:
+            return [n_train]
+        rounds = min(math.ceil(math.log(n_configs, self.factor)) + 1,
+                     1 + int(math.log(max(n_train / self.min_samples, 1), self.factor)))
+        return [max(1, int(n_train / self.factor ** (rounds - 1 - i))) for i in range(rounds)]
+
+    def _run(self, pool, tasks):
+        if pool is None:
+            return [_fit_score(*task) for task in tasks]
+        return list(pool.map(_fit_score, *zip(*tasks), chunksize=max(1, len(tasks) // (4 * self.n_jobs))))
+
+    def fit(self, X, y):
+        started = time.perf_counter()
+        cache = FoldCache(X, y, self.preprocess, self.cv, self.cache_dir, self.random_state)
+        configs = [(c, params) for c in self.candidates for params in c.configs()]
+        pool = ProcessPoolExecutor(self.n_jobs) if self.n_jobs > 1 else None
+        try:
+            missing = [f for f in range(len(cache)) if not cache.ready(f)]
+            if missing:
+                if pool is None:
+                    for fold in missing:
+                        cache.build(fold)
+                else:
+                    list(pool.map(_build_fold, [cache] * len(missing), missing))
+            self.log(f"Preprocessed {len(cache)} folds ({len(missing)} built, {len(cache) - len(missing)} cached) "
+                     f"in {time.perf_counter() - started:.1f}s")
+
+            n_train = min(len(train) for train, _ in cache.splits)
+            rows = []
+            schedule = self._schedule(len(configs), n_train)
+            for round_number, n_samples in enumerate(schedule):
+                round_started = time.perf_counter()
+                tasks = [(cache.files(fold), candidate.estimator, params, n_samples, self.scoring)
+                         for candidate, params in configs for fold in range(len(cache))]
+                outcomes = self._run(pool, tasks)
+                scored = []
+                for i, (candidate, params) in enumerate(configs):
+                    folds = outcomes[i * len(cache):(i + 1) * len(cache)]
+                    scores = np.array([score for score, _ in folds])
+                    rows.append({'round': round_number, 'n_samples': n_samples, 'candidate': candidate.name,
+                                 'params': params, 'mean_score': scores.mean(), 'std_score': scores.std(),
+                                 'fit_seconds': sum(seconds for _, seconds in folds)})
+                    scored.append((scores.mean(), i))
+                self.log(f"Round {round_number + 1}/{len(schedule)}: {len(configs)} configs x {len(cache)} folds "
+                         f"on {n_samples:,} rows in {time.perf_counter() - round_started:.1f}s")
+                if round_number < len(schedule) - 1:
+                    keep = max(1, math.ceil(len(configs) / self.factor))
+                    configs = [configs[i] for _, i in sorted(scored, key=lambda s: -s[0])[:keep]]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        results = pd.DataFrame(rows)
+        final = results[results['round'] == results['round'].max()]
+        best = final.loc[final['mean_score'].idxmax()]
+        self.results_ = results
+        self.best_ = {'name': best['candidate'], 'params': best['params'], 'score': best['mean_score']}
+        self.log(f"Best: {best['candidate']} {best['params']} score={best['mean_score']:.4f} "
+                 f"({time.perf_counter() - started:.1f}s total, {self.n_jobs} workers)")
+        if self.refit:
+            self.best_estimator_ = self._refit(X, y)
+        return self
+
+    def _refit(self, X, y):
+        from sklearn.base import clone
+        from sklearn.pipeline import Pipeline
+        estimator = next(c.estimator for c in self.candidates if c.name == self.best_['name'])
+        model = clone(estimator).set_params(**self.best_['params'])
+        steps = ([('preprocess', clone(self.preprocess))] if self.preprocess is not None else []) + [('model', model)]
+        return Pipeline(steps).fit(X, y)
@@ -0,0 +1,12 @@
+"""Options: chain snapshot ingestion and Black-Scholes analytics."""
+from .snapshot import (OPTIONS_COLUMNS, OPTIONS_KEY, snapshot_timestamp, chain_frame,
+                       fetch_option_snapshot, ensure_options_table, write_option_snapshot)
+from .analytics import (bs_price, bs_greeks, implied_vol, load_snapshot, mid_price, years_to_expiry, parity_spots,
+                        analyse_chain, IVSurface)
+
+__all__ = [
+    'OPTIONS_COLUMNS', 'OPTIONS_KEY', 'snapshot_timestamp', 'chain_frame',
+    'fetch_option_snapshot', 'ensure_options_table', 'write_option_snapshot',
+    'bs_price', 'bs_greeks', 'implied_vol', 'load_snapshot', 'mid_price', 'years_to_expiry', 'parity_spots',
+    'analyse_chain', 'IVSurface',
+]
@@ -0,0 +1,252 @@
+"""Vectorised Black-Scholes analytics over a stored option-chain snapshot.
+
+Every function works on whole columns, so a snapshot of all underlyings is priced in
+a handful of NumPy passes:
+
+* ``bs_price`` / ``bs_greeks`` - European Black-Scholes(-Merton) price, delta, gamma,
+  vega (per vol point) and theta (per calendar day);
+* ``implied_vol`` - one safeguarded Newton solve for every contract at once: each row
+  keeps a ``[low, high]`` bracket, and a Newton step that leaves it (or has no vega)
+  is replaced by bisection, so the solve converges like Newton and never diverges;
+* ``analyse_chain`` - mid prices, time to expiry, spot, re-solved IV, model price at
+  Yahoo's ``impliedVolatility`` and the Greeks for a snapshot frame;
+* ``IVSurface`` - per-underlying surface over (expiry, log-moneyness), interpolated
+  linearly in moneyness within an expiry and in total variance across expiries. The
+  sorted per-expiry slices are built once per underlying and reused by later queries.
+
+The snapshot table holds no underlying price. Pass ``spots`` (e.g. the last close
+from ``sp500_ohlcv``); without it the spot is implied from put-call parity at the
+strike where call and put mids are closest.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from .snapshot import OPTIONS_COLUMNS
+
+try:
+    from scipy.special import ndtr as _norm_cdf
+except ImportError:  # optional dependency
+    _norm_cdf = np.vectorize(lambda x: 0.5 * math.erfc(-x / math.sqrt(2)), otypes=[float])
+
+YEAR_DAYS = 365.0
+EXPIRY_HOUR_UTC = 20  # US listed options stop trading at 16:00 New York
+
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x * x) / math.sqrt(2 * math.pi)
+
+
+def _d1_d2(S, K, T, r, sigma, q):
+    root = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / root
+    return d1, d1 - root
+
+
+def bs_price(is_call, S, K, T, r, sigma, q=0.0):
+    """Black-Scholes price; every argument may be an array (broadcast together)."""
+    d1, d2 = _d1_d2(S, K, T, r, sigma, q)
+    S_q, K_r = S * np.exp(-q * T), K * np.exp(-r * T)
+    call = S_q * _norm_cdf(d1) - K_r * _norm_cdf(d2)
+    return np.where(is_call, call, call - S_q + K_r)  # put from put-call parity
+
+
+def bs_greeks(is_call, S, K, T, r, sigma, q=0.0):
+    """``{'delta', 'gamma', 'vega', 'theta'}`` arrays; vega per 1 vol point, theta per calendar day."""
+    d1, d2 = _d1_d2(S, K, T, r, sigma, q)
+    disc_q, disc_r = np.exp(-q * T), np.exp(-r * T)
+    pdf, sqrt_T = _norm_pdf(d1), np.sqrt(T)
+    call_delta = disc_q * _norm_cdf(d1)
+    decay = -S * disc_q * pdf * sigma / (2 * sqrt_T)
+    call_theta = decay - r * K * disc_r * _norm_cdf(d2) + q * S * disc_q * _norm_cdf(d1)
+    put_theta = decay + r * K * disc_r * _norm_cdf(-d2) - q * S * disc_q * _norm_cdf(-d1)
+    return {
+        'delta': np.where(is_call, call_delta, call_delta - disc_q),
+        'gamma': disc_q * pdf / (S * sigma * sqrt_T),
+        'vega': S * disc_q * pdf * sqrt_T / 100,
+        'theta': np.where(is_call, call_theta, put_theta) / YEAR_DAYS,
+    }
+
+
+def _price_vega(is_call, S, K, T, r, sigma, q):
+    """Price and raw vega (per unit of sigma) sharing one ``d1`` - the inner step of ``implied_vol``."""
+    d1, d2 = _d1_d2(S, K, T, r, sigma, q)
+    S_q, K_r = S * np.exp(-q * T), K * np.exp(-r * T)
+    call = S_q * _norm_cdf(d1) - K_r * _norm_cdf(d2)
+    return np.where(is_call, call, call - S_q + K_r), S_q * _norm_pdf(d1) * np.sqrt(T)
+
+
+def implied_vol(price, is_call, S, K, T, r=0.0, q=0.0, low=1e-4, high=5.0, tol=1e-8, max_iter=60):
+    """Implied volatility of every row at once (NaN where the price is outside the no-arbitrage bounds)."""
+    price, S, K, T = (np.asarray(x, dtype=np.float64) for x in (price, S, K, T))
+    shape = np.broadcast(price, is_call, S, K, T).shape
+    price, is_call, S, K, T = (np.broadcast_to(x, shape).ravel() for x in (price, is_call, S, K, T))
+    r = np.broadcast_to(np.asarray(r, dtype=np.float64), shape).ravel()
+    q = np.broadcast_to(np.asarray(q, dtype=np.float64), shape).ravel()
+    lo, hi = np.full(len(price), low), np.full(len(price), high)
+    with np.errstate(divide='ignore', invalid='ignore'):  # T, S or K of 0 fail the bounds and stay NaN
+        valid = (price > bs_price(is_call, S, K, T, r, lo, q)) & (price < bs_price(is_call, S, K, T, r, hi, q))
+    valid &= (T > 0) & (S > 0) & (K > 0)
+    sigma = np.full(len(price), np.nan)
+    index = np.flatnonzero(valid)
+    # Brenner-Subrahmanyam start: sigma ~ sqrt(2 pi / T) * price / S near the money
+    guess = np.sqrt(2 * np.pi / T[index]) * price[index] / S[index]
+    sigma[index] = np.clip(guess, low * 2, high / 2)
+    for _ in range(max_iter):
+        if not len(index):
+            break
+        model, vega = _price_vega(is_call[index], S[index], K[index], T[index], r[index], sigma[index], q[index])
+        diff = model - price[index]
+        done = np.abs(diff) < tol * np.maximum(price[index], 1e-12)
+        too_high = diff > 0
+        hi[index] = np.where(too_high, sigma[index], hi[index])
+        lo[index] = np.where(too_high, lo[index], sigma[index])
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            step = sigma[index] - diff / vega
+        bisect = ~np.isfinite(step) | (step <= lo[index]) | (step >= hi[index])
+        sigma[index] = np.where(done, sigma[index], np.where(bisect, 0.5 * (lo[index] + hi[index]), step))
+        index = index[~done]
+    return sigma.reshape(shape)
+
+
+# --- snapshots ---------------------------------------------------------------------
+
+def load_snapshot(engine, table, snapshot_ts=None, underlyings=None):
+    """One snapshot of the options table (the latest by default) with ``OPTIONS_COLUMNS`` names.
+
+    PostgreSQL folds the table's unquoted camelCase columns to lower case; they are renamed back.
+    """
+    where, params = "snapshot_ts = (SELECT MAX(snapshot_ts) FROM {table})", {}
+    if snapshot_ts is not None:
+        where, params['ts'] = "snapshot_ts = :ts", pd.Timestamp(snapshot_ts)
+    sql = f"SELECT * FROM {table} WHERE " + where.format(table=table)
+    if underlyings is not None:
+        names = ', '.join("'" + str(u).replace("'", "''") + "'" for u in underlyings)
+        sql += f" AND underlying IN ({names})"
+    df = pd.read_sql(text(sql), engine, params=params)
+    return df.rename(columns={c.lower(): c for c in OPTIONS_COLUMNS})
+
+
+def mid_price(df):
+    """``(bid + ask) / 2`` where both sides are quoted, else ``lastPrice``."""
+    bid, ask = df['bid'].astype('float64'), df['ask'].astype('float64')
+    quoted = (bid > 0) & (ask > 0) & (ask >= bid)
+    return pd.Series(np.where(quoted, (bid + ask) / 2, df['lastPrice'].astype('float64')), index=df.index)
+
+
+def years_to_expiry(df):
+    """Year fraction from ``snapshot_ts`` to the expiry close (``EXPIRY_HOUR_UTC`` on ``expiration``)."""
+    expiry = pd.to_datetime(df['expiration']).dt.tz_localize(None) + pd.Timedelta(hours=EXPIRY_HOUR_UTC)
+    snap = pd.to_datetime(df['snapshot_ts'], utc=True).dt.tz_localize(None)
+    return ((expiry - snap).dt.total_seconds() / 86400 / YEAR_DAYS).clip(lower=1e-6)
+
+
+def parity_spots(df, mid, T, rate=0.0):
+    """Spot per underlying implied by put-call parity, ``S = C - P + K exp(-rT)``, at the closest-to-ATM strike."""
+    frame = pd.DataFrame({'underlying': df['underlying'].to_numpy(), 'expiration': df['expiration'].to_numpy(),
+                          'strike': df['strike'].to_numpy(dtype=np.float64), 'type': df['type'].to_numpy(),
+                          'mid': mid.to_numpy(), 'T': T.to_numpy()})
+    pairs = frame.pivot_table(index=['underlying', 'expiration', 'strike'], columns='type',
+                              values=['mid', 'T'], aggfunc='first').dropna()
+    if pairs.empty:
+        return pd.Series(dtype='float64')
+    gap = pairs[('mid', 'call')] - pairs[('mid', 'put')]
+    strike = pairs.index.get_level_values('strike')
+    implied = pd.Series(gap.to_numpy() + strike * np.exp(-rate * pairs[('T', 'call')].to_numpy()), index=pairs.index)
+    # nearest expiry and the strike where |C - P| is smallest
+    nearest = gap.abs().groupby(level=['underlying', 'expiration']).idxmin()
+    first = nearest.groupby(level='underlying').head(1)
+    return pd.Series(implied.loc[list(first)].to_numpy(), index=first.index.get_level_values('underlying'))
+
+
+def analyse_chain(df, spots=None, rate=0.0, dividend_yield=0.0):
+    """The snapshot ``df`` plus ``mid``, ``T``, ``spot``, ``iv`` (re-solved from the mid), ``model_price``
+    (at Yahoo's ``impliedVolatility``) and ``delta`` / ``gamma`` / ``vega`` / ``theta`` (at ``iv``,
+    or Yahoo's IV where the mid can't be inverted)."""
+    out = df.copy()
+    out['mid'] = mid_price(out)
+    out['T'] = years_to_expiry(out)
+    if spots is None:
+        spots = parity_spots(out, out['mid'], out['T'], rate)
+    out['spot'] = out['underlying'].map(pd.Series(spots, dtype='float64'))
+    is_call = (out['type'] == 'call').to_numpy()
+    S, K, T = (out[c].to_numpy(dtype=np.float64) for c in ('spot', 'strike', 'T'))
+    yahoo_iv = out['impliedVolatility'].astype('float64').to_numpy()
+    out['iv'] = implied_vol(out['mid'].to_numpy(), is_call, S, K, T, rate, dividend_yield)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['model_price'] = bs_price(is_call, S, K, T, rate, yahoo_iv, dividend_yield)
+        sigma = np.where(np.isnan(out['iv']), yahoo_iv, out['iv'])
+        for name, values in bs_greeks(is_call, S, K, T, rate, sigma, dividend_yield).items():
+            out[name] = values
+    return out
+
+
+# --- IV surface ----------------------------------------------------------------------
+
+class IVSurface:
+    """Implied-volatility surfaces of an analysed snapshot (``analyse_chain`` output), one per underlying.
+
+    Each expiry contributes the out-of-the-money side (puts below the forward, calls
+    above), sorted by log-moneyness ``log(K / F)``. Queries interpolate linearly in
+    moneyness (flat beyond the quoted strikes) and linearly in total variance
+    ``iv^2 T`` between expiries.
+    """
+
+    def __init__(self, analysed, rate=0.0, column='iv'):
+        self.rate = rate
+        self.column = column
+        self._frames = {u: g for u, g in analysed.groupby('underlying', sort=False)}
+        self._slices = {}
+
+    def underlyings(self):
+        return list(self._frames)
+
+    def _prepare(self, underlying):
+        """Sorted ``(T, k, iv)`` arrays per expiry for ``underlying`` (built once, then cached)."""
+        if underlying not in self._slices:
+            g = self._frames[underlying]
+            T = g['T'].to_numpy(dtype=np.float64)
+            k = np.log(g['strike'].to_numpy(dtype=np.float64) / (g['spot'].to_numpy(dtype=np.float64)
+                                                                 * np.exp(self.rate * T)))
+            iv = g[self.column].to_numpy(dtype=np.float64)
+            otm = np.where((g['type'] == 'call').to_numpy(), k >= 0, k < 0) & ~np.isnan(iv)
+            T, k, iv = T[otm], k[otm], iv[otm]
+            order = np.lexsort((k, T))
+            T, k, iv = T[order], k[order], iv[order]
+            starts = np.flatnonzero(np.r_[True, T[1:] != T[:-1]]) if len(T) else []  # one slice per expiry
+            slices = [(T[a], k[a:b], iv[a:b]) for a, b in zip(starts, np.r_[starts[1:], len(T)])]
+            self._slices[underlying] = slices
+        return self._slices[underlying]
+
+    def iv(self, underlying, T, strike, spot=None):
+        """Interpolated IV at year fractions ``T`` and ``strike`` (arrays broadcast together)."""
+        slices = self._prepare(underlying)
+        if not slices:
+            raise ValueError(f"no usable implied volatilities for {underlying}")
+        T, strike = np.broadcast_arrays(np.asarray(T, dtype=np.float64), np.asarray(strike, dtype=np.float64))
+        spot = spot if spot is not None else float(self._frames[underlying]['spot'].iloc[0])
+        k = np.log(strike / (spot * np.exp(self.rate * T)))
+        times = np.array([t for t, _, _ in slices])
+        variance = np.stack([np.interp(k, ks, ivs) ** 2 * t for t, ks, ivs in slices])  # expiries x points
+        right = np.clip(np.searchsorted(times, T), 1, len(times) - 1) if len(times) > 1 else np.zeros(T.shape, int)
+        left = np.maximum(right - 1, 0)
+        t0, t1 = times[left], times[right]
+        w0 = np.take_along_axis(variance, left[None], 0)[0] if variance.ndim > 1 else variance[left]
+        w1 = np.take_along_axis(variance, right[None], 0)[0] if variance.ndim > 1 else variance[right]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(t1 > t0, np.clip((T - t0) / (t1 - t0), 0.0, 1.0), 0.0)
+        total = w0 + weight * (w1 - w0)
+        # flat volatility before the first and after the last expiry
+        total = np.where(T < times[0], variance[0] / times[0] * T, total)
+        total = np.where(T > times[-1], variance[-1] / times[-1] * T, total)
+        return np.sqrt(np.maximum(total, 0.0) / T)
+
+    def grid(self, underlying, expiries, moneyness=np.linspace(0.8, 1.2, 9)):
+        """``expiries x moneyness`` frame of IVs (strikes as multiples of the spot)."""
+        spot = float(self._frames[underlying]['spot'].iloc[0])
+        T, m = np.meshgrid(np.asarray(expiries, dtype=np.float64), np.asarray(moneyness, dtype=np.float64),
+                           indexing='ij')
+        return pd.DataFrame(self.iv(underlying, T, m * spot), index=pd.Index(expiries, name='T'),
+                            columns=pd.Index(moneyness, name='moneyness'))
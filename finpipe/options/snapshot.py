@@ -0,0 +1,95 @@
+"""Option-chain snapshot engine.
+
+Two fan-out stages on the shared ``DownloadScheduler``:
+
+1. one ``option_expiries`` call per underlying,
+2. one ``option_chain`` call per (underlying, expiry) inside the window - calls and
+   puts come from the same response, so every chain is fetched exactly once.
+
+Every row carries the run's ``snapshot_ts`` and the table is keyed on
+``(contractSymbol, snapshot_ts)``, so re-running inside the same snapshot bucket
+is a no-op and intraday runs append one clean snapshot each.
+"""
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from ..ingestion import YahooProvider, DownloadScheduler
+from ..storage import upsert_frame
+
+OPTIONS_COLUMNS = ['underlying', 'expiration', 'contractSymbol', 'strike', 'lastPrice', 'bid',
+                   'ask', 'change', 'percentChange', 'volume', 'openInterest', 'impliedVolatility',
+                   'inTheMoney', 'type', 'snapshot_ts']
+OPTIONS_KEY = ('contractSymbol', 'snapshot_ts')
+
+
+def snapshot_timestamp(freq='15min', now=None):
+    """UTC run timestamp floored to ``freq``; reruns inside one bucket share a snapshot."""
+    now = pd.Timestamp(now or datetime.now(timezone.utc))
+    now = now.tz_localize('UTC') if now.tzinfo is None else now.tz_convert('UTC')
+    return now.floor(freq)
+
+
+def chain_frame(chain, underlying, expiry, snapshot_ts):
+    """Calls and puts of one chain as one frame in ``OPTIONS_COLUMNS`` order."""
+    calls = chain.calls.assign(type='call')
+    puts = chain.puts.assign(type='put')
+    df = pd.concat([calls, puts], ignore_index=True)
+    df['underlying'] = underlying
+    df['expiration'] = expiry
+    df['snapshot_ts'] = snapshot_ts
+    for col in OPTIONS_COLUMNS:
+        if col not in df.columns:
+            df[col] = pd.NA
+    return df[OPTIONS_COLUMNS]
+
+
+def fetch_option_snapshot(underlyings, min_expiry, max_expiry, provider=None, scheduler=None,
+                          snapshot_ts=None, **scheduler_kwargs):
+    """Fetch every chain expiring in ``(min_expiry, max_expiry]`` for ``underlyings``.
+
+    Returns ``(df, failed)`` where ``failed`` lists underlyings whose expiry list could
+    not be fetched plus ``'UNDERLYING expiry'`` entries for individual failed chains.
+    """
+    if scheduler is None:
+        scheduler = DownloadScheduler(provider or YahooProvider(), **scheduler_kwargs)
+    provider = scheduler.provider
+    snapshot_ts = snapshot_ts if snapshot_ts is not None else snapshot_timestamp()
+
+    print(f"📥 Fetching expiries for {len(underlyings)} underlyings ...")
+    expiries = scheduler.map(provider.option_expiries, underlyings)
+    tasks = []
+    for underlying, dates in expiries.results.items():
+        for exp in dates:
+            exp_date = datetime.strptime(exp, "%Y-%m-%d").date()
+            if min_expiry < exp_date <= max_expiry:
+                tasks.append((underlying, exp, exp_date))
+
+    print(f"📥 Fetching {len(tasks)} option chains ...")
+    chains = scheduler.map(lambda task: provider.option_chain(task[0], task[1]), tasks)
+    frames = [chain_frame(chain, underlying, exp_date, snapshot_ts)
+              for (underlying, _, exp_date), chain in chains.results.items()]
+    failed = list(expiries.failed) + [f"{u} {exp}" for (u, exp, _) in chains.failed]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=OPTIONS_COLUMNS)
+    print(f"Collected {len(df)} contracts from {len(frames)} chains in "
+          f"{expiries.elapsed + chains.elapsed:.1f}s")
+    return df, failed
+
+
+def ensure_options_table(engine, table, snapshot_ts=None, log=print):
+    """Migrate the snapshot table to the managed schema and create the partition of ``snapshot_ts``.
+
+    The table is partitioned by month of ``snapshot_ts`` on PostgreSQL. The original
+    key-less table is converted by the first migration; its rows keep ``snapshot_ts``
+    NULL (in the default partition) and the UNIQUE ``(contractSymbol, snapshot_ts)``
+    key lets them coexist, since NULLs never collide.
+    """
+    from ..schema import migrate, ensure_partitions
+    migrate(engine, table, 'options', log=log)
+    snapshot_ts = snapshot_ts if snapshot_ts is not None else snapshot_timestamp()
+    ensure_partitions(engine, table, snapshot_ts, snapshot_ts, kind='options', log=log)
+
+
+def write_option_snapshot(engine, df, table):
+    """Append a snapshot; rows already stored for the same ``snapshot_ts`` are skipped server-side."""
+    return upsert_frame(engine, df, table, key=OPTIONS_KEY, on_conflict='nothing', columns=OPTIONS_COLUMNS)
@@ -0,0 +1,12 @@
+import os
+from pathlib import Path
+
+
+def state_dir():
+    """Directory for finpipe's local state (high-water marks, caches, queues).
+
+    Defaults to ``~/.finpipe``; override with the ``FINPIPE_STATE_DIR`` environment variable.
+    """
+    path = Path(os.environ.get('FINPIPE_STATE_DIR', Path.home() / '.finpipe'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,12 @@
+"""Data-quality validation between download and load, with a quarantine table for rejected bars."""
+from .rules import (RULES, BITS, QualityRules, RULESETS, get_rules, day_numbers, trailing_std, flag_rows,
+                    describe_flags, rule_counts, QualityReport, validate_ohlcv)
+from .quarantine import (QUARANTINE_TABLE, QUARANTINE_COLUMNS, QUARANTINE_KEY, ensure_quarantine_table,
+                         write_quarantine, recent_bars, purge_quarantined, ValidatedStream)
+
+__all__ = [
+    'RULES', 'BITS', 'QualityRules', 'RULESETS', 'get_rules', 'day_numbers', 'trailing_std', 'flag_rows',
+    'describe_flags', 'rule_counts', 'QualityReport', 'validate_ohlcv',
+    'QUARANTINE_TABLE', 'QUARANTINE_COLUMNS', 'QUARANTINE_KEY', 'ensure_quarantine_table',
+    'write_quarantine', 'recent_bars', 'purge_quarantined', 'ValidatedStream',
+]
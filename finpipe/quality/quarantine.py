@@ -0,0 +1,145 @@
+"""Quarantine table and the validation stage between download and load.
+
+``ValidatedStream`` wraps a download stream (per-ticker or per-batch frames),
+validates each frame as it arrives and yields only the clean rows, so it slots in
+front of ``upsert_frame`` unchanged. Each frame is validated after the ticker's
+last stored bars (``recent_bars``), so the trailing rules work on the few bars of
+an incremental run. Quarantined rows are kept aside until the job's next
+checkpoint (``drain``), which upserts them into ``data_quarantine``, keyed on
+``(source_table, date, ticker)``, so a rerun re-flags a bar instead of piling up
+copies, and deletes them from the price table (``purge_quarantined``).
+
+The last bar of a run has no next close yet, so a one-bar spike is loaded and
+caught by the next run, whose overlap downloads it again with the bar after it;
+that run moves it out of the price table. Fixed bars can be re-inserted from the
+quarantine and the row deleted.
+"""
+import time
+
+import pandas as pd
+
+from ..ingestion.frames import OHLCV_COLUMNS
+
+from .rules import RULES, get_rules, validate_ohlcv
+
+QUARANTINE_TABLE = 'data_quarantine'
+QUARANTINE_COLUMNS = ['source_table', 'date', 'ticker', 'open', 'high', 'low', 'close', 'volume', 'rules',
+                      'quarantined_at']
+QUARANTINE_KEY = ('source_table', 'date', 'ticker')
+
+
+def ensure_quarantine_table(engine, table=QUARANTINE_TABLE):
+    from sqlalchemy import text
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                source_table TEXT,
+                date DATE,
+                ticker TEXT,
+                open DOUBLE PRECISION,
+                high DOUBLE PRECISION,
+                low DOUBLE PRECISION,
+                close DOUBLE PRECISION,
+                volume BIGINT,
+                rules TEXT,
+                quarantined_at TIMESTAMP WITH TIME ZONE,
+                PRIMARY KEY (source_table, date, ticker)
+            );
+        """))
+
+
+def write_quarantine(engine, quarantined, source_table, table=QUARANTINE_TABLE):
+    """Upsert ``validate_ohlcv`` rejects of ``source_table``; returns rows written."""
+    if quarantined is None or quarantined.empty:
+        return 0
+    from ..storage import upsert_frame
+    ensure_quarantine_table(engine, table)
+    df = quarantined.assign(source_table=source_table, ticker=quarantined['ticker'].astype(str),
+                            quarantined_at=pd.Timestamp.now(tz='UTC'))
+    return upsert_frame(engine, df, table, key=QUARANTINE_KEY, on_conflict='update', columns=QUARANTINE_COLUMNS)
+
+
+def recent_bars(engine, table, df, bars):
+    """Up to ``bars`` stored rows of ``table`` per ticker of ``df``, dated before ``df``'s first date."""
+    from sqlalchemy import text
+    if df.empty or not bars:
+        return None
+    tickers = sorted(df['ticker'].astype(str).unique())
+    names = {f't{i}': t for i, t in enumerate(tickers)}
+    return pd.read_sql(text(f"""
+        SELECT {', '.join(OHLCV_COLUMNS)} FROM (
+            SELECT p.*, ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS recent
+            FROM {table} p
+            WHERE ticker IN ({', '.join(':' + n for n in names)}) AND date < :before
+        ) r WHERE recent <= :bars
+    """), engine, params={**names, 'before': pd.Timestamp(df['date'].min()).date(), 'bars': bars})
+
+
+def purge_quarantined(engine, quarantined, table):
+    """Delete the ``(date, ticker)`` rows of ``quarantined`` from ``table``; returns rows deleted."""
+    if quarantined is None or quarantined.empty:
+        return 0
+    from sqlalchemy import text
+    keys = quarantined[['date', 'ticker']].drop_duplicates()
+    params = [{'date': pd.Timestamp(d).date(), 'ticker': str(t)} for d, t in zip(keys['date'], keys['ticker'])]
+    with engine.begin() as conn:
+        result = conn.execute(text(f"DELETE FROM {table} WHERE date = :date AND ticker = :ticker"), params)
+    return max(result.rowcount, 0)
+
+
+class ValidatedStream:
+    """Iterable of the clean part of each frame in ``frames``, validated as it is consumed.
+
+    Single use. ``history(df)`` (e.g. ``recent_bars``) returns the earlier bars each
+    frame is validated after. ``drain()`` returns the rows rejected since its last
+    call; once exhausted, ``quarantined`` holds all of them (with ``rules``), ``counts``
+    the rows flagged per rule and ``seconds`` the time spent validating. Attribute
+    lookups it does not know (``failed``, ``latest``, ``fail``, ...) go to the
+    wrapped stream.
+    """
+
+    def __init__(self, frames, rules='equity', log=print, history=None):
+        self.frames = frames
+        self.rules = get_rules(rules)
+        self.log = log or (lambda *a, **k: None)
+        self.history = history
+        self._quarantined = []
+        self._drained = 0
+        self.counts = dict.fromkeys(RULES, 0)
+        self.rows = 0
+        self.seconds = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__['frames'], name)
+
+    def __iter__(self):
+        for df in self.frames:
+            started = time.perf_counter()
+            report = validate_ohlcv(df, self.rules, self.history(df) if self.history else None)
+            self.seconds += time.perf_counter() - started
+            self.rows += len(df)
+            for name, count in report.counts.items():
+                self.counts[name] += count
+            if not report.quarantined.empty:
+                self._quarantined.append(report.quarantined)
+            if not report.clean.empty:
+                yield report.clean
+        flagged = {name: count for name, count in self.counts.items() if count}
+        self.log(f"🔎 Validated {self.rows:,} rows in {self.seconds:.2f}s: {len(self.quarantined):,} quarantined"
+                 + (f" ({', '.join(f'{k} {v:,}' for k, v in flagged.items())})" if flagged else ""))
+
+    @staticmethod
+    def _concat(frames):
+        if not frames:
+            return pd.DataFrame(columns=[*QUARANTINE_COLUMNS[1:-2], 'rules'])
+        return pd.concat(frames, ignore_index=True)
+
+    @property
+    def quarantined(self):
+        return self._concat(self._quarantined)
+
+    def drain(self):
+        """Rows quarantined since the last ``drain`` (all so far on the first call)."""
+        frames = self._quarantined[self._drained:]
+        self._drained = len(self._quarantined)
+        return self._concat(frames)
@@ -0,0 +1,242 @@
+"""Vectorised data-quality rules for downloaded OHLCV bars.
+
+Bad bars used to flow straight into the tables. The only cleaning was the
+all-NaN ``dropna`` of the batch reshape, and ``Stock_Feature_Engineering.ipynb``
+later patched ``low > 5000`` row by row. Here every downloaded frame is checked
+before it is written. The frame is sorted once by ``(ticker, date)`` into NumPy
+arrays, and each rule is one masked array expression over all tickers, using the
+segment helpers of ``finpipe.features.engine``:
+
+* ``missing``: an open / high / low / close is NaN
+* ``invalid``: a price <= 0 or a negative volume
+* ``ohlc``: low above min(open, close), high below max(open, close), or low > high
+* ``spike``: the close jumps from the previous close and the next close takes it
+  back (a one-bar print). The jump must exceed ``max(min_move, z x trailing std)``
+  of the ticker's log returns. A split or a re-rating moves the level and stays, so
+  it is not a spike.
+* ``gap``: the open is far from both the previous close and its own close, by the
+  same threshold
+* ``zero_volume``: a run of at least ``zero_volume_run`` bars with volume 0
+* ``stale``: a run of at least ``stale_run`` bars repeating the previous close
+* ``calendar_gap``: more than ``max_calendar_gap_days`` days since the ticker's
+  previous bar (warning only by default; the missing days are not a bad row)
+
+Thresholds are per asset class (``RULESETS``). Volume rules are off for FX and
+funds, whose Yahoo volume is 0 or missing.
+
+An incremental download holds only the last few bars of a ticker, too few for a
+trailing std or a run. ``validate_ohlcv(df, rules, history=...)`` puts the
+ticker's last stored bars (``QualityRules.seed_bars`` of them) in front of the
+frame for the rules' context and reports only the frame's own rows.
+"""
+import numpy as np
+import pandas as pd
+
+from ..features.engine import segment_positions, shift
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional dependency
+    pa = None
+
+RULES = ['missing', 'invalid', 'ohlc', 'spike', 'gap', 'zero_volume', 'stale', 'calendar_gap']
+BITS = {name: np.uint16(1 << i) for i, name in enumerate(RULES)}
+
+
+class QualityRules:
+    """Thresholds of one asset class. ``None`` switches a rule off.
+
+    Rules named in ``quarantine`` remove the bar from the load; the others only count it.
+    """
+
+    def __init__(self, ohlc_tolerance=1e-4, min_move=0.25, z=10.0, window=20, zero_volume_run=5, stale_run=5,
+                 max_calendar_gap_days=6, quarantine=tuple(RULES[:-1])):
+        self.ohlc_tolerance = ohlc_tolerance  # relative slack for rounding in the provider's OHLC
+        self.min_move = min_move              # smallest |log return| that can count as a spike or gap
+        self.z = z                            # ... and at least z trailing standard deviations
+        self.window = window                  # bars in the trailing standard deviation (half must be present)
+        self.zero_volume_run = zero_volume_run
+        self.stale_run = stale_run
+        self.max_calendar_gap_days = max_calendar_gap_days
+        self.quarantine = frozenset(quarantine)
+
+    def __repr__(self):
+        return f"QualityRules({', '.join(f'{k}={v!r}' for k, v in vars(self).items())})"
+
+    @property
+    def seed_bars(self):
+        """Stored bars per ticker that give a short frame the same context as a full history."""
+        return max(self.window, self.zero_volume_run or 0, self.stale_run or 0) + 1
+
+
+RULESETS = {
+    'equity': QualityRules(),
+    'fund': QualityRules(zero_volume_run=None, stale_run=10),
+    'bonds': QualityRules(min_move=0.1, zero_volume_run=None, stale_run=10),
+    'forex': QualityRules(min_move=0.1, zero_volume_run=None, max_calendar_gap_days=5),
+    'commodities': QualityRules(min_move=0.3, zero_volume_run=None),
+}
+
+
+def get_rules(rules):
+    """``rules`` itself, or the ruleset of that asset-class name."""
+    if rules is None or isinstance(rules, QualityRules):
+        return rules
+    try:
+        return RULESETS[rules]
+    except KeyError:
+        raise KeyError(f"Unknown quality ruleset {rules!r}; choose from {', '.join(RULESETS)}") from None
+
+
+def day_numbers(dates):
+    """Days since 1970-01-01 as int64 (zero-copy for Arrow ``date32`` columns)."""
+    if pa is not None and isinstance(dates.dtype, pd.ArrowDtype) and pa.types.is_date32(dates.dtype.pyarrow_dtype):
+        return pa.array(dates.array).cast(pa.int32()).to_numpy(zero_copy_only=False).astype(np.int64)
+    values = pd.to_datetime(dates)
+    if getattr(values.dt, 'tz', None) is not None:
+        values = values.dt.tz_localize(None)
+    return values.to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _long_runs(mask, pos, length):
+    """Rows of ``mask`` that sit in a run of at least ``length`` consecutive rows inside their segment."""
+    starts = mask.copy()
+    starts[1:] &= ~mask[:-1] | (pos[1:] == 0)
+    run = np.cumsum(starts)
+    run[~mask] = 0
+    return mask & (np.bincount(run)[run] >= length)
+
+
+def trailing_std(x, pos, window, min_periods):
+    """Sample std of the up to ``window`` finite values before each row in its segment (NaN below ``min_periods``).
+
+    Windowed differences of cumulative sums: O(n) whatever the window, NaNs skipped.
+    """
+    finite = np.isfinite(x)
+    sums = [np.concatenate([[0.0], np.cumsum(v)]) for v in (finite.astype(float), np.where(finite, x, 0.0),
+                                                            np.where(finite, x * x, 0.0))]
+    hi = np.arange(len(x))
+    lo = hi - np.minimum(pos, window)
+    count, total, squares = (s[hi] - s[lo] for s in sums)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = (squares - total * total / count) / (count - 1)
+    var[count < max(min_periods, 2)] = np.nan
+    return np.sqrt(np.maximum(var, 0.0))
+
+
+def flag_rows(df, rules):
+    """``uint16`` bitmask per row of ``df`` (in input order), one bit per rule in ``RULES``."""
+    n = len(df)
+    flags = np.zeros(n, dtype=np.uint16)
+    if n == 0:
+        return flags
+    ticker = df['ticker']
+    codes = ticker.cat.codes.to_numpy() if isinstance(ticker.dtype, pd.CategoricalDtype) else pd.factorize(ticker)[0]
+    days = day_numbers(df['date'])
+    order = np.lexsort((days, codes))
+    codes, days = codes[order], days[order]
+    pos = segment_positions(codes)
+    opn, high, low, close = (df[c].to_numpy(dtype=float)[order] for c in ('open', 'high', 'low', 'close'))
+    volume = pd.to_numeric(df['volume']).to_numpy(dtype=float, na_value=np.nan)[order]
+    out = np.zeros(n, dtype=np.uint16)
+
+    prices = np.stack([opn, high, low, close])
+    out[np.isnan(prices).any(axis=0)] |= BITS['missing']
+    with np.errstate(invalid='ignore'):
+        out[(prices <= 0).any(axis=0) | (volume < 0)] |= BITS['invalid']
+        slack = 1 + rules.ohlc_tolerance
+        body_low, body_high = np.minimum(opn, close), np.maximum(opn, close)
+        out[(low > body_low * slack) | (high * slack < body_high) | (low > high)] |= BITS['ohlc']
+
+    if rules.min_move is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_close = np.log(np.where(close > 0, close, np.nan))
+            ret = log_close - shift(log_close, 1, pos)           # close vs previous close
+            trailing = trailing_std(ret, pos, rules.window, rules.window // 2)
+            limit = np.fmax(rules.min_move, rules.z * trailing)  # NaN std (short history) -> min_move
+            nxt = np.full(n, np.nan)
+            nxt[:-1] = ret[1:]
+            nxt[np.append(pos[1:] == 0, True)] = np.nan        # the next bar must be the same ticker's
+            reverts = np.abs(ret + nxt) < 0.5 * np.abs(ret)
+            out[(np.abs(ret) > limit) & reverts] |= BITS['spike']
+            log_open = np.log(np.where(opn > 0, opn, np.nan))
+            gap = np.abs(log_open - shift(log_close, 1, pos))
+            out[(gap > limit) & (np.abs(log_open - log_close) > limit)] |= BITS['gap']
+
+    if rules.zero_volume_run:
+        out[_long_runs(volume == 0, pos, rules.zero_volume_run)] |= BITS['zero_volume']
+    if rules.stale_run:
+        repeat = close == shift(close, 1, pos)
+        # a run of k repeats is k + 1 equal closes; the first one is a real quote
+        out[_long_runs(repeat, pos, rules.stale_run - 1)] |= BITS['stale']
+    if rules.max_calendar_gap_days:
+        previous = np.empty(n, dtype=np.int64)
+        previous[1:] = days[:-1]
+        out[(pos > 0) & (days - previous > rules.max_calendar_gap_days)] |= BITS['calendar_gap']
+
+    flags[order] = out
+    return flags
+
+
+def describe_flags(flags):
+    """Comma-separated rule names per bitmask, e.g. ``'ohlc,spike'``."""
+    flags = np.asarray(flags)
+    names = np.full(len(flags), '', dtype=object)
+    for name in RULES:
+        hit = (flags & BITS[name]) != 0
+        names[hit] = names[hit] + (',' + name)
+    return pd.array([s[1:] for s in names], dtype='str')
+
+
+def rule_counts(flags):
+    """``{rule: rows flagged}`` for the rules that flagged anything."""
+    flags = np.asarray(flags)
+    counts = {name: int(np.count_nonzero(flags & BITS[name])) for name in RULES}
+    return {name: count for name, count in counts.items() if count}
+
+
+class QualityReport:
+    """``validate_ohlcv`` result: ``clean`` rows to load, ``quarantined`` rows with their ``rules``."""
+
+    def __init__(self, clean, quarantined, counts):
+        self.clean = clean
+        self.quarantined = quarantined
+        self.counts = counts  # every flagged row, including warn-only rules
+
+    def __repr__(self):
+        return f"QualityReport(clean={len(self.clean)}, quarantined={len(self.quarantined)}, counts={self.counts})"
+
+
+def _with_history(df, history):
+    """``(frame, n)``: the ``n`` rows of ``history`` not in ``df``, then ``df``, as a plain frame for ``flag_rows``."""
+    days, old_days = day_numbers(df['date']), day_numbers(history['date'])
+    tickers, old_tickers = df['ticker'].astype(str).to_numpy(), history['ticker'].astype(str).to_numpy()
+    keep = ~pd.MultiIndex.from_arrays([old_tickers, old_days]).isin(pd.MultiIndex.from_arrays([tickers, days]))
+    combined = {'date': np.concatenate([old_days[keep], days]).astype('datetime64[D]'),
+                'ticker': np.concatenate([old_tickers[keep], tickers])}
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        old = pd.to_numeric(history[col]).to_numpy(dtype=float, na_value=np.nan)[keep]
+        combined[col] = np.concatenate([old, pd.to_numeric(df[col]).to_numpy(dtype=float, na_value=np.nan)])
+    return pd.DataFrame(combined), int(keep.sum())
+
+
+def validate_ohlcv(df, rules='equity', history=None):
+    """Split ``df`` into the rows to load and the rows to quarantine under ``rules``.
+
+    ``rules`` is a ``QualityRules`` or a ``RULESETS`` name. Both frames keep ``df``'s
+    row order; ``quarantined`` gets a ``rules`` column naming every rule the row broke.
+    ``history`` (earlier bars of the same tickers, e.g. the stored ones) is context
+    for the trailing rules only; its rows are never reported.
+    """
+    rules = get_rules(rules)
+    if history is None or history.empty or df.empty:
+        flags = flag_rows(df, rules)
+    else:
+        combined, seeded = _with_history(df, history)
+        flags = flag_rows(combined, rules)[seeded:]
+    blocking = np.uint16(sum(int(BITS[name]) for name in rules.quarantine))
+    bad = (flags & blocking) != 0
+    if not bad.any():
+        return QualityReport(df, df.iloc[:0].assign(rules=pd.array([], dtype='str')), rule_counts(flags))
+    quarantined = df[bad].assign(rules=describe_flags(flags[bad]))
+    return QualityReport(df[~bad], quarantined, rule_counts(flags))
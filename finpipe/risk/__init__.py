@@ -0,0 +1,15 @@
+"""Portfolio risk over the stored price tables: FX-aligned prices, vectorised VaR / CVaR / drawdown, stress tests."""
+from .market import (EXCHANGE_CURRENCIES, instrument_currency, load_closes, wide_closes, fx_rate,
+                     price_matrix)
+from .engine import (simple_returns, weight_matrix, portfolio_returns, historical_var, parametric_var,
+                     rolling_volatility, max_drawdown, correlation_matrix, portfolio_risk)
+from .montecarlo import (CorrelatedGBM, Bootstrap, PortfolioStress, FundingStress, tail_estimates, StressResult,
+                         MonteCarlo)
+
+__all__ = [
+    'EXCHANGE_CURRENCIES', 'instrument_currency', 'load_closes', 'wide_closes', 'fx_rate', 'price_matrix',
+    'simple_returns', 'weight_matrix', 'portfolio_returns', 'historical_var', 'parametric_var',
+    'rolling_volatility', 'max_drawdown', 'correlation_matrix', 'portfolio_risk',
+    'CorrelatedGBM', 'Bootstrap', 'PortfolioStress', 'FundingStress', 'tail_estimates', 'StressResult',
+    'MonteCarlo',
+]
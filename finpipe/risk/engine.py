@@ -0,0 +1,136 @@
+"""Portfolio risk for many portfolios at once: VaR / CVaR, volatility, correlation, drawdown.
+
+A book of ``P`` portfolios over ``N`` instruments is a ``P x N`` weight matrix ``W``.
+With the ``T x N`` daily return matrix ``R`` every portfolio's return series is one
+product ``R @ W.T``, and every statistic is computed down the time axis of that
+``T x P`` matrix - no loop over portfolios:
+
+* historical VaR / CVaR: one ``np.partition`` per confidence level puts the worst
+  ``k`` days of every column in front (VaR is the ``k``-th, CVaR their mean);
+* parametric (normal) VaR / CVaR: ``mu = W @ mean``, ``sigma^2 = rowsum((W @ Cov) * W)``;
+* rolling volatility: differences of cumulative sums of ``r`` and ``r^2``;
+* max drawdown: ``cumprod`` of growth and its running maximum.
+
+Portfolios are processed ``chunk`` columns at a time so the ``T x chunk`` working
+arrays stay small. Losses (VaR, CVaR, drawdown) are reported as positive numbers.
+"""
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+
+def simple_returns(prices):
+    """Daily simple returns of a wide price frame; days an instrument has no price count as 0."""
+    returns = prices.pct_change(fill_method=None).iloc[1:]
+    return returns.fillna(0.0)
+
+
+def weight_matrix(weights, instruments):
+    """``P x N`` float array of ``weights`` (frame / dict of rows / array) in the order of ``instruments``."""
+    if isinstance(weights, dict):
+        weights = pd.DataFrame(weights).T
+    if isinstance(weights, pd.DataFrame):
+        unknown = weights.columns.difference(instruments)
+        if len(unknown):
+            raise KeyError(f"weights for instruments without prices: {', '.join(map(str, unknown[:10]))}")
+        weights = weights.reindex(columns=instruments, fill_value=0.0).fillna(0.0)
+    W = np.asarray(weights, dtype=np.float64)
+    return W.reshape(1, -1) if W.ndim == 1 else W
+
+
+def portfolio_returns(returns, weights):
+    """``T x P`` daily returns of every portfolio (``returns`` is ``T x N``)."""
+    R = returns.to_numpy(dtype=np.float64) if hasattr(returns, 'to_numpy') else np.asarray(returns, np.float64)
+    columns = returns.columns if hasattr(returns, 'columns') else range(R.shape[1])
+    return R @ weight_matrix(weights, columns).T
+
+
+def historical_var(portfolio_returns, level=0.99):
+    """``(VaR, CVaR)`` per column from the empirical distribution of ``portfolio_returns`` (``T x P``)."""
+    r = np.asarray(portfolio_returns)
+    k = max(int(np.ceil((1 - level) * len(r))) - 1, 0)  # index of the VaR day among the sorted returns
+    worst = np.partition(r, k, axis=0)[:k + 1]
+    return -worst[k], -worst.mean(axis=0)
+
+
+def parametric_var(mean, cov, weights, level=0.99):
+    """Normal ``(VaR, CVaR)`` per portfolio from instrument ``mean`` (N) and ``cov`` (N x N)."""
+    W = np.asarray(weights, dtype=np.float64)
+    mu = W @ np.asarray(mean)
+    sigma = np.sqrt(np.maximum(np.einsum('pn,pn->p', W @ np.asarray(cov), W), 0.0))
+    z = NormalDist().inv_cdf(1 - level)
+    var = -(mu + z * sigma)
+    cvar = -(mu - sigma * np.exp(-z * z / 2) / np.sqrt(2 * np.pi) / (1 - level))
+    return var, cvar
+
+
+def rolling_volatility(returns, window=21, periods=252):
+    """Annualised rolling standard deviation (sample, ``ddof=1``) down each column of ``returns``.
+
+    Row ``i`` of the result covers rows ``i .. i + window - 1`` of the input.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    r = r - r.mean(axis=0)  # centring keeps the cumulative sums well conditioned
+    zero = np.zeros((1,) + r.shape[1:])
+    s1 = np.concatenate([zero, np.cumsum(r, axis=0)])
+    s2 = np.concatenate([zero, np.cumsum(r * r, axis=0)])
+    total, squares = s1[window:] - s1[:-window], s2[window:] - s2[:-window]
+    variance = np.maximum(squares - total * total / window, 0.0) / (window - 1)
+    return np.sqrt(variance * periods)
+
+
+def max_drawdown(portfolio_returns):
+    """Largest peak-to-trough fall of the compounded value of each column (0.25 = -25%)."""
+    growth = np.cumprod(1.0 + np.asarray(portfolio_returns), axis=0)
+    peak = np.maximum.accumulate(np.maximum(growth, 1.0), axis=0)
+    return -(growth / peak - 1.0).min(axis=0)
+
+
+def correlation_matrix(returns):
+    """Pearson correlation of the columns of ``returns`` (instruments, or portfolio returns)."""
+    frame = returns if isinstance(returns, pd.DataFrame) else pd.DataFrame(returns)
+    X = frame.to_numpy(dtype=np.float64)
+    X = X - X.mean(axis=0)
+    norm = np.sqrt((X * X).sum(axis=0))
+    norm[norm == 0] = np.nan
+    corr = (X.T @ X) / np.outer(norm, norm)
+    return pd.DataFrame(corr, index=frame.columns, columns=frame.columns)
+
+
+def portfolio_risk(returns, weights, levels=(0.95, 0.99), window=21, periods=252, chunk=1024, log=print):
+    """One row of risk figures per portfolio (row of ``weights``), computed in portfolio chunks.
+
+    Columns: annualised ``mean`` and ``volatility``, the latest ``rolling_vol`` over
+    ``window`` days (NaN with fewer days of returns), ``hist_var_<level>`` / ``hist_cvar_<level>``,
+    ``param_var_<level>`` / ``param_cvar_<level>`` (one-day, as fractions of the portfolio value)
+    and ``max_drawdown``.
+    """
+    started = time.perf_counter()
+    if isinstance(weights, dict):
+        weights = pd.DataFrame(weights).T
+    R = returns.to_numpy(dtype=np.float64)
+    W = weight_matrix(weights, returns.columns)
+    mean, cov = R.mean(axis=0), np.cov(R, rowvar=False).reshape(R.shape[1], R.shape[1])
+    parts = []
+    for first in range(0, len(W), chunk):
+        w = W[first:first + chunk]
+        p = R @ w.T
+        recent = rolling_volatility(p[-window:], window, periods)[-1] if len(p) >= window else np.nan
+        part = {'mean': p.mean(axis=0) * periods, 'volatility': p.std(axis=0, ddof=1) * np.sqrt(periods),
+                'rolling_vol': recent}
+        for level in levels:
+            tag = f'{level * 100:g}'
+            part[f'hist_var_{tag}'], part[f'hist_cvar_{tag}'] = historical_var(p, level)
+            part[f'param_var_{tag}'], part[f'param_cvar_{tag}'] = parametric_var(mean, cov, w, level)
+        part['max_drawdown'] = max_drawdown(p)
+        parts.append(pd.DataFrame(part))
+    index = weights.index if isinstance(weights, pd.DataFrame) else None
+    result = pd.concat(parts, ignore_index=True)
+    if index is not None:
+        result.index = index
+    if log:
+        log(f"Risk for {len(W):,} portfolios x {R.shape[1]} instruments x {len(R):,} days "
+            f"in {time.perf_counter() - started:.2f}s")
+    return result
@@ -0,0 +1,109 @@
+"""Aligned, base-currency price matrices across the asset tables.
+
+Each ETL script writes its own ``(date, ticker, open, high, low, close, volume)``
+table, on its own exchange calendar and in the listing currency. ``price_matrix``
+turns any number of those long frames into one wide ``date x ticker`` matrix of
+closes:
+
+* dates are the union of all tables' dates; a price is carried forward over at
+  most ``fill_limit`` missing days (exchange holidays), never before its first bar;
+* every instrument is converted into ``base`` with the Yahoo FX pairs stored by
+  ``forex_to_database.py`` (``EURUSD=X`` = USD per EUR). A currency is converted
+  directly, through the inverse pair, or through USD when neither pair is stored.
+
+The listing currency comes from the Yahoo exchange suffix (``SWDA.L`` -> GBP,
+``SXR8.DE`` -> EUR); pass ``currencies={ticker: ccy}`` for anything else. LSE lines
+quoted in pence only differ from pounds by a constant factor, which cancels in returns.
+"""
+import pandas as pd
+from sqlalchemy import text
+
+from ..adjustments import price_source
+
+EXCHANGE_CURRENCIES = {
+    'L': 'GBP', 'DE': 'EUR', 'F': 'EUR', 'AS': 'EUR', 'PA': 'EUR', 'MI': 'EUR', 'MC': 'EUR', 'BR': 'EUR',
+    'SW': 'CHF', 'TO': 'CAD', 'T': 'JPY', 'HK': 'HKD', 'AX': 'AUD', 'ST': 'SEK', 'OL': 'NOK', 'CO': 'DKK',
+}
+
+
+def instrument_currency(ticker, default='USD'):
+    """Listing currency of a Yahoo ticker: FX pairs are priced in their quote currency, suffixes map by exchange."""
+    ticker = str(ticker)
+    if ticker.endswith('=X') and len(ticker) == 8:
+        return ticker[3:6]
+    if '.' in ticker:
+        return EXCHANGE_CURRENCIES.get(ticker.rsplit('.', 1)[1], default)
+    return default
+
+
+def load_closes(source, tables, start=None, end=None, adjusted=True):
+    """``{table: long frame}`` of ``date, ticker, close`` from a ``ParquetCache`` or a SQLAlchemy engine.
+
+    Closes are split- and dividend-adjusted (``finpipe.adjustments``) unless ``adjusted=False``;
+    the raw tables would show every split as a one-day loss.
+    """
+    frames = {}
+    for table in tables:
+        if hasattr(source, 'load'):
+            frames[table] = source.load(table, start=start, end=end, columns=['date', 'ticker', 'close'],
+                                        adjusted=adjusted)
+            continue
+        sql, params = f"SELECT date, ticker, close FROM {price_source(source, table, adjusted)} WHERE 1 = 1", {}
+        if start is not None:
+            sql, params['start'] = sql + " AND date >= :start", pd.Timestamp(start).date()
+        if end is not None:
+            sql, params['end'] = sql + " AND date <= :end", pd.Timestamp(end).date()
+        frames[table] = pd.read_sql(text(sql), source, params=params, parse_dates=['date'])
+    return frames
+
+
+def wide_closes(frames, field='close'):
+    """One ``date x ticker`` frame from long frames (a list, a dict of tables or one frame), dates unioned."""
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    elif isinstance(frames, dict):
+        frames = list(frames.values())
+    wide = []
+    for df in frames:
+        dates = pd.to_datetime(df['date'])
+        if getattr(dates.dt, 'tz', None) is not None:
+            dates = dates.dt.tz_localize(None)
+        table = pd.DataFrame({'date': dates.astype('datetime64[ns]').to_numpy(),
+                              'ticker': df['ticker'].astype(str).to_numpy(),
+                              field: df[field].to_numpy(dtype='float64')})
+        wide.append(table.pivot_table(index='date', columns='ticker', values=field, aggfunc='last'))
+    out = pd.concat(wide, axis=1).sort_index()
+    return out.loc[:, ~out.columns.duplicated()]  # a ticker stored in two tables (EMIM.L) is kept once
+
+
+def fx_rate(fx, currency, base='USD'):
+    """Daily ``base`` per one unit of ``currency`` from a wide frame of Yahoo ``XXXYYY=X`` closes."""
+    if currency == base:
+        return pd.Series(1.0, index=fx.index)
+    if f'{currency}{base}=X' in fx:
+        return fx[f'{currency}{base}=X']
+    if f'{base}{currency}=X' in fx:
+        return 1.0 / fx[f'{base}{currency}=X']
+    if 'USD' not in (currency, base):
+        return fx_rate(fx, currency, 'USD') * fx_rate(fx, 'USD', base)
+    raise KeyError(f"no FX pair for {currency}/{base}: store {currency}{base}=X or {base}{currency}=X")
+
+
+def price_matrix(frames, fx=None, base='USD', currencies=None, fill_limit=5):
+    """Wide closes of every instrument in ``frames``, in ``base`` currency, on the union calendar.
+
+    ``fx`` is the long forex table (or its wide closes); it is only needed when some
+    instrument is not priced in ``base``. FX rates are carried forward like prices.
+    """
+    prices = wide_closes(frames).ffill(limit=fill_limit)
+    currencies = {t: (currencies or {}).get(t) or instrument_currency(t) for t in prices.columns}
+    foreign = sorted({c for c in currencies.values() if c != base})
+    if not foreign:
+        return prices
+    if fx is None:
+        raise ValueError(f"prices in {', '.join(foreign)} need the forex table to convert into {base}")
+    fx = wide_closes(fx) if 'ticker' in fx.columns else fx
+    fx = fx.reindex(fx.index.union(prices.index)).sort_index().ffill(limit=fill_limit).reindex(prices.index)
+    rates = pd.DataFrame({c: fx_rate(fx, c, base) for c in foreign}, index=prices.index)
+    rates[base] = 1.0
+    return prices * rates[[currencies[t] for t in prices.columns]].to_numpy()
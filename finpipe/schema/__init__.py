@@ -0,0 +1,19 @@
+"""Managed schema: versioned migrations, range-partitioned tables, generation counters and a partition-pruned
+range-query API."""
+from .tables import (INTERVALS, TableSpec, OHLCV_SPEC, OPTIONS_SPEC, SPECS, get_spec, partition_bounds,
+                     create_table_sql, partition_sql, default_partition_sql, index_sql)
+from .migrations import (MIGRATIONS_TABLE, Migration, MIGRATIONS, create_partitioned, create_indexes,
+                         ensure_migrations_table, applied_versions, pending_migrations, migrate, partitions,
+                         ensure_partitions)
+from .generations import GENERATIONS_TABLE, ensure_generations_table, bump_generation, table_generation
+from .query import RangeQuery, stream_range, read_range, explain_partitions
+
+__all__ = [
+    'INTERVALS', 'TableSpec', 'OHLCV_SPEC', 'OPTIONS_SPEC', 'SPECS', 'get_spec', 'partition_bounds',
+    'create_table_sql', 'partition_sql', 'default_partition_sql', 'index_sql',
+    'MIGRATIONS_TABLE', 'Migration', 'MIGRATIONS', 'create_partitioned', 'create_indexes',
+    'ensure_migrations_table', 'applied_versions', 'pending_migrations', 'migrate', 'partitions',
+    'ensure_partitions',
+    'GENERATIONS_TABLE', 'ensure_generations_table', 'bump_generation', 'table_generation',
+    'RangeQuery', 'stream_range', 'read_range', 'explain_partitions',
+]
@@ -0,0 +1,45 @@
+"""Per-table generation counters for rewrites that keep every ticker's ``MAX(date)``.
+
+Readers that copy a table incrementally (``ParquetCache``) compare ``MAX(date)`` and
+``COUNT(*)`` per ticker with their copy. A full re-download with ``ON CONFLICT DO
+UPDATE`` (``finpipe run --full``, the raw-price conversion) overwrites old bars
+in place and moves neither, so the writer bumps the table's generation as well, and
+a reader holding an older generation starts over.
+"""
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+GENERATIONS_TABLE = 'table_generations'
+
+
+def ensure_generations_table(conn):
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {GENERATIONS_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        );
+    """))
+
+
+def bump_generation(engine, table):
+    """Record an in-place rewrite of ``table``; returns its new generation."""
+    with engine.begin() as conn:
+        ensure_generations_table(conn)
+        conn.execute(text(f"""
+            INSERT INTO {GENERATIONS_TABLE} (table_name, generation) VALUES (:t, 1)
+            ON CONFLICT (table_name) DO UPDATE SET generation = {GENERATIONS_TABLE}.generation + 1,
+                                                   updated_at = CURRENT_TIMESTAMP
+        """), {'t': table})
+        return table_generation(conn, table)
+
+
+def table_generation(conn, table):
+    """Current generation of ``table``: 0 until it is first rewritten (or without the counter table)."""
+    try:
+        row = conn.execute(text(f"SELECT generation FROM {GENERATIONS_TABLE} WHERE table_name = :t"),
+                           {'t': table}).first()
+    except (OperationalError, ProgrammingError):
+        conn.rollback()
+        return 0
+    return row[0] if row else 0
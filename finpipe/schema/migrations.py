@@ -0,0 +1,252 @@
+"""Versioned migrations for the managed tables.
+
+Every table records the migrations it has been through in ``schema_migrations``,
+keyed on ``(table_name, version)``. ``migrate`` applies the missing ones in order,
+each in its own transaction together with its bookkeeping row, so a failed step
+leaves the table at the previous version. On PostgreSQL a transaction-scoped
+advisory lock on the table name keeps two concurrent runs from migrating the same
+table twice. New steps are appended to ``MIGRATIONS``; applied ones are never edited.
+
+The first step also adopts the tables the scripts used to create ad hoc. An
+existing unpartitioned table is renamed to ``<table>_legacy``, the partitioned
+table is created with partitions covering the legacy rows, the rows are copied
+(``DISTINCT ON`` the key, which drops the duplicates of the key-less commodity
+table) and the legacy table is dropped, all in one transaction. Columns the old
+table lacks (``snapshot_ts`` of the first options table) are added to it first and
+stay NULL in its rows. On SQLite a table without the key is rebuilt the same way,
+minus the partitions.
+"""
+from sqlalchemy import text
+
+from .tables import (get_spec, partition_bounds, create_table_sql, partition_sql, default_partition_sql,
+                     index_sql, _name)
+
+MIGRATIONS_TABLE = 'schema_migrations'
+
+
+class Migration:
+    """One schema step: ``apply(conn, table, spec, dialect)`` runs inside the migration's transaction."""
+
+    def __init__(self, version, description, apply):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+    def __repr__(self):
+        return f"Migration({self.version}, {self.description!r})"
+
+
+def _relkind(conn, table):
+    """``'p'`` for a partitioned table, ``'r'`` for a plain one, None when missing (PostgreSQL)."""
+    return conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {'t': table}).scalar()
+
+
+def _columns(conn, table):
+    return list(conn.execute(text(f"SELECT * FROM {table} WHERE false")).keys())
+
+
+def _add_missing_columns(conn, table, spec, dialect='postgresql'):
+    """Add the columns of ``spec`` that ``table`` lacks; its rows hold NULL in them."""
+    present = {c.lower() for c in _columns(conn, table)}
+    for name, kind in spec.columns.items():
+        if name.lower() not in present:
+            if dialect != 'postgresql':
+                kind = kind.replace('TIMESTAMPTZ', 'TIMESTAMP WITH TIME ZONE')
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {kind}"))
+
+
+def _sqlite_has_key(conn, table, spec):
+    """True when the SQLite ``table`` has a PRIMARY KEY or UNIQUE index on exactly ``spec.key``."""
+    key = {k.lower() for k in spec.key}
+    for _, index, unique, *_ in conn.execute(text(f"PRAGMA index_list({table})")).all():
+        columns = {row[2].lower() for row in conn.execute(text(f"PRAGMA index_info('{index}')")).all()}
+        if unique and columns == key:
+            return True
+    return False
+
+
+def _convert_legacy_sqlite(conn, table, spec):
+    legacy = f"{table}_legacy"
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    _add_missing_columns(conn, legacy, spec, 'sqlite')
+    conn.execute(text(create_table_sql(table, spec, 'sqlite')))
+    cols = ', '.join(spec.columns)
+    where = '' if spec.legacy_nulls else ' WHERE ' + ' AND '.join(f'{k} IS NOT NULL' for k in spec.key)
+    # first row per key wins, like DISTINCT ON; rows with a NULL in a UNIQUE key never collide
+    copied = conn.execute(text(f"INSERT OR IGNORE INTO {table} ({cols}) SELECT {cols} FROM {legacy}{where} "
+                               f"ORDER BY rowid")).rowcount
+    total = conn.execute(text(f"SELECT COUNT(*) FROM {legacy}")).scalar()
+    conn.execute(text(f"DROP TABLE {legacy}"))
+    print(f"Converted '{table}' to the managed schema: {copied:,} of {total:,} rows kept.")
+
+
+def _convert_legacy(conn, table, spec):
+    schema, _, base = table.rpartition('.')
+    legacy = f"{schema}.{base}_legacy" if schema else f"{base}_legacy"
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {base}_legacy"))
+    _add_missing_columns(conn, legacy, spec)
+    # the legacy key / indexes keep their names (e.g. <table>_pkey); move them out of the way
+    indexes = conn.execute(text("SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                                "WHERE i.indrelid = to_regclass(:t)"), {'t': legacy}).scalars().all()
+    for index in indexes:
+        qualified = f"{schema}.{index}" if schema else index
+        conn.execute(text(f'ALTER INDEX {qualified} RENAME TO "{index[:55]}_legacy"'))
+
+    conn.execute(text(create_table_sql(table, spec)))
+    conn.execute(text(default_partition_sql(table)))
+    lowest, highest = conn.execute(text(f"SELECT MIN({spec.partition_column}), MAX({spec.partition_column}) "
+                                        f"FROM {legacy}")).one()
+    if lowest is not None:
+        for suffix, lower, upper in partition_bounds(lowest, highest, spec.interval):
+            conn.execute(text(partition_sql(table, suffix, lower, upper)))
+
+    present = {c.lower(): c for c in _columns(conn, legacy)}
+    columns = [c for c in spec.columns if c.lower() in present]
+    cols = ', '.join(columns)
+    key = [k for k in spec.key if k.lower() in present]
+    copied = 0
+    if len(key) == len(spec.key):
+        keys = ', '.join(key)
+        copied += conn.execute(text(f"""
+            INSERT INTO {table} ({cols})
+            SELECT DISTINCT ON ({keys}) {cols} FROM {legacy}
+            WHERE {' AND '.join(f'{k} IS NOT NULL' for k in key)}
+            ORDER BY {keys}
+        """)).rowcount
+    if spec.legacy_nulls:
+        null_key = ' OR '.join(f'{k} IS NULL' for k in key) if len(key) == len(spec.key) else 'true'
+        copied += conn.execute(text(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {legacy} "
+                                    f"WHERE {null_key}")).rowcount
+    total = conn.execute(text(f"SELECT COUNT(*) FROM {legacy}")).scalar()
+    conn.execute(text(f"DROP TABLE {legacy}"))
+    print(f"Converted '{table}' to a partitioned table: {copied:,} of {total:,} rows kept.")
+
+
+def create_partitioned(conn, table, spec, dialect):
+    """Create ``table``, or convert the unpartitioned table the scripts created."""
+    if dialect != 'postgresql':
+        if dialect == 'sqlite' and conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                                                     "AND name = :t"), {'t': table}).first():
+            if not _sqlite_has_key(conn, table, spec):
+                _convert_legacy_sqlite(conn, table, spec)
+            return
+        conn.execute(text(create_table_sql(table, spec, dialect)))
+        return
+    kind = _relkind(conn, table)
+    if kind == 'p':
+        return
+    if kind is None:
+        conn.execute(text(create_table_sql(table, spec)))
+        conn.execute(text(default_partition_sql(table)))
+        return
+    _convert_legacy(conn, table, spec)
+
+
+def create_indexes(conn, table, spec, dialect):
+    for statement in index_sql(table, spec, dialect):
+        conn.execute(text(statement))
+
+
+MIGRATIONS = {
+    'ohlcv': [
+        Migration(1, "range-partitioned table keyed on (date, ticker)", create_partitioned),
+        Migration(2, "BRIN on date, B-tree on (ticker, date)", create_indexes),
+    ],
+    'options': [
+        Migration(1, "range-partitioned table keyed on (contractSymbol, snapshot_ts)", create_partitioned),
+        Migration(2, "BRIN on snapshot_ts, B-tree on (underlying, snapshot_ts)", create_indexes),
+    ],
+}
+
+
+def ensure_migrations_table(conn):
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            table_name TEXT,
+            version INTEGER,
+            kind TEXT,
+            description TEXT,
+            applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (table_name, version)
+        );
+    """))
+
+
+def applied_versions(conn, table):
+    """Versions already applied to ``table``."""
+    rows = conn.execute(text(f"SELECT version FROM {MIGRATIONS_TABLE} WHERE table_name = :t"), {'t': table})
+    return {version for version, in rows}
+
+
+def pending_migrations(engine, table, kind='ohlcv'):
+    """The ``MIGRATIONS`` of ``kind`` that ``table`` has not been through yet."""
+    with engine.begin() as conn:
+        ensure_migrations_table(conn)
+        done = applied_versions(conn, table)
+    return [m for m in MIGRATIONS[get_spec(kind).kind] if m.version not in done]
+
+
+def migrate(engine, table, kind='ohlcv', log=print):
+    """Bring ``table`` to the latest version of ``kind``; returns the versions applied by this call."""
+    spec = get_spec(kind)
+    dialect = engine.dialect.name
+    applied = []
+    for migration in pending_migrations(engine, table, spec):
+        with engine.begin() as conn:
+            if dialect == 'postgresql':
+                conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:t))"), {'t': table})
+            if migration.version in applied_versions(conn, table):
+                continue  # another run got there first
+            migration.apply(conn, table, spec, dialect)
+            conn.execute(text(f"INSERT INTO {MIGRATIONS_TABLE} (table_name, version, kind, description) "
+                              "VALUES (:t, :v, :k, :d)"),
+                         {'t': table, 'v': migration.version, 'k': spec.kind, 'd': migration.description})
+        applied.append(migration.version)
+        if log:
+            log(f"🛠️ Migrated '{table}' to version {migration.version}: {migration.description}")
+    return applied
+
+
+def partitions(conn, table):
+    """Names of ``table``'s partitions (without schema), empty for a plain table or another dialect."""
+    if conn.dialect.name != 'postgresql':
+        return []
+    rows = conn.execute(text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                             "WHERE i.inhparent = to_regclass(:t) ORDER BY c.relname"), {'t': table})
+    return list(rows.scalars())
+
+
+def ensure_partitions(engine, table, start, end, kind='ohlcv', log=print):
+    """Create the partitions of ``table`` covering ``[start, end]``; returns the ones created.
+
+    Rows of that range already sitting in ``<table>_default`` are moved into the new
+    partition (PostgreSQL refuses to create it over them). A no-op on other dialects.
+    """
+    if engine.dialect.name != 'postgresql':
+        return []
+    spec = get_spec(kind)
+    column = spec.partition_column
+    default = _name(table, 'default')
+    created = []
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:t))"), {'t': table})
+        existing = set(partitions(conn, table))
+        missing = [b for b in partition_bounds(start, end, spec.interval)
+                   if _name(table, b[0]).rpartition('.')[2] not in existing]
+        if not missing:
+            return []
+        for suffix, lower, upper in missing:
+            name = _name(table, suffix)
+            where = f"{column} >= '{lower}' AND {column} < '{upper}'"
+            if conn.execute(text(f"SELECT 1 FROM {default} WHERE {where} LIMIT 1")).first() is None:
+                conn.execute(text(partition_sql(table, suffix, lower, upper)))
+            else:
+                conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+                conn.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {where}"))
+                conn.execute(text(f"DELETE FROM {default} WHERE {where}"))
+                conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} "
+                                  f"FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+            created.append(suffix)
+    if log:
+        log(f"🛠️ Created {len(created)} partitions of '{table}': {created[0]} .. {created[-1]}")
+    return created
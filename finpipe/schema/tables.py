@@ -0,0 +1,144 @@
+"""Table layouts of the managed schema and the DDL they turn into.
+
+A ``TableSpec`` describes a kind of table (``ohlcv`` for every daily price table,
+``options`` for the snapshot table), not one table, because the jobs let the table
+name be chosen per run. On PostgreSQL a table is declared
+``PARTITION BY RANGE (<partition column>)`` with one partition per year or month,
+named ``<table>_y2024`` / ``<table>_m2024_06``, plus ``<table>_default`` for
+anything outside them. Two indexes cover the two access paths:
+
+* BRIN on the partition column: a few pages per partition, enough for the
+  ``WHERE date >= ...`` scans of the notebooks, because rows arrive roughly in date order
+* B-tree on ``(ticker, date)``: per-ticker windows (``load_adjusted``, backtests)
+
+Other dialects (SQLite for tests and benchmarks) get the same columns and key in
+a plain table with the B-tree index.
+"""
+from datetime import date
+
+import pandas as pd
+
+INTERVALS = ('year', 'month')
+
+
+class TableSpec:
+    """Columns, conflict key, partitioning and indexes of one kind of table.
+
+    ``key_type`` is ``'PRIMARY KEY'`` or ``'UNIQUE'`` (a UNIQUE key lets legacy rows keep
+    NULLs in it). ``legacy_nulls`` keeps such rows when an old table is converted;
+    otherwise rows with a NULL key are dropped.
+    """
+
+    def __init__(self, kind, columns, key, partition_column, ticker_column, interval='year',
+                 key_type='PRIMARY KEY', legacy_nulls=False):
+        if interval not in INTERVALS:
+            raise ValueError(f"interval must be one of {INTERVALS}, got {interval!r}")
+        self.kind = kind
+        self.columns = dict(columns)  # name -> SQL type
+        self.key = tuple(key)
+        self.partition_column = partition_column
+        self.ticker_column = ticker_column
+        self.interval = interval
+        self.key_type = key_type
+        self.legacy_nulls = legacy_nulls
+
+    def __repr__(self):
+        return f"TableSpec({self.kind!r}, key={self.key}, partition={self.partition_column} by {self.interval})"
+
+
+OHLCV_SPEC = TableSpec('ohlcv', [
+    ('date', 'DATE'),
+    ('ticker', 'TEXT'),
+    ('open', 'DOUBLE PRECISION'),
+    ('high', 'DOUBLE PRECISION'),
+    ('low', 'DOUBLE PRECISION'),
+    ('close', 'DOUBLE PRECISION'),
+    ('volume', 'BIGINT'),
+], key=('date', 'ticker'), partition_column='date', ticker_column='ticker', interval='year')
+
+OPTIONS_SPEC = TableSpec('options', [
+    ('underlying', 'TEXT'),
+    ('expiration', 'DATE'),
+    ('contractSymbol', 'TEXT'),
+    ('strike', 'DOUBLE PRECISION'),
+    ('lastPrice', 'DOUBLE PRECISION'),
+    ('bid', 'DOUBLE PRECISION'),
+    ('ask', 'DOUBLE PRECISION'),
+    ('change', 'DOUBLE PRECISION'),
+    ('percentChange', 'DOUBLE PRECISION'),
+    ('volume', 'BIGINT'),
+    ('openInterest', 'BIGINT'),
+    ('impliedVolatility', 'DOUBLE PRECISION'),
+    ('inTheMoney', 'BOOLEAN'),
+    ('type', 'TEXT'),
+    ('snapshot_ts', 'TIMESTAMPTZ'),
+], key=('contractSymbol', 'snapshot_ts'), partition_column='snapshot_ts', ticker_column='underlying',
+    interval='month', key_type='UNIQUE', legacy_nulls=True)
+
+SPECS = {spec.kind: spec for spec in [OHLCV_SPEC, OPTIONS_SPEC]}
+
+
+def get_spec(kind):
+    """``kind`` itself if it is a ``TableSpec``, else the ``SPECS`` entry."""
+    if isinstance(kind, TableSpec):
+        return kind
+    try:
+        return SPECS[kind]
+    except KeyError:
+        raise KeyError(f"Unknown table kind {kind!r}; choose from {', '.join(SPECS)}") from None
+
+
+def _name(table, suffix):
+    return f"{table}_{suffix}"
+
+
+def _index_name(table, suffix):
+    return f"{table.replace('.', '_')}_{suffix}"
+
+
+def partition_bounds(start, end, interval='year'):
+    """``[(suffix, lower, upper)]`` of the partitions covering ``[start, end]`` (both days included)."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if interval == 'year':
+        lower = date(start.year, 1, 1)
+        step = pd.DateOffset(years=1)
+    else:
+        lower = date(start.year, start.month, 1)
+        step = pd.DateOffset(months=1)
+    bounds = []
+    while pd.Timestamp(lower) <= end:
+        upper = (pd.Timestamp(lower) + step).date()
+        suffix = f"y{lower.year}" if interval == 'year' else f"m{lower.year}_{lower.month:02d}"
+        bounds.append((suffix, lower, upper))
+        lower = upper
+    return bounds
+
+
+def create_table_sql(table, spec, dialect='postgresql'):
+    """``CREATE TABLE`` of ``table`` with ``spec``'s columns and key (partitioned on PostgreSQL)."""
+    columns = ',\n    '.join(f"{name} {kind}" for name, kind in spec.columns.items())
+    if dialect != 'postgresql':
+        columns = columns.replace('TIMESTAMPTZ', 'TIMESTAMP WITH TIME ZONE')
+        return f"CREATE TABLE IF NOT EXISTS {table} (\n    {columns},\n    {spec.key_type} ({', '.join(spec.key)})\n)"
+    return (f"CREATE TABLE {table} (\n    {columns},\n    {spec.key_type} ({', '.join(spec.key)})\n)"
+            f" PARTITION BY RANGE ({spec.partition_column})")
+
+
+def partition_sql(table, suffix, lower, upper):
+    return (f"CREATE TABLE IF NOT EXISTS {_name(table, suffix)} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')")
+
+
+def default_partition_sql(table):
+    return f"CREATE TABLE IF NOT EXISTS {_name(table, 'default')} PARTITION OF {table} DEFAULT"
+
+
+def index_sql(table, spec, dialect='postgresql'):
+    """``CREATE INDEX`` statements: BRIN on the partition column (PostgreSQL only), B-tree on (ticker, date)."""
+    part, tick = spec.partition_column, spec.ticker_column
+    statements = [f"CREATE INDEX IF NOT EXISTS {_index_name(table, f'{tick}_{part}_idx')} "
+                  f"ON {table} ({tick}, {part})"]
+    if dialect == 'postgresql':
+        statements.insert(0, f"CREATE INDEX IF NOT EXISTS {_index_name(table, f'{part}_brin')} "
+                             f"ON {table} USING brin ({part})")
+    return statements
@@ -0,0 +1,12 @@
+"""Database paths: streaming COPY loader, server-side upsert and the local Parquet read cache."""
+from .copy_loader import (LoadStats, column_types, prepare_frame, iter_frame_chunks, encode_chunk,
+                          NullSink, MemorySink, FileSink, PostgresCopySink, SQLiteSink, stream_copy, copy_frame)
+from .upsert import upsert_sql, upsert_frame
+from .parquet_cache import ASSET_CLASSES, ParquetCache
+
+__all__ = [
+    'LoadStats', 'column_types', 'prepare_frame', 'iter_frame_chunks', 'encode_chunk',
+    'NullSink', 'MemorySink', 'FileSink', 'PostgresCopySink', 'SQLiteSink', 'stream_copy', 'copy_frame',
+    'upsert_sql', 'upsert_frame',
+    'ASSET_CLASSES', 'ParquetCache',
+]
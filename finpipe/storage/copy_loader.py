@@ -0,0 +1,266 @@
+"""Streaming ``COPY FROM STDIN`` bulk loader.
+
+``DataFrame.to_sql`` turns every row into a Python tuple and ships it through
+``executemany``. Here each chunk of ``chunksize`` rows is encoded to CSV by pandas'
+C writer and handed straight to the server's ``COPY`` stream, so only one encoded
+chunk is alive at a time and no per-row Python objects are created.
+
+The destination is a *sink* - anything with ``write(text)`` - which keeps the
+loader testable without a database:
+
+* ``PostgresCopySink`` streams into ``COPY ... FROM STDIN`` (psycopg2 or psycopg 3)
+* ``SQLiteSink`` inserts into a local SQLite table (offline runs and benchmarks)
+* ``MemorySink`` / ``FileSink`` collect or persist the encoded stream locally
+* ``NullSink`` discards it (encoding-only throughput)
+
+When ``pyarrow`` is installed its multi-threaded C++ CSV writer does the
+encoding (roughly 10x faster than ``DataFrame.to_csv`` on float-heavy OHLCV);
+otherwise pandas' writer is used.
+"""
+import io
+import csv
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute as pa_compute
+except ImportError:  # optional dependency
+    pa = None
+
+INTEGER_TYPES = {'smallint', 'integer', 'bigint'}
+
+
+def _is_sqlite(cursor):
+    return type(cursor).__module__.split('.')[0] == 'sqlite3'
+
+
+def column_types(cursor, table):
+    """``{column: data_type}`` of ``table`` from ``information_schema`` (``PRAGMA table_info`` on SQLite).
+
+    Names and types are lower-cased.
+    """
+    if _is_sqlite(cursor):
+        cursor.execute(f"PRAGMA table_info({table})")
+        return {row[1].lower(): row[2].lower() for row in cursor.fetchall()}
+    schema, _, name = table.rpartition('.')
+    cursor.execute(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        "WHERE table_name = %s AND table_schema = COALESCE(NULLIF(%s, ''), current_schema())",
+        (name, schema))
+    return {name.lower(): data_type for name, data_type in cursor.fetchall()}
+
+
+def prepare_frame(df, columns, types=None):
+    """Make ``df[columns]`` COPY-friendly: naive dates, UTC timestamptz, integers without a ``.0`` suffix,
+    float32 widened to float64."""
+    out = df[list(columns)].copy()
+    types = types or {}
+    for col in out.columns:
+        series = out[col]
+        if isinstance(series.dtype, pd.DatetimeTZDtype) and types.get(str(col).lower()) == 'timestamp with time zone':
+            out[col] = series.dt.tz_convert('UTC')  # an instant, keep it unambiguous
+        elif isinstance(series.dtype, pd.DatetimeTZDtype):
+            # Yahoo bars are stamped at local midnight; the local calendar date is the trading date
+            out[col] = series.dt.tz_localize(None)
+        elif types.get(str(col).lower()) in INTEGER_TYPES and pd.api.types.is_float_dtype(series):
+            # e.g. volume / openInterest arrive as float (NaN-able) but the columns are BIGINT
+            out[col] = series.round().astype('Int64')
+        elif series.dtype == np.float32:
+            # compact prices: write the float64 they came from, not float32's shortest decimal
+            out[col] = series.astype(np.float64)
+    return out
+
+
+class LoadStats:
+    """Rows, encoded bytes and wall time of one load; ``rows_per_sec`` derived."""
+
+    def __init__(self, rows=0, nbytes=0, seconds=0.0, chunks=0):
+        self.rows = rows
+        self.nbytes = nbytes
+        self.seconds = seconds
+        self.chunks = chunks
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds else float('inf')
+
+    def __repr__(self):
+        return (f"LoadStats(rows={self.rows}, chunks={self.chunks}, mb={self.nbytes / 1e6:.1f}, "
+                f"seconds={self.seconds:.2f}, rows_per_sec={self.rows_per_sec:,.0f})")
+
+
+def iter_frame_chunks(frames, chunksize=50_000):
+    """Yield row slices of at most ``chunksize`` from one DataFrame or an iterable of DataFrames."""
+    if hasattr(frames, 'iloc'):
+        frames = [frames]
+    for frame in frames:
+        for start in range(0, len(frame), chunksize):
+            yield frame.iloc[start:start + chunksize]
+
+
+def encode_chunk(chunk, columns, types=None):
+    """CSV text for one chunk (no header, NULL as empty field)."""
+    prepared = prepare_frame(chunk, columns, types)
+    if pa is not None:
+        return _encode_arrow(prepared, types or {})
+    buffer = io.StringIO()
+    prepared.to_csv(buffer, index=False, header=False, na_rep='')
+    return buffer.getvalue()
+
+
+def _encode_arrow(prepared, types):
+    table = pa.Table.from_pandas(prepared, preserve_index=False)  # NaN becomes NULL
+    for i, name in enumerate(table.column_names):
+        if types.get(str(name).lower()) == 'date' and pa.types.is_timestamp(table.column(i).type):
+            table = table.set_column(i, name, pa_compute.cast(table.column(i), pa.date32()))
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(table, sink, pa_csv.WriteOptions(include_header=False))
+    return sink.getvalue().to_pybytes().decode('utf-8')
+
+
+class NullSink:
+    def write(self, block):
+        pass
+
+
+class MemorySink:
+    """Keeps the encoded stream in memory (``getvalue()``), for tests and small loads."""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+
+    def write(self, block):
+        self._buffer.write(block)
+
+    def getvalue(self):
+        return self._buffer.getvalue()
+
+
+class FileSink:
+    """Appends the encoded stream to a file, e.g. for a later ``psql \\copy``."""
+
+    def __init__(self, path):
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, block):
+        self._file.write(block)
+
+    def close(self):
+        self._file.close()
+
+
+class _BlockReader(io.RawIOBase):
+    """File-like view over an iterator of text blocks, for psycopg2's ``copy_expert``."""
+
+    def __init__(self, blocks):
+        self._blocks = iter(blocks)
+        self._pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self._pending:
+            try:
+                self._pending = next(self._blocks).encode('utf-8')
+            except StopIteration:
+                return 0
+        n = min(len(target), len(self._pending))
+        target[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+class PostgresCopySink:
+    """Streams blocks into ``COPY table (columns) FROM STDIN WITH (FORMAT csv)`` on a DB-API cursor."""
+
+    def __init__(self, cursor, table, columns):
+        self.cursor = cursor
+        self.sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+
+    def consume(self, blocks):
+        if hasattr(self.cursor, 'copy_expert'):  # psycopg2 pulls from a file-like object
+            self.cursor.copy_expert(self.sql, io.BufferedReader(_BlockReader(blocks), 1 << 20))
+        else:                                     # psycopg 3 is pushed to
+            with self.cursor.copy(self.sql) as copy:
+                for block in blocks:
+                    copy.write(block)
+
+
+class SQLiteSink:
+    """Inserts the encoded stream into a SQLite table, the local stand-in for ``PostgresCopySink``.
+
+    Empty fields become NULL as with ``COPY ... (FORMAT csv)``; the columns' type
+    affinity turns the text back into numbers.
+    """
+
+    def __init__(self, cursor, table, columns):
+        self.cursor = cursor
+        self.sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+    def write(self, block):
+        rows = csv.reader(io.StringIO(block))
+        self.cursor.executemany(self.sql, ([None if v == '' else v for v in row] for row in rows))
+
+
+def stream_copy(sink, frames, columns, types=None, chunksize=50_000, log=print):
+    """Encode ``frames`` chunk by chunk into ``sink`` and return ``LoadStats``.
+
+    ``sink`` either exposes ``consume(blocks)`` (pull-style, like ``PostgresCopySink``)
+    or ``write(block)``. At most one encoded chunk is held in memory.
+    """
+    stats = LoadStats()
+    started = time.perf_counter()
+
+    def blocks():
+        for chunk in iter_frame_chunks(frames, chunksize):
+            if chunk.empty:
+                continue
+            block = encode_chunk(chunk, columns, types)
+            stats.rows += len(chunk)
+            stats.nbytes += len(block)
+            stats.chunks += 1
+            yield block
+
+    if hasattr(sink, 'consume'):
+        sink.consume(blocks())
+    else:
+        for block in blocks():
+            sink.write(block)
+    stats.seconds = time.perf_counter() - started
+    if log:
+        log(f"COPY streamed {stats.rows:,} rows in {stats.chunks} chunks "
+            f"({stats.seconds:.2f}s, {stats.rows_per_sec:,.0f} rows/sec)")
+    return stats
+
+
+def copy_frame(engine, frames, table, columns=None, chunksize=50_000, log=print):
+    """Append one DataFrame (or an iterable of DataFrames) to ``table`` via streaming COPY.
+
+    Plain append with no conflict handling - the ``to_sql(if_exists='append')``
+    replacement. Use ``upsert_frame`` for keyed tables that may already hold rows.
+    The sink follows the engine: ``SQLiteSink`` on SQLite, ``PostgresCopySink`` otherwise.
+    """
+    if hasattr(frames, 'iloc'):
+        if frames.empty:
+            return LoadStats()
+        columns = list(columns or frames.columns)
+    elif columns is None:
+        raise ValueError("columns is required when streaming an iterable of frames")
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        types = column_types(cursor, table)
+        sink = SQLiteSink if engine.dialect.name == 'sqlite' else PostgresCopySink
+        stats = stream_copy(sink(cursor, table, columns), frames, columns, types, chunksize, log)
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return stats
@@ -0,0 +1,337 @@
+"""Read-through local Parquet cache for the price tables.
+
+``pd.read_sql("SELECT * FROM sp500_ohlcv")`` builds a Python tuple per row and then
+a DataFrame from those tuples, on every notebook run. The cache materialises each
+table once as a Parquet dataset partitioned by asset class and ticker::
+
+    <root>/<asset_class>/<table>/ticker=<TICKER>/part-*.parquet   history
+    <root>/<asset_class>/<table>/ticker=<TICKER>/tail-*.parquet   the last overlap_days, replaced by each refresh
+    <root>/<asset_class>/<table>/_marks.json          cached MAX(date) and row count per ticker, generation
+    <root>/<asset_class>/<table>/_factors.parquet     the table's adjustment factors
+
+and later loads only ask the database for ``SELECT ticker, MAX(date), COUNT(*) ...
+GROUP BY ticker`` and the table's generation. A ticker whose mark or count changed
+gets its rows after ``mark - overlap_days`` fetched again, replacing the cached
+``tail-*`` files, because the price jobs re-upsert that overlap with revised bars. A count that
+does not add up or a mark that moved backwards re-fetches the ticker in full, and a
+full rewrite (``finpipe run --full`` bumps the generation) re-fetches everything.
+Reads go through ``pyarrow.dataset`` with the ticker / date filters pushed down to
+the partition and row-group level, and Arrow hands the columns to pandas without
+a per-row copy.
+
+The price tables hold the prices that traded (``PriceJob(raw=True)``), so the
+partitions never change when a ticker splits. Every refresh re-reads the table's
+rows of ``adjustment_factors`` (a few per ticker), and ``load`` applies them with
+``adjust_frame`` unless ``adjusted=False``. A split recorded after a bar was cached
+therefore shows up in the next load without re-fetching any prices.
+
+On PostgreSQL the rows are pulled with ``COPY (query) TO STDOUT`` and parsed by
+pyarrow's CSV reader; other databases fall back to ``pd.read_sql``.
+"""
+import io
+import json
+import time
+import uuid
+import shutil
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from ..paths import state_dir
+from ..schema import table_generation
+from ..ingestion.frames import OHLCV_COLUMNS, PRICE_COLUMNS, compact_ohlcv
+from ..adjustments import FACTOR_COLUMNS, load_factors, adjust_frame
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as pa_ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+
+ASSET_CLASSES = {  # the default tables of the price jobs (finpipe/jobs/catalog.py)
+    'sp500_ohlcv': 'equity',
+    'etf_data': 'etf',
+    'fund_data': 'fund',
+    'bond_data': 'bonds',
+    'forex_data': 'forex',
+    'commodity_data': 'commodities',
+}
+
+
+class ParquetCache:
+    """Local Parquet copy of database tables, refreshed when the DB high-water mark moves."""
+
+    def __init__(self, engine, root=None, log=print, overlap_days=5):
+        if pa is None:
+            raise ImportError("ParquetCache needs pyarrow: pip install pyarrow")
+        self.engine = engine
+        self.overlap = pd.Timedelta(days=overlap_days)  # the price jobs' default overlap_days
+        self.root = Path(root) if root else state_dir() / 'cache'
+        self.log = log
+        self.timings = {}
+
+    # --- layout ------------------------------------------------------------------------
+
+    def path(self, table, asset_class=None):
+        return self.root / (asset_class or ASSET_CLASSES.get(table, 'other')) / table
+
+    def _partition(self, path, ticker):
+        return path / f"ticker={quote(str(ticker), safe='')}"  # same escaping as pyarrow's hive writer
+
+    def _state(self, path):
+        """``(generation, {ticker: Timestamp}, {ticker: rows})`` of the cached copy at ``path``.
+
+        A ``_marks.json`` from before row counts were kept has no generation, so the
+        first refresh starts over.
+        """
+        try:
+            with open(path / '_marks.json') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None, {}, {}
+        if 'tickers' not in state:
+            return None, {t: pd.Timestamp(d) for t, d in state.items()}, {}
+        tickers = state['tickers']
+        return (state['generation'], {t: pd.Timestamp(v['date']) for t, v in tickers.items()},
+                {t: v['rows'] for t, v in tickers.items()})
+
+    def marks(self, table, asset_class=None):
+        """Cached ``{ticker: Timestamp}`` of the last date held locally."""
+        return self._state(self.path(table, asset_class))[1]
+
+    def _save_state(self, path, generation, marks, rows):
+        state = {'generation': generation,
+                 'tickers': {t: {'date': d.date().isoformat(), 'rows': rows[t]} for t, d in marks.items()}}
+        tmp = path / '_marks.json.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        tmp.replace(path / '_marks.json')
+
+    # --- database side -----------------------------------------------------------------
+
+    def _query(self, sql):
+        """Rows of ``sql`` as an Arrow table (``COPY TO STDOUT`` on PostgreSQL)."""
+        if self.engine.dialect.name != 'postgresql':
+            return pa.Table.from_pandas(pd.read_sql(text(sql), self.engine, parse_dates=['date']),
+                                        preserve_index=False)
+        buffer = io.BytesIO()
+        copy_sql = f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            if hasattr(cursor, 'copy_expert'):  # psycopg2
+                cursor.copy_expert(copy_sql, buffer)
+            else:                               # psycopg 3
+                with cursor.copy(copy_sql) as copy:
+                    for block in copy:
+                        buffer.write(block)
+            raw.commit()
+        finally:
+            raw.close()
+        buffer.seek(0)
+        # only empty fields are NULL - 'NA' is a real ticker
+        convert = pa_csv.ConvertOptions(null_values=[''], strings_can_be_null=False,
+                                        column_types={'ticker': pa.string()})
+        return pa_csv.read_csv(buffer, convert_options=convert)
+
+    def _versions(self, conn, table):
+        """``{ticker: (MAX(date), COUNT(*))}`` of ``table`` (empty if the table is missing)."""
+        try:
+            rows = conn.execute(text(f"SELECT ticker, MAX(date), COUNT(*) FROM {table} GROUP BY ticker")).fetchall()
+        except (ProgrammingError, OperationalError):
+            conn.rollback()
+            return {}
+        return {ticker: (pd.Timestamp(day), count) for ticker, day, count in rows if day is not None}
+
+    def _fetch(self, table, tickers, since=None):
+        """Rows of ``tickers`` (dated after ``since``) as an Arrow table with ``date32`` dates."""
+        names = ', '.join("'" + t.replace("'", "''") + "'" for t in sorted(tickers))
+        sql = f"SELECT * FROM {table} WHERE ticker IN ({names})"
+        if since is not None:
+            sql += f" AND date > '{since.date().isoformat()}'"
+        rows = self._query(sql)
+        return rows.set_column(rows.schema.get_field_index('date'), 'date',
+                               rows['date'].cast(pa.timestamp('ms')).cast(pa.date32()))
+
+    def _write(self, path, rows, marks):
+        """Write ``rows`` into their ticker partitions: ``tail-*`` files for the dates after
+        ``mark - overlap_days`` of each ticker's new ``marks``, ``part-*`` files for the rest.
+
+        The tail is what the next refresh fetches again, so that refresh replaces the
+        ``tail-*`` files without reading or rewriting the history in ``part-*``.
+        """
+        frame = rows.select(['ticker', 'date']).to_pandas(date_as_object=False)
+        cutoff = frame['ticker'].map({t: d - self.overlap for t, d in marks.items()})
+        tail = (frame['date'].astype('datetime64[ns]') > cutoff.astype('datetime64[ns]')).to_numpy()
+        for prefix, part in (('part', rows.filter(pa.array(~tail))), ('tail', rows.filter(pa.array(tail)))):
+            if part.num_rows:
+                pq.write_to_dataset(part, path, partition_cols=['ticker'],
+                                    basename_template=f'{prefix}-{uuid.uuid4().hex}-{{i}}.parquet')
+
+    def refresh(self, table, tickers=None, asset_class=None):
+        """Bring the cached partitions of ``tickers`` (default: all) up to the database.
+
+        A ticker is stale when its ``MAX(date)`` or ``COUNT(*)`` differs from the cached
+        ones. Its rows after ``mark - overlap_days`` are fetched again and replace the
+        cached tail, which picks up the bars the jobs re-upsert in their overlap. When
+        the row count still does not add up (rows deleted or inserted further back), or
+        the mark moved backwards, the ticker is fetched in full; a new table generation
+        (``finpipe.schema.bump_generation``, an in-place rewrite) or another
+        ``overlap_days`` drops the whole cache. Returns the number of rows fetched.
+        """
+        path = self.path(table, asset_class)
+        generation, cached, counts = self._state(path)
+        with self.engine.connect() as conn:
+            db = self._versions(conn, table)
+            current = table_generation(conn, table)
+        version = [current, self.overlap.days]
+        if generation != version and cached:
+            if self.log:
+                self.log(f"{table}: rewritten in place or cached with another overlap; re-fetching it")
+            shutil.rmtree(path, ignore_errors=True)
+            cached, counts = {}, {}
+        path.mkdir(parents=True, exist_ok=True)
+        if tickers is not None:
+            wanted = set(map(str, tickers))
+            db = {t: v for t, v in db.items() if t in wanted}
+
+        stale = {t: v for t, v in db.items() if (cached.get(t), counts.get(t)) != v}
+        self._refresh_factors(table, tickers, path)
+        if not stale:
+            if generation != version:
+                self._save_state(path, version, cached, counts)
+            return 0
+        marks = {t: day for t, (day, _) in stale.items()}
+        rebuild = [t for t in stale if t not in counts or marks[t] < cached[t]]
+        extend = [t for t in stale if t not in rebuild]
+
+        fetched = 0
+        if extend:
+            rows = self._fetch(table, extend, since=min(cached[t] for t in extend) - self.overlap)
+            fetched += rows.num_rows
+            frame = rows.select(['ticker', 'date']).to_pandas(date_as_object=False)
+            dates = frame['date'].astype('datetime64[ns]')
+            mark = frame['ticker'].map(cached).astype('datetime64[ns]')
+            keep = (dates > mark - self.overlap).to_numpy().copy()
+            new = frame['ticker'][(dates > mark).to_numpy()].value_counts()
+            for ticker in extend:
+                if counts[ticker] + int(new.get(ticker, 0)) != stale[ticker][1]:  # rows changed before the tail
+                    rebuild.append(ticker)
+                    keep &= (frame['ticker'] != ticker).to_numpy()
+                    continue
+                for part in self._partition(path, ticker).glob('tail-*.parquet'):
+                    part.unlink()
+            self._write(path, rows.filter(pa.array(keep)), marks)
+        for ticker in rebuild:
+            shutil.rmtree(self._partition(path, ticker), ignore_errors=True)
+        if rebuild:
+            rows = self._fetch(table, rebuild)
+            fetched += rows.num_rows
+            self._write(path, rows, marks)
+        for ticker, (day, count) in stale.items():
+            cached[ticker], counts[ticker] = day, count
+        self._save_state(path, version, cached, counts)
+        return fetched
+
+    def _refresh_factors(self, table, tickers, path):
+        """Replace the cached factors of ``tickers`` (default: all) with the database's."""
+        factors = load_factors(self.engine, table, tickers)
+        if tickers is not None:
+            kept = self.factors(table, path=path)
+            factors = pd.concat([kept[~kept['ticker'].isin([str(t) for t in tickers])], factors],
+                                ignore_index=True)
+        tmp = path / '_factors.parquet.tmp'
+        factors.to_parquet(tmp, index=False)
+        tmp.replace(path / '_factors.parquet')
+
+    def factors(self, table, asset_class=None, path=None):
+        """Cached ``load_factors`` intervals of ``table`` (empty before the first refresh)."""
+        try:
+            return pd.read_parquet((path or self.path(table, asset_class)) / '_factors.parquet')
+        except FileNotFoundError:
+            return pd.DataFrame(columns=FACTOR_COLUMNS[1:])
+
+    # --- local side --------------------------------------------------------------------
+
+    def load(self, table, tickers=None, start=None, end=None, columns=None, asset_class=None,
+             refresh=True, compact=True, adjusted=True):
+        """``table`` as a DataFrame sorted by ``(ticker, date)``, served from the local cache.
+
+        ``tickers`` / ``start`` / ``end`` (inclusive) are pushed down to the Parquet scan.
+        With ``refresh=False`` the database is not contacted at all. Prices and volume are
+        split- and dividend-adjusted with the cached factors; ``adjusted=False`` returns
+        the stored (traded) values. OHLCV tables come back in the compact schema
+        (``ingestion.compact_ohlcv``) unless ``compact=False``.
+        """
+        started = time.perf_counter()
+        fetched = self.refresh(table, tickers, asset_class) if refresh else 0
+        refreshed = time.perf_counter()
+
+        path = self.path(table, asset_class)
+        partitioning = pa_ds.partitioning(pa.schema([('ticker', pa.string())]), flavor='hive')
+        if not any(path.glob('ticker=*')):
+            return pd.DataFrame(columns=columns)
+        dataset = pa_ds.dataset(path, format='parquet', partitioning=partitioning)
+        condition = None
+        for term in (pa_ds.field('ticker').isin([str(t) for t in tickers]) if tickers is not None else None,
+                     pa_ds.field('date') >= pa.scalar(pd.Timestamp(start).date()) if start is not None else None,
+                     pa_ds.field('date') <= pa.scalar(pd.Timestamp(end).date()) if end is not None else None):
+            if term is not None:
+                condition = term if condition is None else condition & term
+        adjust = adjusted and (columns is None or bool({*PRICE_COLUMNS, 'volume'} & set(columns)))
+        scan = columns if columns is None or not adjust else list(dict.fromkeys([*columns, 'date', 'ticker']))
+        result = dataset.to_table(columns=scan, filter=condition)
+        order = [(c, 'ascending') for c in ('ticker', 'date') if c in result.column_names]
+        if order:
+            result = result.sort_by(order)
+        if columns is None and 'date' in result.column_names:  # the partition column comes back last
+            names = [c for c in result.column_names if c != 'ticker']
+            result = result.select(names[:names.index('date') + 1] + ['ticker'] + names[names.index('date') + 1:])
+        df = result.to_pandas(date_as_object=False, split_blocks=True, self_destruct=True)
+        if adjust:
+            factors = self.factors(table, asset_class)
+            if not factors.empty:
+                df = adjust_frame(df, factors)
+            if scan != columns:
+                df = df[columns]
+        if compact and set(OHLCV_COLUMNS) <= set(df.columns):
+            df = compact_ohlcv(df)
+        done = time.perf_counter()
+
+        self.timings = {'refresh': refreshed - started, 'read': done - refreshed,
+                        'fetched_rows': fetched, 'rows': len(df)}
+        if self.log:
+            self.log(f"{table}: {len(df):,} rows from cache in {done - started:.2f}s "
+                     f"(refresh {refreshed - started:.2f}s, {fetched:,} rows fetched from DB)")
+        return df
+
+    def invalidate(self, table, tickers=None, asset_class=None):
+        """Drop cached partitions (all of ``table`` by default) so the next load re-fetches them."""
+        path = self.path(table, asset_class)
+        if tickers is None:
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        generation, cached, counts = self._state(path)
+        for ticker in tickers:
+            shutil.rmtree(self._partition(path, ticker), ignore_errors=True)
+            cached.pop(str(ticker), None)
+            counts.pop(str(ticker), None)
+        if path.exists():
+            self._save_state(path, generation, cached, counts)
+
+    def compact(self, table, asset_class=None):
+        """Rewrite the ``part-*`` files of each ticker partition as one (incremental refreshes add one per run)."""
+        path = self.path(table, asset_class)
+        for partition in path.glob('ticker=*'):
+            parts = sorted(partition.glob('part-*.parquet'))
+            if len(parts) < 2:
+                continue
+            merged = pa.concat_tables([pq.read_table(p) for p in parts]).sort_by('date')
+            pq.write_table(merged, partition / f'part-{uuid.uuid4().hex}-0.parquet')
+            for part in parts:
+                part.unlink()
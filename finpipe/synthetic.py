@@ -0,0 +1,204 @@
+"""Deterministic synthetic market data for benchmarks and offline runs."""
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from .ingestion.providers import FakeProvider, OptionChain
+
+
+def synthetic_ohlcv(tickers=500, days=2000, start='2017-01-02', seed=0):
+    """Long ``date, ticker, open, high, low, close, volume`` panel of geometric random walks.
+
+    ``tickers`` is a count (names ``T000``...) or a list of names. Same arguments, same frame.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f'T{i:03d}' for i in range(tickers)] if isinstance(tickers, int) else list(tickers)
+    dates = pd.bdate_range(start, periods=days)
+    n = len(names) * days
+    log_ret = rng.normal(0.0003, 0.015, (len(names), days))
+    close = (rng.uniform(20, 500, (len(names), 1)) * np.exp(np.cumsum(log_ret, axis=1))).ravel()
+    opn = close * (1 + rng.normal(0, 0.004, n))
+    spread = np.abs(rng.normal(0, 0.008, n))
+    return pd.DataFrame({
+        'date': np.tile(dates.to_numpy(), len(names)),
+        'ticker': np.repeat(names, days),
+        'open': opn,
+        'high': np.maximum(opn, close) * (1 + spread),
+        'low': np.minimum(opn, close) * (1 - spread),
+        'close': close,
+        'volume': rng.lognormal(13, 1, n).round(),
+    })
+
+
+def synthetic_loans(n=1_000_000, seed=0):
+    """``LoanDataRiskAnalysis.csv``-shaped applications (the columns the PD models use, plus an id)."""
+    rng = np.random.default_rng(seed)
+    income = rng.lognormal(10.8, 0.5, n).round()
+    debt = rng.lognormal(5.8, 0.6, n).round()
+    return pd.DataFrame({
+        'LoanId': np.arange(n),
+        'DebtToIncomeRatio': rng.beta(2, 6, n),
+        'CreditScore': rng.normal(570, 50, n).clip(300, 850).round().astype(np.int64),
+        'MonthlyDebtPayments': debt.astype(np.int64),
+        'PaymentHistory': rng.poisson(24, n),
+        'NetWorth': (income * rng.uniform(0, 3, n)).round().astype(np.int64),
+        'SavingsAccountBalance': rng.lognormal(8, 1.2, n).round().astype(np.int64),
+        'BankruptcyHistory': (rng.random(n) < 0.05).astype(np.int64),
+        'CreditCardUtilizationRate': rng.beta(2, 5, n),
+        'LoanAmount': rng.lognormal(10, 0.6, n).round().astype(np.int64),
+        'EmploymentStatus': rng.choice(['Employed', 'Self-Employed', 'Unemployed'], n, p=[0.86, 0.08, 0.06]),
+    })
+
+
+def synthetic_option_chains(underlyings=50, expiries=6, strikes=41, snapshot_ts='2024-06-03 15:00', rate=0.0,
+                            seed=0):
+    """Option snapshot in ``options.OPTIONS_COLUMNS`` with Black-Scholes prices on a smile.
+
+    Weekly expiries, strikes from 60% to 140% of spot. ``impliedVolatility`` is the
+    true smile volatility plus a little quote noise; bid / ask straddle the model price.
+    Returns ``(chains, spots)``.
+    """
+    from .options.analytics import bs_price
+    rng = np.random.default_rng(seed)
+    names = [f'U{i:03d}' for i in range(underlyings)] if isinstance(underlyings, int) else list(underlyings)
+    snap = pd.Timestamp(snapshot_ts, tz='UTC')
+    spots = pd.Series(rng.uniform(20, 800, len(names)).round(2), index=names)
+    days = 7 * np.arange(1, expiries + 1) - snap.dayofweek + 4  # Fridays
+    expiry = (snap.normalize().tz_localize(None) + pd.to_timedelta(days, unit='D')).date
+    grid = np.linspace(0.6, 1.4, strikes)
+    u, e, m, kind = (a.ravel() for a in np.meshgrid(np.arange(len(names)), np.arange(expiries), grid, [1, 0],
+                                                     indexing='ij'))
+    S = spots.to_numpy()[u]
+    K = (m * S).round(1)
+    T = (days[e] + 5 / 24) / 365.0
+    k = np.log(K / S)
+    level = rng.uniform(0.15, 0.6, len(names))[u]
+    sigma = level * (1 + 0.8 * k * k - 0.3 * k) * (1 + 0.1 / np.sqrt(days[e]))
+    price = bs_price(kind == 1, S, K, T, rate, sigma)
+    half = np.maximum(0.01, 0.02 * price) / 2
+    bid, ask = np.maximum(price - half, 0.0).round(2), (price + half).round(2)
+    kind_name = np.where(kind == 1, 'C', 'P')
+    return pd.DataFrame({
+        'underlying': np.array(names)[u],
+        'expiration': expiry[e],
+        'contractSymbol': [f'{n}{d:%y%m%d}{c}{int(x * 1000):08d}' for n, d, c, x in
+                           zip(np.array(names)[u], expiry[e], kind_name, K)],
+        'strike': K,
+        'lastPrice': price.round(2),
+        'bid': bid,
+        'ask': ask,
+        'change': 0.0,
+        'percentChange': 0.0,
+        'volume': rng.poisson(50, len(u)),
+        'openInterest': rng.poisson(500, len(u)),
+        'impliedVolatility': sigma * (1 + rng.normal(0, 0.01, len(u))),
+        'inTheMoney': np.where(kind == 1, K < S, K > S),
+        'type': np.where(kind == 1, 'call', 'put'),
+        'snapshot_ts': snap,
+    }), spots
+
+
+def synthetic_funding(n=1_000_000, institutions=500, seed=0):
+    """``funding_risk_data_sample.csv``-shaped funding deals (before the EDA notebook's feature engineering)."""
+    rng = np.random.default_rng(seed)
+    days = rng.integers(1, 1800, n)
+    ratings = np.array(['AAA', 'AA', 'A', 'BBB', 'BB', 'B', 'CCC', 'D'])
+    return pd.DataFrame({
+        'deal_id': np.arange(n),
+        'institution_id': np.char.add('INST', rng.integers(0, institutions, n).astype(str)),
+        'funding_source': rng.choice(['Bond', 'Bank Loan', 'Repo', 'Commercial Paper', 'Deposit'], n),
+        'funding_amount': rng.uniform(1e6, 1e9, n).round(2),
+        'interest_spread': rng.gamma(6, 9, n).round(2),
+        'maturity_date': (pd.Timestamp('2025-01-01') + pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d'),
+        'days_to_maturity': days,
+        'funding_currency': rng.choice(['USD', 'EUR', 'GBP', 'JPY', 'CHF'], n, p=[0.5, 0.2, 0.15, 0.1, 0.05]),
+        'credit_rating': rng.choice(ratings, n, p=[0.05, 0.1, 0.2, 0.25, 0.2, 0.1, 0.07, 0.03]),
+        'refinancing_needed': rng.random(n) < 0.3,
+    })
+
+
+# --- a provider that makes its data up ----------------------------------------------
+
+YAHOO_CHAIN_COLUMNS = ['contractSymbol', 'lastTradeDate', 'strike', 'lastPrice', 'bid', 'ask', 'change',
+                       'percentChange', 'volume', 'openInterest', 'impliedVolatility', 'inTheMoney', 'contractSize',
+                       'currency']
+
+
+def _ticker_seed(ticker, seed):
+    return zlib.crc32(str(ticker).encode()) ^ seed
+
+
+def yahoo_history(ticker, days=2000, start='2017-01-02', seed=0):
+    """One ticker's bars shaped like ``yf.Ticker(t).history()``: New York midnight index named
+    ``Date``, float32-precision prices, ``Dividends`` / ``Stock Splits`` columns. Same ticker, same frame.
+    """
+    rng = np.random.default_rng(_ticker_seed(ticker, seed))
+    index = pd.bdate_range(start, periods=days, tz='America/New_York', name='Date')
+    close = rng.uniform(20, 500) * np.exp(np.cumsum(rng.normal(0.0003, 0.015, days)))
+    opn = close * (1 + rng.normal(0, 0.004, days))
+    spread = np.abs(rng.normal(0, 0.008, days))
+    frame = pd.DataFrame({'Open': opn, 'High': np.maximum(opn, close) * (1 + spread),
+                          'Low': np.minimum(opn, close) * (1 - spread), 'Close': close}, index=index)
+    frame = frame.astype(np.float32).astype(np.float64)  # Yahoo quotes are float32 at source
+    frame['Volume'] = rng.lognormal(13, 1, days).astype(np.int64)
+    frame['Dividends'] = 0.0
+    frame['Stock Splits'] = 0.0
+    return frame
+
+
+class SyntheticProvider(FakeProvider):
+    """``FakeProvider`` that generates every answer on request, for any ticker, with no stored data.
+
+    ``history`` / ``download`` serve ``yahoo_history`` bars; ``option_expiries`` /
+    ``option_chain`` serve ``synthetic_option_chains`` in yfinance's calls / puts
+    columns. ``latency`` and ``failures`` behave as in ``FakeProvider``.
+    """
+
+    host = 'synthetic.local'
+
+    def __init__(self, days=2000, start='2017-01-02', expiries=6, strikes=41, snapshot_ts='2024-06-03 15:00',
+                 latency=0.0, failures=None, seed=0):
+        super().__init__(latency=latency, failures=failures)
+        self.days, self.start, self.seed = days, start, seed
+        self.expiries, self.strikes, self.snapshot_ts = expiries, strikes, snapshot_ts
+        self._chain_cache = {}  # one generated snapshot per underlying, sliced per expiry
+
+    def _history(self, ticker, start, end):
+        df = yahoo_history(ticker, self.days, self.start, self.seed)
+        index = df.index.tz_localize(None)
+        return df.loc[(index >= pd.Timestamp(start)) & (index < pd.Timestamp(end))]
+
+    def history(self, ticker, start, end, timeout=None, **kwargs):
+        self._hit('history', ticker)
+        return self._history(ticker, start, end)
+
+    def download(self, tickers, start, end, **kwargs):
+        self._hit('download', ','.join(tickers))  # one round trip: yf.download fetches a batch concurrently
+        return pd.concat({t: self._history(t, start, end) for t in tickers}, axis=1)
+
+    def _chains(self, ticker):
+        """``{expiry: OptionChain}`` of one underlying, generated once."""
+        if ticker in self._chain_cache:
+            return self._chain_cache[ticker]
+        chains, _ = synthetic_option_chains([ticker], self.expiries, self.strikes, self.snapshot_ts,
+                                            seed=_ticker_seed(ticker, self.seed))
+        chains['lastTradeDate'] = chains['snapshot_ts']
+        chains['contractSize'], chains['currency'] = 'REGULAR', 'USD'
+        by_expiry = {}
+        for expiry, chain in chains.groupby('expiration'):
+            calls, puts = chain[chain['type'] == 'call'], chain[chain['type'] == 'put']
+            by_expiry[str(expiry)] = OptionChain(calls[YAHOO_CHAIN_COLUMNS].reset_index(drop=True),
+                                                 puts[YAHOO_CHAIN_COLUMNS].reset_index(drop=True))
+        with self._lock:
+            self._chain_cache[ticker] = by_expiry
+        return by_expiry
+
+    def option_expiries(self, ticker):
+        self._hit('option_expiries', ticker)
+        return sorted(self._chains(ticker))
+
+    def option_chain(self, ticker, expiry):
+        self._hit('option_chain', ticker)
+        chain = self._chains(ticker)[expiry]
+        return OptionChain(chain.calls.copy(), chain.puts.copy())
@@ -0,0 +1,172 @@
+"""Factor intervals, the adjusted view and ``adjust_frame`` against hand-computed factors, and a raw price job."""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from finpipe.adjustments import (FIRST_DATE, adjust_frame, create_adjusted_view, factor_intervals, factor_versions,
+                                 load_adjusted, load_factors, update_adjustments)
+from finpipe.ingestion import HighWaterMarkStore
+from finpipe.jobs import JobContext, JobQueue, PriceJob
+from finpipe.schema import migrate
+from finpipe.storage import upsert_frame
+from finpipe.synthetic import SyntheticProvider, synthetic_ohlcv, yahoo_history
+
+ACTIONS = {'AAA': [('2018-06-04', 'split', 4.0), ('2019-03-01', 'dividend', 0.5), ('2020-02-03', 'split', 2.0)],
+           'BBB': [('2019-05-01', 'dividend', 1.0)]}
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+class RestatingProvider(SyntheticProvider):
+    """Yahoo's behaviour: every bar before a split that has happened by ``end`` comes back divided by its ratio.
+
+    ``yahoo_history`` is the raw truth; ``ACTIONS`` are announced on their dates.
+    """
+
+    def _history(self, ticker, start, end):
+        df = yahoo_history(ticker, self.days, self.start, self.seed).copy()
+        index = df.index.tz_localize(None)
+        for day, kind, value in ACTIONS.get(ticker, []):
+            if pd.Timestamp(day) >= pd.Timestamp(end):
+                continue  # not announced yet
+            at = index.searchsorted(pd.Timestamp(day))
+            if kind == 'split':
+                df.iloc[:at, :4] /= value
+                df.iloc[:at, 4] = (df.iloc[:at, 4] * value).round()
+                df.iloc[:at, 5] /= value
+                df.iloc[at, 6] = value
+            else:
+                df.iloc[at, 5] += value
+        return df.loc[(index >= pd.Timestamp(start)) & (index < pd.Timestamp(end))]
+
+
+def actions_frame(rows):
+    return pd.DataFrame([{'ticker': t, 'date': pd.Timestamp(d), 'dividend': v if kind == 'dividend' else 0.0,
+                          'split': v if kind == 'split' else 1.0} for t, actions in rows.items()
+                         for d, kind, v in actions])
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    migrate(engine, 'px', 'ohlcv', log=None)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def bars():
+    df = synthetic_ohlcv(['AAA', 'BBB', 'CCC'], days=900, seed=4)  # 2017-01-02 onwards
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def expected_factors(bars, ticker):
+    """``(price, volume)`` factor per bar of ``ticker``, one action at a time."""
+    own = bars[bars['ticker'] == ticker].reset_index(drop=True)
+    price, volume = np.ones(len(own)), np.ones(len(own))
+    for day, kind, value in ACTIONS.get(ticker, []):
+        before = (own['date'] < pd.Timestamp(day)).to_numpy()
+        if kind == 'split':
+            price[before] /= value
+            volume[before] *= value
+        else:
+            price[before] *= 1 - value / own.loc[before, 'close'].iloc[-1]
+    return own, price, volume
+
+
+# --- intervals ---
+
+def test_factor_intervals_by_hand():
+    actions = pd.DataFrame({'ticker': ['X', 'X', 'X', 'Y'],
+                            'date': pd.to_datetime(['2020-01-10', '2020-03-02', '2020-06-01', '2021-01-04']),
+                            'dividend': [0.0, 1.0, 0.0, 2.0], 'split': [2.0, 1.0, 3.0, 1.0],
+                            'prev_close': [10.0, 50.0, 20.0, None]})
+    factors = factor_intervals(actions.sample(frac=1, random_state=1))
+    x = factors[factors['ticker'] == 'X']
+    assert list(x['valid_from']) == [FIRST_DATE, date(2020, 1, 10), date(2020, 3, 2)]
+    assert list(x['valid_to']) == [date(2020, 1, 10), date(2020, 3, 2), date(2020, 6, 1)]
+    np.testing.assert_allclose(x['price_factor'], [0.98 / 6, 0.98 / 3, 1 / 3], rtol=1e-15)
+    np.testing.assert_allclose(x['volume_factor'], [6.0, 3.0, 3.0])
+    y = factors[factors['ticker'] == 'Y']  # no earlier close: the dividend cannot be applied
+    assert list(y['price_factor']) == [1.0] and list(y['valid_from']) == [FIRST_DATE]
+
+
+# --- read paths ---
+
+def test_adjusted_view_load_and_adjust_frame_agree_with_the_factors(engine, bars):
+    upsert_frame(engine, bars, 'px')
+    assert update_adjustments(engine, actions_frame(ACTIONS), 'px', log=None) == ['AAA', 'BBB']
+    view = create_adjusted_view(engine, 'px')
+    loaded = load_adjusted(engine, 'px')
+    with engine.connect() as conn:
+        viewed = pd.read_sql(text(f"SELECT * FROM {view} ORDER BY ticker, date"), conn, parse_dates=['date'])
+    local = adjust_frame(bars, load_factors(engine, 'px')).sort_values(['ticker', 'date'], ignore_index=True)
+    for ticker in ['AAA', 'BBB', 'CCC']:
+        own, price, volume = expected_factors(bars, ticker)
+        for frame in (loaded, viewed, local):
+            got = frame[frame['ticker'] == ticker]
+            assert (got['date'].to_numpy() == own['date'].to_numpy()).all()
+            for column in ['open', 'high', 'low', 'close']:
+                np.testing.assert_allclose(got[column], own[column] * price, rtol=1e-12)
+            np.testing.assert_array_equal(got['volume'].to_numpy(float), (own['volume'] * volume).round())
+    some = load_adjusted(engine, 'px', tickers=['AAA'], start='2018-06-01', end='2018-06-06')
+    assert list(some['date'].dt.strftime('%m-%d')) == ['06-01', '06-04', '06-05']  # the split's ex-date is 06-04
+    raw = bars[(bars['ticker'] == 'AAA') & bars['date'].isin(some['date'])]
+    ratio = some['close'].to_numpy() / raw['close'].to_numpy()
+    assert ratio[0] / ratio[1] == pytest.approx(1 / 4) and ratio[1] == pytest.approx(ratio[2])
+
+
+def test_unchanged_actions_write_nothing_and_a_new_split_rewrites_one_ticker(engine, bars):
+    upsert_frame(engine, bars, 'px')
+    update_adjustments(engine, actions_frame(ACTIONS), 'px', log=None)
+    before = factor_versions(load_factors(engine, 'px'))
+    assert update_adjustments(engine, actions_frame(ACTIONS), 'px', log=None) == []
+    split = actions_frame({'BBB': [('2019-09-03', 'split', 3.0)]})
+    assert update_adjustments(engine, split, 'px', log=None) == ['BBB']
+    after = factor_versions(load_factors(engine, 'px'))
+    assert after['AAA'] == before['AAA'] and after['BBB'] != before['BBB'] and 'CCC' not in after
+    bbb = load_factors(engine, 'px', ['BBB'])
+    assert len(bbb) == 2 and list(bbb['volume_factor']) == [3.0, 3.0]
+
+
+def test_adjust_frame_without_factors_is_a_copy(bars):
+    empty = adjust_frame(bars, pd.DataFrame(columns=['ticker', 'valid_from', 'valid_to', 'price_factor',
+                                                     'volume_factor']))
+    pd.testing.assert_frame_equal(empty, bars)
+    assert empty is not bars
+
+
+# --- a raw price job ---
+
+def test_raw_job_stores_traded_prices_across_a_later_split(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    ctx = JobContext(engine=engine, provider=RestatingProvider(days=1000),
+                     store=HighWaterMarkStore(tmp_path / 'marks.json'), queue=JobQueue(tmp_path / 'queue.sqlite'),
+                     max_workers=1, rate_per_host=None, log=quiet)
+    job = PriceJob('t', 'px', ['AAA', 'BBB', 'CCC'], quality=None)
+    assert not job.run(ctx, today=date(2019, 12, 1)).failed
+    assert list(load_factors(engine, 'px', ['AAA'])['volume_factor']) == [4.0, 1.0]  # the split and the dividend
+    assert not job.run(ctx, today=date(2020, 10, 1)).failed  # the 2:1 split is announced in between
+
+    with engine.connect() as conn:
+        stored = pd.read_sql(text("SELECT * FROM px ORDER BY ticker, date"), conn, parse_dates=['date'])
+    truth = {}
+    for ticker in ['AAA', 'BBB', 'CCC']:
+        raw = yahoo_history(ticker, 1000)
+        raw.index = raw.index.tz_localize(None)
+        own = stored[stored['ticker'] == ticker].set_index('date')
+        np.testing.assert_allclose(own['close'], raw.loc[own.index, 'Close'], rtol=1e-12)
+        assert (own['volume'].to_numpy() == raw.loc[own.index, 'Volume'].to_numpy()).all()
+        truth[ticker] = own.reset_index().assign(ticker=ticker)
+    raw = pd.concat(truth.values(), ignore_index=True)
+    adjusted = load_adjusted(engine, 'px')
+    for ticker in ['AAA', 'BBB', 'CCC']:
+        own, price, _ = expected_factors(raw, ticker)
+        np.testing.assert_allclose(adjusted.loc[adjusted['ticker'] == ticker, 'close'], own['close'] * price,
+                                   rtol=1e-9)
@@ -0,0 +1,103 @@
+"""Walk-forward folds, the no-look-ahead refits and the resumable ``WalkForwardBacktest``."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from finpipe.features import compute_features
+from finpipe.modeling import (IncrementalRidge, WalkForwardBacktest, backtest_ticker, prepare_panel,
+                              walk_forward_folds)
+from finpipe.synthetic import synthetic_ohlcv
+
+pytest.importorskip('sklearn')
+
+
+class Recorder:
+    """Predicts the last target it was fitted on and remembers the rows of every fit."""
+    fits = []
+
+    def get_params(self, deep=True):
+        return {}
+
+    def fit(self, X, y):
+        Recorder.fits.append(np.asarray(X)[:, 0].copy())
+        self.last_ = y[-1]
+        return self
+
+    def predict(self, X):
+        return np.full(len(X), self.last_)
+
+
+@pytest.fixture(scope='module')
+def features():
+    return compute_features(synthetic_ohlcv(tickers=4, days=300, seed=11))
+
+
+@pytest.fixture(scope='module')
+def panel(features):
+    return prepare_panel(features)
+
+
+def test_folds_tile_the_calendar_after_min_train():
+    dates = pd.bdate_range('2024-01-01', periods=100).to_numpy()
+    folds = walk_forward_folds(np.concatenate([dates, dates[::3]]), min_train=40, step=15)
+    assert folds[0][0] == dates[40]
+    assert all(end == start for (_, end), (start, _) in zip(folds, folds[1:]))
+    assert [pd.Timestamp(s) for s, _ in folds] == list(pd.DatetimeIndex(dates[40::15]))
+    assert folds[-1][1] > dates[-1]
+
+
+def test_every_fit_only_sees_rows_before_its_fold(panel):
+    df, columns = panel
+    rows = df[df['ticker'] == 'T000'].reset_index(drop=True)
+    ordinal = rows['date'].map(pd.Timestamp.toordinal).astype(float)
+    rows = rows.assign(**{columns[0]: ordinal})  # the first feature carries the row's date
+    folds = walk_forward_folds(df['date'], min_train=120, step=20)
+    for window in (None, 30):
+        Recorder.fits = []
+        out = backtest_ticker('T000', rows, columns, folds, Recorder(), window=window)
+        assert len(Recorder.fits) == out['fold'].nunique() == len(folds)
+        for seen, (number, predicted) in zip(Recorder.fits, out.groupby('fold')):
+            start, end = folds[number]
+            assert (predicted['date'] >= start).all() and (predicted['date'] < end).all()
+            assert seen.max() < pd.Timestamp(start).toordinal()  # no look-ahead
+            if window:
+                assert len(seen) == window
+        assert len(out) == (rows['date'] >= folds[0][0]).sum()  # every bar after min_train is predicted once
+
+
+def test_incremental_refits_match_full_refits(panel):
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    df, columns = panel
+    rows = df[df['ticker'] == 'T001'].reset_index(drop=True)
+    folds = walk_forward_folds(df['date'], min_train=120, step=20)
+    incremental = backtest_ticker('T001', rows, columns, folds, IncrementalRidge(alpha=1.0))
+    refitted = backtest_ticker('T001', rows, columns, folds, make_pipeline(StandardScaler(), Ridge(alpha=1.0)))
+    np.testing.assert_allclose(incremental['y_pred'], refitted['y_pred'], rtol=1e-9)
+
+
+def test_incremental_ridge_matches_sklearn(panel):
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    df, columns = panel
+    X, y = df[columns].to_numpy(), df['next_day_close'].to_numpy()
+    model = IncrementalRidge(alpha=2.0).partial_fit(X[:500], y[:500]).partial_fit(X[500:], y[500:])
+    expected = make_pipeline(StandardScaler(), Ridge(alpha=2.0)).fit(X, y)
+    np.testing.assert_allclose(model.predict(X), expected.predict(X), rtol=1e-8)
+
+
+def test_run_resumes_from_checkpoints(features, tmp_path):
+    backtest = WalkForwardBacktest(min_train=120, step=20, n_jobs=1, checkpoint_dir=tmp_path, log=None)
+    first = backtest.run(features)
+    assert sorted(first.metrics.index) == ['T000', 'T001', 'T002', 'T003']
+    parts = sorted(tmp_path.glob('*/*.parquet'))
+    parts[-1].unlink()
+
+    messages = []
+    backtest.log = messages.append
+    resumed = backtest.run(features)
+    assert '3 already done' in messages[0]
+    pd.testing.assert_frame_equal(resumed.predictions, first.predictions)
+    pd.testing.assert_frame_equal(resumed.metrics, first.metrics)
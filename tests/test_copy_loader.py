@@ -0,0 +1,179 @@
+"""``stream_copy`` into the pluggable sinks, ``copy_frame`` and ``upsert_frame`` idempotency on SQLite."""
+import io
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from finpipe.ingestion import OHLCV_COLUMNS
+from finpipe.storage import (MemorySink, NullSink, FileSink, PostgresCopySink, SQLiteSink, copy_frame, stream_copy,
+                             upsert_frame, upsert_sql)
+from finpipe.synthetic import synthetic_ohlcv
+
+TABLE_SQL = """
+    CREATE TABLE prices (
+        date DATE NOT NULL, ticker TEXT NOT NULL,
+        open DOUBLE PRECISION, high DOUBLE PRECISION, low DOUBLE PRECISION, close DOUBLE PRECISION,
+        volume BIGINT,
+        PRIMARY KEY (date, ticker)
+    )
+"""
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def bars():
+    df = synthetic_ohlcv(tickers=5, days=300)
+    df['date'] = pd.to_datetime(df['date'])
+    return df[OHLCV_COLUMNS].reset_index(drop=True)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'prices.sqlite'}")
+    with engine.begin() as conn:
+        conn.execute(text(TABLE_SQL))
+    yield engine
+    engine.dispose()
+
+
+def parse(csv_text, columns):
+    return pd.read_csv(io.StringIO(csv_text), header=None, names=columns, parse_dates=['date'])
+
+
+def read_table(engine):
+    with engine.connect() as conn:
+        df = pd.read_sql(text("SELECT * FROM prices ORDER BY ticker, date"), conn, parse_dates=['date'])
+    return df.reset_index(drop=True)
+
+
+def ordered(df):
+    return df.sort_values(['ticker', 'date']).reset_index(drop=True)
+
+
+# --- stream_copy and the sinks --------------------------------------------------------
+
+def test_memory_sink_round_trip(bars):
+    sink = MemorySink()
+    stats = stream_copy(sink, bars, OHLCV_COLUMNS, chunksize=400, log=quiet)
+    assert (stats.rows, stats.chunks) == (len(bars), -(-len(bars) // 400))
+    assert stats.nbytes == len(sink.getvalue())
+    pd.testing.assert_frame_equal(parse(sink.getvalue(), OHLCV_COLUMNS), bars, check_dtype=False)
+
+
+def test_frames_are_encoded_for_copy():
+    df = pd.DataFrame({
+        'date': pd.to_datetime(['2024-06-03', '2024-06-04']).tz_localize('America/New_York'),
+        'ticker': ['AAPL', 'AAPL'],
+        'close': np.array([191.28999328613281, np.nan], dtype=np.float32),
+        'volume': [1.0e6, np.nan],
+    })
+    sink = MemorySink()
+    stream_copy(sink, [df.iloc[:0], df], list(df.columns), types={'volume': 'bigint'}, log=quiet)
+    lines = sink.getvalue().splitlines()
+    assert lines[0].split(',')[0].strip('"').startswith('2024-06-03')  # local trading date, no offset
+    assert '-04:00' not in sink.getvalue()
+    assert float(lines[0].split(',')[2]) == float(np.float32(191.28999328613281))  # exact float64 of the float32
+    assert lines[0].split(',')[3] == '1000000' and lines[1].split(',')[2:] == ['', '']
+
+
+def test_null_and_file_sinks(tmp_path, bars):
+    assert stream_copy(NullSink(), bars, OHLCV_COLUMNS, log=quiet).rows == len(bars)
+    sink = FileSink(tmp_path / 'bars.csv')
+    stream_copy(sink, (bars.iloc[i:i + 500] for i in range(0, len(bars), 500)), OHLCV_COLUMNS, log=quiet)
+    sink.close()
+    pd.testing.assert_frame_equal(parse((tmp_path / 'bars.csv').read_text(), OHLCV_COLUMNS), bars,
+                                  check_dtype=False)
+
+
+def test_postgres_sink_streams_the_same_blocks(bars):
+    memory = MemorySink()
+    stream_copy(memory, bars, OHLCV_COLUMNS, chunksize=250, log=quiet)
+
+    class Psycopg2Cursor:
+        def copy_expert(self, sql, file):
+            self.sql, self.data = sql, file.read().decode('utf-8')
+
+    class Psycopg3Cursor:
+        def copy(self, sql):
+            self.sql, self.blocks = sql, []
+            cursor = self
+
+            class Copy:
+                def __enter__(self):
+                    return self
+
+                def __exit__(self, *exc):
+                    pass
+
+                def write(self, block):
+                    cursor.blocks.append(block)
+            return Copy()
+
+    pulled, pushed = Psycopg2Cursor(), Psycopg3Cursor()
+    stream_copy(PostgresCopySink(pulled, 'prices', OHLCV_COLUMNS), bars, OHLCV_COLUMNS, chunksize=250, log=quiet)
+    stream_copy(PostgresCopySink(pushed, 'prices', OHLCV_COLUMNS), bars, OHLCV_COLUMNS, chunksize=250, log=quiet)
+    assert pulled.sql == f"COPY prices ({', '.join(OHLCV_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    assert pulled.data == memory.getvalue() == ''.join(pushed.blocks)
+    assert len(pushed.blocks) == -(-len(bars) // 250)
+
+
+def test_sqlite_sink_inserts_every_row(bars):
+    conn = sqlite3.connect(':memory:')
+    conn.execute(TABLE_SQL)
+    stream_copy(SQLiteSink(conn.cursor(), 'prices', OHLCV_COLUMNS), bars, OHLCV_COLUMNS, chunksize=333, log=quiet)
+    df = pd.read_sql("SELECT * FROM prices", conn, parse_dates=['date'])
+    pd.testing.assert_frame_equal(ordered(df), ordered(bars), check_dtype=False)
+    assert conn.execute("SELECT COUNT(*) FROM prices WHERE volume IS NULL").fetchone()[0] == 0
+
+
+def test_copy_frame_appends_through_the_engines_sink(engine, bars):
+    stats = copy_frame(engine, bars, 'prices', chunksize=400, log=quiet)
+    assert (stats.rows, stats.chunks) == (len(bars), -(-len(bars) // 400))
+    pd.testing.assert_frame_equal(read_table(engine), ordered(bars), check_dtype=False)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT MIN(date) FROM prices")).scalar() == bars['date'].min().date().isoformat()
+    with pytest.raises(ValueError, match='columns is required'):
+        copy_frame(engine, [bars], 'prices')
+    assert copy_frame(engine, bars.iloc[:0], 'prices').rows == 0
+
+
+# --- upsert_frame ------------------------------------------------------------------------
+
+def test_upsert_is_idempotent(engine, bars):
+    assert upsert_frame(engine, bars, 'prices', chunksize=500) == len(bars)
+    assert upsert_frame(engine, bars, 'prices', chunksize=500) == 0
+    assert upsert_frame(engine, bars, 'prices', on_conflict='update') == 0  # unchanged rows are not rewritten
+    pd.testing.assert_frame_equal(read_table(engine), ordered(bars), check_dtype=False)
+
+
+def test_upsert_update_overwrites_changed_rows_only(engine, bars):
+    upsert_frame(engine, bars, 'prices')
+    revised = bars.copy()
+    changed = revised.index[::50]
+    revised.loc[changed, 'close'] *= 1.01
+    new = bars.groupby('ticker').tail(1).iloc[:3].assign(date=bars['date'].max() + pd.Timedelta(days=1))
+    assert upsert_frame(engine, pd.concat([revised, new]), 'prices', on_conflict='nothing') == 3
+    assert read_table(engine)['close'].sum() == pytest.approx(bars['close'].sum() + new['close'].sum())
+    assert upsert_frame(engine, revised, 'prices', on_conflict='update') == len(changed)
+    pd.testing.assert_frame_equal(read_table(engine), ordered(pd.concat([revised, new])), check_dtype=False)
+
+
+def test_upsert_deduplicates_keys_within_a_batch(engine, bars):
+    frames = [bars[bars['ticker'] == t] for t in bars['ticker'].unique()]
+    assert upsert_frame(engine, frames + [frames[0]], 'prices', columns=OHLCV_COLUMNS) == len(bars)
+    assert len(read_table(engine)) == len(bars)
+
+
+def test_upsert_edge_cases(engine, bars):
+    assert upsert_frame(engine, None, 'prices') == 0
+    assert upsert_frame(engine, bars.iloc[:0], 'prices') == 0
+    with pytest.raises(ValueError, match='columns is required'):
+        upsert_frame(engine, [bars], 'prices')
+    with pytest.raises(ValueError, match='on_conflict'):
+        upsert_sql('prices', 'stage', OHLCV_COLUMNS, ['date', 'ticker'], on_conflict='replace')
@@ -0,0 +1,80 @@
+"""``FeatureStore`` appends against a full ``compute_features`` recompute, bit for bit."""
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from finpipe.features import FeatureSpec, FeatureStore, compute_features
+from finpipe.synthetic import synthetic_ohlcv
+
+SPEC = FeatureSpec(windows=(5, 20))
+
+
+@pytest.fixture(scope='module')
+def bars():
+    df = synthetic_ohlcv(tickers=30, days=160, seed=5)
+    dates = np.sort(df['date'].unique())
+    return df[~((df['ticker'] == 'T029') & (df['date'] < dates[150]))]  # listed late: starts inside the appends
+
+
+@pytest.fixture(scope='module')
+def dates(bars):
+    return np.sort(bars['date'].unique())
+
+
+def assert_identical(stored, expected):
+    """Same rows, same values: equal bits, or NaN in both."""
+    columns = SPEC.columns()
+    assert len(stored) == len(expected)
+    assert (stored['ticker'].to_numpy() == expected['ticker'].to_numpy()).all()
+    assert (stored['date'].to_numpy() == expected['date'].to_numpy()).all()
+    a, b = stored[columns].to_numpy(np.float64), expected[columns].to_numpy(np.float64)
+    mismatched = ~((a == b) | (np.isnan(a) & np.isnan(b)))
+    assert not mismatched.any(), [c for c, bad in zip(columns, mismatched.any(axis=0)) if bad]
+
+
+def test_daily_appends_equal_a_full_recompute(tmp_path, bars, dates):
+    FeatureStore(tmp_path, SPEC).build(bars[bars['date'] <= dates[140]])
+    for day in dates[141:]:
+        FeatureStore(tmp_path).append(bars[bars['date'] == day])  # reopened every night
+    assert_identical(FeatureStore(tmp_path).read(), compute_features(bars, SPEC))
+
+
+def test_multi_day_append_and_compact(tmp_path, bars, dates):
+    store = FeatureStore(tmp_path, SPEC)
+    store.build(bars[bars['date'] <= dates[100]])
+    appended = store.append(bars)  # the whole history again: only the newer bars are computed
+    assert len(appended) == (bars['date'] > dates[100]).sum()
+    assert store.append(bars).empty
+    assert store.compact() == len(bars)
+    assert len(list(store.parts.glob('part-*.parquet'))) == 1
+    assert_identical(store.read(), compute_features(bars, SPEC))
+
+
+def test_forgotten_tickers_are_recomputed(tmp_path, bars, dates):
+    store = FeatureStore(tmp_path, SPEC)
+    store.build(bars)
+    store.forget(['T003', 'T010'])
+    assert set(store.read()['ticker']) == set(bars['ticker']) - {'T003', 'T010'}
+    store.append(bars)
+    assert_identical(store.read(), compute_features(bars, SPEC))
+
+
+def test_refresh_from_db_appends_new_bars(tmp_path, bars, dates):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    first = bars[bars['date'] <= dates[130]]
+    first.to_sql('prices', engine, index=False)
+    store = FeatureStore(tmp_path / 'store', SPEC)
+    assert len(store.refresh_from_db(engine, 'prices', adjusted=False)) == len(first)
+    bars[bars['date'] > dates[130]].to_sql('prices', engine, index=False, if_exists='append')
+    assert len(store.refresh_from_db(engine, 'prices', adjusted=False)) == len(bars) - len(first)
+    assert_identical(store.read(), compute_features(bars, SPEC))
+
+
+def test_read_filters_and_spec_mismatch(tmp_path, bars, dates):
+    store = FeatureStore(tmp_path, SPEC)
+    store.build(bars)
+    some = store.read(tickers=['T001', 'T002'], start=dates[-10], columns=['date', 'ticker', 'close'])
+    assert list(some.columns) == ['date', 'ticker', 'close'] and len(some) == 20
+    with pytest.raises(ValueError, match='call build'):
+        FeatureStore(tmp_path, FeatureSpec(windows=(5, 10)))
@@ -0,0 +1,181 @@
+"""``funding_cubes`` against the ``Analytics/Funds_Analysis`` notebooks' own groupbys.
+
+``notebook_engineer`` and ``notebook_cubes`` are the notebooks' code (row-wise
+``apply`` classes, one ``groupby`` per table) and stay as the regression baseline:
+the streamed cubes must reproduce them whatever the chunk size. Columns the cubes
+add (``sum_funding_amount``) are checked on their own.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from finpipe.funding import aggregate_frames, funding_cubes, iter_deal_chunks
+from finpipe.synthetic import synthetic_funding
+
+
+def notebook_engineer(df):
+    """``EDA_Funding_Risks.ipynb``: the derived columns, one row at a time."""
+    df = df.copy()
+    df['refinancing_needed'] = df['refinancing_needed'].astype(int)
+
+    def categorize_maturity(days):
+        if days <= 180:
+            return 'short_term'
+        elif days <= 365:
+            return 'medium_term'
+        return 'long_term'
+
+    def categorize_spread(spread):
+        if spread < 40:
+            return 'low'
+        elif spread < 70:
+            return 'medium'
+        return 'high'
+
+    def size_class(amount):
+        if amount < 250_000_000:
+            return 'small'
+        elif amount < 750_000_000:
+            return 'medium'
+        return 'large'
+
+    def risk_bucket(row):
+        if row['spread_level'] == 'high' and row['rating_score'] >= 6:
+            return 'very_high_risk'
+        elif row['spread_level'] == 'medium' and row['rating_score'] >= 4:
+            return 'moderate_risk'
+        return 'low_risk'
+
+    df['maturity_bucket'] = df['days_to_maturity'].apply(categorize_maturity)
+    df['spread_level'] = df['interest_spread'].apply(categorize_spread)
+    df['funding_size_class'] = df['funding_amount'].apply(size_class)
+    df['rating_score'] = df['credit_rating'].map({'AAA': 1, 'AA': 2, 'A': 3, 'BBB': 4, 'BB': 5, 'B': 6, 'CCC': 7,
+                                                  'D': 8})
+    df['is_foreign_currency'] = (df['funding_currency'] != 'USD').astype(int)
+    df['adjusted_spread'] = df['interest_spread'] / df['days_to_maturity']
+    df['risk_bucket'] = df.apply(risk_bucket, axis=1)
+    return df
+
+
+def notebook_cubes(df):
+    """The tables of ``Funding_Profile_Analysis.ipynb`` and ``fund_risk_analytics.ipynb``."""
+    out = {}
+    out['by_source'] = df.groupby('funding_source')['funding_amount'].agg(
+        average_funding_amount='mean', total_funding_amount='mean', deal_count='count').reset_index()
+    out['by_institution'] = df.groupby('institution_id')['funding_amount'].agg(
+        average_funding_amount='mean', total_funding_amount='mean', deal_count='count').reset_index()
+    out['by_currency'] = df.groupby('funding_currency')['funding_amount'].agg(
+        average_funding_amount='mean', total_funding_amount='sum', deal_count='count').reset_index()
+
+    def funding_size_class(amount):
+        if amount < 252_287_500:
+            return 'Small'
+        elif amount < 500_813_200:
+            return 'Medium'
+        elif amount < 750_850_100:
+            return 'Upper-Medium'
+        return 'Large'
+
+    df = df.copy()
+    df['funding_class'] = df['funding_amount'].apply(funding_size_class)
+    classes = df.groupby('funding_class').agg(number_of_deals=('funding_amount', 'count'),
+                                              total_amount=('funding_amount', 'sum'),
+                                              average_deal_size=('funding_amount', 'mean')).reset_index()
+    classes['percent_of_total_funding'] = (classes['total_amount'] / df['funding_amount'].sum() * 100).round(2)
+    out['by_funding_class'] = classes.sort_values(by='total_amount', ascending=False)
+
+    df['maturity_date'] = pd.to_datetime(df['maturity_date'])
+    trend = df.groupby('maturity_date').agg({'funding_amount': 'mean', 'interest_spread': 'mean',
+                                             'refinancing_needed': 'mean'}).reset_index()
+    out['maturity_trend'] = trend.rename(columns={'funding_amount': 'average_funding_amount',
+                                                  'interest_spread': 'average_interest_spread',
+                                                  'refinancing_needed': 'refinancing_probability'})
+    out['risk_segmentation'] = df.groupby(['risk_bucket', 'credit_rating', 'rating_score']).agg(
+        {'institution_id': 'nunique', 'funding_amount': ['count', 'sum', 'mean'], 'interest_spread': 'mean',
+         'refinancing_needed': 'mean'})
+    out['adjusted_spread_by_risk'] = df.groupby('risk_bucket')['adjusted_spread'].agg(
+        avg_adjusted_spread='mean', median_adjusted_spread='median', std_adjusted_spread='std',
+        min_adjusted_spread='min', max_adjusted_spread='max', count='count').reset_index()
+    counts = df.groupby(['risk_bucket', 'refinancing_needed']).size().unstack(fill_value=0)
+    counts['Total'] = counts.sum(axis=1)
+    counts['Refinancing_Rate (%)'] = (counts[1] / counts['Total'] * 100).round(2)
+    out['refinancing_counts'] = counts
+    for column in ['funding_source', 'funding_currency', 'credit_rating']:
+        out[f'refinancing_by_{column}'] = pd.crosstab(df[column], df['refinancing_needed'])
+    return out
+
+
+def same(actual, expected):
+    if isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(actual, expected, check_dtype=False, check_names=False, rtol=1e-9)
+    else:
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_names=False, rtol=1e-9)
+
+
+@pytest.fixture(scope='module')
+def deals():
+    return synthetic_funding(20_000, institutions=300, seed=3)
+
+
+@pytest.fixture(scope='module')
+def baseline(deals):
+    return notebook_cubes(notebook_engineer(deals))
+
+
+@pytest.fixture(scope='module')
+def deal_file(tmp_path_factory, deals):
+    path = tmp_path_factory.mktemp('deals') / 'Feature_Engineered_Funding_Data.csv'
+    deals.to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture(scope='module')
+def streamed(deal_file, tmp_path_factory):
+    return funding_cubes(deal_file, chunksize=3_000, root=tmp_path_factory.mktemp('cubes'), log=None)
+
+
+@pytest.mark.parametrize('name', ['by_source', 'by_institution', 'by_currency', 'by_funding_class',
+                                  'maturity_trend', 'risk_segmentation', 'adjusted_spread_by_risk',
+                                  'refinancing_counts', 'refinancing_by_funding_source',
+                                  'refinancing_by_funding_currency', 'refinancing_by_credit_rating'])
+def test_cube_matches_notebook(name, streamed, baseline):
+    same(streamed[name][baseline[name].columns], baseline[name])
+
+
+@pytest.mark.parametrize('name, column', [('by_source', 'funding_source'), ('by_institution', 'institution_id')])
+def test_sum_funding_amount(name, column, streamed, deals):
+    assert list(streamed[name].columns) == [column, 'average_funding_amount', 'total_funding_amount', 'deal_count',
+                                            'sum_funding_amount']
+    same(streamed[name].set_index(column)['sum_funding_amount'], deals.groupby(column)['funding_amount'].sum())
+
+
+def test_engineered_columns_match_notebook(deals):
+    from finpipe.funding import engineer
+    expected = notebook_engineer(deals)
+    actual = engineer(deals)[expected.columns]
+    same(actual.astype({'rating_score': np.int64}), expected)
+
+
+def test_summaries_match_pandas(deals, streamed):
+    engineered = notebook_engineer(deals)
+    summary = deals['funding_amount'].describe()[['count', 'mean', 'std', 'min', 'max']]
+    same(streamed['funding_amount_summary'], summary)
+    numeric = streamed['by_refinancing'].columns
+    same(streamed['by_refinancing'], engineered.groupby('refinancing_needed')[list(numeric)].mean())
+
+
+def test_chunk_size_does_not_change_the_cubes(deals, deal_file, streamed):
+    whole = aggregate_frames(deals)
+    chunked = aggregate_frames(iter_deal_chunks(deal_file, chunksize=1_234))
+    for name, cube in streamed.items():
+        same(whole[name], cube)
+        same(chunked[name], cube)
+
+
+def test_unchanged_file_is_answered_from_the_cache(deal_file, tmp_path):
+    messages = []
+    first = funding_cubes(deal_file, chunksize=5_000, root=tmp_path, log=messages.append)
+    second = funding_cubes(deal_file, chunksize=5_000, root=tmp_path, log=messages.append)
+    assert 'from cache' in messages[-1] and 'from cache' not in messages[0]
+    for name in first:
+        same(second[name], first[name])
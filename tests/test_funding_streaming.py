@@ -0,0 +1,158 @@
+"""The mergeable summaries of ``finpipe.funding.streaming`` against one pass of numpy / pandas / scipy."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from finpipe.funding import RunningMoments, QuantileSketch, ContingencyTable, FundingStats, welch_test
+from finpipe.synthetic import synthetic_funding
+
+stats = pytest.importorskip('scipy.stats')
+
+
+def chunks(values, sizes):
+    start = 0
+    for size in sizes:
+        yield values[start:start + size]
+        start += size
+
+
+@pytest.fixture(scope='module')
+def deals():
+    return synthetic_funding(60_000, seed=7)
+
+
+@pytest.fixture(scope='module')
+def merged(deals):
+    """``FundingStats`` of three unequal slices of ``deals``, summarised apart and merged."""
+    parts = [FundingStats().update(part) for part in chunks(deals, [5_000, 40_000, 15_000])]
+    for part in parts[1:]:
+        parts[0].merge(part)
+    return parts[0]
+
+
+# --- RunningMoments ------------------------------------------------------------------
+
+def test_moments_merge_matches_numpy():
+    rng = np.random.default_rng(1)
+    x = np.concatenate([rng.normal(1e9, 3.0, 1_000), rng.normal(-5.0, 200.0, 30_000), [7.5]])
+    x[::97] = np.nan
+    m = RunningMoments()
+    for part in chunks(x, [1, 999, 10_000, 20_001]):
+        m.merge(RunningMoments().update(part))
+    clean = x[~np.isnan(x)]
+    assert m.n == len(clean)
+    assert m.mean == pytest.approx(clean.mean(), rel=1e-12)
+    assert m.var() == pytest.approx(clean.var(), rel=1e-9)
+    assert m.var(ddof=1) == pytest.approx(clean.var(ddof=1), rel=1e-9)
+    assert (m.min, m.max) == (clean.min(), clean.max())
+
+
+def test_moments_update_equals_merge():
+    x = np.random.default_rng(2).gamma(6, 9, 5_000)
+    streamed = RunningMoments()
+    for part in chunks(x, [100] * 50):
+        streamed.update(part)
+    assert streamed.mean == pytest.approx(x.mean(), rel=1e-12)
+    assert streamed.m2 == pytest.approx(((x - x.mean()) ** 2).sum(), rel=1e-10)
+    assert RunningMoments().merge(RunningMoments()).n == 0
+    assert np.isnan(RunningMoments().update([1.0]).var(ddof=1))
+
+
+def test_welch_test_matches_scipy():
+    rng = np.random.default_rng(3)
+    a, b = rng.normal(10, 2, 4_000), rng.normal(10.2, 5, 900)
+    t, p = welch_test(RunningMoments().update(a[:1_000]).merge(RunningMoments().update(a[1_000:])),
+                      RunningMoments().update(b))
+    expected = stats.ttest_ind(a, b, equal_var=False)
+    assert t == pytest.approx(expected.statistic, rel=1e-9)
+    assert p == pytest.approx(expected.pvalue, rel=1e-6)
+
+
+# --- QuantileSketch ------------------------------------------------------------------
+
+def test_sketch_is_exact_below_k():
+    x = np.random.default_rng(4).gamma(6, 9, 800)
+    sketch = QuantileSketch(k=1000).update(x[:300]).merge(QuantileSketch(k=1000).update(x[300:]))
+    q = [0.0, 0.1, 0.25, 0.5, 0.75, 0.99, 1.0]
+    np.testing.assert_allclose(sketch.quantile(q), pd.Series(x).quantile(q).to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('k', [200, 1000])
+def test_merged_sketch_rank_error_within_bound(k):
+    rng = np.random.default_rng(5)
+    x = np.concatenate([rng.gamma(6, 9, 150_000), rng.uniform(1e6, 1e9, 50_000)])
+    parts = [QuantileSketch(k, seed=i).update(part) for i, part in enumerate(chunks(x, [70_000, 3, 129_997]))]
+    sketch = parts[0]
+    for part in parts[1:]:
+        sketch.merge(part)
+    assert sketch.n == len(x)
+    assert sum(map(len, sketch.levels)) <= 3 * k + len(sketch.levels)
+    ordered = np.sort(x)
+    q = np.linspace(0.01, 0.99, 99)
+    ranks = np.searchsorted(ordered, sketch.quantile(q)) / len(x)
+    assert np.abs(ranks - q).max() <= 1.7 / k
+    probes = np.quantile(x, q)
+    assert np.abs(sketch.rank(probes) - np.searchsorted(ordered, probes)).max() <= 1.7 / k * len(x)
+
+
+# --- ContingencyTable and chi-squared -------------------------------------------------
+
+def test_contingency_merge_matches_crosstab(deals):
+    outcome = deals['refinancing_needed'].astype(int)
+    table = ContingencyTable()
+    for part in chunks(deals.index, [10, 49_990, 10_000]):
+        table.merge(ContingencyTable().update(deals.loc[part, 'credit_rating'], outcome[part]))
+    expected = pd.crosstab(deals['credit_rating'], outcome)
+    pd.testing.assert_frame_equal(table.table('credit_rating'), expected, check_names=False, check_dtype=False)
+
+
+def test_chi2_matches_notebook(deals, merged):
+    result = merged.chi2_tests()
+    for column in ['funding_source', 'funding_currency', 'credit_rating']:
+        chi2, p, dof, _ = stats.chi2_contingency(pd.crosstab(deals[column], deals['refinancing_needed']))
+        assert result.at[column, 'chi2'] == pytest.approx(chi2, rel=1e-12)
+        assert result.at[column, 'p_value'] == pytest.approx(p, rel=1e-9)
+        assert result.at[column, 'dof'] == dof
+
+
+# --- FundingStats against the EDA notebook ---------------------------------------------
+
+def test_zscore_bounds_match_notebook(deals, merged):
+    bounds = merged.zscore_bounds()
+    flagged = merged.flag_outliers(deals)
+    for column in ['interest_spread', 'funding_amount']:
+        z = stats.zscore(deals[column])
+        assert bounds.at[column, 'mean'] == pytest.approx(deals[column].mean(), rel=1e-12)
+        assert bounds.at[column, 'std'] == pytest.approx(deals[column].std(ddof=0), rel=1e-9)
+        np.testing.assert_allclose(flagged[f'z_score_{column}'], z, rtol=1e-9, atol=1e-12)
+        assert flagged[f'{column}_z_outlier'].sum() == (np.abs(z) > 3).sum()
+
+
+def test_iqr_bounds_match_notebook(deals, merged):
+    bounds = merged.iqr_bounds()
+    flagged = merged.flag_outliers(deals)
+    for column in ['interest_spread', 'funding_amount']:
+        values = deals[column]
+        q1, q3 = values.quantile(0.25), values.quantile(0.75)
+        spread = values.max() - values.min()
+        assert bounds.at[column, 'q1'] == pytest.approx(q1, abs=0.01 * spread)
+        assert bounds.at[column, 'q3'] == pytest.approx(q3, abs=0.01 * spread)
+        exact = ((values < q1 - 1.5 * (q3 - q1)) | (values > q3 + 1.5 * (q3 - q1))).sum()
+        assert bounds.at[column, 'outliers'] == pytest.approx(exact, abs=0.005 * len(values))
+        assert flagged[f'{column}_iqr_outlier'].sum() == pytest.approx(exact, abs=0.005 * len(values))
+
+
+def test_welch_tests_match_notebook(deals, merged):
+    result = merged.welch_tests()
+    group = deals['refinancing_needed'].astype(bool)
+    for column in ['funding_amount', 'days_to_maturity']:
+        expected = stats.ttest_ind(deals.loc[~group, column], deals.loc[group, column], equal_var=False)
+        assert result.at[column, 't_stat'] == pytest.approx(expected.statistic, rel=1e-9)
+        assert result.at[column, 'p_value'] == pytest.approx(expected.pvalue, rel=1e-6)
+
+
+def test_save_and_load_round_trip(tmp_path, merged):
+    loaded = FundingStats.load(merged.save(tmp_path / 'stats' / 'funding.pkl'))
+    assert loaded.rows == merged.rows
+    pd.testing.assert_frame_equal(loaded.iqr_bounds(), merged.iqr_bounds())
+    pd.testing.assert_frame_equal(loaded.chi2_tests(), merged.chi2_tests())
@@ -0,0 +1,103 @@
+"""High-water marks and the incremental download plan, alone and through a ``PriceJob`` run."""
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from finpipe.ingestion import HighWaterMarkStore, incremental_starts, plan_starts, read_db_high_water_marks
+from finpipe.jobs import JobContext, JobQueue, get_job
+from finpipe.synthetic import SyntheticProvider
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+class RecordingProvider(SyntheticProvider):
+    """``SyntheticProvider`` that also keeps the requested ``(ticker, start)`` of every ``history`` call."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.requests = []
+
+    def history(self, ticker, start, end, timeout=None, **kwargs):
+        self.requests.append((ticker, pd.Timestamp(start)))
+        return super().history(ticker, start, end, timeout, **kwargs)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HighWaterMarkStore(tmp_path / 'marks.json')
+
+
+def test_plan_starts_after_the_mark_with_overlap():
+    marks = {'A': pd.Timestamp('2024-05-31'), 'B': pd.Timestamp('2024-06-10'), 'OLD': pd.Timestamp('2010-01-04')}
+    starts = plan_starts(['A', 'B', 'NEW', 'OLD'], marks, '2016-06-01', '2024-06-05', overlap_days=5)
+    assert starts == {'A': pd.Timestamp('2024-05-27'), 'NEW': pd.Timestamp('2016-06-01'),
+                      'OLD': pd.Timestamp('2016-06-01')}  # B is up to date; OLD's mark is before the window
+    assert starts.known == {'A', 'B', 'OLD'}
+    assert plan_starts(['A'], marks, '2016-06-01', '2024-06-05', overlap_days=0) == {'A': pd.Timestamp('2024-06-01')}
+
+
+def test_marks_only_move_forward_and_persist(store):
+    store.record('prices', pd.DataFrame({'date': pd.to_datetime(['2024-06-03', '2024-06-04', '2024-06-03']),
+                                         'ticker': ['A', 'A', 'B']}))
+    aware = pd.to_datetime(['2024-05-01', '2024-06-05']).tz_localize('America/New_York')
+    store.record('prices', pd.DataFrame({'date': aware, 'ticker': ['A', 'B']}))
+    store.record('prices', None)
+    expected = {'A': pd.Timestamp('2024-06-04'), 'B': pd.Timestamp('2024-06-05')}
+    assert store.get('prices') == expected
+    assert HighWaterMarkStore(store.path).get('prices') == expected
+    assert not store.has('other') and store.get('other') == {}
+
+
+def test_marks_are_read_from_the_table_once(store):
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE prices (date DATE, ticker TEXT)"))
+        conn.execute(text("INSERT INTO prices VALUES ('2024-05-31', 'A'), ('2024-06-03', 'A'), ('2024-01-02', 'B')"))
+    with engine.connect() as conn:
+        assert read_db_high_water_marks(conn, 'prices') == {'A': pd.Timestamp('2024-06-03'),
+                                                             'B': pd.Timestamp('2024-01-02')}
+        assert read_db_high_water_marks(conn, 'missing') == {}
+        starts = incremental_starts(['A', 'B', 'C'], 'prices', conn, '2016-06-01', '2024-06-05', store=store,
+                                    overlap_days=0)
+        assert starts == {'A': pd.Timestamp('2024-06-04'), 'B': pd.Timestamp('2024-01-03'),
+                          'C': pd.Timestamp('2016-06-01')}
+        conn.execute(text("DELETE FROM prices"))
+        again = incremental_starts(['A'], 'prices', conn, '2016-06-01', '2024-06-05', store=store, overlap_days=0)
+        assert again == {'A': pd.Timestamp('2024-06-04')}  # answered from the store, not the emptied table
+        refreshed = incremental_starts(['A'], 'prices', conn, '2016-06-01', '2024-06-05', store=store,
+                                       refresh=True)
+        assert refreshed == {'A': pd.Timestamp('2016-06-01')}
+
+
+def test_second_run_only_fetches_the_tail(tmp_path, store):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    provider = RecordingProvider(days=800, start='2022-01-03')
+    tickers = ['EURUSD=X', 'GBPUSD=X', 'USDJPY=X']
+    job = get_job('forex').with_options(table='fx_test', tickers=tickers, years=1, overlap_days=5, quality=None)
+    ctx = JobContext(engine=engine, provider=provider, store=store, queue=JobQueue(tmp_path / 'queue.sqlite'),
+                     max_workers=1, rate_per_host=None, log=quiet)
+    first = job.run(ctx, today=date(2024, 6, 3))
+    assert not first.failed and first.rows > 0
+    start, end = job.window(date(2024, 6, 3))
+    assert {s for _, s in provider.requests} == {pd.Timestamp(start)}  # a full backfill
+    marks = store.get('fx_test')
+
+    provider.requests.clear()
+    second = job.run(ctx, today=date(2024, 6, 10))
+    assert not second.failed
+    assert sorted(t for t, _ in provider.requests) == sorted(tickers)
+    for ticker, requested in provider.requests:
+        assert requested == marks[ticker] + pd.Timedelta(days=1 - job.overlap_days)
+    new_end = job.window(date(2024, 6, 10))[1]
+    with engine.connect() as conn:
+        last = pd.read_sql(text("SELECT ticker, MAX(date) AS last FROM fx_test GROUP BY ticker"), conn,
+                           parse_dates=['last']).set_index('ticker')['last']
+        duplicates = conn.execute(text("SELECT COUNT(*) - COUNT(DISTINCT date || ticker) FROM fx_test")).scalar()
+    assert duplicates == 0
+    for ticker, mark in store.get('fx_test').items():
+        assert last[ticker].normalize() == mark < pd.Timestamp(new_end)
+        assert mark > marks[ticker]
@@ -0,0 +1,154 @@
+"""``JobQueue`` states, backoff and dead-lettering, and a job resuming the run a crash interrupted."""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from finpipe.ingestion import HighWaterMarkStore
+from finpipe.jobs import JobContext, JobQueue, get_job
+from finpipe.synthetic import SyntheticProvider
+
+RANGE = (date(2020, 1, 1), date(2020, 2, 1))
+TICKERS = [f'T{i:02d}' for i in range(12)]
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+class Crash(BaseException):
+    """A kill: not an ``Exception``, so no retry or error handling catches it."""
+
+
+class FlakyProvider(SyntheticProvider):
+    """``SyntheticProvider`` that dies after ``crash_after`` requests and always fails the tickers of ``broken``."""
+
+    def __init__(self, crash_after=None, broken=(), **options):
+        super().__init__(days=400, **options)
+        self.crash_after = crash_after
+        self.broken = set(broken)
+
+    def history(self, ticker, start, end, timeout=None, **kwargs):
+        if self.crash_after is not None and len(self.calls) >= self.crash_after:
+            raise Crash()
+        if ticker in self.broken:
+            self._hit('history', ticker)
+            raise ValueError(f"no data for {ticker}")
+        return super().history(ticker, start, end, timeout=timeout, **kwargs)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(tmp_path / 'queue.sqlite', max_attempts=3, base_delay=10.0, max_delay=25.0)
+    yield queue
+    queue.close()
+
+
+def states(queue, pipeline):
+    return {task.ticker: task.state for task in queue.tasks(pipeline)}
+
+
+# --- states ---
+
+def test_tasks_move_from_pending_to_done(queue):
+    queue.enqueue('x', {'A': RANGE, 'B': (date(2020, 1, 15), date(2020, 2, 1))})
+    assert queue.interrupted('x') and not queue.interrupted('y')
+    claimed = queue.claim('x')
+    assert [(t.ticker, t.start, t.end, t.state) for t in claimed] == [
+        ('A', *RANGE, 'running'), ('B', date(2020, 1, 15), date(2020, 2, 1), 'running')]
+    assert len(queue.claim('x')) == 2  # running tasks are a crashed run's: due again
+    assert queue.complete('x', ['A', 'A']) == 1 and queue.complete('x', []) == 0
+    assert states(queue, 'x') == {'A': 'done', 'B': 'running'} and queue.interrupted('x')
+    queue.complete('x', ['B'])
+    assert not queue.interrupted('x')
+    assert queue.counts() == {'x': {'pending': 0, 'running': 0, 'done': 2, 'failed': 0, 'dead': 0}}
+
+
+def test_a_crashed_run_is_claimed_again_from_another_connection(queue, tmp_path):
+    queue.enqueue('x', {'A': RANGE, 'B': RANGE})
+    queue.claim('x')
+    queue.complete('x', ['A'])
+    later = JobQueue(tmp_path / 'queue.sqlite')  # the next process
+    assert later.interrupted('x') and [t.ticker for t in later.claim('x')] == ['B']
+    later.close()
+
+
+def test_a_new_run_replaces_finished_tasks_and_keeps_failed_ones(queue):
+    queue.enqueue('x', {'A': RANGE, 'B': RANGE})
+    queue.claim('x')
+    queue.complete('x', ['A'])
+    queue.fail('x', {'B': 'timeout'})
+    queue.enqueue('x', {'B': (date(2020, 1, 20), date(2020, 3, 1)), 'C': RANGE})
+    tasks = {t.ticker: t for t in queue.tasks('x')}
+    assert sorted(tasks) == ['B', 'C'] and tasks['C'].state == 'pending'
+    assert (tasks['B'].state, tasks['B'].attempts, tasks['B'].end) == ('failed', 1, date(2020, 3, 1))
+    assert queue.clear('x', ['pending']) == 1 and queue.clear('x') == 1 and queue.counts() == {}
+
+
+# --- backoff and dead-lettering ---
+
+def test_backoff_doubles_up_to_its_cap(queue):
+    assert [queue.backoff(n) for n in range(5)] == [10.0, 10.0, 20.0, 25.0, 25.0]
+
+
+def test_failed_tasks_wait_for_their_backoff_then_go_dead(queue):
+    queue.enqueue('x', {'A': RANGE, 'B': RANGE})
+    queue.claim('x')
+    queue.complete('x', ['B'])
+    assert queue.fail('x', {'A': ValueError('boom')}) == {'A': 'failed'}
+    [task] = queue.tasks('x', ['failed'])
+    assert task.attempts == 1 and task.last_error == 'boom'
+    assert queue.claim('x', now=task.not_before - 1) == []
+    assert [t.ticker for t in queue.claim('x', now=task.not_before)] == ['A']
+    assert queue.fail('x', {'A': 'boom'}) == {'A': 'failed'}
+    [task] = queue.tasks('x', ['failed'])
+    assert task.not_before - task.updated_at == pytest.approx(20.0)
+    queue.claim('x', now=task.not_before)
+    assert queue.fail('x', {'A': 'still broken'}) == {'A': 'dead'}
+    assert queue.claim('x', now=task.not_before + 1e6) == []  # dead tasks are never claimed
+    [dead] = queue.tasks('x', ['dead'])
+    assert dead.attempts == 3 and dead.last_error == 'still broken'
+
+    assert queue.retry('x') == 1
+    [task] = queue.tasks('x', ['pending'])
+    assert task.attempts == 0 and [t.ticker for t in queue.claim('x')] == ['A']
+    assert queue.fail('x', {}) == {} and queue.retry('x') == 0
+
+
+# --- a job ---
+
+def test_a_job_resumes_the_tickers_a_crash_left_unwritten(tmp_path, queue):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    store = HighWaterMarkStore(tmp_path / 'marks.json')
+    job = get_job('forex').with_options(table='px', tickers=TICKERS, quality=None, commit_every=4)
+
+    def run(provider, job=job):
+        ctx = JobContext(engine=engine, provider=provider, store=store, queue=queue, max_workers=1,
+                         rate_per_host=None, log=quiet)
+        return job.run(ctx, today=date(2020, 6, 1))
+
+    with pytest.raises(Crash):
+        run(FlakyProvider(crash_after=6, broken=['T09']))
+    done = [t.ticker for t in queue.tasks('forex', ['done'])]
+    assert done == TICKERS[:4] and queue.counts('forex')['forex']['running'] == 8  # one committed chunk
+
+    provider = FlakyProvider(broken=['T09'])
+    result = run(provider)
+    assert result.failed == ['T09'] and {t for _, t in provider.calls} == set(TICKERS[4:])
+    assert states(queue, 'forex') == {t: 'failed' if t == 'T09' else 'done' for t in TICKERS}
+    with engine.connect() as conn:
+        stored = dict(conn.execute(text("SELECT ticker, COUNT(*) FROM px GROUP BY ticker")).fetchall())
+    assert sorted(stored) == [t for t in TICKERS if t != 'T09'] and len(set(stored.values())) == 1
+
+    again = FlakyProvider()
+    assert not run(again).failed and ('history', 'T09') not in again.calls  # still backing off
+    queue.retry('forex')
+    assert not run(again).failed and ('history', 'T09') in again.calls
+    assert set(states(queue, 'forex').values()) == {'done'}
+
+    queue.enqueue('forex', {'T00': RANGE})
+    queue.claim('forex')
+    fresh = FlakyProvider()
+    run(fresh, job.with_options(resume=False))  # starts over instead of finishing the open task
+    assert {t for _, t in fresh.calls} == set(TICKERS)
+    engine.dispose()
@@ -0,0 +1,82 @@
+"""``ModelSearch`` against ``GridSearchCV`` and its successive-halving rounds against the full grid."""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from finpipe.credit import RISK_FEATURES
+from finpipe.modeling import ALPHAS, Candidate, ModelSearch, risk_candidates, risk_preprocess
+
+pytest.importorskip('sklearn')
+
+DATA = Path(__file__).resolve().parents[1] / 'Analytics' / 'Probability_Of_Default' / 'model_data.csv'
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+@pytest.fixture(scope='module')
+def data():
+    df = pd.read_csv(DATA)
+    return df[RISK_FEATURES], df['RiskScore']
+
+
+@pytest.fixture(scope='module')
+def cache_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp('model_search')
+
+
+@pytest.fixture(scope='module')
+def full(data, cache_dir):
+    return ModelSearch(risk_candidates(), risk_preprocess(), cv=5, n_jobs=1, cache_dir=cache_dir, refit=False,
+                       log=quiet).fit(*data)
+
+
+def key(row):
+    return row['candidate'], tuple(sorted(row['params'].items()))
+
+
+def test_grid_scores_equal_gridsearchcv(data, full):
+    from sklearn.linear_model import Ridge
+    from sklearn.model_selection import GridSearchCV, KFold
+    from sklearn.pipeline import Pipeline
+    grid = GridSearchCV(Pipeline([('preprocess', risk_preprocess()), ('model', Ridge())]),
+                        {'model__alpha': ALPHAS, 'model__fit_intercept': [True, False]},
+                        cv=KFold(5, shuffle=True, random_state=0), scoring='neg_mean_squared_error').fit(*data)
+    ridge = full.results_[full.results_['candidate'] == 'ridge']
+    ours = {tuple(sorted(p.items())): s for p, s in zip(ridge['params'], ridge['mean_score'])}
+    for params, score in zip(grid.cv_results_['params'], grid.cv_results_['mean_test_score']):
+        theirs = tuple(sorted((name.replace('model__', ''), value) for name, value in params.items()))
+        assert ours[theirs] == pytest.approx(score, rel=1e-9)
+    assert len(full.results_) == 1 + 2 * 2 * len(ALPHAS) and (full.results_['round'] == 0).all()
+
+
+def test_halving_keeps_the_full_grid_winner(data, cache_dir, full):
+    messages = []
+    halving = ModelSearch(risk_candidates(), risk_preprocess(), cv=5, n_jobs=1, cache_dir=cache_dir, halving=True,
+                          factor=3, min_samples=300, refit=True, log=messages.append).fit(*data)
+    assert 'Preprocessed 5 folds (0 built, 5 cached)' in messages[0]  # the full grid's fold arrays are reused
+    results = halving.results_
+    sizes = results.groupby('round')['n_samples'].first().tolist()
+    assert len(sizes) > 1 and sizes == sorted(sizes) and sizes[-1] == full.results_['n_samples'].iloc[0]
+    counts = results.groupby('round').size().tolist()
+    assert counts[0] == len(full.results_)
+    assert all(later == -(-earlier // 3) for earlier, later in zip(counts, counts[1:]))  # the best third survives
+    survivors = results[results['round'] == results['round'].max()]
+    exact = {key(row): row['mean_score'] for _, row in full.results_.iterrows()}
+    for _, row in survivors.iterrows():  # the last round trains on the full folds: same scores as the grid
+        assert row['mean_score'] == pytest.approx(exact[key(row)], rel=1e-9)
+    assert halving.best_['score'] == pytest.approx(full.best_['score'], rel=1e-9)
+
+    model = halving.best_estimator_.named_steps['model']
+    assert {name: model.get_params()[name] for name in halving.best_['params']} == halving.best_['params']
+    assert halving.best_estimator_.predict(data[0]).shape == data[1].shape
+
+
+def test_schedule_grows_by_factor_to_the_full_fold():
+    search = ModelSearch([Candidate('c', None)], halving=True, factor=3, min_samples=100, log=quiet)
+    assert search._schedule(27, 8_100) == [300, 900, 2_700, 8_100]
+    assert search._schedule(5, 8_100) == [900, 2_700, 8_100]
+    assert search._schedule(27, 250) == [250]  # too few rows to halve
+    assert ModelSearch([], halving=False)._schedule(27, 8_100) == [8_100]
@@ -0,0 +1,77 @@
+"""``MonteCarlo`` reproducibility across workers, early stop, and the stress models against closed forms."""
+import math
+
+import numpy as np
+import pytest
+
+from finpipe.risk import (Bootstrap, CorrelatedGBM, FundingStress, MonteCarlo, PortfolioStress, price_matrix,
+                          simple_returns, tail_estimates)
+from finpipe.synthetic import synthetic_funding, synthetic_ohlcv
+
+
+@pytest.fixture(scope='module')
+def returns():
+    return simple_returns(price_matrix(synthetic_ohlcv(['BZ=F', 'GC=F', 'TLT', 'IEF'], 600, seed=7)))
+
+
+@pytest.fixture(scope='module')
+def models(returns):
+    holdings = {'GC=F': 1e6, 'TLT': 2e6, 'IEF': 1e6}
+    return {'gbm': PortfolioStress(CorrelatedGBM.from_returns(returns, 10), holdings, shocks={'TLT': -0.1}),
+            'bootstrap': PortfolioStress(Bootstrap(returns, 10, 5), holdings),
+            'funding': FundingStress.from_frame(synthetic_funding(2_000, seed=3), shock=0.5, horizon_days=60)}
+
+
+@pytest.mark.parametrize('name', ['gbm', 'bootstrap', 'funding'])
+def test_seeded_runs_are_identical_for_any_worker_count(models, name):
+    options = dict(n_paths=40_000, chunk=5_000, check_every=10_000, seed=11, log=None)
+    serial = MonteCarlo(models[name], n_jobs=1, **options).run()
+    parallel = MonteCarlo(models[name], n_jobs=2, **options).run()
+    assert serial.paths == 40_000 and np.array_equal(serial.losses, parallel.losses)
+    assert serial.estimates == parallel.estimates
+    other = MonteCarlo(models[name], n_jobs=1, **{**options, 'seed': 12}).run()
+    assert not np.array_equal(serial.losses, other.losses)
+
+
+def test_early_stop_keeps_the_seeded_prefix(models):
+    full = MonteCarlo(models['gbm'], n_paths=400_000, chunk=20_000, check_every=40_000, n_jobs=1, log=None).run()
+    stopped = MonteCarlo(models['gbm'], n_paths=400_000, chunk=20_000, check_every=40_000, min_paths=40_000,
+                         tol=0.05, n_jobs=1, log=None).run()
+    assert stopped.converged and stopped.paths < full.paths and not full.converged
+    assert np.array_equal(stopped.losses, full.losses[:stopped.paths])
+    for v, _, low, high in stopped.estimates.values():
+        assert high - low <= 0.05 * abs(v)
+
+
+def test_tail_estimates_equal_the_sorted_sample():
+    losses = np.random.default_rng(0).standard_normal(10_001)
+    ordered = np.sort(losses)
+    for level, (var, es, low, high) in tail_estimates(losses, (0.95, 0.99)).items():
+        k = math.ceil(level * len(losses)) - 1
+        assert var == ordered[k] and es == pytest.approx(ordered[k:].mean(), rel=1e-12)
+        assert low <= var <= high
+
+
+def test_single_asset_gbm_var_matches_the_lognormal_quantile():
+    stats = pytest.importorskip('scipy.stats')
+    model = PortfolioStress(CorrelatedGBM([0.0], [[1e-4]], horizon=4), {0: 1.0})
+    result = MonteCarlo(model, n_paths=400_000, chunk=100_000, n_jobs=1, log=None).run()
+    for level, (var, _, _, _) in result.estimates.items():
+        assert var == pytest.approx(1 - math.exp(stats.norm.ppf(1 - level) * 0.02), rel=0.02)
+
+
+@pytest.mark.parametrize('kappa', [0.0, 0.5])
+def test_funding_stress_without_volatility_is_the_decayed_shock_on_the_rolled_amount(kappa):
+    deals = synthetic_funding(3_000, seed=5)
+    model = FundingStress.from_frame(deals, shock=0.5, spread_vol=0.0, kappa=kappa)
+    rolled = deals[deals['days_to_maturity'] < 365]
+    days = rolled['days_to_maturity']
+    expected = (0.5 * np.exp(-kappa * days / 365) * 0.01 * rolled['funding_amount']
+                * rolled['refinancing_needed'].astype(float) * (365 - days) / 365).sum()
+    assert model.deals_rolled == len(rolled)
+    np.testing.assert_allclose(model.losses(np.random.default_rng(0), 3), expected, rtol=1e-9)
+
+
+def test_holdings_without_history_are_rejected(returns):
+    with pytest.raises(KeyError, match='ZZZ'):
+        PortfolioStress(CorrelatedGBM.from_returns(returns), {'ZZZ': 1.0})
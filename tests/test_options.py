@@ -0,0 +1,133 @@
+"""Black-Scholes prices, Greeks and implied volatilities, ``analyse_chain`` and ``IVSurface`` interpolation."""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finpipe.options import IVSurface, analyse_chain, bs_greeks, bs_price, implied_vol
+from finpipe.synthetic import synthetic_option_chains
+
+STRIKES = np.array([80.0, 90.0, 100.0, 110.0, 120.0])
+SMILE = {0.1: np.array([0.32, 0.27, 0.24, 0.25, 0.28]), 0.4: np.array([0.30, 0.26, 0.22, 0.23, 0.25])}
+
+
+def surface_frame(itm_iv=9.9, rate=0.0):
+    """Both sides of two expiries of ``X`` (spot 100); in-the-money quotes carry ``itm_iv``."""
+    rows = []
+    for T, ivs in SMILE.items():
+        forward = 100.0 * math.exp(rate * T)
+        for strike, iv in zip(STRIKES, ivs):
+            for kind in ('call', 'put'):
+                otm = strike >= forward if kind == 'call' else strike < forward
+                rows.append({'underlying': 'X', 'type': kind, 'strike': strike, 'spot': 100.0, 'T': T,
+                             'iv': iv if otm else itm_iv})
+    return pd.DataFrame(rows)
+
+
+def total_variance_iv(T, ivs_by_expiry):
+    (t0, v0), (t1, v1) = ivs_by_expiry
+    w = v0 * v0 * t0 + (T - t0) / (t1 - t0) * (v1 * v1 * t1 - v0 * v0 * t0)
+    return math.sqrt(w / T)
+
+
+# --- prices, Greeks, implied volatility ---
+
+def test_implied_vol_round_trips_every_row():
+    rng = np.random.default_rng(1)
+    n = 5_000
+    sigma = rng.uniform(0.03, 3.0, n)
+    is_call = rng.random(n) < 0.5
+    S, K, T = 100.0, rng.uniform(40, 200, n), rng.uniform(1 / 365, 3.0, n)
+    price = bs_price(is_call, S, K, T, 0.03, sigma, 0.01)
+    solved = implied_vol(price, is_call, S, K, T, 0.03, 0.01)
+    bumped = bs_price(is_call, S, K, T, 0.03, sigma * 1.01, 0.01)
+    # far from the money the price is ~0 or hardly depends on sigma: any sigma in a wide range fits it
+    informative = (price > 1e-6) & (np.abs(bumped - price) > 1e-6 * price)
+    assert informative.mean() > 0.9
+    repriced = bs_price(is_call, S, K, T, 0.03, solved, 0.01)
+    np.testing.assert_allclose(repriced[informative], price[informative], rtol=1e-8)  # the solver's tolerance
+    np.testing.assert_allclose(solved[informative], sigma[informative], rtol=1e-4)
+
+
+def test_implied_vol_is_nan_outside_the_no_arbitrage_bounds():
+    is_call = np.array([True, False, True, True, True])
+    price = np.array([0.0, 5.0, 100.0, 4.0, 4.0])  # below intrinsic, below intrinsic, above spot, T=0, K=0
+    K = np.array([90.0, 120.0, 100.0, 100.0, 0.0])
+    T = np.array([0.5, 0.5, 0.5, 0.0, 0.5])
+    assert np.isnan(implied_vol(price, is_call, 100.0, K, T)).all()
+    assert implied_vol(np.array([[4.0]]), True, 100.0, 100.0, 0.1).shape == (1, 1)
+
+
+@pytest.mark.parametrize('is_call', [True, False])
+def test_greeks_equal_finite_differences(is_call):
+    S, K, T, r, q, sigma, h = 100.0, np.array([80.0, 100.0, 120.0]), 0.3, 0.03, 0.01, 0.25, 1e-4
+    greeks = bs_greeks(is_call, S, K, T, r, sigma, q)
+
+    def price(S=S, T=T, sigma=sigma):
+        return bs_price(is_call, S, K, T, r, sigma, q)
+
+    np.testing.assert_allclose(greeks['delta'], (price(S=S + h) - price(S=S - h)) / (2 * h), atol=1e-7)
+    np.testing.assert_allclose(greeks['gamma'], (price(S=S + h) - 2 * price() + price(S=S - h)) / h ** 2, atol=1e-4)
+    np.testing.assert_allclose(greeks['vega'], (price(sigma=sigma + h) - price(sigma=sigma - h)) / (2 * h) / 100,
+                               atol=1e-7)
+    np.testing.assert_allclose(greeks['theta'], -(price(T=T + h) - price(T=T - h)) / (2 * h) / 365, atol=1e-7)
+
+
+def test_put_call_parity():
+    K, T, r, q = np.linspace(60, 140, 9), 0.5, 0.02, 0.01
+    call, put = bs_price(True, 100.0, K, T, r, 0.3, q), bs_price(False, 100.0, K, T, r, 0.3, q)
+    np.testing.assert_allclose(call - put, 100.0 * math.exp(-q * T) - K * math.exp(-r * T), atol=1e-10)
+
+
+# --- analyse_chain ---
+
+def test_analyse_chain_recovers_spots_and_prices_the_mid():
+    chains, spots = synthetic_option_chains(['AAA', 'BBB', 'CCC'], expiries=3, strikes=21, seed=4)
+    implied = analyse_chain(chains)
+    np.testing.assert_allclose(implied.groupby('underlying')['spot'].first(), spots.sort_index(), rtol=2e-3)
+    given = analyse_chain(chains, spots=spots)
+    near = given[(given['strike'] / given['spot'] - 1).abs() <= 0.1]
+    assert near['iv'].notna().all()  # the cent-rounded quotes far from the money may not invert
+    solved = given.dropna(subset=['iv'])
+    repriced = bs_price((solved['type'] == 'call').to_numpy(), solved['spot'].to_numpy(), solved['strike'].to_numpy(),
+                        solved['T'].to_numpy(), 0.0, solved['iv'].to_numpy())
+    np.testing.assert_allclose(repriced, solved['mid'], rtol=1e-6, atol=1e-9)
+
+
+# --- IVSurface ---
+
+def test_surface_returns_the_quotes_and_ignores_in_the_money_rows():
+    surface = IVSurface(surface_frame())
+    assert surface.underlyings() == ['X']
+    for T, ivs in SMILE.items():
+        np.testing.assert_allclose(surface.iv('X', T, STRIKES), ivs, rtol=1e-12)
+    assert surface._prepare('X') is surface._prepare('X')  # the sorted slices are built once
+
+
+def test_surface_interpolates_in_moneyness_and_total_variance():
+    surface = IVSurface(surface_frame())
+    low, high = SMILE[0.1][1], SMILE[0.1][2]
+    weight = (math.log(0.95) - math.log(0.9)) / -math.log(0.9)
+    assert surface.iv('X', 0.1, 95.0) == pytest.approx(low + weight * (high - low), rel=1e-12)
+    assert surface.iv('X', 0.1, 50.0) == pytest.approx(SMILE[0.1][0], rel=1e-12)  # flat beyond the strikes
+    assert surface.iv('X', 0.1, 300.0) == pytest.approx(SMILE[0.1][-1], rel=1e-12)
+    expected = total_variance_iv(0.25, [(0.1, SMILE[0.1][2]), (0.4, SMILE[0.4][2])])
+    assert surface.iv('X', 0.25, 100.0) == pytest.approx(expected, rel=1e-12)
+    assert surface.iv('X', 0.02, 110.0) == pytest.approx(SMILE[0.1][3], rel=1e-12)  # flat vol outside the expiries
+    assert surface.iv('X', 2.0, 110.0) == pytest.approx(SMILE[0.4][3], rel=1e-12)
+    grid = surface.grid('X', [0.1, 0.25, 0.4], moneyness=[0.9, 1.0, 1.1])
+    assert grid.shape == (3, 3) and grid.loc[0.25, 1.0] == pytest.approx(expected, rel=1e-12)
+
+
+def test_surface_measures_moneyness_from_the_forward():
+    frame = surface_frame(rate=0.05)  # the forward is above 100: the 100 strike is quoted from the put
+    surface = IVSurface(frame, rate=0.05)
+    for T, ivs in SMILE.items():
+        np.testing.assert_allclose(surface.iv('X', T, STRIKES), ivs, rtol=1e-12)
+    assert IVSurface(frame).iv('X', 0.1, 100.0) == pytest.approx(9.9)  # measured from the spot: the ITM call
+
+
+def test_surface_without_usable_quotes_raises():
+    with pytest.raises(ValueError, match='no usable'):
+        IVSurface(surface_frame().assign(iv=np.nan)).iv('X', 0.1, 100.0)
@@ -0,0 +1,124 @@
+"""``ParquetCache`` loads against the database after every kind of change the price jobs make."""
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from finpipe.adjustments import load_adjusted, update_adjustments
+from finpipe.schema import bump_generation, migrate
+from finpipe.storage import ParquetCache, upsert_frame
+from finpipe.storage.parquet_cache import ASSET_CLASSES
+from finpipe.synthetic import synthetic_ohlcv
+
+pytest.importorskip('pyarrow')
+
+TICKERS = ['AAA', 'BBB', "O'X", 'NA']  # a quote and a ticker that reads as NULL in CSV
+
+
+@pytest.fixture
+def bars():
+    df = synthetic_ohlcv(TICKERS, days=120, seed=9)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+@pytest.fixture
+def dates(bars):
+    return sorted(bars['date'].unique())
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    migrate(engine, 'px', 'ohlcv', log=None)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def cache(engine, tmp_path):
+    return ParquetCache(engine, root=tmp_path / 'cache', log=None)
+
+
+def write(engine, df):
+    upsert_frame(engine, df, 'px', on_conflict='update')
+
+
+def database(engine):
+    with engine.connect() as conn:
+        return pd.read_sql(text("SELECT * FROM px ORDER BY ticker, date"), conn, parse_dates=['date'])
+
+
+def assert_matches_database(cache, engine):
+    cached = cache.load('px', adjusted=False, compact=False)
+    stored = database(engine)
+    assert list(cached['ticker']) == list(stored['ticker'])
+    assert (cached['date'].to_numpy() == stored['date'].to_numpy()).all()
+    for column in ['open', 'high', 'low', 'close', 'volume']:
+        np.testing.assert_allclose(cached[column].to_numpy(float), stored[column].to_numpy(float), rtol=1e-12)
+
+
+def test_round_trip_and_warm_load(cache, engine, bars, dates):
+    write(engine, bars)
+    assert_matches_database(cache, engine)
+    assert cache.timings['fetched_rows'] == len(bars)
+    assert_matches_database(cache, engine)
+    assert cache.timings['fetched_rows'] == 0  # nothing moved: answered from Parquet
+    some = cache.load('px', tickers=["O'X"], start=dates[10], end=dates[19], columns=['date', 'ticker', 'close'],
+                      refresh=False)
+    assert list(some.columns) == ['date', 'ticker', 'close'] and len(some) == 10
+
+
+def test_new_bars_fetch_only_the_tail(cache, engine, bars, dates):
+    write(engine, bars[bars['date'] <= dates[100]])
+    cache.load('px')
+    write(engine, bars[bars['date'] > dates[100]])
+    assert_matches_database(cache, engine)
+    overlap = sum(day > dates[100] - cache.overlap for day in dates[:101])
+    assert cache.timings['fetched_rows'] == len(TICKERS) * (overlap + len(dates) - 101)
+
+
+def test_revised_overlap_and_deleted_history_are_picked_up(cache, engine, bars, dates):
+    write(engine, bars[bars['date'] <= dates[-4]])
+    cache.load('px')
+    # the next run re-upserts its overlap with revised bars next to the new ones
+    write(engine, bars[bars['date'] >= dates[-6]].assign(close=lambda d: d['close'] * 1.1))
+    with engine.begin() as conn:  # and a row far behind the overlap disappears
+        conn.execute(text("DELETE FROM px WHERE ticker = 'BBB' AND date = :day"), {'day': dates[5].date()})
+    assert_matches_database(cache, engine)
+
+
+def test_generation_bump_and_invalidate_refetch(cache, engine, bars):
+    write(engine, bars)
+    cache.load('px')
+    write(engine, bars.assign(close=bars['close'] * 0.5))  # rewritten in place: same marks and counts
+    bump_generation(engine, 'px')
+    assert_matches_database(cache, engine)
+    assert cache.timings['fetched_rows'] == len(bars)
+
+    cache.invalidate('px', tickers=['AAA'])
+    assert 'AAA' not in cache.marks('px')
+    assert_matches_database(cache, engine)
+    assert cache.timings['fetched_rows'] == (bars['ticker'] == 'AAA').sum()
+    cache.invalidate('px')
+    assert not cache.path('px').exists()
+
+
+def test_new_split_adjusts_cached_bars_without_refetching(cache, engine, bars, dates):
+    write(engine, bars)
+    cache.load('px')
+    split = pd.DataFrame({'ticker': ['BBB'], 'date': [dates[60].date()], 'dividend': [0.0], 'split': [2.0]})
+    update_adjustments(engine, split, 'px', log=None)
+    adjusted = cache.load('px', compact=False)
+    assert cache.timings['fetched_rows'] == 0
+    expected = load_adjusted(engine, 'px')
+    np.testing.assert_allclose(adjusted['close'].to_numpy(float), expected['close'].to_numpy(float), rtol=1e-12)
+    before = (adjusted['ticker'] == 'BBB') & (adjusted['date'] < dates[60])
+    raw = cache.load('px', adjusted=False, compact=False)
+    np.testing.assert_allclose(adjusted.loc[before, 'close'], raw.loc[before, 'close'] / 2, rtol=1e-12)
+
+
+def test_every_price_job_table_has_an_asset_class():
+    from finpipe.jobs import JOBS
+    tables = {job.table for job in JOBS.values() if job.kind == 'prices'}
+    assert tables <= set(ASSET_CLASSES)
@@ -0,0 +1,75 @@
+"""``PDModel``'s folded scorer against the sklearn pipelines, persistence, ``score_file`` and the script."""
+import runpy
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finpipe.credit import PDModel, SCORE_COLUMNS, score_file
+from finpipe.synthetic import synthetic_loans
+
+pytest.importorskip('sklearn')
+
+HERE = Path(__file__).resolve().parents[1] / 'Analytics' / 'Probability_Of_Default'
+
+
+@pytest.fixture(scope='module')
+def model():
+    return PDModel.fit(pd.read_csv(HERE / 'model_data.csv'))
+
+
+@pytest.fixture(scope='module')
+def loans():
+    return synthetic_loans(30_000, seed=2)
+
+
+def assert_same_scores(actual, expected):
+    np.testing.assert_allclose(actual['ProbabilityOfDefault'], expected['ProbabilityOfDefault'], rtol=1e-9,
+                               atol=1e-12)
+    np.testing.assert_allclose(actual['PredictedRiskScore'], expected['PredictedRiskScore'], rtol=1e-9)
+
+
+def test_folded_scores_equal_the_pipelines(model, loans):
+    sample = pd.read_csv(HERE / 'LoanDataRiskAnalysis.csv')
+    for frame in (sample, loans):
+        folded = model.score(frame)
+        assert list(folded.columns) == SCORE_COLUMNS and folded.index.equals(frame.index)
+        assert_same_scores(folded, model.score(frame, exact=True))
+
+
+def test_unknown_category_scores_like_the_encoder(model, loans):
+    odd = loans.head(200).assign(EmploymentStatus=['Retired', 'Employed'] * 100)
+    assert_same_scores(model.score(odd), model.score(odd, exact=True))
+
+
+def test_save_and_load_round_trip(model, loans, tmp_path):
+    path = model.save(tmp_path / 'models' / 'pd.joblib')
+    assert path.with_suffix('.json').exists()
+    loaded = PDModel.load(path)
+    assert loaded.threshold == model.threshold and loaded.info == model.info
+    pd.testing.assert_frame_equal(loaded.score(loans), model.score(loans))
+
+
+@pytest.mark.parametrize('src, dst', [('loans.csv', 'scores.parquet'), ('loans.parquet', 'scores.csv')])
+def test_score_file_streams_every_row(model, loans, tmp_path, src, dst):
+    pytest.importorskip('pyarrow')
+    (loans.to_csv if src.endswith('.csv') else loans.to_parquet)(tmp_path / src, index=False)
+    rows, _ = score_file(model, tmp_path / src, tmp_path / dst, chunksize=4_000, keep=['LoanId'], log=None)
+    assert rows == len(loans)
+    out = (pd.read_csv if dst.endswith('.csv') else pd.read_parquet)(tmp_path / dst)
+    assert list(out.columns) == ['LoanId', *SCORE_COLUMNS]
+    assert (out['LoanId'].to_numpy() == loans['LoanId'].to_numpy()).all()
+    assert_same_scores(out, model.score(loans))
+
+
+def test_script_fits_and_scores_only_when_run(loans, tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv('FINPIPE_STATE_DIR', str(tmp_path / 'state'))  # the --model default lives there
+    script = runpy.run_path(str(HERE / 'score_loans.py'))  # importing parses no arguments
+    model_path = tmp_path / 'pd.joblib'
+    script['main'](['--model', str(model_path), 'fit'])
+    loans.head(1_000).to_csv(tmp_path / 'loans.csv', index=False)
+    script['main'](['--model', str(model_path), 'score', str(tmp_path / 'loans.csv'), str(tmp_path / 'out.csv'),
+                    '--keep', 'LoanId'])
+    assert 'Model saved' in capsys.readouterr().out
+    assert len(pd.read_csv(tmp_path / 'out.csv')) == 1_000
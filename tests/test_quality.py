@@ -0,0 +1,182 @@
+"""Quality rules on injected bad bars, validation after stored history, and the quarantine table through a job."""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from finpipe.ingestion import HighWaterMarkStore
+from finpipe.jobs import JobContext, JobQueue, get_job
+from finpipe.quality import (BITS, QualityRules, RULESETS, ValidatedStream, flag_rows, get_rules, purge_quarantined,
+                             validate_ohlcv, write_quarantine)
+from finpipe.schema import migrate
+from finpipe.storage import upsert_frame
+from finpipe.synthetic import SyntheticProvider, synthetic_ohlcv
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+class CorruptProvider(SyntheticProvider):
+    """``SyntheticProvider`` whose bars on ``(ticker, day)`` in ``bad`` are overwritten with the given fields."""
+
+    def __init__(self, bad, **options):
+        super().__init__(**options)
+        self.bad = bad
+
+    def _history(self, ticker, start, end):
+        df = super()._history(ticker, start, end).copy()
+        for (name, day), fields in self.bad.items():
+            hit = df.index.tz_localize(None).normalize() == pd.Timestamp(day)
+            if name == ticker and hit.any():
+                df.loc[hit, list(fields)] = list(fields.values())
+        return df
+
+
+@pytest.fixture(scope='module')
+def bars():
+    return synthetic_ohlcv(['AAA', 'BBB', 'CCC'], days=300, seed=2)
+
+
+def row(bars, ticker, i):
+    """Index label of the ``i``-th bar of ``ticker``."""
+    return bars.index[bars['ticker'] == ticker][i]
+
+
+# --- rules ---
+
+def test_clean_bars_pass_every_ruleset(bars):
+    for name in RULESETS:
+        report = validate_ohlcv(bars, name)
+        assert report.quarantined.empty and len(report.clean) == len(bars) and report.counts == {}
+
+
+def test_each_rule_flags_its_bar(bars):
+    bad = bars.copy()
+    expected = {}
+
+    def hit(ticker, i, rule, **fields):
+        label = row(bad, ticker, i)
+        for column, value in fields.items():
+            bad.loc[label, column] = value(bad.loc[label]) if callable(value) else value
+        expected.setdefault(label, set()).add(rule)
+
+    hit('AAA', 50, 'missing', close=np.nan)
+    hit('AAA', 80, 'invalid', open=-1.0)
+    hit('AAA', 120, 'ohlc', low=6000.0)  # the notebook's low > 5000 print
+    hit('BBB', 60, 'spike', close=lambda r: r['close'] * 5, high=lambda r: r['close'] * 5)
+    hit('BBB', 150, 'gap', open=lambda r: r['open'] * 3, high=lambda r: r['open'] * 3)
+    for i in range(200, 206):
+        hit('CCC', i, 'zero_volume', volume=0.0)
+    for i in range(100, 106):
+        hit('BBB', i, 'stale', close=lambda r, v=bad.loc[row(bad, 'BBB', 99), 'close']: v,
+            open=lambda r, v=bad.loc[row(bad, 'BBB', 99), 'close']: v,
+            high=lambda r: max(r['high'], r['close']), low=lambda r: min(r['low'], r['close']))
+
+    report = validate_ohlcv(bad, 'equity')
+    flagged = {label: set(rules.split(',')) for label, rules in report.quarantined['rules'].items()}
+    for label, rules in expected.items():
+        assert rules <= flagged[label], (label, flagged.get(label))
+    assert set(flagged) == set(expected)  # not the bar after the spike, nor the last fresh close before the run
+    assert list(report.clean.index) == [label for label in bad.index if label not in flagged]
+
+
+def test_a_split_is_not_a_spike(bars):
+    split = bars.copy()
+    later = (split['ticker'] == 'AAA') & (split.index >= row(split, 'AAA', 150))
+    split.loc[later, ['open', 'high', 'low', 'close']] /= 2
+    assert validate_ohlcv(split).quarantined.empty
+
+
+def test_flags_do_not_depend_on_row_order(bars):
+    bad = bars.copy()
+    bad.loc[row(bad, 'BBB', 60), ['close', 'high']] *= 5
+    shuffled = bad.sample(frac=1, random_state=0)
+    flags = pd.Series(flag_rows(shuffled, RULESETS['equity']), index=shuffled.index)
+    assert (flags.reindex(bad.index).to_numpy() == flag_rows(bad, RULESETS['equity'])).all()
+    assert list(validate_ohlcv(shuffled).clean.index) == [i for i in shuffled.index if flags[i] == 0]
+
+
+def test_calendar_gaps_are_counted_not_quarantined(bars):
+    gapped = bars.drop(index=[row(bars, 'AAA', i) for i in range(100, 110)])
+    report = validate_ohlcv(gapped)
+    assert report.counts == {'calendar_gap': 1} and report.quarantined.empty
+    strict = QualityRules(quarantine=['calendar_gap'])
+    assert len(validate_ohlcv(gapped, strict).quarantined) == 1
+
+
+def test_rulesets_switch_rules_off(bars):
+    silent = bars.copy()
+    silent.loc[silent['ticker'] == 'CCC', 'volume'] = 0.0
+    assert validate_ohlcv(silent, 'forex').quarantined.empty
+    assert validate_ohlcv(silent, 'equity').counts == {'zero_volume': (silent['ticker'] == 'CCC').sum()}
+    with pytest.raises(KeyError, match='Unknown quality ruleset'):
+        get_rules('crypto')
+
+
+def test_short_frames_are_judged_after_their_history(bars):
+    bad = bars.copy()
+    bad.loc[row(bad, 'BBB', 290), ['close', 'high']] = [bad.loc[row(bad, 'BBB', 290), 'close'] * 1.6] * 2
+    rules = QualityRules()
+    cut = bad['date'] >= bad.loc[row(bad, 'BBB', 288), 'date']
+    tail, stored = bad[cut], bad[~cut]
+    history = stored.groupby('ticker').tail(rules.seed_bars)
+    full = flag_rows(bad, rules)[cut.to_numpy()]
+    report = validate_ohlcv(tail, rules, history=history)
+    assert list(report.quarantined.index) == list(tail.index[full != 0])
+    assert (full & BITS['spike']).any()
+    overlapping = pd.concat([history, tail])  # stored bars the frame downloads again are not context twice
+    assert validate_ohlcv(tail, rules, history=overlapping).quarantined.index.equals(report.quarantined.index)
+
+
+# --- quarantine ---
+
+def test_validated_stream_yields_clean_rows_and_drains_rejects(bars):
+    bad = bars.copy()
+    bad.loc[row(bad, 'AAA', 10), 'low'] = 6000.0
+    stream = ValidatedStream((g for _, g in bad.groupby('ticker')), 'equity', log=quiet)
+    clean = pd.concat(list(stream))
+    assert len(clean) == len(bad) - 1 and stream.counts['ohlc'] == 1
+    assert list(stream.drain()['rules']) == ['ohlc'] and stream.drain().empty
+    assert len(stream.quarantined) == 1
+
+
+def test_quarantine_upserts_and_purges(tmp_path, bars):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    migrate(engine, 'px', 'ohlcv', log=None)
+    upsert_frame(engine, bars, 'px')
+    bad = bars.head(3).assign(rules='ohlc')
+    assert write_quarantine(engine, bad, 'px') == 3
+    assert write_quarantine(engine, bad.assign(rules='spike'), 'px') == 3
+    with engine.connect() as conn:
+        stored = pd.read_sql(text("SELECT source_table, ticker, rules FROM data_quarantine"), conn)
+    assert len(stored) == 3 and set(stored['rules']) == {'spike'} and set(stored['source_table']) == {'px'}
+    assert purge_quarantined(engine, bad, 'px') == 3
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM px")).scalar() == len(bars) - 3
+
+
+def test_a_job_moves_a_bad_bar_loaded_earlier_into_quarantine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    bad_day = date(2024, 5, 29)
+    provider = CorruptProvider({('GC=F', bad_day): {'Low': 6000.0}}, days=800, start='2022-01-03')
+    ctx = JobContext(engine=engine, provider=provider, store=HighWaterMarkStore(tmp_path / 'marks.json'),
+                     queue=JobQueue(tmp_path / 'queue.sqlite'), max_workers=1, rate_per_host=None, log=quiet)
+    job = get_job('commodities').with_options(table='cmd', tickers=['GC=F', 'SI=F'], years=1)
+    loaded = job.with_options(quality=None).run(ctx, today=date(2024, 6, 3))
+    assert not loaded.failed and loaded.quarantined == 0
+
+    def stored():
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT COUNT(*) FROM cmd WHERE ticker = 'GC=F' AND date = :day"),
+                                {'day': bad_day}).scalar()
+
+    assert stored() == 1
+    again = job.run(ctx, today=date(2024, 6, 5))  # the overlap downloads the bad bar again
+    assert not again.failed and again.quarantined == 1 and stored() == 0
+    with engine.connect() as conn:
+        quarantined = pd.read_sql(text("SELECT * FROM data_quarantine"), conn)
+    assert list(quarantined[['source_table', 'ticker', 'rules']].itertuples(index=False, name=None)) == [
+        ('cmd', 'GC=F', 'ohlc')]
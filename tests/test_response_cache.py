@@ -0,0 +1,184 @@
+"""``CachedProvider`` hits, TTLs, LRU eviction and offline mode, and a job recorded then replayed offline."""
+import os
+import pickle
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from finpipe.ingestion import CachedProvider, CacheMiss, FakeProvider, HighWaterMarkStore, asset_class, request_key
+from finpipe.jobs import JobContext, JobQueue, get_job
+from finpipe.synthetic import SyntheticProvider
+
+HOUR = 3600.0
+FX = ['EURUSD=X', 'GBPUSD=X', 'USDJPY=X']
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = []
+
+    def acquire(self, host):
+        self.acquired.append(host)
+
+
+@pytest.fixture
+def provider():
+    return SyntheticProvider(days=300)
+
+
+def cached(provider, tmp_path, **options):
+    return CachedProvider(provider, root=tmp_path / 'responses', **options)
+
+
+def entry_path(cache, ticker, start='2017-03-01', end='2017-06-01'):
+    return cache.path('history', request_key('history', (ticker, start, end), {'timeout': None}))
+
+
+def age(path, seconds):
+    """Make the answer stored at ``path`` look ``seconds`` older."""
+    with open(path, 'rb') as f:
+        entry = pickle.load(f)
+    entry['fetched_at'] -= seconds
+    with open(path, 'wb') as f:
+        pickle.dump(entry, f)
+
+
+# --- keys ---
+
+def test_request_keys_ignore_arguments_that_do_not_change_the_answer():
+    key = request_key('history', ('AAA', date(2024, 1, 1), date(2024, 2, 1)), {'interval': '1d'})
+    assert key == request_key('history', ('AAA', pd.Timestamp('2024-01-01'), date(2024, 2, 1)),
+                              {'interval': '1d', 'timeout': 5, 'session': object(), 'threads': True})
+    assert key != request_key('history', ('AAA', date(2024, 1, 1), date(2024, 2, 2)), {'interval': '1d'})
+    assert key != request_key('history', ('AAA', date(2024, 1, 1), date(2024, 2, 1)), {'interval': '1wk'})
+    assert key != request_key('download', (['AAA'], date(2024, 1, 1), date(2024, 2, 1)), {'interval': '1d'})
+    assert [asset_class(t) for t in ['EURUSD=X', 'GC=F', 'AAPL']] == ['forex', 'futures', 'equity']
+
+
+# --- readwrite, refresh, offline ---
+
+def test_repeated_requests_are_answered_from_disk(provider, tmp_path):
+    limiter = CountingLimiter()
+    cache = cached(provider, tmp_path, rate_limiter=limiter)
+    first = cache.history('AAA', '2017-03-01', '2017-06-01')
+    again = cached(provider, tmp_path).history('AAA', '2017-03-01', '2017-06-01', timeout=30)  # a new process
+    pd.testing.assert_frame_equal(first, again)
+    assert provider.calls == [('history', 'AAA')] and limiter.acquired == ['synthetic.local']
+    cache.history('AAA', '2017-03-01', '2017-06-02')
+    cache.download(['AAA', 'BBB'], '2017-03-01', '2017-06-01')
+    cache.download(['AAA', 'BBB'], '2017-03-01', '2017-06-01')
+    assert len(provider.calls) == 3 and len(limiter.acquired) == 3  # hits take no token
+    assert cache.stats == {'hits': 1, 'misses': 3, 'writes': 3, 'evictions': 0}
+    assert entry_path(cache, 'AAA').exists() and cache.size() > 0
+    cache.clear()
+    assert cache.size() == 0 and not entry_path(cache, 'AAA').exists()
+
+
+def test_answers_expire_after_their_asset_class_ttl(provider, tmp_path):
+    cache = cached(provider, tmp_path, ttls={'equity': HOUR, 'forex': None})
+    for ticker in ['AAA', 'EURUSD=X']:
+        cache.history(ticker, '2017-03-01', '2017-06-01')
+        age(entry_path(cache, ticker), 2 * HOUR)
+    cache.history('EURUSD=X', '2017-03-01', '2017-06-01')  # never expires
+    assert len(provider.calls) == 2
+    cache.history('AAA', '2017-03-01', '2017-06-01')
+    assert provider.calls[-1] == ('history', 'AAA') and len(provider.calls) == 3
+    cache.history('AAA', '2017-03-01', '2017-06-01')  # fetched again just now
+    assert len(provider.calls) == 3
+
+
+def test_refresh_always_fetches_and_rewrites(provider, tmp_path):
+    cached(provider, tmp_path).history('AAA', '2017-03-01', '2017-06-01')
+    refresh = cached(provider, tmp_path, mode='refresh')
+    refresh.history('AAA', '2017-03-01', '2017-06-01')
+    refresh.history('AAA', '2017-03-01', '2017-06-01')
+    assert len(provider.calls) == 3 and refresh.stats['writes'] == 2 and refresh.stats['hits'] == 0
+
+
+def test_offline_serves_stale_answers_and_never_fetches(provider, tmp_path):
+    cached(provider, tmp_path).history('AAA', '2017-03-01', '2017-06-01')
+    age(entry_path(cached(provider, tmp_path), 'AAA'), 1000 * HOUR)
+    offline = cached(provider, tmp_path, mode='offline')
+    assert len(offline.history('AAA', '2017-03-01', '2017-06-01')) > 0
+    with pytest.raises(CacheMiss, match='offline') as miss:
+        offline.history('BBB', '2017-03-01', '2017-06-01')
+    assert not miss.value.retryable and isinstance(miss.value, LookupError)
+    assert provider.calls == [('history', 'AAA')] and offline.stats['misses'] == 1
+    with pytest.raises(ValueError, match='mode'):
+        cached(provider, tmp_path, mode='readonly')
+
+
+# --- size ---
+
+def test_least_recently_used_answers_are_evicted(provider, tmp_path):
+    one = cached(provider, tmp_path)
+    one.history('AAA', '2017-03-01', '2017-06-01')
+    budget = int(one.size() * 2.5)  # the same number of bars per ticker: about the same size
+    one.clear()
+
+    cache = cached(provider, tmp_path, max_bytes=budget)
+    for ticker in ['AAA', 'BBB', 'AAA', 'CCC']:  # the hit on AAA makes BBB the least recently used
+        cache.history(ticker, '2017-03-01', '2017-06-01')
+    assert cache.stats['evictions'] == 1 and cache.size() <= budget
+    assert [entry_path(cache, t).exists() for t in ['AAA', 'BBB', 'CCC']] == [True, False, True]
+
+    now = time.time()
+    os.utime(entry_path(cache, 'AAA'), (now, now))
+    os.utime(entry_path(cache, 'CCC'), (now - 60, now - 60))
+    fresh = cached(provider, tmp_path, max_bytes=budget)  # recency comes from the modification times
+    fresh.history('DDD', '2017-03-01', '2017-06-01')
+    assert [entry_path(fresh, t).exists() for t in ['AAA', 'CCC', 'DDD']] == [True, False, True]
+
+    tiny = cached(provider, tmp_path, max_bytes=1)
+    tiny.history('EEE', '2017-03-01', '2017-06-01')
+    assert entry_path(tiny, 'EEE').exists() and tiny.stats['evictions'] == 2  # the newest answer always stays
+
+
+# --- recording and replaying a job ---
+
+def run_forex(tmp_path, name, provider, cache, as_of, state=None):
+    """Run the forex job on a fresh database (and fresh marks unless ``state`` names earlier ones)."""
+    engine = create_engine(f"sqlite:///{tmp_path / f'{name}.sqlite'}")
+    state = tmp_path / (state or name)
+    state.mkdir(exist_ok=True)
+    ctx = JobContext(engine=engine, provider=provider, cache=cache, cache_dir=tmp_path / 'responses', as_of=as_of,
+                     store=HighWaterMarkStore(state / 'marks.json'), queue=JobQueue(state / 'queue.sqlite'),
+                     max_workers=2, rate_per_host=None, log=quiet)
+    result = get_job('forex').with_options(table='fx', tickers=FX, years=1).run(ctx)
+    with engine.connect() as conn:
+        rows = pd.read_sql(text("SELECT * FROM fx ORDER BY ticker, date"), conn)
+    engine.dispose()
+    return ctx, result, rows
+
+
+def test_an_offline_run_replays_the_recorded_date_and_ranges(tmp_path):
+    as_of = date(2024, 6, 3)
+    recorded, result, rows = run_forex(tmp_path, 'first', SyntheticProvider(), 'readwrite', as_of)
+    assert not result.failed and len(rows) > 0
+    assert recorded.recorded_run('forex')['as_of'] == '2024-06-03'
+
+    network = FakeProvider()
+    ctx, result, replayed = run_forex(tmp_path, 'replay', network, 'offline', None)
+    assert not result.failed and network.calls == []
+    assert ctx.cache_stats['misses'] == 0 and ctx.cache_stats['hits'] == len(FX)
+    pd.testing.assert_frame_equal(replayed, rows)
+
+    _, result, nothing = run_forex(tmp_path, 'other', network, 'offline', as_of + timedelta(days=1))
+    assert sorted(result.failed) == FX and nothing.empty and network.calls == []  # no answers for that date
+
+
+def test_the_replay_of_an_incremental_run_fetches_only_its_ranges(tmp_path):
+    provider = SyntheticProvider()
+    _, _, full = run_forex(tmp_path, 'first', provider, 'readwrite', date(2024, 6, 3), state='marks')
+    _, _, later = run_forex(tmp_path, 'second', provider, 'readwrite', date(2024, 6, 6), state='marks')
+    assert 0 < len(later) < len(full) / 10  # the overlap and the new days only
+    _, result, replayed = run_forex(tmp_path, 'replay', FakeProvider(), 'offline', None)
+    assert not result.failed
+    pd.testing.assert_frame_equal(replayed, later)  # not the full backfill a fresh high-water mark would plan
@@ -0,0 +1,99 @@
+"""``portfolio_risk`` and its statistics against a direct, one-portfolio-at-a-time computation."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from finpipe.risk import (correlation_matrix, historical_var, max_drawdown, parametric_var, portfolio_risk,
+                          rolling_volatility)
+
+LEVELS = (0.95, 0.99)
+
+
+@pytest.fixture(scope='module')
+def returns():
+    rng = np.random.default_rng(3)
+    data = rng.standard_t(4, size=(400, 6)) * 0.01 + 0.0003
+    return pd.DataFrame(data, columns=[f'I{i}' for i in range(6)])
+
+
+@pytest.fixture(scope='module')
+def weights(returns):
+    rng = np.random.default_rng(4)
+    return pd.DataFrame(rng.dirichlet(np.ones(returns.shape[1]), 7), columns=returns.columns,
+                        index=[f'P{i}' for i in range(7)])
+
+
+def direct_tail(p, level):
+    """VaR as the ``k``-th worst day and CVaR as the mean of the ``k + 1`` worst, from a full sort."""
+    ordered = np.sort(p)
+    k = max(int(np.ceil((1 - level) * len(p))) - 1, 0)
+    return -ordered[k], -ordered[:k + 1].mean()
+
+
+def direct_drawdown(p):
+    value, peak, worst = 1.0, 1.0, 0.0
+    for r in p:
+        value *= 1 + r
+        peak = max(peak, value)
+        worst = max(worst, 1 - value / peak)
+    return worst
+
+
+def test_historical_var_equals_the_sorted_returns(returns, weights):
+    P = returns.to_numpy() @ weights.to_numpy().T
+    for level in LEVELS + (0.5, 0.9999):
+        var, cvar = historical_var(P, level)
+        for j in range(P.shape[1]):
+            assert (var[j], cvar[j]) == pytest.approx(direct_tail(P[:, j], level), rel=1e-12)
+
+
+def test_parametric_var_equals_the_normal_formula(returns, weights):
+    stats = pytest.importorskip('scipy.stats')
+    R, W = returns.to_numpy(), weights.to_numpy()
+    for level in LEVELS:
+        var, cvar = parametric_var(R.mean(axis=0), np.cov(R, rowvar=False), W, level)
+        for j, w in enumerate(W):
+            p = R @ w
+            mu, sigma, z = p.mean(), p.std(ddof=1), stats.norm.ppf(1 - level)
+            assert var[j] == pytest.approx(-(mu + z * sigma), rel=1e-9)
+            assert cvar[j] == pytest.approx(-(mu - sigma * stats.norm.pdf(z) / (1 - level)), rel=1e-9)
+
+
+def test_rolling_volatility_and_correlation_equal_pandas(returns):
+    expected = returns.rolling(21).std().dropna().to_numpy() * np.sqrt(252)
+    np.testing.assert_allclose(rolling_volatility(returns.to_numpy(), 21), expected, rtol=1e-9)
+    np.testing.assert_allclose(correlation_matrix(returns).to_numpy(), returns.corr().to_numpy(), rtol=1e-12)
+
+
+def test_max_drawdown_equals_a_loop(returns):
+    R = returns.to_numpy()
+    crash = np.concatenate([[0.1, -0.5], np.full(20, 0.01)])  # falls below its starting value
+    assert max_drawdown(crash) == pytest.approx(direct_drawdown(crash), rel=1e-12)
+    assert max_drawdown(np.full(10, -0.01)) == pytest.approx(1 - 0.99 ** 10, rel=1e-12)
+    np.testing.assert_allclose(max_drawdown(R), [direct_drawdown(R[:, j]) for j in range(R.shape[1])], rtol=1e-12)
+
+
+def test_portfolio_risk_matches_each_portfolio_and_any_chunk(returns, weights):
+    risk = portfolio_risk(returns, weights, levels=LEVELS, window=21, chunk=3, log=None)
+    assert list(risk.index) == list(weights.index)
+    pd.testing.assert_frame_equal(risk, portfolio_risk(returns, weights, levels=LEVELS, chunk=1024, log=None))
+    for name, w in weights.iterrows():
+        p = returns @ w
+        row = risk.loc[name]
+        assert row['mean'] == pytest.approx(p.mean() * 252, rel=1e-9)
+        assert row['volatility'] == pytest.approx(p.std() * np.sqrt(252), rel=1e-9)
+        assert row['rolling_vol'] == pytest.approx(p.iloc[-21:].std() * np.sqrt(252), rel=1e-9)
+        assert row['max_drawdown'] == pytest.approx(direct_drawdown(p), rel=1e-9)
+        for level in LEVELS:
+            tag = f'{level * 100:g}'
+            var, cvar = direct_tail(p.to_numpy(), level)
+            assert row[f'hist_var_{tag}'] == pytest.approx(var, rel=1e-9)
+            assert row[f'hist_cvar_{tag}'] == pytest.approx(cvar, rel=1e-9)
+
+
+def test_short_history_has_no_rolling_volatility(returns, weights):
+    risk = portfolio_risk(returns.head(10), weights, window=21, log=None)
+    assert risk['rolling_vol'].isna().all()
+    assert risk['volatility'].notna().all() and risk['max_drawdown'].notna().all()
+    exact = portfolio_risk(returns.head(21), weights, window=21, log=None)
+    assert exact['rolling_vol'].notna().all()
@@ -0,0 +1,151 @@
+"""``DownloadScheduler`` retries, timeouts and rate limiting against ``FakeProvider``."""
+import time
+import threading
+
+import pandas as pd
+import pytest
+
+from finpipe.ingestion import (FakeProvider, DownloadScheduler, RateLimiter, RetryPolicy, TaskTimeout,
+                               call_with_timeout)
+from finpipe.ingestion.scheduler import abandoned_calls
+from finpipe.synthetic import yahoo_history
+
+TICKERS = ['AAPL', 'MSFT', 'NVDA', 'SAP.DE', 'ASML.AS', 'EURUSD=X']
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def scheduler(provider, **options):
+    options = {'max_workers': 4, 'rate_per_host': None, 'retry': RetryPolicy(attempts=3, base_delay=0.0),
+               'timeout': 5.0, 'log': quiet, **options}
+    return DownloadScheduler(provider, **options)
+
+
+@pytest.fixture
+def provider():
+    return FakeProvider({t: yahoo_history(t, days=60, start='2024-01-02') for t in TICKERS})
+
+
+def test_history_returns_every_ticker_in_order(provider):
+    result = scheduler(provider).history(TICKERS, '2024-01-10', '2024-02-01')
+    assert list(result.results) == TICKERS and not result.failed
+    for ticker, frame in result.results.items():
+        expected = provider.histories[ticker]
+        expected = expected[(expected.index.tz_localize(None) >= '2024-01-10')
+                            & (expected.index.tz_localize(None) < '2024-02-01')]
+        pd.testing.assert_frame_equal(frame, expected)
+    assert sorted(provider.calls) == sorted(('history', t) for t in TICKERS)
+
+
+def test_transient_failures_are_retried(provider):
+    provider.failures = {'AAPL': 2, 'NVDA': 1}
+    result = scheduler(provider).history(TICKERS, '2024-01-02', '2024-03-01')
+    assert not result.failed
+    calls = pd.Series([ticker for _, ticker in provider.calls]).value_counts()
+    assert calls['AAPL'] == 3 and calls['NVDA'] == 2 and calls['MSFT'] == 1
+
+
+def test_permanent_failure_fails_only_its_ticker(provider):
+    provider.failures = {'MSFT': 99}
+    result = scheduler(provider).history(TICKERS, '2024-01-02', '2024-03-01')
+    assert list(result.failed) == ['MSFT'] and 'simulated failure' in result.failed['MSFT']
+    assert list(result.results) == [t for t in TICKERS if t != 'MSFT']
+    assert provider.calls.count(('history', 'MSFT')) == 3
+
+
+def test_non_retryable_error_is_not_retried():
+    class Missing(LookupError):
+        retryable = False
+
+    calls = []
+
+    def fetch(key):
+        calls.append(key)
+        raise Missing(key)
+
+    result = scheduler(FakeProvider()).map(fetch, ['A', 'B'])
+    assert sorted(result.failed) == ['A', 'B'] and sorted(calls) == ['A', 'B']
+
+
+def test_retry_delays_stay_under_the_cap():
+    policy = RetryPolicy(base_delay=0.5, max_delay=2.0, seed=1)
+    for attempt in range(8):
+        assert 0.0 <= policy.delay(attempt) <= min(2.0, 0.5 * 2 ** attempt)
+
+
+def test_slow_call_times_out_and_is_retried(provider):
+    provider.latency = 0.3
+    sched = scheduler(provider, timeout=0.02, watchdog_grace=0.0, retry=RetryPolicy(attempts=2, base_delay=0.0))
+    started = time.perf_counter()
+    result = sched.history(['AAPL'], '2024-01-02', '2024-03-01')
+    assert time.perf_counter() - started < 0.25
+    assert 'timed out' in result.failed['AAPL']
+    assert provider.calls.count(('history', 'AAPL')) == 2
+
+
+def test_call_with_timeout_caps_abandoned_threads():
+    release = threading.Event()
+    try:
+        running = abandoned_calls()
+        with pytest.raises(TaskTimeout):
+            call_with_timeout(release.wait, 0.01, 5.0, max_abandoned=running + 1)
+        assert abandoned_calls() >= 1  # the waiting thread; earlier ones may have finished meanwhile
+        with pytest.raises(TaskTimeout, match='still running'):
+            call_with_timeout(lambda: 'never started', 1.0, max_abandoned=1)
+    finally:
+        release.set()
+    assert call_with_timeout(lambda x: x * 2, 1.0, 21) == 42
+    with pytest.raises(ZeroDivisionError):
+        call_with_timeout(lambda: 1 / 0, 1.0)
+
+
+def test_rate_limit_is_shared_per_host():
+    limiter = RateLimiter(rate=50.0, burst=1)
+    started = time.perf_counter()
+    for _ in range(11):
+        limiter.acquire('a.example')
+    assert time.perf_counter() - started >= 0.18  # 10 waits of 20 ms after the first token
+    started = time.perf_counter()
+    limiter.acquire('b.example')
+    assert time.perf_counter() - started < 0.01
+
+
+def test_scheduler_respects_the_host_rate(provider):
+    started = time.perf_counter()
+    result = scheduler(provider, max_workers=8, rate_per_host=25.0,
+                       rate_limiter=RateLimiter(25.0, burst=1)).history(TICKERS, '2024-01-02', '2024-03-01')
+    assert not result.failed
+    assert time.perf_counter() - started >= (len(TICKERS) - 1) / 25.0 * 0.9
+
+
+def test_workers_overlap_latency(provider):
+    provider.latency = 0.1
+    started = time.perf_counter()
+    result = scheduler(provider, max_workers=6).history(TICKERS, '2024-01-02', '2024-03-01')
+    assert not result.failed
+    assert time.perf_counter() - started < 0.35  # one round-trip, not six
+
+
+def test_imap_bounds_pending_results_and_collects_failures(provider):
+    provider.failures = {'NVDA': 99}
+    sched = scheduler(provider, max_workers=2)
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def fetch(ticker):
+        frame = provider.history(ticker, '2024-01-02', '2024-03-01')
+        with lock:  # finished, waiting for the consumer
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        return frame
+
+    failed, seen = {}, []
+    for ticker, frame in sched.imap(fetch, TICKERS + ['AAPL'], failed=failed, in_flight=2):
+        seen.append(ticker)
+        with lock:
+            in_flight[0] -= 1
+        assert not frame.empty
+    assert sorted(seen) == sorted(t for t in TICKERS if t != 'NVDA')
+    assert list(failed) == ['NVDA']
+    assert peak[0] <= 2
@@ -0,0 +1,168 @@
+"""Migrations of the tables the original scripts created to the managed schema, partitions and range reads.
+
+SQLite runs everywhere; the PostgreSQL (partitioned) path runs when
+``FINPIPE_TEST_PG_DSN`` names a scratch database.
+"""
+import os
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+
+from finpipe.options import ensure_options_table, write_option_snapshot
+from finpipe.schema import (OHLCV_SPEC, OPTIONS_SPEC, RangeQuery, bump_generation, create_table_sql,
+                            ensure_partitions, index_sql, migrate, partition_bounds, partitions, pending_migrations,
+                            read_range, stream_range, table_generation)
+from finpipe.synthetic import synthetic_option_chains, synthetic_ohlcv
+
+# ETL_Pipelines/Options/options_to_database.py before the options engine: no snapshot_ts, no key
+BASELINE_OPTIONS_SQL = """
+    CREATE TABLE {table} (
+        underlying TEXT, expiration DATE, contractSymbol TEXT, strike DOUBLE PRECISION,
+        lastPrice DOUBLE PRECISION, bid DOUBLE PRECISION, ask DOUBLE PRECISION, change DOUBLE PRECISION,
+        percentChange DOUBLE PRECISION, volume BIGINT, openInterest BIGINT,
+        impliedVolatility DOUBLE PRECISION, inTheMoney BOOLEAN, type TEXT
+    )
+"""
+# the commodity script's key-less price table
+BASELINE_OHLCV_SQL = """
+    CREATE TABLE {table} (
+        date DATE, ticker TEXT, open DOUBLE PRECISION, high DOUBLE PRECISION, low DOUBLE PRECISION,
+        close DOUBLE PRECISION, volume BIGINT
+    )
+"""
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def sqlite_engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+
+
+def postgres_engine():
+    dsn = os.environ.get('FINPIPE_TEST_PG_DSN')
+    if not dsn:
+        pytest.skip("set FINPIPE_TEST_PG_DSN to a scratch PostgreSQL database")
+    return create_engine(dsn)
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def engine(request, tmp_path):
+    engine = sqlite_engine(tmp_path) if request.param == 'sqlite' else postgres_engine()
+    yield engine
+    with engine.begin() as conn:
+        for table in ['options_test', 'prices_test', 'schema_migrations', 'table_generations']:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table} CASCADE" if request.param == 'postgresql'
+                              else f"DROP TABLE IF EXISTS {table}"))
+    engine.dispose()
+
+
+def baseline_chains():
+    chains, _ = synthetic_option_chains(underlyings=2, expiries=2, strikes=5)
+    return chains
+
+
+def test_baseline_options_table_is_migrated(engine):
+    old = baseline_chains().drop(columns='snapshot_ts')
+    with engine.begin() as conn:
+        conn.execute(text(BASELINE_OPTIONS_SQL.format(table='options_test')))
+    old.to_sql('options_test', engine, if_exists='append', index=False)
+    old.to_sql('options_test', engine, if_exists='append', index=False)  # the scripts appended every run
+
+    snapshot_ts = pd.Timestamp('2024-06-03 15:00', tz='UTC')
+    ensure_options_table(engine, 'options_test', snapshot_ts, log=quiet)
+    assert not pending_migrations(engine, 'options_test', 'options')
+    with engine.connect() as conn:
+        legacy = conn.execute(text("SELECT COUNT(*) FROM options_test WHERE snapshot_ts IS NULL")).scalar()
+        assert legacy == 2 * len(old)  # kept as they were, with no snapshot time
+        if engine.dialect.name == 'postgresql':
+            assert 'options_test_m2024_06' in partitions(conn, 'options_test')
+
+    new = baseline_chains().assign(snapshot_ts=snapshot_ts)
+    assert write_option_snapshot(engine, new, 'options_test') == len(new)
+    assert write_option_snapshot(engine, new, 'options_test') == 0  # same snapshot again: nothing new
+    assert migrate(engine, 'options_test', 'options', log=quiet) == []
+
+
+def test_keyless_price_table_keeps_one_row_per_key(engine):
+    bars = synthetic_ohlcv(tickers=3, days=40)
+    with engine.begin() as conn:
+        conn.execute(text(BASELINE_OHLCV_SQL.format(table='prices_test')))
+    pd.concat([bars, bars.iloc[:10]]).to_sql('prices_test', engine, if_exists='append', index=False)
+
+    assert migrate(engine, 'prices_test', 'ohlcv', log=quiet) == [1, 2]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM prices_test")).scalar() == len(bars)
+    stored = read_range(engine, 'prices_test', tickers=['T001'])
+    assert len(stored) == (bars['ticker'] == 'T001').sum()
+    with pytest.raises(IntegrityError), engine.begin() as conn:  # the (date, ticker) key is enforced from now on
+        conn.execute(text("INSERT INTO prices_test (date, ticker) SELECT date, ticker FROM prices_test LIMIT 1"))
+
+
+def test_new_table_is_created_with_the_key(tmp_path):
+    engine = sqlite_engine(tmp_path)
+    assert migrate(engine, 'prices_test', 'ohlcv', log=quiet) == [1, 2]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM prices_test")).scalar() == 0
+    assert migrate(engine, 'prices_test', 'ohlcv', log=quiet) == []
+
+
+def test_rows_outside_the_partitions_move_out_of_the_default(engine):
+    bars = synthetic_ohlcv(tickers=2, days=30, start='2023-12-18')  # across the new year
+    migrate(engine, 'prices_test', 'ohlcv', log=quiet)
+    ensure_partitions(engine, 'prices_test', '2023-01-01', '2023-12-31', log=quiet)
+    bars.to_sql('prices_test', engine, if_exists='append', index=False)  # 2024 lands in the default partition
+    created = ensure_partitions(engine, 'prices_test', '2024-01-01', '2024-12-31', log=quiet)
+    with engine.connect() as conn:
+        if engine.dialect.name == 'postgresql':
+            assert created == ['prices_test_y2024']
+            assert conn.execute(text("SELECT COUNT(*) FROM prices_test_default")).scalar() == 0
+            assert conn.execute(text("SELECT COUNT(*) FROM prices_test_y2024")).scalar() == \
+                (pd.to_datetime(bars['date']).dt.year == 2024).sum()
+        else:
+            assert created == [] and partitions(conn, 'prices_test') == []
+        assert conn.execute(text("SELECT COUNT(*) FROM prices_test")).scalar() == len(bars)
+
+
+def test_read_range_filters_and_streams_in_chunks(engine):
+    bars = synthetic_ohlcv(tickers=4, days=60)
+    migrate(engine, 'prices_test', 'ohlcv', log=quiet)
+    bars.to_sql('prices_test', engine, if_exists='append', index=False)
+    dates = sorted(pd.to_datetime(bars['date']).unique())
+    query = RangeQuery('prices_test', ['T001', 'T003'], dates[10], dates[20], columns=['date', 'ticker', 'close'])
+    chunks = list(stream_range(engine, query, chunksize=7))
+    assert len(chunks) == 3 and all(len(c) <= 7 for c in chunks)
+    got = pd.concat(chunks, ignore_index=True)
+    expected = bars[bars['ticker'].isin(['T001', 'T003']) & (pd.to_datetime(bars['date']) >= dates[10])
+                    & (pd.to_datetime(bars['date']) < dates[20])].sort_values(['ticker', 'date'])
+    assert list(got.columns) == ['date', 'ticker', 'close'] and len(got) == 20
+    assert list(got['close']) == pytest.approx(list(expected['close']))
+    empty = read_range(engine, 'prices_test', tickers=[], columns=['date', 'close'])
+    assert empty.empty and list(empty.columns) == ['date', 'close']
+    with pytest.raises(ValueError, match='Unknown columns'):
+        RangeQuery('prices_test', columns=['close; DROP TABLE prices_test'])
+
+
+def test_partition_bounds_and_ddl():
+    assert partition_bounds('2023-12-31', '2025-01-01') == [
+        ('y2023', date(2023, 1, 1), date(2024, 1, 1)), ('y2024', date(2024, 1, 1), date(2025, 1, 1)),
+        ('y2025', date(2025, 1, 1), date(2026, 1, 1))]
+    assert [b[0] for b in partition_bounds('2024-11-15', '2025-01-31', 'month')] == ['m2024_11', 'm2024_12', 'm2025_01']
+    pg = create_table_sql('options_test', OPTIONS_SPEC)
+    assert pg.endswith('PARTITION BY RANGE (snapshot_ts)') and 'UNIQUE (contractSymbol, snapshot_ts)' in pg
+    assert 'PARTITION' not in create_table_sql('options_test', OPTIONS_SPEC, 'sqlite')
+    assert any('USING brin (date)' in sql for sql in index_sql('prices_test', OHLCV_SPEC))
+    assert not any('brin' in sql for sql in index_sql('prices_test', OHLCV_SPEC, 'sqlite'))
+
+
+def test_generations_count_rewrites(engine):
+    with engine.connect() as conn:
+        assert table_generation(conn, 'prices_test') == 0
+    assert bump_generation(engine, 'prices_test') == 1
+    assert bump_generation(engine, 'prices_test') == 2
+    with engine.connect() as conn:
+        assert table_generation(conn, 'prices_test') == 2 and table_generation(conn, 'other') == 0